@@ -15,6 +15,7 @@ autorunner 回測執行器 - 作為 config 與 backtester 之間的轉換器。
 """
 
 import logging
+import os
 from typing import Any, Dict, Optional
 
 import pandas as pd
@@ -22,6 +23,11 @@ from rich.console import Console
 from rich.panel import Panel
 
 from backtester.Base_backtester import BaseBacktester
+from backtester.ResultStore_backtester import (
+    RESULT_STORE_DATASET,
+    RESULT_STORE_FILE,
+    RESULT_STORES,
+)
 
 
 class BacktestRunnerAutorunner:
@@ -38,7 +44,7 @@ class BacktestRunnerAutorunner:
         執行回測 - 純轉換器模式
 
         Args:
-            data: 回測數據
+            data: 回測數據；多標的回測時為 {標的: DataFrame}
             config: autorunner 配置
 
         Returns:
@@ -48,10 +54,14 @@ class BacktestRunnerAutorunner:
             
             # 步驟 1: 轉換 config 為 backtester 格式
             backtester_config = self._convert_config(config)
+
+            # 多標的回測：data 為 {標的: DataFrame}，以第一個標的的數據建立引擎與導出器
+            multi_asset = isinstance(data, dict)
+            primary_data = next(iter(data.values())) if multi_asset else data
             
             # 步驟 2: 創建並配置 BaseBacktester（用於結果導出）
             backtester = BaseBacktester(
-                data=data,
+                data=primary_data,
                 frequency=config.get("dataloader", {}).get("frequency", "1D"),
                 logger=self.logger
             )
@@ -63,31 +73,126 @@ class BacktestRunnerAutorunner:
             # 步驟 3: 直接調用 VectorBacktestEngine，避免用戶輸入
             from backtester.VectorBacktestEngine_backtester import VectorBacktestEngine
             
-            engine = VectorBacktestEngine(data, config.get("dataloader", {}).get("frequency", "1D"), self.logger)
-            results = engine.run_backtests(backtester_config)
-            
-            # 步驟 4: 設置結果到 backtester 並導出（自動化模式，不顯示用戶界面）
-            backtester.results = results
-            
+            engine = VectorBacktestEngine(primary_data, config.get("dataloader", {}).get("frequency", "1D"), self.logger)
+
             # 直接導出 parquet 文件，不顯示用戶選擇界面
             from backtester.TradeRecordExporter_backtester import TradeRecordExporter_backtester
-            exporter = TradeRecordExporter_backtester(
-                trade_records=pd.DataFrame(),
-                frequency=config.get("dataloader", {}).get("frequency", "1D"),
-                results=results,
-                data=data,
-                Backtest_id=backtester_config.get("Backtest_id", ""),
-                predictor_file_name=backtester.predictor_file_name,
-                predictor_column=backtester.predictor_column,
-                **backtester_config.get("trading_params", {})
+
+            exported_files = []
+            result_store = config.get("backtester", {}).get(
+                "result_store", RESULT_STORE_FILE
+            )
+            if result_store not in RESULT_STORES:
+                raise ValueError(
+                    f"不支援的 result_store: {result_store}，可選值為 {RESULT_STORES}"
+                )
+            self._warn_unsupported_options(
+                config.get("backtester", {}), backtester_config, multi_asset, result_store
             )
-            exporter.export_to_parquet()
+
+            def export_results(chunk_results):
+                """導出結果並回傳本次新增的檔案路徑（串流檢查點記錄於 manifest）"""
+                first_new = len(exported_files)
+                exporter = TradeRecordExporter_backtester(
+                    trade_records=pd.DataFrame(),
+                    frequency=config.get("dataloader", {}).get("frequency", "1D"),
+                    results=chunk_results,
+                    data=primary_data,
+                    Backtest_id=backtester_config.get("Backtest_id", ""),
+                    predictor_file_name=backtester.predictor_file_name,
+                    predictor_column=backtester.predictor_column,
+                    **backtester_config.get("trading_params", {})
+                )
+                if multi_asset and result_store == RESULT_STORE_DATASET:
+                    # 多標的：Trading_instrument / 條件組 / 預測因子分區的資料集 + _index.parquet
+                    exporter.export_dataset(data_by_instrument=engine.instrument_data)
+                elif multi_asset:
+                    # 多標的：導出為以 Trading_instrument 分區的單一資料集
+                    exported_files.extend(
+                        exporter.export_partitioned_dataset(engine.instrument_data)
+                    )
+                    return exported_files[first_new:]
+                elif result_store == RESULT_STORE_DATASET and not backtester_config["incremental"]:
+                    # 以條件組 / 預測因子分區的資料集 + _index.parquet 指標索引
+                    # （增量回測的 _state.npz 追加仍需單檔 Parquet，已於開始時提示）
+                    exporter.export_dataset()
+                else:
+                    exporter.export_to_parquet()
+                if exporter.last_exported_path:
+                    exported_files.append(exporter.last_exported_path)
+                return exported_files[first_new:]
+
+            search_summary = None
+            walk_forward = None
+            incremental = None
+            incremental_path = None
+            if (
+                backtester_config["incremental"]
+                and backtester_config["result_mode"] == "full"
+                and not multi_asset
+            ):
+                # 增量模式：已有涵蓋本次參數、數據前段一致的 Parquet 時只模擬新K線並追加
+                incremental_path = engine.find_incremental_parquet(
+                    backtester_config, TradeRecordExporter_backtester.default_output_dir()
+                )
+            if multi_asset:
+                # 多標的回測：同一參數網格在所有標的上只執行一次引擎流程
+                results = engine.run_multi_asset(backtester_config, data)
+                backtester.results = results
+                export_results(results)
+            elif backtester_config["walk_forward"]:
+                # 滾動前進分析：導出各窗口樣本外結果，接續的資金曲線另存 _walkforward.parquet
+                summary = engine.run_walk_forward(backtester_config)
+                results = summary["results"]
+                backtester.results = results
+                export_results(results)
+                walk_forward = {"folds": summary["folds"], "file": None}
+                if exported_files:
+                    from backtester.WalkForward_backtester import WalkForward_backtester
+
+                    walk_forward["file"] = WalkForward_backtester.save(
+                        summary,
+                        os.path.splitext(exported_files[-1])[0] + "_walkforward.parquet",
+                    )
+            elif backtester_config["search"].get("method"):
+                # 智能參數搜索：只回傳並導出前 top_k 個參數組合的完整回測結果
+                results = engine.run_search(backtester_config)
+                search_summary = engine.search_summary
+                backtester.results = results
+                export_results(results)
+            elif incremental_path is not None:
+                # 結果直接追加到既有 Parquet（並更新 _state.npz），績效分析讀取該檔案
+                incremental = engine.run_incremental(backtester_config, incremental_path)
+                results = []
+                exported_files.append(incremental_path)
+            elif config.get("backtester", {}).get("stream_chunks", False):
+                # 串流模式：每個記憶體區塊完成後立即導出（績效已於區塊內計算並寫出
+                # _metadata.json），引擎不保留結果，results 為空列表，請改用 exported_files
+                results = engine.run_backtests(
+                    backtester_config, chunk_callback=export_results
+                )
+                # 檢查點續跑時，先前區塊已導出的檔案一併交給績效分析
+                exported_files[:0] = engine.resumed_exports
+            else:
+                results = engine.run_backtests(backtester_config)
+
+                # 步驟 4: 設置結果到 backtester 並導出（自動化模式，不顯示用戶界面）
+                backtester.results = results
+                export_results(results)
             
             # 步驟 5: 收集結果
             final_results = {
                 "success": True,
                 "results": results,
-                "data_shape": data.shape,
+                "exported_files": exported_files,
+                "search_summary": search_summary,
+                "walk_forward": walk_forward,
+                "incremental": incremental,
+                "data_shape": (
+                    {symbol: df.shape for symbol, df in data.items()}
+                    if multi_asset
+                    else data.shape
+                ),
                 "config": backtester_config
             }
             
@@ -104,6 +209,47 @@ class BacktestRunnerAutorunner:
             )
             return None
 
+    def _warn_unsupported_options(
+        self,
+        raw_config: Dict[str, Any],
+        backtester_config: Dict[str, Any],
+        multi_asset: bool,
+        result_store: str,
+    ) -> None:
+        """提示會被忽略或改用其他格式的配置組合（不中斷回測）"""
+        warnings = []
+        if backtester_config["incremental"]:
+            if multi_asset:
+                warnings.append("多標的回測不支援 incremental，將完整重跑")
+            elif backtester_config["result_mode"] != "full":
+                warnings.append("incremental 只支援 result_mode = full，將完整重跑")
+            elif result_store == RESULT_STORE_DATASET:
+                warnings.append(
+                    'incremental 需要單檔 Parquet（_state.npz 追加），'
+                    '本次忽略 result_store = "dataset" 改為導出單檔'
+                )
+        if multi_asset:
+            ignored = [
+                name
+                for name, enabled in (
+                    ("walk_forward", bool(backtester_config["walk_forward"])),
+                    ("search", bool(backtester_config["search"].get("method"))),
+                    ("stream_chunks", bool(raw_config.get("stream_chunks", False))),
+                )
+                if enabled
+            ]
+            if ignored:
+                warnings.append(f"多標的回測不支援 {', '.join(ignored)}，已忽略")
+        for message in warnings:
+            self.logger.warning(message)
+            self.console.print(
+                Panel(
+                    message,
+                    title="[bold #8f1511]⚠️ 回測配置提醒[/bold #8f1511]",
+                    border_style="#dbac30",
+                )
+            )
+
     def _convert_config(self, config: Dict[str, Any]) -> Dict[str, Any]:
         """
         將 autorunner config 轉換為 backtester 期望的格式
@@ -156,12 +302,83 @@ class BacktestRunnerAutorunner:
             "condition_pairs": condition_pairs,
             "indicator_params": processed_indicator_params,
             "trading_params": trading_params,
-            "predictors": predictors
+            "predictors": predictors,
+            "result_mode": backtester_config.get("result_mode", "full"),
+            "result_precision": backtester_config.get("result_precision", "float64"),
+            "max_memory_mb": backtester_config.get("max_memory_mb", 1000),
+            "indicator_cache": backtester_config.get("indicator_cache", {}),
+            "checkpoint": backtester_config.get("checkpoint", {}),
+            "incremental": backtester_config.get("incremental", False),
+            "search": self._convert_search_config(
+                backtester_config.get("search", {}), config.get("metricstracker", {})
+            ),
+            "walk_forward": self._convert_walk_forward_config(
+                backtester_config.get("walk_forward", {}),
+                config.get("metricstracker", {}),
+            ),
+            # 串流模式不保留記憶體結果，未明確設定時預設逐區塊計算績效
+            "inline_metrics": self._convert_inline_metrics_config(
+                backtester_config.get(
+                    "inline_metrics", backtester_config.get("stream_chunks", False)
+                ),
+                config.get("metricstracker", {}),
+            ),
         }
         
         
         return converted
 
+    @staticmethod
+    def _convert_search_config(
+        search_config: Dict[str, Any], metricstracker_config: Dict[str, Any]
+    ) -> Dict[str, Any]:
+        """智能參數搜索配置：method 未設定或為 grid 時執行完整網格"""
+        converted = dict(search_config or {})
+        if converted.get("method") in (None, "", "grid"):
+            converted.pop("method", None)
+            return converted
+        return BacktestRunnerAutorunner._with_scoring_defaults(
+            converted, metricstracker_config
+        )
+
+    @staticmethod
+    def _convert_walk_forward_config(
+        walk_forward_config: Dict[str, Any], metricstracker_config: Dict[str, Any]
+    ) -> Dict[str, Any]:
+        """滾動前進分析配置：未設定 in_sample 視為停用"""
+        if not walk_forward_config or not walk_forward_config.get("in_sample"):
+            return {}
+        return BacktestRunnerAutorunner._with_scoring_defaults(
+            dict(walk_forward_config), metricstracker_config
+        )
+
+    @staticmethod
+    def _convert_inline_metrics_config(
+        inline_config: Any, metricstracker_config: Dict[str, Any]
+    ) -> Dict[str, Any]:
+        """引擎內績效配置：true 或未設 enabled=false 的 dict 時啟用，年化參數沿用績效分析配置"""
+        if isinstance(inline_config, bool):
+            inline_config = {"enabled": inline_config}
+        if not isinstance(inline_config, dict) or not inline_config.get("enabled", True):
+            return {}
+        converted = {
+            k: v for k, v in inline_config.items() if k not in ("enabled", "_help")
+        }
+        return BacktestRunnerAutorunner._with_scoring_defaults(
+            converted, metricstracker_config
+        )
+
+    @staticmethod
+    def _with_scoring_defaults(
+        section: Dict[str, Any], metricstracker_config: Dict[str, Any]
+    ) -> Dict[str, Any]:
+        """評分的年化單位與無風險利率預設沿用績效分析配置"""
+        section.setdefault("time_unit", metricstracker_config.get("time_unit", 365))
+        section.setdefault(
+            "risk_free_rate", metricstracker_config.get("risk_free_rate", 0.04)
+        )
+        return section
+
     def _display_error(self, message: str):
         """顯示錯誤信息"""
         self.console.print(
@@ -311,7 +311,11 @@ class BaseAutorunner:
             **config_data.dataloader_config,
             "predictor_config": config_data.predictor_config,
         }
-        data = self.data_loader.load_data(full_dataloader_config)
+        if full_dataloader_config.get("multi_asset"):
+            # 多標的回測：data 為 {標的: DataFrame}
+            data = self.data_loader.load_multi_asset(full_dataloader_config)
+        else:
+            data = self.data_loader.load_data(full_dataloader_config)
         self.data_loader_frequency = self.data_loader.frequency
 
         if data is not None:
@@ -328,7 +332,9 @@ class BaseAutorunner:
             return
 
         # 執行回測
-        backtest_results = self._execute_backtest(data, config_data.backtester_config)
+        backtest_results = self._execute_backtest(
+            data, config_data.backtester_config, config_data.metricstracker_config
+        )
 
         if backtest_results is not None:
             self._display_backtest_summary(backtest_results)
@@ -340,7 +346,10 @@ class BaseAutorunner:
         self._execute_metrics(backtest_results, config_data.metricstracker_config)
 
     def _execute_backtest(
-        self, data: Any, backtest_config: Dict[str, Any]
+        self,
+        data: Any,
+        backtest_config: Dict[str, Any],
+        metricstracker_config: Optional[Dict[str, Any]] = None,
     ) -> Optional[Dict[str, Any]]:
         """
         執行回測
@@ -348,6 +357,7 @@ class BaseAutorunner:
         Args:
             data: 已載入的數據
             backtest_config: 回測配置
+            metricstracker_config: 績效分析配置（智能參數搜索評分沿用其年化單位與無風險利率）
 
         Returns:
             回測結果或 None
@@ -360,7 +370,8 @@ class BaseAutorunner:
             # 構建完整的 config，包含 dataloader 信息
             config = {
                 "backtester": backtest_config,
-                "dataloader": {"frequency": self.data_loader_frequency or "1D"}
+                "dataloader": {"frequency": self.data_loader_frequency or "1D"},
+                "metricstracker": metricstracker_config or {},
             }
             results = backtest_runner.run_backtest(data, config)
 
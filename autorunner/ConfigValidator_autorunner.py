@@ -42,6 +42,8 @@ ConfigValidator_autorunner.py
 - v1.1: 新增詳細錯誤報告
 - v1.2: 新增 Rich Panel 錯誤顯示和調試輸出
 - v2.0: 嘗試使用原版驗證邏輯，發現不存在，恢復基本驗證邏輯
+- v2.1: 新增跨模組檢查：backtester.result_store = "dataset" 不支援 metricstracker 的
+  robustness / portfolio（兩者需要單檔 Parquet 與 _metadata.json 排名）
 
 【參考】
 ------------------------------------------------------------
@@ -261,6 +263,37 @@ class ConfigValidator:
         if not self._validate_metricstracker_config(config.get("metricstracker", {})):
             return False
 
+        # 驗證跨模組組合
+        if not self._validate_result_store_analysis(config):
+            return False
+
+        return True
+
+    @staticmethod
+    def _dataset_unsupported_analyses(config: Dict[str, Any]) -> List[str]:
+        """result_store = "dataset" 時已啟用、但分區資料集不支援的分析（robustness / portfolio）"""
+        if config.get("backtester", {}).get("result_store", "file") != "dataset":
+            return []
+        metrics = config.get("metricstracker", {})
+        if not metrics.get("enable_metrics_analysis"):
+            return []
+        enabled = []
+        for key in ("robustness", "portfolio"):
+            value = metrics.get(key)
+            if value is True or (isinstance(value, dict) and value.get("enabled", True)):
+                enabled.append(key)
+        return enabled
+
+    def _validate_result_store_analysis(self, config: Dict[str, Any]) -> bool:
+        """分區資料集（result_store = "dataset"）不支援穩健性檢驗與投資組合合成"""
+        enabled = self._dataset_unsupported_analyses(config)
+        if enabled:
+            self._display_validation_error(
+                f"result_store = \"dataset\" 不支援 {', '.join(enabled)}，"
+                "請改用 result_store = \"file\" 或停用這些分析",
+                "績效追蹤器配置",
+            )
+            return False
         return True
 
     def _validate_dataloader_config(self, config: Dict[str, Any]) -> bool:
@@ -403,6 +436,10 @@ class ConfigValidator:
         if not isinstance(condition_pairs, list) or len(condition_pairs) == 0:
             errors.append("條件配對不能為空")
 
+        # 檢查分區資料集與穩健性檢驗/投資組合合成的組合
+        for key in self._dataset_unsupported_analyses(config):
+            errors.append(f"result_store = \"dataset\" 不支援 {key}")
+
         return errors
 
     def _display_validation_error(self, message: str, context: str = "") -> None:
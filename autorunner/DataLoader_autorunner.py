@@ -27,6 +27,7 @@ DataLoader_autorunner.py
 【範例】
 ------------------------------------------------------------
 - 載入數據：loader.load_data(config) -> DataFrame
+- 載入多標的：config["multi_asset"] = {"symbols": ["BTCUSDT", "ETHUSDT"]}；loader.load_multi_asset(config) -> {標的: DataFrame}
 - 獲取載入摘要：loader.get_loading_summary() -> dict
 
 【與其他模組的關聯】
@@ -41,6 +42,7 @@ DataLoader_autorunner.py
 - v1.1: 新增預測因子處理
 - v1.2: 新增 Rich Panel 顯示和調試輸出
 - v2.0: 重構為直接使用原版 dataloader 模組，避免重複實現
+- v2.1: 新增 load_multi_asset，逐標的沿用 load_data 流程載入多個交易標的
 
 【參考】
 ------------------------------------------------------------
@@ -50,6 +52,7 @@ DataLoader_autorunner.py
 - dataloader/base_loader.py
 """
 
+import copy
 import logging
 import traceback
 from pathlib import Path
@@ -232,6 +235,55 @@ class DataLoaderAutorunner:
             return None
 
 
+    def load_multi_asset(
+        self, config: Dict[str, Any]
+    ) -> Optional[Dict[str, pd.DataFrame]]:
+        """
+        載入多個交易標的 - 每個標的沿用 load_data 的完整流程（收益率、預測因子、差分）
+
+        config["multi_asset"] 為 {"symbols": [...]}（API 數據源，替換 <source>_config.symbol）
+        或 {"files": {標的: 檔案路徑}}（file 數據源，替換 file_config.file_path）
+
+        Returns:
+            Optional[Dict[str, pd.DataFrame]]: {標的: 數據}，任一標的載入失敗則返回 None
+        """
+        multi_config = config.get("multi_asset") or {}
+        source = config.get("source", "yfinance")
+        if source == "file":
+            targets = dict(multi_config.get("files") or {})
+        else:
+            targets = {symbol: symbol for symbol in multi_config.get("symbols") or []}
+        if not targets:
+            self._display_error("multi_asset 未指定任何標的（symbols 或 files）")
+            return None
+
+        datasets: Dict[str, pd.DataFrame] = {}
+        for symbol, target in targets.items():
+            symbol_config = copy.deepcopy(config)
+            if source == "file":
+                symbol_config.setdefault("file_config", {})["file_path"] = target
+            else:
+                symbol_config.setdefault(f"{source}_config", {})["symbol"] = target
+            data = self.load_data(symbol_config)
+            if data is None:
+                self._display_error(f"標的 {symbol} 載入失敗")
+                return None
+            datasets[str(symbol)] = data
+
+        console.print(
+            Panel(
+                "\n".join(
+                    f"• {symbol}: {len(df)} 行 ({df['Time'].min()} ~ {df['Time'].max()})"
+                    if "Time" in df.columns
+                    else f"• {symbol}: {len(df)} 行"
+                    for symbol, df in datasets.items()
+                ),
+                title=Text("🌐 多標的數據載入", style="bold #8f1511"),
+                border_style="#dbac30",
+            )
+        )
+        return datasets
+
     def _load_predictor_data(self, config: Dict[str, Any]) -> Optional[pd.DataFrame]:
         """載入預測因子數據 - 使用 config 中的設置"""
         try:
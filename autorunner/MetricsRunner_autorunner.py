@@ -11,6 +11,12 @@ MetricsRunner_autorunner.py
 ------------------------------------------------------------
 - 由 Base_autorunner 調用，接收回測結果與 metrics 配置
 - 解析配置 → 選擇目標 Parquet → 計算績效 → 匯出結果 → 顯示摘要
+- 回測已以 inline_metrics 在引擎內計算績效且年化參數一致時，直接沿用已寫出的
+  _metadata.json，不再讀回 Parquet 重算
+- 分區資料集（result_store = "dataset"）的績效寫入指標資料集的 _index.parquet；
+  回測索引已帶年化參數一致的引擎內績效時直接沿用
+- 沿用引擎內績效時，穩健性檢驗與投資組合合成只讀取所需欄位（ANALYSIS_COLUMNS），
+  兩者皆未啟用時完全不讀取逐K線記錄；分區資料集不支援兩者（ConfigValidator 會拒絕該配置）
 
 【維護與擴充重點】
 ------------------------------------------------------------
@@ -21,17 +27,30 @@ MetricsRunner_autorunner.py
 
 from __future__ import annotations
 
+import json
 import logging
 import os
 from dataclasses import dataclass
 from typing import Any, Dict, List, Optional
 
+import numpy as np
 import pandas as pd
+import pyarrow.parquet as pq
 from rich.console import Console
 from rich.panel import Panel
 from rich.table import Table
 
+from backtester.MultiAsset_backtester import MultiAsset_backtester
+from backtester.ResultStore_backtester import ResultStore_backtester
 from metricstracker.MetricsExporter_metricstracker import MetricsExporter
+from metricstracker.Portfolio_metricstracker import PortfolioMetricTracker
+from metricstracker.Robustness_metricstracker import RobustnessMetricTracker
+
+# 穩健性檢驗與投資組合合成需要的逐K線欄位（full 檔案取權益/收益率，trades_only 以 Bar_index 放回交易動作）
+ANALYSIS_COLUMNS = {
+    "robustness": ("Backtest_id", "Bar_index", "Return", "Equity_value", "Trade_action"),
+    "portfolio": ("Backtest_id", "Time", "Equity_value"),
+}
 
 
 @dataclass
@@ -78,6 +97,8 @@ class MetricsRunnerAutorunner:
 
         time_unit = self._resolve_time_unit(config)
         risk_free_rate = self._resolve_risk_free_rate(config)
+        robustness_config = self._resolve_robustness_config(config)
+        portfolio_config = self._resolve_optional_config(config, "portfolio")
 
         task_results: List[MetricsTaskResult] = []
         success_count = 0
@@ -97,6 +118,8 @@ class MetricsRunnerAutorunner:
                 file_path=file_path,
                 time_unit=time_unit,
                 risk_free_rate=risk_free_rate,
+                robustness_config=robustness_config,
+                portfolio_config=portfolio_config,
             )
             task_results.append(result)
             if result.status == "success":
@@ -151,8 +174,9 @@ class MetricsRunnerAutorunner:
 
         if file_selection_mode == "auto":
             if exported_abs:
+                # 本次回測導出的檔案（串流模式下為每個區塊一檔）全部納入
                 exported_abs.sort(key=os.path.getmtime, reverse=True)
-                return [exported_abs[0]]
+                return exported_abs
             candidate = self._find_latest_parquet(parquet_directory)
             return [candidate] if candidate else []
 
@@ -162,20 +186,16 @@ class MetricsRunnerAutorunner:
         return self._list_all_parquet(parquet_directory)
 
     def _find_latest_parquet(self, directory: str) -> Optional[str]:
-        parquet_files: List[str] = []
-        for entry in os.listdir(directory):
-            if entry.endswith(".parquet"):
-                parquet_files.append(os.path.join(directory, entry))
-        if not parquet_files:
-            return None
-        parquet_files.sort(key=os.path.getmtime, reverse=True)
-        return parquet_files[0]
+        parquet_files = self._list_all_parquet(directory)
+        return parquet_files[0] if parquet_files else None
 
     def _list_all_parquet(self, directory: str) -> List[str]:
+        """回測 Parquet 檔與分區資料集目錄（result_store = "dataset"）"""
         parquet_files: List[str] = []
         for entry in os.listdir(directory):
-            if entry.endswith(".parquet"):
-                parquet_files.append(os.path.join(directory, entry))
+            path = os.path.join(directory, entry)
+            if entry.endswith(".parquet") or ResultStore_backtester.is_dataset(path):
+                parquet_files.append(path)
         parquet_files.sort(key=os.path.getmtime, reverse=True)
         return parquet_files
 
@@ -210,11 +230,31 @@ class MetricsRunnerAutorunner:
             return float(value) / 100.0
         return float(value)
 
+    def _resolve_robustness_config(
+        self, config: Dict[str, Any]
+    ) -> Optional[Dict[str, Any]]:
+        """穩健性檢驗配置：robustness 為 dict 且未設 enabled=false 時啟用"""
+        return self._resolve_optional_config(config, "robustness")
+
+    @staticmethod
+    def _resolve_optional_config(
+        config: Dict[str, Any], key: str
+    ) -> Optional[Dict[str, Any]]:
+        """可選分析配置（robustness / portfolio）：為 dict 或 true 且未設 enabled=false 時啟用"""
+        value = config.get(key)
+        if isinstance(value, bool):
+            value = {"enabled": value}
+        if not isinstance(value, dict) or not value.get("enabled", True):
+            return None
+        return {k: v for k, v in value.items() if k not in ("enabled", "_help")}
+
     def _process_single_file(
         self,
         file_path: str,
         time_unit: int,
         risk_free_rate: float,
+        robustness_config: Optional[Dict[str, Any]] = None,
+        portfolio_config: Optional[Dict[str, Any]] = None,
     ) -> MetricsTaskResult:
         abs_path = os.path.abspath(file_path)
         self.logger.info("Processing metrics for %s", abs_path)
@@ -225,11 +265,45 @@ class MetricsRunnerAutorunner:
             self._display_warning(warning)
             return MetricsTaskResult(abs_path, None, "failed", warning)
 
+        if ResultStore_backtester.is_dataset(abs_path):
+            return self._process_dataset(
+                abs_path,
+                time_unit,
+                risk_free_rate,
+                robustness_config is not None or portfolio_config is not None,
+            )
+
         try:
-            df = pd.read_parquet(abs_path)
-            MetricsExporter.export(df, abs_path, time_unit, risk_free_rate)
-            output_path = self._derive_output_path(abs_path)
-            self._display_success(f"已匯出績效：{os.path.basename(output_path)}")
+            df = None
+            output_path = self._inline_metrics_path(abs_path, time_unit, risk_free_rate)
+            if output_path is not None:
+                self._display_success(
+                    f"沿用引擎內績效：{os.path.basename(output_path)}"
+                )
+            else:
+                df = pd.read_parquet(abs_path)
+                MetricsExporter.export(df, abs_path, time_unit, risk_free_rate)
+                output_path = self._derive_output_path(abs_path)
+                self._display_success(f"已匯出績效：{os.path.basename(output_path)}")
+            if df is None and (
+                robustness_config is not None or portfolio_config is not None
+            ):
+                df = pd.read_parquet(
+                    abs_path,
+                    columns=self._analysis_columns(
+                        abs_path, robustness_config, portfolio_config
+                    ),
+                )
+            if robustness_config is not None:
+                # 穩健性檢驗依 _metadata.json 排名挑選回測，需在績效導出之後執行
+                RobustnessMetricTracker.export(
+                    df, abs_path, time_unit, risk_free_rate, robustness_config
+                )
+            if portfolio_config is not None:
+                # 投資組合合成（top_k 同樣依 _metadata.json 排名）
+                PortfolioMetricTracker.export(
+                    df, abs_path, time_unit, risk_free_rate, portfolio_config
+                )
             return MetricsTaskResult(abs_path, output_path, "success")
         except Exception as exc:  # pragma: no cover (防止執行時意外)
             error_msg = f"績效分析失敗：{exc}"
@@ -237,10 +311,99 @@ class MetricsRunnerAutorunner:
             self._display_error(error_msg)
             return MetricsTaskResult(abs_path, None, "failed", str(exc))
 
+    @staticmethod
+    def _analysis_columns(
+        parquet_path: str,
+        robustness_config: Optional[Dict[str, Any]],
+        portfolio_config: Optional[Dict[str, Any]],
+    ) -> List[str]:
+        """已啟用的穩健性檢驗/投資組合合成需要、且存在於檔案中的欄位（依檔案欄位順序）"""
+        wanted = set()
+        if robustness_config is not None:
+            wanted.update(ANALYSIS_COLUMNS["robustness"])
+        if portfolio_config is not None:
+            wanted.update(ANALYSIS_COLUMNS["portfolio"])
+        return [name for name in pq.read_schema(parquet_path).names if name in wanted]
+
+    def _process_dataset(
+        self,
+        dataset_dir: str,
+        time_unit: int,
+        risk_free_rate: float,
+        extra_analysis: bool = False,
+    ) -> MetricsTaskResult:
+        """分區資料集：索引已有年化參數一致的績效時直接沿用，否則計算並寫出指標資料集"""
+        try:
+            metrics_config = ResultStore_backtester.read_index_metadata(
+                dataset_dir
+            ).get("metrics_config")
+            if metrics_config is not None and self._metrics_config_matches(
+                metrics_config, time_unit, risk_free_rate, dataset_dir
+            ):
+                output_path = dataset_dir
+                self._display_success(
+                    f"沿用指標索引中的績效：{os.path.basename(dataset_dir)}"
+                )
+            else:
+                output_path = MetricsExporter.export_dataset(
+                    dataset_dir, time_unit, risk_free_rate
+                )
+                self._display_success(f"已匯出績效：{os.path.basename(output_path)}")
+            if extra_analysis:
+                # ConfigValidator 已拒絕此組合；直接調用 run 時仍提示已跳過
+                self._display_warning(
+                    "分區資料集暫不支援穩健性檢驗與投資組合合成，請改用 result_store = file。"
+                )
+            return MetricsTaskResult(dataset_dir, output_path, "success")
+        except Exception as exc:  # pragma: no cover (防止執行時意外)
+            error_msg = f"績效分析失敗：{exc}"
+            self.logger.exception(error_msg)
+            self._display_error(error_msg)
+            return MetricsTaskResult(dataset_dir, None, "failed", str(exc))
+
+    def _metrics_config_matches(
+        self, config_json: str, time_unit: int, risk_free_rate: float, source: str
+    ) -> bool:
+        """已計算績效的年化參數（time_unit / risk_free_rate）是否與本次配置一致"""
+        config = json.loads(config_json)
+        if int(config.get("time_unit", -1)) != time_unit or not np.isclose(
+            float(config.get("risk_free_rate", np.nan)), risk_free_rate
+        ):
+            self.logger.info(
+                "Inline metrics of %s use different settings, recompute.", source
+            )
+            return False
+        return True
+
+    def _inline_metrics_path(
+        self, parquet_path: str, time_unit: int, risk_free_rate: float
+    ) -> Optional[str]:
+        """回測導出時已寫出引擎內績效且年化參數一致時，回傳其 _metadata.json 路徑"""
+        try:
+            metadata = pq.read_schema(parquet_path).metadata or {}
+        except Exception:  # pragma: no cover (損壞檔案交由後續讀取報錯)
+            return None
+        if b"inline_metrics" not in metadata:
+            return None
+        if not self._metrics_config_matches(
+            metadata[b"inline_metrics"].decode("utf-8"),
+            time_unit,
+            risk_free_rate,
+            parquet_path,
+        ):
+            return None
+        orig_name = os.path.splitext(os.path.basename(parquet_path))[0]
+        metadata_json_path = os.path.join(
+            MultiAsset_backtester.records_root(parquet_path),
+            "metricstracker",
+            f"{orig_name}_metadata.json",
+        )
+        return metadata_json_path if os.path.exists(metadata_json_path) else None
+
     def _derive_output_path(self, parquet_path: str) -> str:
         orig_name = os.path.splitext(os.path.basename(parquet_path))[0]
         out_dir = os.path.join(
-            os.path.dirname(os.path.dirname(parquet_path)), "metricstracker"
+            MultiAsset_backtester.records_root(parquet_path), "metricstracker"
         )
         return os.path.join(out_dir, f"{orig_name}_metrics.parquet")
 
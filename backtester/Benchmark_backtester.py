@@ -0,0 +1,565 @@
+"""
+Benchmark_backtester.py
+
+【功能說明】
+------------------------------------------------------------
+本模組為 Lo2cin4BT 回測框架的性能基準測試工具，以可重現的合成 OHLCV 數據
+（固定亂數種子）逐階段計時回測熱點路徑，結果追加到 JSON 歷史檔案，方便跨 commit 比較：
+- 參數展開：generate_parameter_combinations + _generate_all_tasks_matrix
+- 各指標信號生成：MA / BOLL / HL / VALUE / PERC 各自以 _vectorized_generate_signals 計時
+- 信號合併：_vectorized_combine_signals
+- 交易模擬：vectorized_trade_simulation（_vectorized_trade_simulation_njit 核心）
+- 記錄生成：_build_batch_results（單進程，取前 record_tasks 個任務）
+- Parquet 導出：TradeRecordExporter_backtester.export_to_parquet
+- 績效計算：MetricsExporter.export
+
+【流程與數據流】
+------------------------------------------------------------
+- 先以極小規模執行一次全部階段完成 Numba JIT 編譯（編譯時間另記為 jit_warmup）
+- 每個 (K線數 x 參數組合數) 案例重複 repeat 次，各階段取最短時間
+- 估算記憶體超過 max_cells 的案例記錄為 skipped，不執行
+- 結果追加到 records/benchmark/benchmark_history.json，並與上一次相同案例比較
+
+```mermaid
+flowchart TD
+    A[合成 OHLCV（固定種子）] -->|JIT 預熱| B[各案例 K線 x 組合]
+    B -->|逐階段計時，取最短| C[階段耗時]
+    C -->|追加| D[benchmark_history.json]
+    D -->|與上一次比較| E[Rich 比較表]
+```
+
+【維護與擴充重點】
+------------------------------------------------------------
+- 新增指標或熱點階段時，請同步更新 SIGNAL_FAMILIES / STAGES 與 README
+- 每次重複都建立新的引擎實例，避免指標緩存令後續重複變成緩存命中
+- 歷史檔案每筆記錄帶有 git commit、Python/NumPy/Numba 版本與 CPU 數，跨機器比較需留意
+
+【常見易錯點】
+------------------------------------------------------------
+- 1M K線 x 10k 組合的信號與交易矩陣需數十 GB，預設 max_cells 會跳過，需要時以 --max-cells 放寬
+- 記錄生成與導出只取前 record_tasks 個任務，耗時與任務數近似線性，比較時需使用相同設定
+- 計時包含 Rich 輸出以外的全部工作；各階段輸出會被暫時導向，不影響計時結果
+
+【範例】
+------------------------------------------------------------
+- python -m backtester.Benchmark_backtester --quick
+- python -m backtester.Benchmark_backtester --bars 10000,100000 --combos 100,1000 --repeat 3
+- python -m backtester.Benchmark_backtester --label "before-refactor" --max-cells 200000000
+
+【與其他模組的關聯】
+------------------------------------------------------------
+- 調用 VectorBacktestEngine、TradeSimulator、TradeRecordExporter 與 metricstracker.MetricsExporter
+- 不屬於 pytest 測試集，需手動或於 CI 中獨立執行
+"""
+
+import argparse
+import contextlib
+import gc
+import io
+import json
+import math
+import os
+import platform
+import subprocess
+import tempfile
+import time
+from datetime import datetime
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+from rich.console import Console
+from rich.panel import Panel
+from rich.table import Table
+
+from .Indicators_backtester import IndicatorsBacktester
+from .TradeRecordExporter_backtester import TradeRecordExporter_backtester
+from .TradeSimulator_backtester import vectorized_trade_simulation
+from .VectorBacktestEngine_backtester import VectorBacktestEngine
+
+console = Console()
+
+DEFAULT_BARS = (10_000, 100_000, 1_000_000)
+DEFAULT_COMBOS = (100, 1_000, 10_000)
+DEFAULT_HISTORY = os.path.join(
+    os.path.dirname(os.path.dirname(os.path.abspath(__file__))),
+    "records",
+    "benchmark",
+    "benchmark_history.json",
+)
+# 每個 (K線 x 組合) 單元的估算位元組：int8 信號、float64 合併信號與交易結果矩陣
+_BYTES_PER_CELL = 40
+SIGNAL_FAMILIES = ("MA", "BOLL", "HL", "VALUE", "PERC")
+STAGES = (
+    "parameter_expansion",
+    *(f"signals_{family}" for family in SIGNAL_FAMILIES),
+    "combine_signals",
+    "trade_simulation",
+    "record_building",
+    "parquet_export",
+    "metrics",
+)
+TRADING_PARAMS = {
+    "transaction_cost": 0.001,
+    "slippage": 0.0005,
+    "trade_delay": 1,
+    "trade_price": "open",
+}
+
+
+class Benchmark_backtester:
+    """回測熱點路徑的逐階段性能基準測試"""
+
+    @staticmethod
+    def synthetic_ohlcv(n_bars: int, seed: int = 42) -> pd.DataFrame:
+        """以幾何布朗運動產生可重現的 OHLCV 與預測因子 X"""
+        rng = np.random.default_rng(seed)
+        close = 100.0 * np.exp(np.cumsum(rng.normal(0.0, 0.01, n_bars)))
+        open_ = close * (1.0 + rng.normal(0.0, 0.002, n_bars))
+        return pd.DataFrame(
+            {
+                "Time": pd.date_range("2000-01-01", periods=n_bars, freq="min"),
+                "Open": open_,
+                "High": np.maximum(open_, close) * 1.003,
+                "Low": np.minimum(open_, close) * 0.997,
+                "Close": close,
+                "Volume": rng.uniform(1.0, 1000.0, n_bars),
+                "X": np.round(np.cumsum(rng.normal(0.0, 1.0, n_bars)), 1),
+            }
+        )
+
+    @staticmethod
+    def family_params(family: str, n_combos: int) -> List[Any]:
+        """產生指定指標族至少 n_combos 個參數（二維網格）後截取前 n_combos 個"""
+        indicators = IndicatorsBacktester()
+        k = int(math.ceil(math.sqrt(n_combos))) + 1
+        if family == "MA":
+            code = "MA5"
+            config = {
+                "ma_type": "SMA",
+                "short_range": f"2:{k + 1}:1",
+                "long_range": f"{k + 5}:{k + 5 + 5 * (k - 1)}:5",
+            }
+        elif family == "BOLL":
+            code = "BOLL1"
+            config = {
+                "ma_range": f"5:{5 + k - 1}:1",
+                "sd_multi": ",".join(f"{1.0 + 0.05 * i:.2f}" for i in range(k)),
+            }
+        elif family == "HL":
+            code = "HL1"
+            config = {"n_range": f"1:{k}:1", "m_range": f"{k + 1}:{k + 1 + 5 * (k - 1)}:5"}
+        elif family == "VALUE":
+            code = "VALUE1"
+            config = {"n_range": f"1:{k}:1", "m_range": f"{-(k // 2)}:{k - k // 2 - 1}:1"}
+        elif family == "PERC":
+            code = "PERC1"
+            n_percentiles = min(k, 98)
+            n_windows = int(math.ceil(n_combos / n_percentiles)) + 1
+            low = max(1, 50 - n_percentiles // 2)
+            config = {
+                "window_range": f"10:{10 + 5 * (n_windows - 1)}:5",
+                "percentile_range": f"{low}:{low + n_percentiles - 1}:1",
+            }
+        else:
+            raise ValueError(f"不支援的指標族: {family}，可選值為 {SIGNAL_FAMILIES}")
+        return indicators.get_indicator_params(code, config)[:n_combos]
+
+    @staticmethod
+    def best_of(func: Callable[[], Any], repeat: int) -> Tuple[float, Any]:
+        """重複執行 repeat 次，回傳最短耗時與最後一次的結果（各階段輸出暫時導向）"""
+        best = math.inf
+        result = None
+        for _ in range(max(1, repeat)):
+            result = None
+            gc.collect()
+            with contextlib.redirect_stdout(io.StringIO()):
+                start = time.perf_counter()
+                result = func()
+                elapsed = time.perf_counter() - start
+            best = min(best, elapsed)
+        return best, result
+
+    @staticmethod
+    def run_case(  # pylint: disable=too-complex
+        n_bars: int,
+        n_combos: int,
+        repeat: int = 3,
+        record_tasks: int = 50,
+        result_mode: str = "full",
+        seed: int = 42,
+    ) -> Dict[str, Any]:
+        """執行單一 (K線數 x 參數組合數) 案例，回傳各階段最短耗時（秒）"""
+        data = Benchmark_backtester.synthetic_ohlcv(n_bars, seed)
+        stages: Dict[str, float] = {}
+
+        def new_engine() -> VectorBacktestEngine:
+            engine = VectorBacktestEngine(data, "1min")
+            engine.result_mode = result_mode
+            return engine
+
+        # 參數展開：單一條件配對（MA5 開倉 x n_combos，MA8 平倉 x 1）
+        entry_params = Benchmark_backtester.family_params("MA", n_combos)
+        exit_params = IndicatorsBacktester().get_indicator_params(
+            "MA8", {"ma_type": "SMA", "short_range": "5:5:1", "long_range": "20:20:1"}
+        )
+        config = {
+            "condition_pairs": [{"entry": ["MA5"], "exit": ["MA8"]}],
+            "indicator_params": {
+                "MA5_strategy_1": entry_params,
+                "MA8_strategy_1": exit_params,
+            },
+            "predictors": ["X"],
+            "trading_params": TRADING_PARAMS,
+        }
+
+        def expand() -> Dict[str, Any]:
+            engine = new_engine()
+            return engine._generate_all_tasks_matrix(
+                engine.generate_parameter_combinations(config), config["predictors"]
+            )
+
+        stages["parameter_expansion"], all_tasks = Benchmark_backtester.best_of(
+            expand, repeat
+        )
+        n_tasks = len(all_tasks["combinations"])
+
+        # 各指標族信號生成（每次重複使用新引擎，避免指標緩存命中）
+        entry_matrix = None
+        for family in SIGNAL_FAMILIES:
+            params = (
+                entry_params
+                if family == "MA"
+                else Benchmark_backtester.family_params(family, n_combos)
+            )
+            params_list = [[p] for p in params]
+            predictors = ["X"] * len(params_list)
+            elapsed, matrix = Benchmark_backtester.best_of(
+                lambda: new_engine()._vectorized_generate_signals(params_list, predictors),
+                repeat,
+            )
+            stages[f"signals_{family}"] = elapsed
+            if family == "MA":
+                entry_matrix = matrix
+            del matrix
+
+        # 信號合併
+        engine = new_engine()
+        stages["combine_signals"], entry_signals = Benchmark_backtester.best_of(
+            lambda: engine._vectorized_combine_signals(entry_matrix, False), repeat
+        )
+        del entry_matrix
+        exit_single = engine._vectorized_combine_signals(
+            engine._vectorized_generate_signals([[exit_params[0]]], ["X"]), True
+        )
+        exit_signals = np.repeat(exit_single, n_tasks, axis=1)
+        all_signals = {"entry_signals": entry_signals, "exit_signals": exit_signals}
+
+        # 交易模擬
+        close_prices = data["Close"].to_numpy(dtype=np.float64)
+        open_prices = data["Open"].to_numpy(dtype=np.float64)
+        stages["trade_simulation"], trade_results = Benchmark_backtester.best_of(
+            lambda: vectorized_trade_simulation(
+                entry_signals,
+                exit_signals,
+                close_prices,
+                open_prices,
+                TRADING_PARAMS["transaction_cost"],
+                TRADING_PARAMS["slippage"],
+                TRADING_PARAMS["trade_price"],
+                TRADING_PARAMS["trade_delay"],
+            ),
+            repeat,
+        )
+
+        # 記錄生成（單進程，前 record_tasks 個任務）
+        record_indices = list(range(min(record_tasks, n_tasks)))
+        batch_data = engine._prepare_batch_data(
+            record_indices,
+            all_tasks,
+            trade_results,
+            all_signals,
+            config["condition_pairs"],
+            TRADING_PARAMS,
+        )
+        del all_signals, entry_signals, exit_signals, trade_results
+        stages["record_building"], results = Benchmark_backtester.best_of(
+            lambda: VectorBacktestEngine._build_batch_results(
+                batch_data, data, "BENCH", result_mode
+            ),
+            repeat,
+        )
+
+        # Parquet 導出與績效計算（輸出寫入暫存目錄）
+        from metricstracker.MetricsExporter_metricstracker import MetricsExporter
+
+        with tempfile.TemporaryDirectory() as temp_dir:
+            backtest_dir = os.path.join(temp_dir, "backtester")
+            os.makedirs(backtest_dir)
+            exporter = TradeRecordExporter_backtester(
+                trade_records=pd.DataFrame(),
+                frequency="1min",
+                results=results,
+                data=data,
+                Backtest_id="bench",
+                **TRADING_PARAMS,
+            )
+            exporter.output_dir = backtest_dir
+
+            def export() -> str:
+                for name in os.listdir(backtest_dir):
+                    os.remove(os.path.join(backtest_dir, name))
+                exporter.export_to_parquet()
+                return exporter.last_exported_path
+
+            stages["parquet_export"], parquet_path = Benchmark_backtester.best_of(
+                export, repeat
+            )
+            records = pd.read_parquet(parquet_path)
+            stages["metrics"], _ = Benchmark_backtester.best_of(
+                lambda: MetricsExporter.export(records, parquet_path, 365, 0.04),
+                repeat,
+            )
+
+        return {
+            "n_bars": n_bars,
+            "n_combos": n_tasks,
+            "record_tasks": len(record_indices),
+            "result_mode": result_mode,
+            "stages": stages,
+        }
+
+    @staticmethod
+    def environment() -> Dict[str, Any]:
+        """記錄 git commit、Python/套件版本與 CPU 數，供跨次比較時參考"""
+        import numba
+
+        repo_dir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+        commit = None
+        dirty = None
+        try:
+            commit = subprocess.run(
+                ["git", "rev-parse", "--short", "HEAD"],
+                cwd=repo_dir,
+                capture_output=True,
+                text=True,
+                check=True,
+            ).stdout.strip()
+            dirty = bool(
+                subprocess.run(
+                    ["git", "status", "--porcelain", "--untracked-files=no"],
+                    cwd=repo_dir,
+                    capture_output=True,
+                    text=True,
+                    check=True,
+                ).stdout.strip()
+            )
+        except (OSError, subprocess.CalledProcessError):
+            pass
+        return {
+            "git_commit": commit,
+            "git_dirty": dirty,
+            "python": platform.python_version(),
+            "numpy": np.__version__,
+            "numba": numba.__version__,
+            "pandas": pd.__version__,
+            "platform": platform.platform(),
+            "cpu_count": os.cpu_count(),
+        }
+
+    @staticmethod
+    def run(
+        bars: List[int],
+        combos: List[int],
+        repeat: int = 3,
+        record_tasks: int = 50,
+        result_mode: str = "full",
+        max_cells: float = 2.5e7,
+        seed: int = 42,
+        label: Optional[str] = None,
+    ) -> Dict[str, Any]:
+        """執行全部案例（先 JIT 預熱），回傳一筆歷史記錄"""
+        start = time.perf_counter()
+        Benchmark_backtester.run_case(500, 16, 1, 4, result_mode, seed)
+        jit_warmup = time.perf_counter() - start
+
+        cases = []
+        for n_bars in bars:
+            for n_combos in combos:
+                if n_bars * n_combos > max_cells:
+                    cases.append(
+                        {
+                            "n_bars": n_bars,
+                            "n_combos": n_combos,
+                            "skipped": f"估算記憶體約 {n_bars * n_combos * _BYTES_PER_CELL / 1024**3:.1f} GB，"
+                            f"超過 max_cells={max_cells:.0f}",
+                        }
+                    )
+                    continue
+                console.print(f"⏱️ 基準測試：{n_bars} 根K線 x {n_combos} 種參數組合 ...")
+                cases.append(
+                    Benchmark_backtester.run_case(
+                        n_bars, n_combos, repeat, record_tasks, result_mode, seed
+                    )
+                )
+                gc.collect()
+
+        return {
+            "timestamp": datetime.now().isoformat(timespec="seconds"),
+            "label": label,
+            **Benchmark_backtester.environment(),
+            "settings": {
+                "repeat": repeat,
+                "record_tasks": record_tasks,
+                "result_mode": result_mode,
+                "max_cells": max_cells,
+                "seed": seed,
+            },
+            "jit_warmup": jit_warmup,
+            "cases": cases,
+        }
+
+    @staticmethod
+    def load_history(path: str) -> List[Dict[str, Any]]:
+        """讀取歷史記錄；檔案不存在時為空列表"""
+        if not os.path.exists(path):
+            return []
+        with open(path, "r", encoding="utf-8") as f:
+            return json.load(f)
+
+    @staticmethod
+    def append_history(path: str, entry: Dict[str, Any]) -> None:
+        """追加一筆記錄（先寫暫存檔再替換，避免中斷時損壞歷史）"""
+        history = Benchmark_backtester.load_history(path)
+        history.append(entry)
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        temp_path = f"{path}.tmp"
+        with open(temp_path, "w", encoding="utf-8") as f:
+            json.dump(history, f, ensure_ascii=False, indent=2)
+        os.replace(temp_path, path)
+
+    @staticmethod
+    def previous_stages(
+        history: List[Dict[str, Any]], n_bars: int, n_combos: int, settings: Dict[str, Any]
+    ) -> Tuple[Optional[Dict[str, float]], Optional[str]]:
+        """在歷史中找出最近一次相同案例與設定的階段耗時"""
+        for entry in reversed(history):
+            if entry.get("settings", {}).get("record_tasks") != settings.get(
+                "record_tasks"
+            ) or entry.get("settings", {}).get("result_mode") != settings.get(
+                "result_mode"
+            ):
+                continue
+            for case in entry.get("cases", []):
+                if (
+                    case.get("n_bars") == n_bars
+                    and case.get("n_combos") == n_combos
+                    and "stages" in case
+                ):
+                    return case["stages"], entry.get("git_commit")
+        return None, None
+
+    @staticmethod
+    def display(entry: Dict[str, Any], history: List[Dict[str, Any]]) -> None:
+        """以 Rich 表格顯示本次結果，並與上一次相同案例比較（慢 20% 以上標紅）"""
+        for case in entry["cases"]:
+            title = f"{case['n_bars']} 根K線 x {case['n_combos']} 種參數組合"
+            if "skipped" in case:
+                console.print(
+                    Panel(
+                        f"⏭️ 已跳過：{case['skipped']}",
+                        title=f"[bold #8f1511]⏱️ {title}[/bold #8f1511]",
+                        border_style="#dbac30",
+                    )
+                )
+                continue
+            previous, previous_commit = Benchmark_backtester.previous_stages(
+                history, case["n_bars"], case["n_combos"], entry["settings"]
+            )
+            table = Table(
+                title=f"⏱️ {title}", show_lines=False, border_style="#dbac30"
+            )
+            table.add_column("階段", style="white")
+            table.add_column("耗時 (秒)", justify="right")
+            table.add_column(
+                f"上次 ({previous_commit or '-'})", justify="right", style="dim"
+            )
+            table.add_column("比值", justify="right")
+            for stage in STAGES:
+                seconds = case["stages"].get(stage)
+                if seconds is None:
+                    continue
+                before = (previous or {}).get(stage)
+                ratio = seconds / before if before else None
+                style = (
+                    "red"
+                    if ratio is not None and ratio > 1.2
+                    else "green" if ratio is not None and ratio < 0.8 else "white"
+                )
+                table.add_row(
+                    stage,
+                    f"{seconds:.4f}",
+                    f"{before:.4f}" if before is not None else "-",
+                    f"[{style}]{ratio:.2f}x[/{style}]" if ratio is not None else "-",
+                )
+            console.print(table)
+        console.print(
+            Panel(
+                f"JIT 預熱：{entry['jit_warmup']:.1f} 秒 | commit {entry.get('git_commit') or '-'}"
+                f"{'（有未提交修改）' if entry.get('git_dirty') else ''} | "
+                f"Python {entry['python']} / NumPy {entry['numpy']} / Numba {entry['numba']} | "
+                f"CPU {entry['cpu_count']}",
+                title="[bold #8f1511]⏱️ 基準測試環境[/bold #8f1511]",
+                border_style="#dbac30",
+            )
+        )
+
+
+def _parse_sizes(text: str) -> List[int]:
+    return [int(float(part)) for part in text.split(",") if part.strip()]
+
+
+def main(argv: Optional[List[str]] = None) -> Dict[str, Any]:
+    """命令列入口：python -m backtester.Benchmark_backtester"""
+    parser = argparse.ArgumentParser(description="Lo2cin4BT 回測熱點路徑基準測試")
+    parser.add_argument("--bars", default=",".join(map(str, DEFAULT_BARS)), help="K線數列表")
+    parser.add_argument(
+        "--combos", default=",".join(map(str, DEFAULT_COMBOS)), help="參數組合數列表"
+    )
+    parser.add_argument("--quick", action="store_true", help="只跑 10k K線 x 100 組合")
+    parser.add_argument("--repeat", type=int, default=3, help="每階段重複次數（取最短）")
+    parser.add_argument("--record-tasks", type=int, default=50, help="記錄生成/導出的任務數")
+    parser.add_argument(
+        "--result-mode", default="full", choices=["full", "trades_only"], help="結果模式"
+    )
+    parser.add_argument(
+        "--max-cells", type=float, default=2.5e7, help="K線數 x 組合數上限，超過則跳過"
+    )
+    parser.add_argument("--seed", type=int, default=42, help="合成數據亂數種子")
+    parser.add_argument("--label", default=None, help="本次記錄的標籤")
+    parser.add_argument("--history", default=DEFAULT_HISTORY, help="JSON 歷史檔案路徑")
+    parser.add_argument("--no-save", action="store_true", help="不寫入歷史檔案")
+    args = parser.parse_args(argv)
+
+    bars = [10_000] if args.quick else _parse_sizes(args.bars)
+    combos = [100] if args.quick else _parse_sizes(args.combos)
+    history = Benchmark_backtester.load_history(args.history)
+    entry = Benchmark_backtester.run(
+        bars,
+        combos,
+        args.repeat,
+        args.record_tasks,
+        args.result_mode,
+        args.max_cells,
+        args.seed,
+        args.label,
+    )
+    Benchmark_backtester.display(entry, history)
+    if not args.no_save:
+        Benchmark_backtester.append_history(args.history, entry)
+        console.print(f"📋 已追加到歷史檔案：{args.history}")
+    return entry
+
+
+if __name__ == "__main__":
+    main()
@@ -79,6 +79,9 @@ flowchart TD
 - v2.0: 整合 Numba JIT 編譯優化
 - v2.1: 新增向量化批量計算
 - v2.2: 完善緩存機制與性能優化
+- v2.3: 滾動平均/標準差改為 O(n) Welford 滑動窗口，並新增多窗口批量計算
+- v2.4: 向量化信號改由 _batch_boll_signals_njit 以 prange 一次寫入 int8 信號張量
+- v2.5: 窗口含 NaN/inf 時改為精確計算並於恢復有限值後重新置中，NaN 影響範圍與原實現一致
 
 【參考】
 ------------------------------------------------------------
@@ -97,7 +100,7 @@ from .IndicatorParams_backtester import IndicatorParams
 
 # 優化：嘗試導入 Numba 進行 JIT 編譯加速
 try:
-    from numba import njit
+    from numba import njit, prange
 
     NUMBA_AVAILABLE = True
 except ImportError:
@@ -107,38 +110,140 @@ except ImportError:
 # 核心算法：純 Numba + ndarray 實現
 if NUMBA_AVAILABLE:
 
-    @njit(fastmath=True, cache=True)
-    def _calculate_rolling_mean_njit(data, window):
-        """使用 Numba 計算滾動平均"""
-        n = len(data)
-        result = np.zeros(n)
+    # 不使用 fastmath：需保留 NaN/inf 判斷，fastmath 會假設輸入皆為有限值而省略檢查
+    @njit(cache=True)
+    def _rolling_mean_std_njit(data, window):
+        """
+        O(n) 滑動窗口平均與母體標準差（Welford 滑動更新）
 
+        每次滑動以 Welford 公式同時移出舊值、加入新值，避免 sum(x^2) - n*mean^2 的相消誤差；
+        每滑動 window 根便以兩階段公式在當前窗口重新置中計算一次，防止累積漂移。
+        窗口內含 NaN/inf 時改以兩階段公式直接計算（結果與原 O(n·w) 實現相同），
+        並於窗口恢復全為有限值時重新置中，避免非有限值殘留在滑動狀態中。
+        窗口未滿的位置維持 0（與原實現一致）。
+        """
+        n = len(data)
+        mean_result = np.zeros(n)
+        std_result = np.zeros(n)
+        if window <= 0 or window > n:
+            return mean_result, std_result
+
+        # 窗口內非有限值的個數
+        n_non_finite = 0
+        for j in range(window - 1):
+            if not np.isfinite(data[j]):
+                n_non_finite += 1
+
+        mean = 0.0
+        m2 = 0.0
+        recentre = True
         for i in range(window - 1, n):
-            sum_val = 0.0
-            for j in range(i - window + 1, i + 1):
-                sum_val += data[j]
-            result[i] = sum_val / window
+            start = i - window + 1
+            if not np.isfinite(data[i]):
+                n_non_finite += 1
+            if start > 0 and not np.isfinite(data[start - 1]):
+                n_non_finite -= 1
+
+            if recentre or n_non_finite > 0 or (start % window) == 0:
+                # 重新置中：兩階段精確計算當前窗口
+                mean = 0.0
+                for j in range(start, i + 1):
+                    mean += data[j]
+                mean /= window
+                m2 = 0.0
+                for j in range(start, i + 1):
+                    diff = data[j] - mean
+                    m2 += diff * diff
+                # 含非有限值的窗口狀態不可用於下一次滑動
+                recentre = n_non_finite > 0
+            else:
+                x_new = data[i]
+                x_old = data[start - 1]
+                new_mean = mean + (x_new - x_old) / window
+                m2 += (x_new - x_old) * (x_new - new_mean + x_old - mean)
+                mean = new_mean
+                if m2 < 0.0:
+                    m2 = 0.0
+
+            mean_result[i] = mean
+            std_result[i] = np.sqrt(m2 / window)
 
-        return result
+        return mean_result, std_result
 
     @njit(fastmath=True, cache=True)
-    def _calculate_rolling_std_njit(data, window):
-        """使用 Numba 計算滾動標準差"""
+    def _rolling_mean_std_batch_njit(data, windows):
+        """
+        批量計算多個窗口長度的滑動平均與標準差
+
+        Returns:
+            (mean_matrix, std_matrix)，形狀皆為 (n_windows, n_time)
+        """
         n = len(data)
-        result = np.zeros(n)
+        n_windows = len(windows)
+        mean_matrix = np.zeros((n_windows, n))
+        std_matrix = np.zeros((n_windows, n))
+        for k in range(n_windows):
+            mean_row, std_row = _rolling_mean_std_njit(data, windows[k])
+            mean_matrix[k, :] = mean_row
+            std_matrix[k, :] = std_row
+        return mean_matrix, std_matrix
 
-        for i in range(window - 1, n):
-            mean_val = 0.0
-            for j in range(i - window + 1, i + 1):
-                mean_val += data[j]
-            mean_val /= window
+    @njit(fastmath=True, cache=True)
+    def _calculate_rolling_mean_njit(data, window):
+        """使用 Numba 計算滾動平均（O(n) 滑動窗口）"""
+        mean_values, _ = _rolling_mean_std_njit(data, window)
+        return mean_values
 
-            var_val = 0.0
-            for j in range(i - window + 1, i + 1):
-                var_val += (data[j] - mean_val) ** 2
-            result[i] = np.sqrt(var_val / window)
+    @njit(fastmath=True, cache=True)
+    def _calculate_rolling_std_njit(data, window):
+        """使用 Numba 計算滾動標準差（O(n) 滑動窗口）"""
+        _, std_values = _rolling_mean_std_njit(data, window)
+        return std_values
+
+    @njit(parallel=True, fastmath=True, cache=True)
+    def _batch_boll_signals_njit(
+        predictor_values,
+        upper_matrix,
+        lower_matrix,
+        band_rows,
+        strat_indices,
+        ma_lengths,
+        task_cols,
+        indicator_cols,
+        signals_matrix,
+    ):
+        """
+        批量生成布林帶信號，直接寫入 int8 信號張量
 
-        return result
+        以 prange 並行處理所有任務；第 k 個任務讀取 upper/lower 矩陣的 band_rows[k] 列，
+        結果寫入 signals_matrix[:, task_cols[k], indicator_cols[k]]。
+        band_rows[k] < 0 表示無可用布林帶（如窗口超過數據長度），保持 0 信號。
+        """
+        n = len(predictor_values)
+        for k in prange(len(band_rows)):
+            row = band_rows[k]
+            strat_idx = strat_indices[k]
+            if row < 0 or strat_idx < 1 or strat_idx > 4:
+                continue
+            col = task_cols[k]
+            indicator = indicator_cols[k]
+            if strat_idx == 1 or strat_idx == 3:
+                signal_value = 1
+            else:
+                signal_value = -1
+
+            # 確保在有效期間之前不產生信號；前一日值與 np.roll 一致（t=0 取最後一根）
+            for t in range(max(ma_lengths[k] - 1, 0), n):
+                value = predictor_values[t]
+                prev_value = predictor_values[t - 1] if t > 0 else predictor_values[n - 1]
+                if strat_idx <= 2:  # 突破上軌策略
+                    band = upper_matrix[row, t]
+                    if value >= band and prev_value < band:
+                        signals_matrix[t, col, indicator] = signal_value
+                else:  # 突破下軌策略
+                    band = lower_matrix[row, t]
+                    if value <= band and prev_value > band:
+                        signals_matrix[t, col, indicator] = signal_value
 
     @njit(fastmath=True, cache=True)
     def _generate_bollinger_signals_njit(
@@ -343,7 +448,7 @@ class BollingerBandIndicator:
         Args:
             tasks: 任務列表，每個任務包含 (task_idx, indicator_idx, param)
             predictor: 預測因子名稱
-            signals_matrix: 信號矩陣 [時間點, 任務數, 指標數]
+            signals_matrix: int8 信號矩陣 [時間點, 任務數, 指標數]
             global_boll_cache: 全局緩存字典，避免重複計算
             data: 數據DataFrame，如果為None則使用實例的data
 
@@ -388,75 +493,68 @@ class BollingerBandIndicator:
 
         # print(f"🔧 計算 {len(unique_combinations)} 個唯一參數組合")  # 移除重複輸出
 
-        for ma_length, std_multiplier in unique_combinations:
-            if ma_length <= len(data):
+        # 所有未緩存的窗口長度一次性批量計算 (n_windows × n_time) 平均/標準差矩陣
+        missing_windows = sorted(
+            {
+                ma_length
+                for ma_length, std_multiplier in unique_combinations
+                if ma_length <= len(data)
+                and (ma_length, std_multiplier, predictor) not in global_boll_cache
+            }
+        )
+        if missing_windows:
+            mean_matrix, std_matrix = _rolling_mean_std_batch_njit(
+                predictor_values, np.array(missing_windows, dtype=np.int64)
+            )
+            window_rows = {w: k for k, w in enumerate(missing_windows)}
+
+            for ma_length, std_multiplier in unique_combinations:
                 cache_key = (ma_length, std_multiplier, predictor)
-                if cache_key not in global_boll_cache:
-                    # 使用Numba優化的函數計算布林帶
-                    ma_values = _calculate_rolling_mean_njit(
-                        predictor_values, ma_length
-                    )
-                    std_values = _calculate_rolling_std_njit(
-                        predictor_values, ma_length
-                    )
+                if ma_length in window_rows and cache_key not in global_boll_cache:
+                    row = window_rows[ma_length]
+                    ma_values = mean_matrix[row]
+                    std_values = std_matrix[row]
 
                     upper_band = ma_values + (std_values * std_multiplier)
                     lower_band = ma_values - (std_values * std_multiplier)
 
                     global_boll_cache[cache_key] = (upper_band, lower_band, ma_values)
 
-        # 為每個任務生成信號 - 使用Numba優化
-        for i, (
-            ma_length,
-            std_multiplier,
-            strat_idx,
-            task_idx,
-            indicator_idx,
-        ) in enumerate(
-            zip(
-                ma_lengths,
-                std_multipliers,
-                strat_indices,
-                task_indices,
-                indicator_indices,
-            )
-        ):
-            try:
-                cache_key = (ma_length, std_multiplier, predictor)
-                upper_band, lower_band, ma_values = global_boll_cache[cache_key]
-
-                # 使用緩存中的布林帶值直接生成信號
-                signals = np.zeros(len(predictor_values))
-
-                # 計算前一日值
-                prev_values = np.roll(predictor_values, 1)
-
-                # 向量化生成信號 - 優化條件判斷
-                if strat_idx in [1, 2]:  # 突破上軌策略
-                    crossover = (predictor_values >= upper_band) & (
-                        prev_values < upper_band
-                    )
-                    signal_value = 1.0 if strat_idx == 1 else -1.0
-                    signals = np.where(crossover, signal_value, 0.0)
-                elif strat_idx in [3, 4]:  # 突破下軌策略
-                    crossover = (predictor_values <= lower_band) & (
-                        prev_values > lower_band
-                    )
-                    signal_value = 1.0 if strat_idx == 3 else -1.0
-                    signals = np.where(crossover, signal_value, 0.0)
-
-                # 確保在有效期間之前不產生信號
-                signals[: ma_length - 1] = 0.0
-
-                signals_matrix[:, task_idx, indicator_idx] = signals
-
-            except Exception as e:
-                # 記錄錯誤但不中斷處理
-                if hasattr(BollingerBandIndicator, "logger"):
-                    BollingerBandIndicator.logger.warning(
-                        f"布林帶信號生成失敗 (task_idx={task_idx}, indicator_idx={indicator_idx}): {e}"
-                    )
-                signals_matrix[:, task_idx, indicator_idx] = 0
+        # 將各任務需要的布林帶堆疊成矩陣，以單次並行 Numba 調用寫入 int8 信號張量
+        band_keys = sorted(
+            {
+                (ma_length, std_multiplier, predictor)
+                for ma_length, std_multiplier in unique_combinations
+                if (ma_length, std_multiplier, predictor) in global_boll_cache
+            }
+        )
+        band_index = {key: row for row, key in enumerate(band_keys)}
+        n_time = len(predictor_values)
+        if band_keys:
+            upper_matrix = np.vstack([global_boll_cache[key][0] for key in band_keys])
+            lower_matrix = np.vstack([global_boll_cache[key][1] for key in band_keys])
+        else:
+            upper_matrix = np.zeros((0, n_time))
+            lower_matrix = np.zeros((0, n_time))
+
+        band_rows = np.array(
+            [
+                band_index.get((ma_length, std_multiplier, predictor), -1)
+                for ma_length, std_multiplier in zip(ma_lengths, std_multipliers)
+            ],
+            dtype=np.int64,
+        )
+        _batch_boll_signals_njit(
+            predictor_values,
+            upper_matrix,
+            lower_matrix,
+            band_rows,
+            np.array(strat_indices, dtype=np.int64),
+            np.array(ma_lengths, dtype=np.int64),
+            np.array(task_indices, dtype=np.int64),
+            np.array(indicator_indices, dtype=np.int64),
+            signals_matrix,
+        )
 
     @staticmethod
     def create_global_boll_cache():
@@ -0,0 +1,346 @@
+"""
+Checkpoint_backtester.py
+
+【功能說明】
+------------------------------------------------------------
+本模組為 Lo2cin4BT 回測框架的區塊級檢查點，讓長時間的參數掃描在崩潰或超時後可從
+中斷處續跑：
+- 每個串流區塊完成後，將成功的回測結果寫入磁碟（交易記錄為 Parquet，其餘欄位為 JSON），
+  並於 manifest 記錄已完成的組合雜湊與該區塊導出的檔案
+- 重新執行相同配置時，跳過已完成的參數組合，並將舊結果合併回本次結果（同一份 Parquet）
+- 回測全部完成後預設刪除檢查點
+
+【流程與數據流】
+------------------------------------------------------------
+- VectorBacktestEngine 依 config["checkpoint"] 建立 BacktestCheckpoint
+- 運行鍵 = 數據內容 + 條件配對 + 交易參數 + 結果模式的雜湊，決定檢查點目錄
+- 任務鍵 = 參數組合（指標參數 + strategy_id）+ 預測因子的雜湊
+
+```mermaid
+flowchart TD
+    A[run_backtests] -->|啟動| B[讀取 manifest]
+    B -->|已完成組合| C[載入舊結果]
+    B -->|剩餘組合| D[逐區塊回測]
+    D -->|save_chunk| E[chunk_XXXXX.parquet/.json + manifest.json]
+    C & D -->|合併| F[完整結果]
+```
+
+【維護與擴充重點】
+------------------------------------------------------------
+- 只有 error 為 None 的結果會被視為完成；失敗或超時的任務在續跑時重新計算
+- 一個參數組合的所有預測因子皆完成才會跳過，避免部分預測因子遺漏
+- 運行鍵不包含 indicator_params，擴大參數網格時已完成的組合仍可重用
+- 區塊在 chunk_callback 成功後才記錄為完成；回調回傳的導出檔案路徑記錄於 manifest，
+  串流模式續跑時沿用仍存在的檔案，檔案已不存在的區塊以檢查點結果重新交由回調導出
+- 結果中的 ndarray（末端狀態、trades_only 的逐K線陣列）另存於 chunk_XXXXX_arrays.parquet，
+  JSON 中以 {"__array__": 序號} 引用
+
+【常見易錯點】
+------------------------------------------------------------
+- 交易記錄 Parquet 以 Checkpoint_task 欄位區分同一區塊內的各個回測，載入時移除
+- 修改交易參數、數據或條件配對會產生新的運行鍵，舊檢查點不會被使用
+
+【範例】
+------------------------------------------------------------
+- config["checkpoint"] = {"enabled": True}
+- config["checkpoint"] = {"enabled": True, "checkpoint_dir": "records/checkpoints", "keep": True}
+
+【與其他模組的關聯】
+------------------------------------------------------------
+- 由 VectorBacktestEngine.run_backtests 調用，與串流分塊（chunk_callback）配合
+"""
+
+import hashlib
+import json
+import os
+import shutil
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Set, Tuple
+
+import numpy as np
+import pandas as pd
+
+MANIFEST_FILENAME = "manifest.json"
+TASK_COLUMN = "Checkpoint_task"
+
+
+class BacktestCheckpoint:
+    """區塊級回測檢查點：chunk 結果檔 + 已完成任務 manifest"""
+
+    def __init__(self, checkpoint_dir: str, run_key: str) -> None:
+        self.run_key = run_key
+        self.run_dir = os.path.join(checkpoint_dir, run_key)
+        os.makedirs(self.run_dir, exist_ok=True)
+        self.manifest = self._load_manifest()
+
+    @classmethod
+    def for_run(
+        cls,
+        config: Dict[str, Any],
+        data: pd.DataFrame,
+        checkpoint_dir: Optional[str] = None,
+    ) -> "BacktestCheckpoint":
+        """依回測配置與數據建立（或續用）檢查點"""
+        if checkpoint_dir is None:
+            checkpoint_dir = os.path.join(
+                os.path.dirname(os.path.dirname(__file__)),
+                "records",
+                "checkpoints",
+            )
+        return cls(checkpoint_dir, cls.make_run_key(config, data))
+
+    @staticmethod
+    def make_run_key(config: Dict[str, Any], data: pd.DataFrame) -> str:
+        """運行鍵：數據內容、條件配對、交易參數與結果模式的雜湊"""
+        digest = hashlib.blake2b(digest_size=12)
+        digest.update(pd.util.hash_pandas_object(data, index=True).values.tobytes())
+        run_config = {
+            "condition_pairs": config.get("condition_pairs"),
+            "trading_params": config.get("trading_params"),
+            "result_mode": config.get("result_mode", "full"),
+            "result_precision": config.get("result_precision", "float64"),
+        }
+        digest.update(json.dumps(run_config, sort_keys=True, default=str).encode())
+        return digest.hexdigest()
+
+    @staticmethod
+    def combination_hash(combo: Tuple[Any, ...]) -> str:
+        """參數組合雜湊：各指標參數（含 strat_idx）與 strategy_id"""
+        parts = [
+            param.to_dict() if hasattr(param, "to_dict") else param for param in combo
+        ]
+        raw = json.dumps(parts, sort_keys=True, default=str)
+        return hashlib.blake2b(raw.encode(), digest_size=12).hexdigest()
+
+    @staticmethod
+    def task_hash(combination_hash: str, predictor: str) -> str:
+        """任務鍵：參數組合雜湊 + 預測因子"""
+        return f"{combination_hash}:{predictor}"
+
+    def _manifest_path(self) -> str:
+        return os.path.join(self.run_dir, MANIFEST_FILENAME)
+
+    def _load_manifest(self) -> Dict[str, Any]:
+        try:
+            with open(self._manifest_path(), "r", encoding="utf-8") as f:
+                manifest = json.load(f)
+            if manifest.get("run_key") == self.run_key:
+                return manifest
+        except (OSError, ValueError):
+            pass
+        return {"run_key": self.run_key, "chunks": []}
+
+    def _write_manifest(self) -> None:
+        tmp_path = f"{self._manifest_path()}.tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(self.manifest, f)
+        os.replace(tmp_path, self._manifest_path())
+
+    def completed_tasks(self) -> Set[str]:
+        """所有已完成的任務鍵"""
+        completed: Set[str] = set()
+        for chunk in self.manifest["chunks"]:
+            completed.update(chunk["tasks"])
+        return completed
+
+    def completed_combinations(
+        self, combination_hashes: Iterable[str], predictors: List[str]
+    ) -> Set[str]:
+        """所有預測因子皆已完成的參數組合雜湊"""
+        completed = self.completed_tasks()
+        return {
+            combo_hash
+            for combo_hash in combination_hashes
+            if all(
+                self.task_hash(combo_hash, predictor) in completed
+                for predictor in predictors
+            )
+        }
+
+    def iter_chunks(
+        self, task_hashes: Set[str]
+    ) -> Iterator[Tuple[int, List[Dict[str, Any]], List[str]]]:
+        """
+        依區塊寫入順序逐塊載入指定任務鍵的已完成結果
+
+        Yields:
+            (區塊序號, 結果列表, 該區塊先前導出的檔案路徑)
+        """
+        for index, chunk in enumerate(self.manifest["chunks"]):
+            if not task_hashes.intersection(chunk["tasks"]):
+                continue
+            chunk_results = self._read_chunk(chunk)
+            yield (
+                index,
+                [
+                    result
+                    for task_key, result in zip(chunk["tasks"], chunk_results)
+                    if task_key in task_hashes
+                ],
+                list(chunk.get("exported_files") or []),
+            )
+
+    def load_results(self, task_hashes: Set[str]) -> List[Dict[str, Any]]:
+        """載入指定任務鍵的已完成結果（依區塊寫入順序）"""
+        results: List[Dict[str, Any]] = []
+        for _, chunk_results, _ in self.iter_chunks(task_hashes):
+            results.extend(chunk_results)
+        return results
+
+    def save_chunk(
+        self,
+        results: List[Dict[str, Any]],
+        task_hashes: List[str],
+        exported_files: Optional[List[str]] = None,
+    ) -> int:
+        """
+        保存區塊結果（只保存成功的任務）並更新 manifest
+
+        Args:
+            results: 區塊結果，順序與 task_hashes 一致
+            task_hashes: 各結果對應的任務鍵
+            exported_files: 本區塊已導出的檔案路徑（串流模式續跑時沿用）
+
+        Returns:
+            int: 記錄為完成的任務數
+        """
+        saved_tasks = []
+        saved_results = []
+        for task_key, result in zip(task_hashes, results):
+            if result.get("error") is None:
+                saved_tasks.append(task_key)
+                saved_results.append(result)
+        if not saved_results:
+            return 0
+
+        stem = f"chunk_{len(self.manifest['chunks']):05d}"
+        self._write_chunk(stem, saved_results)
+        self.manifest["chunks"].append(
+            {
+                "file": stem,
+                "tasks": saved_tasks,
+                "exported_files": list(exported_files or []),
+            }
+        )
+        self._write_manifest()
+        return len(saved_tasks)
+
+    def record_exports(self, chunk_index: int, exported_files: List[str]) -> None:
+        """更新區塊的導出檔案路徑（續跑時重新導出後調用）"""
+        self.manifest["chunks"][chunk_index]["exported_files"] = list(exported_files)
+        self._write_manifest()
+
+    def _write_chunk(self, stem: str, results: List[Dict[str, Any]]) -> None:
+        """交易記錄寫入 <stem>.parquet，ndarray 寫入 <stem>_arrays.parquet，其餘欄位寫入 <stem>.json"""
+        frames = []
+        arrays: List[np.ndarray] = []
+        metadata = []
+        for task_index, result in enumerate(results):
+            entry = {
+                key: _encode_value(value, arrays)
+                for key, value in result.items()
+                if key != "records"
+            }
+            records = result.get("records")
+            if isinstance(records, pd.DataFrame):
+                entry["record_columns"] = list(records.columns)
+                frames.append(
+                    records.reset_index(drop=True).assign(**{TASK_COLUMN: task_index})
+                )
+            metadata.append(entry)
+
+        if frames:
+            self._atomic_write(
+                f"{stem}.parquet",
+                lambda path: pd.concat(frames, ignore_index=True).to_parquet(
+                    path, index=False
+                ),
+            )
+        if arrays:
+            array_table = pd.DataFrame(
+                {
+                    "dtype": [str(array.dtype) for array in arrays],
+                    "data": [np.ascontiguousarray(array).tobytes() for array in arrays],
+                }
+            )
+            self._atomic_write(
+                f"{stem}_arrays.parquet",
+                lambda path: array_table.to_parquet(path, index=False),
+            )
+
+        def write_metadata(path: str) -> None:
+            with open(path, "w", encoding="utf-8") as f:
+                json.dump(metadata, f)
+
+        self._atomic_write(f"{stem}.json", write_metadata)
+
+    def _read_chunk(self, chunk: Dict[str, Any]) -> List[Dict[str, Any]]:
+        stem = os.path.join(self.run_dir, chunk["file"])
+        with open(f"{stem}.json", "r", encoding="utf-8") as f:
+            metadata = json.load(f)
+        arrays: List[np.ndarray] = []
+        if os.path.exists(f"{stem}_arrays.parquet"):
+            array_table = pd.read_parquet(f"{stem}_arrays.parquet")
+            arrays = [
+                np.frombuffer(data, dtype=dtype).copy()
+                for dtype, data in zip(array_table["dtype"], array_table["data"])
+            ]
+        grouped: Dict[int, pd.DataFrame] = {}
+        if os.path.exists(f"{stem}.parquet"):
+            table = pd.read_parquet(f"{stem}.parquet")
+            grouped = {
+                int(task_index): frame
+                for task_index, frame in table.groupby(TASK_COLUMN, sort=False)
+            }
+
+        results = []
+        for task_index, entry in enumerate(metadata):
+            columns = entry.pop("record_columns", None)
+            result = {key: _decode_value(value, arrays) for key, value in entry.items()}
+            if columns is not None:
+                frame = grouped.get(task_index)
+                result["records"] = (
+                    pd.DataFrame(columns=columns)
+                    if frame is None
+                    else frame[columns].reset_index(drop=True)
+                )
+            results.append(result)
+        return results
+
+    def _atomic_write(self, filename: str, writer: Any) -> None:
+        path = os.path.join(self.run_dir, filename)
+        tmp_path = f"{path}.tmp"
+        writer(tmp_path)
+        os.replace(tmp_path, path)
+
+    def clear(self) -> None:
+        """刪除本次運行的檢查點目錄"""
+        shutil.rmtree(self.run_dir, ignore_errors=True)
+
+
+def _encode_value(value: Any, arrays: List[np.ndarray]) -> Any:
+    """將結果欄位轉為可 JSON 序列化的值，ndarray 以序號引用並收集到 arrays"""
+    if isinstance(value, np.ndarray) and value.dtype != object:
+        arrays.append(value)
+        return {"__array__": len(arrays) - 1, "shape": list(value.shape)}
+    if isinstance(value, dict):
+        return {key: _encode_value(item, arrays) for key, item in value.items()}
+    if isinstance(value, (list, tuple, np.ndarray)):
+        return [_encode_value(item, arrays) for item in value]
+    if isinstance(value, pd.Timestamp):
+        return {"__timestamp__": value.isoformat()}
+    if isinstance(value, np.generic):
+        return value.item()
+    return value
+
+
+def _decode_value(value: Any, arrays: List[np.ndarray]) -> Any:
+    """_encode_value 的逆操作"""
+    if isinstance(value, dict):
+        if "__array__" in value:
+            return arrays[value["__array__"]].reshape(value["shape"])
+        if "__timestamp__" in value:
+            return pd.Timestamp(value["__timestamp__"])
+        return {key: _decode_value(item, arrays) for key, item in value.items()}
+    if isinstance(value, list):
+        return [_decode_value(item, arrays) for item in value]
+    return value
@@ -79,6 +79,8 @@ flowchart TD
 - v2.0: 整合 Numba JIT 編譯優化
 - v2.1: 新增向量化批量計算
 - v2.2: 完善緩存機制與性能優化
+- v2.3: 改用 RollingWindow_backtester 單調佇列 O(n) 滾動極值，並按 (m_length, 預測因子) 緩存
+- v2.4: 向量化信號改由 _batch_hl_signals_njit 以 prange 一次寫入 int8 信號張量
 
 【參考】
 ------------------------------------------------------------
@@ -98,7 +100,7 @@ from .IndicatorParams_backtester import IndicatorParams
 
 # 優化：嘗試導入 Numba 進行 JIT 編譯加速
 try:
-    from numba import njit
+    from numba import njit, prange
 
     NUMBA_AVAILABLE = True
 except ImportError:
@@ -107,13 +109,81 @@ except ImportError:
 
 # 核心算法：純 Numba + ndarray 實現
 if NUMBA_AVAILABLE:
+    from .RollingWindow_backtester import (
+        rolling_max_njit,
+        rolling_min_njit,
+        run_length_njit,
+    )
+
+    @njit(fastmath=True, cache=True)  # type: ignore[misc]
+    def _hl_signals_from_extremes_njit(
+        predictor_values, extremes, n_length, m_length, strat_idx
+    ):  # type: ignore[no-untyped-def]
+        """
+        以預先計算的滾動極值生成HL信號（O(n)）
+
+        extremes 為過去 m 天的滾動最高值（HL1/HL2）或最低值（HL3/HL4），
+        可按 (預測因子, m_length) 緩存並在所有 n_length 組合間共用。
+        """
+        n = len(predictor_values)
+        signals = np.zeros(n)
+        if n_length <= 0 or strat_idx < 1 or strat_idx > 4:
+            return signals
+
+        # 每天是否等同其過去m天的極值
+        at_extreme = np.abs(predictor_values - extremes) <= 1e-10
+        streak = run_length_njit(at_extreme)
+
+        if strat_idx == 1 or strat_idx == 3:
+            signal_value = 1.0
+        else:
+            signal_value = -1.0
+
+        # 起始點應該是 m_length + n_length - 1，這樣檢查連續n天時，每天都有m天的歷史數據
+        for i in range(max(m_length + n_length - 1, 0), n):
+            if streak[i] >= n_length:
+                signals[i] = signal_value
+
+        return signals
+
+    @njit(parallel=True, fastmath=True, cache=True)  # type: ignore[misc]
+    def _batch_hl_signals_njit(
+        streak_matrix,
+        streak_rows,
+        n_lengths,
+        m_lengths,
+        strat_indices,
+        task_cols,
+        indicator_cols,
+        signals_matrix,
+    ):  # type: ignore[no-untyped-def]
+        """
+        批量生成HL信號，直接寫入 int8 信號張量
+
+        streak_matrix 每列為「連續等同滾動極值」的天數（按 (m_length, 極值類型) 計算一次），
+        以 prange 並行處理所有任務，第 k 個任務以 streak >= n_length 判斷並寫入
+        signals_matrix[:, task_cols[k], indicator_cols[k]]。
+        """
+        n = streak_matrix.shape[1]
+        for k in prange(len(streak_rows)):
+            strat_idx = strat_indices[k]
+            if strat_idx < 1 or strat_idx > 4 or n_lengths[k] <= 0:
+                continue
+            row = streak_rows[k]
+            col = task_cols[k]
+            indicator = indicator_cols[k]
+            signal_value = 1 if (strat_idx == 1 or strat_idx == 3) else -1
+            # 需要m_length + n_length - 1天的數據，與單個指標方法保持一致
+            for t in range(max(m_lengths[k] + n_lengths[k] - 1, 0), n):
+                if streak_matrix[row, t] >= n_lengths[k]:
+                    signals_matrix[t, col, indicator] = signal_value
 
     @njit(fastmath=True, cache=True)  # type: ignore[misc]
     def _generate_hl_signals_njit(
         predictor_values, n_length, m_length, strat_idx
-    ):  # type: ignore[no-untyped-def] # pylint: disable=too-complex
+    ):  # type: ignore[no-untyped-def]
         """
-        使用 Numba 生成HL等同信號 - 修正版本
+        使用 Numba 生成HL等同信號 - 單調佇列 O(n) 版本
         全程使用 ndarray，無 pandas 依賴
 
         邏輯：
@@ -122,106 +192,15 @@ if NUMBA_AVAILABLE:
         - HL3: 連續 n 日數值等同過去 m 天的歷史低位，發出買入信號
         - HL4: 連續 n 日數值等同過去 m 天的歷史低位，發出賣出信號
         """
-        n = len(predictor_values)
-        signals = np.zeros(n)
-
-        # 生成信號
-        # 需要確保有足夠的數據進行連續次數檢查
-        # 起始點應該是 m_length + n_length - 1，這樣檢查連續n天時，每天都有m天的歷史數據
-        for i in range(m_length + n_length - 1, n):
-            # 計算過去m天的歷史高位和低位（包括當前第i天）
-            start_idx = i - m_length + 1  # 包含第i天
-            end_idx = i + 1  # 包含第i天
-
-            _ = predictor_values[start_idx:end_idx].max()  # historical_high
-            _ = predictor_values[start_idx:end_idx].min()  # historical_low
-
-            # 檢查連續n日是否都等同各自的歷史高位或低位
-            if strat_idx == 1:  # HL1: 連續n日等同高位做多
-                # 檢查連續n天，每天都要等同各自過去m天的最高值
-                # 確保有足夠的數據進行連續次數檢查
-                if i >= n_length - 1:
-                    all_equal_high = True
-                    for j in range(i - n_length + 1, i + 1):
-                        # 確保j不會超出範圍
-                        if j < 0:
-                            all_equal_high = False
-                            break
-                        # 計算第j天過去m天的最高值
-                        j_start = max(0, j - m_length + 1)
-                        j_end = j + 1
-                        j_historical_high = predictor_values[j_start:j_end].max()
-                        # 檢查第j天是否等同其過去m天的最高值
-                        if abs(predictor_values[j] - j_historical_high) > 1e-10:
-                            all_equal_high = False
-                            break
-                    if all_equal_high:
-                        signals[i] = 1.0
-
-            elif strat_idx == 2:  # HL2: 連續n日等同高位做空
-                # 檢查連續n天，每天都要等同各自過去m天的最高值
-                # 確保有足夠的數據進行連續次數檢查
-                if i >= n_length - 1:
-                    all_equal_high = True
-                    for j in range(i - n_length + 1, i + 1):
-                        # 確保j不會超出範圍
-                        if j < 0:
-                            all_equal_high = False
-                            break
-                        # 計算第j天過去m天的最高值
-                        j_start = max(0, j - m_length + 1)
-                        j_end = j + 1
-                        j_historical_high = predictor_values[j_start:j_end].max()
-                        # 檢查第j天是否等同其過去m天的最高值
-                        if abs(predictor_values[j] - j_historical_high) > 1e-10:
-                            all_equal_high = False
-                            break
-                    if all_equal_high:
-                        signals[i] = -1.0
-
-            elif strat_idx == 3:  # HL3: 連續n日等同低位做多
-                # 檢查連續n天，每天都要等同各自過去m天的最低值
-                # 確保有足夠的數據進行連續次數檢查
-                if i >= n_length - 1:
-                    all_equal_low = True
-                    for j in range(i - n_length + 1, i + 1):
-                        # 確保j不會超出範圍
-                        if j < 0:
-                            all_equal_low = False
-                            break
-                        # 計算第j天過去m天的最低值
-                        j_start = max(0, j - m_length + 1)
-                        j_end = j + 1
-                        j_historical_low = predictor_values[j_start:j_end].min()
-                        # 檢查第j天是否等同其過去m天的最低值
-                        if abs(predictor_values[j] - j_historical_low) > 1e-10:
-                            all_equal_low = False
-                            break
-                    if all_equal_low:
-                        signals[i] = 1.0
-
-            elif strat_idx == 4:  # HL4: 連續n日等同低位做空
-                # 檢查連續n天，每天都要等同各自過去m天的最低值
-                # 確保有足夠的數據進行連續次數檢查
-                if i >= n_length - 1:
-                    all_equal_low = True
-                    for j in range(i - n_length + 1, i + 1):
-                        # 確保j不會超出範圍
-                        if j < 0:
-                            all_equal_low = False
-                            break
-                        # 計算第j天過去m天的最低值
-                        j_start = max(0, j - m_length + 1)
-                        j_end = j + 1
-                        j_historical_low = predictor_values[j_start:j_end].min()
-                        # 檢查第j天是否等同其過去m天的最低值
-                        if abs(predictor_values[j] - j_historical_low) > 1e-10:
-                            all_equal_low = False
-                            break
-                    if all_equal_low:
-                        signals[i] = -1.0
-
-        return signals
+        if strat_idx == 1 or strat_idx == 2:
+            extremes = rolling_max_njit(predictor_values, m_length)
+        elif strat_idx == 3 or strat_idx == 4:
+            extremes = rolling_min_njit(predictor_values, m_length)
+        else:
+            return np.zeros(len(predictor_values))
+        return _hl_signals_from_extremes_njit(
+            predictor_values, extremes, n_length, m_length, strat_idx
+        )
 
 
 class HLIndicator:
@@ -383,7 +362,7 @@ class HLIndicator:
         Args:
             tasks: 任務列表，每個任務包含 (task_idx, indicator_idx, param)
             predictor: 預測因子名稱
-            signals_matrix: 信號矩陣 [時間點, 任務數, 指標數]
+            signals_matrix: int8 信號矩陣 [時間點, 任務數, 指標數]
             global_hl_cache: 全局緩存字典，避免重複計算
             data: 數據DataFrame，如果為None則使用實例的data
 
@@ -423,32 +402,42 @@ class HLIndicator:
         predictor_values = data[predictor].values.astype(np.float64)
         predictor_values = np.nan_to_num(predictor_values, nan=0.0)
 
-        # 直接為每個任務生成信號 - 真正的向量化處理
-        for i, (n_length, m_length, strat_idx, task_idx, indicator_idx) in enumerate(
-            zip(n_lengths, m_lengths, strat_indices, task_indices, indicator_indices)
-        ):
-            try:
-                # 直接使用Numba優化的函數計算HL信號
-                signal_values = _generate_hl_signals_njit(
-                    predictor_values, n_length, m_length, strat_idx
+        # 滾動極值按 (m_length, 極值類型, 預測因子) 緩存，所有 n_length 組合共用
+        streak_index: Dict[Tuple[int, str], int] = {}
+        streak_list = []
+        streak_rows = []
+        for m_length, strat_idx in zip(m_lengths, strat_indices):
+            extreme_type = "max" if strat_idx in [1, 2] else "min"
+            row_key = (m_length, extreme_type)
+            if row_key not in streak_index:
+                cache_key = (m_length, extreme_type, predictor)
+                if cache_key not in global_hl_cache:
+                    if extreme_type == "max":
+                        global_hl_cache[cache_key] = rolling_max_njit(
+                            predictor_values, m_length
+                        )
+                    else:
+                        global_hl_cache[cache_key] = rolling_min_njit(
+                            predictor_values, m_length
+                        )
+                # 每天是否等同其過去m天的極值，轉為連續天數
+                at_extreme = (
+                    np.abs(predictor_values - global_hl_cache[cache_key]) <= 1e-10
                 )
-
-                # 確保在有效期間之前不產生信號
-                # 需要m_length + n_length - 1天的數據，與單個指標方法保持一致
-                min_required_length = m_length + n_length - 1
-                min_signal_start = max(min_required_length - 1, n_length - 1)
-                signal_values[:min_signal_start] = 0.0
-
-                # 直接寫入信號矩陣
-                signals_matrix[:, task_idx, indicator_idx] = signal_values
-
-            except Exception as e:
-                # 記錄錯誤但不中斷處理
-                if hasattr(HLIndicator, "logger"):
-                    HLIndicator.logger.warning(
-                        f"HL突破信號生成失敗 (task_idx={task_idx}, indicator_idx={indicator_idx}): {e}"
-                    )
-                signals_matrix[:, task_idx, indicator_idx] = 0
-
-    # 注意：緩存機制已簡化，直接使用 _generate_hl_signals_njit 進行計算
-    # 如需緩存功能，可在 VectorBacktestEngine 中實現
+                streak_index[row_key] = len(streak_list)
+                streak_list.append(run_length_njit(at_extreme))
+            streak_rows.append(streak_index[row_key])
+
+        # 單次並行 Numba 調用寫入 int8 信號張量
+        _batch_hl_signals_njit(
+            np.vstack(streak_list),
+            np.array(streak_rows, dtype=np.int64),
+            np.array(n_lengths, dtype=np.int64),
+            np.array(m_lengths, dtype=np.int64),
+            np.array(strat_indices, dtype=np.int64),
+            np.array(task_indices, dtype=np.int64),
+            np.array(indicator_indices, dtype=np.int64),
+            signals_matrix,
+        )
+
+    # 注意：global_hl_cache 只緩存滾動極值，信號由 _batch_hl_signals_njit 以 O(n) 並行生成
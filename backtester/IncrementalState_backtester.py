@@ -0,0 +1,348 @@
+"""
+IncrementalState_backtester.py
+
+【功能說明】
+------------------------------------------------------------
+本模組為 Lo2cin4BT 回測框架的增量回測工具。數據每日追加新K線時，不必從第 0 根K線
+重新模擬所有策略：
+- 完整回測結束時保存每個回測的末端交易狀態（持倉、開倉價、開倉權益、當前權益、
+  昨日資金曲線、未平倉交易的開倉K線與交易組ID）
+- 增量回測只模擬新K線，並把新交易記錄追加到原有 Parquet，同步更新 metadata
+- 狀態檔與 Parquet 同名，後綴為 _state.npz
+
+【流程與數據流】
+------------------------------------------------------------
+- VectorBacktestEngine（config["incremental"] = True）在結果中附上 end_state
+- TradeRecordExporter 導出 Parquet 時一併寫入 _state.npz
+- VectorBacktestEngine.run_incremental(config, parquet_path) 讀取狀態、模擬新K線並追加
+- autorunner 於 config["incremental"] = True 時以 find_parquet 尋找可續算的 Parquet，
+  找到時自動增量回測，否則完整回測並保存狀態
+
+```mermaid
+flowchart TD
+    A[完整回測] -->|end_state| B[TradeRecordExporter]
+    B -->|Parquet + _state.npz| C[磁碟]
+    D[追加K線後的數據] -->|run_incremental| E[只模擬新K線]
+    C -->|載入狀態| E
+    E -->|append_to_parquet / save_states| C
+```
+
+【維護與擴充重點】
+------------------------------------------------------------
+- 交易狀態欄位與 TradeSimulator.STATE_COLUMNS 一致，新增狀態時需同步更新
+- 指標狀態不另外保存：信號在完整數據上重新計算（Numba 批量核心，成本遠低於交易記錄生成），
+  只有交易模擬與記錄生成限於新K線
+- 新記錄重用 build_trade_record_columns，從未平倉交易的開倉K線起建構以延續持倉期數與交易組ID
+
+【常見易錯點】
+------------------------------------------------------------
+- 既有K線若被修改（非單純追加），指紋不符會拒絕增量回測，需重新完整回測
+- 只支援 full 結果模式；trades_only 稀疏結果請重新完整回測
+- 既有K線的記錄保持不變；信號計算中 np.roll 在第 0 根K線的環繞值不會被回溯更新
+
+【範例】
+------------------------------------------------------------
+- config["incremental"] = True 後完整回測並導出 Parquet
+- engine.run_incremental(config, parquet_path)
+- IncrementalState_backtester.find_parquet("records/backtester", data, task_keys)
+
+【與其他模組的關聯】
+------------------------------------------------------------
+- 由 VectorBacktestEngine 與 TradeRecordExporter 調用
+- 依賴 TradeSimulator 的狀態欄位定義與記錄建構函數
+"""
+
+import hashlib
+import json
+import os
+import uuid
+from typing import Any, Dict, List, Optional, Set
+
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+import pyarrow.parquet as pq
+
+from .TradeSimulator_backtester import (
+    STATE_COLUMNS,
+    bar_time_values,
+    build_trade_record_columns,
+    records_frame_from_columns,
+)
+
+# 狀態檔後綴（與 Parquet 同名）
+STATE_SUFFIX = "_state.npz"
+
+
+class IncrementalState_backtester:
+    """增量回測：末端交易狀態的保存、載入與新K線記錄追加"""
+
+    @staticmethod
+    def state_path(parquet_path: str) -> str:
+        """Parquet 對應的狀態檔路徑"""
+        return os.path.splitext(parquet_path)[0] + STATE_SUFFIX
+
+    @staticmethod
+    def data_fingerprint(data: pd.DataFrame) -> str:
+        """K線數據指紋，用於確認既有K線未被修改"""
+        digest = hashlib.blake2b(digest_size=16)
+        digest.update(str(len(data)).encode())
+        digest.update(pd.util.hash_pandas_object(data, index=True).values.tobytes())
+        return digest.hexdigest()
+
+    @staticmethod
+    def end_state(
+        task_key: str,
+        state_row: np.ndarray,
+        trade_actions: np.ndarray,
+        records: pd.DataFrame,
+    ) -> Dict[str, Any]:
+        """
+        由交易模擬末端狀態與交易記錄組成單個回測的 end_state
+
+        Args:
+            task_key: 參數組合雜湊:預測因子（見 BacktestCheckpoint.task_hash）
+            state_row: 長度為 len(STATE_COLUMNS) 的末端狀態
+            trade_actions: 該回測的逐K線 trade_actions
+            records: 該回測的 records（full 或 trades_only）
+        """
+        open_bar = -1
+        open_group = ""
+        if state_row[0] != 0:
+            opens = np.flatnonzero(np.asarray(trade_actions) == 1)
+            if len(opens) > 0:
+                open_bar = int(opens[-1])
+                if "Bar_index" in records.columns:
+                    match = records.loc[records["Bar_index"] == open_bar, "Trade_group_id"]
+                    open_group = str(match.iloc[0]) if len(match) else ""
+                elif open_bar < len(records):
+                    open_group = str(records["Trade_group_id"].iloc[open_bar])
+        return {
+            "task_key": task_key,
+            "state": np.asarray(state_row, dtype=np.float64).copy(),
+            "open_bar": open_bar,
+            "open_group": open_group,
+        }
+
+    @staticmethod
+    def save_states(path: str, data: pd.DataFrame, results: List[Dict[str, Any]]) -> int:
+        """
+        將結果中的 end_state 保存為 npz
+
+        Returns:
+            int: 保存的回測數
+        """
+        tracked = [r for r in results if r.get("end_state") is not None]
+        if not tracked:
+            return 0
+        np.savez(
+            path,
+            Backtest_id=np.array([r["Backtest_id"] for r in tracked], dtype=str),
+            task_key=np.array([r["end_state"]["task_key"] for r in tracked], dtype=str),
+            state=np.vstack([r["end_state"]["state"] for r in tracked]),
+            open_bar=np.array(
+                [r["end_state"]["open_bar"] for r in tracked], dtype=np.int64
+            ),
+            open_group=np.array(
+                [r["end_state"]["open_group"] for r in tracked], dtype=str
+            ),
+            n_bars=np.array(len(data), dtype=np.int64),
+            fingerprint=np.array(IncrementalState_backtester.data_fingerprint(data)),
+            state_columns=np.array(STATE_COLUMNS, dtype=str),
+        )
+        return len(tracked)
+
+    @staticmethod
+    def load_states(path: str) -> Dict[str, Any]:
+        """讀取狀態檔"""
+        with np.load(path, allow_pickle=False) as store:
+            if tuple(store["state_columns"]) != STATE_COLUMNS:
+                raise ValueError(f"狀態檔欄位與目前版本不一致: {path}")
+            return {
+                "Backtest_id": list(store["Backtest_id"]),
+                "task_key": list(store["task_key"]),
+                "state": store["state"].copy(),
+                "open_bar": store["open_bar"].copy(),
+                "open_group": list(store["open_group"]),
+                "n_bars": int(store["n_bars"]),
+                "fingerprint": str(store["fingerprint"]),
+            }
+
+    @staticmethod
+    def build_tail_records(  # pylint: disable=too-many-arguments
+        data: pd.DataFrame,
+        start_index: int,
+        position_state: float,
+        open_bar: int,
+        open_group: str,
+        position: np.ndarray,
+        returns: np.ndarray,
+        trade_actions: np.ndarray,
+        equity_values: np.ndarray,
+        entry_signal: np.ndarray,
+        exit_signal: np.ndarray,
+        predictor: str,
+        trading_instrument: str,
+        parameter_set_id: str,
+        backtest_id: str,
+        trading_params: Dict[str, Any],
+    ) -> pd.DataFrame:
+        """
+        生成新K線（start_index 之後）的交易記錄
+
+        若末端有未平倉交易，從其開倉K線起建構（既有K線部分以持倉狀態補齊後捨棄），
+        使持倉期數、交易組ID、平倉收益與完整回測一致。
+
+        Args:
+            position/returns/trade_actions/equity_values: 只含新K線的模擬結果
+            entry_signal/exit_signal: 完整數據上的信號
+        """
+        n_bars = len(data)
+        window_start = open_bar if open_bar >= 0 else start_index
+        n_prefix = start_index - window_start
+
+        prefix_actions = np.zeros(n_prefix, dtype=np.float64)
+        if n_prefix > 0:
+            prefix_actions[0] = 1
+        window_actions = np.concatenate([prefix_actions, np.asarray(trade_actions, dtype=np.float64)])
+        window_position = np.concatenate(
+            [np.full(n_prefix, position_state), np.asarray(position, dtype=np.float64)]
+        )
+        padding = np.zeros(n_prefix, dtype=np.float64)
+
+        bars = data.iloc[window_start:n_bars]
+        trade_price = trading_params.get("trade_price", "close")
+        current_prices = (
+            bars["Open"] if trade_price == "open" else bars["Close"]
+        ).to_numpy(dtype=np.float64)
+        if predictor in data.columns:
+            predictor_values = bars[predictor].to_numpy()
+        else:
+            predictor_values = np.zeros(len(bars))
+
+        # 交易組ID：延續中的交易沿用原ID，新開倉交易生成新ID
+        group_labels = None
+        if n_prefix > 0:
+            n_opens = int((window_actions == 1).sum())
+            group_labels = [open_group] + [
+                f"T{str(uuid.uuid4())[:8]}" for _ in range(n_opens - 1)
+            ]
+
+        columns = build_trade_record_columns(
+            bars,
+            bar_time_values(data).iloc[window_start:n_bars].reset_index(drop=True),
+            current_prices,
+            window_position,
+            np.concatenate([padding, np.asarray(returns, dtype=np.float64)]),
+            window_actions,
+            np.concatenate([padding, np.asarray(equity_values, dtype=np.float64)]),
+            np.asarray(entry_signal)[window_start:n_bars],
+            np.asarray(exit_signal)[window_start:n_bars],
+            predictor_values,
+            trading_instrument,
+            parameter_set_id,
+            backtest_id,
+            trading_params.get("transaction_cost", 0.001),
+            trading_params.get("slippage", 0.0005),
+            group_labels=group_labels,
+        )
+        return records_frame_from_columns(columns, np.arange(n_prefix, len(bars)))
+
+    @staticmethod
+    def append_to_parquet(
+        parquet_path: str, new_records: List[pd.DataFrame], data: pd.DataFrame
+    ) -> int:
+        """
+        將新記錄追加到既有 Parquet（同一回測的記錄保持連續），並更新 metadata 的數據結束時間
+
+        Returns:
+            int: 追加的列數
+        """
+        table = pq.read_table(parquet_path)
+        metadata = dict(table.schema.metadata or {})
+        existing = table.to_pandas()
+
+        # 與導出時一致：全空欄位不參與合併（合併後以缺值補齊）
+        frames = [existing] + [
+            df.dropna(axis=1, how="all") for df in new_records if not df.empty
+        ]
+        combined = pd.concat(frames, ignore_index=True, sort=False)
+        if "Backtest_id" in combined.columns and len(combined):
+            # 依既有順序排列各回測，回測內保持時間順序
+            order = {bid: i for i, bid in enumerate(pd.unique(combined["Backtest_id"]))}
+            combined = combined.iloc[
+                np.argsort(combined["Backtest_id"].map(order).to_numpy(), kind="stable")
+            ].reset_index(drop=True)
+
+        # 追加K線後引擎內績效已過期，移除標記讓 metricstracker 重新計算
+        metadata.pop(b"inline_metrics", None)
+        if b"batch_metadata" in metadata and "Time" in data.columns:
+            batch_metadata = json.loads(metadata[b"batch_metadata"].decode("utf-8"))
+            for meta in batch_metadata:
+                meta["Data_end_time"] = str(data["Time"].max())
+            metadata[b"batch_metadata"] = json.dumps(
+                batch_metadata, ensure_ascii=False
+            ).encode("utf-8")
+
+        new_table = pa.Table.from_pandas(combined)
+        all_meta = dict(new_table.schema.metadata or {})
+        all_meta.update({k: v for k, v in metadata.items() if k != b"pandas"})
+        new_table = new_table.replace_schema_metadata(all_meta)
+
+        tmp_path = f"{parquet_path}.tmp"
+        pq.write_table(new_table, tmp_path)
+        os.replace(tmp_path, parquet_path)
+        return sum(len(df) for df in new_records)
+
+    @staticmethod
+    def find_state(stored: Dict[str, Any], task_key: str) -> Optional[int]:
+        """以任務鍵查找狀態列索引"""
+        try:
+            return stored["task_key"].index(task_key)
+        except ValueError:
+            return None
+
+    @staticmethod
+    def find_parquet(
+        directory: str, data: pd.DataFrame, task_keys: Set[str]
+    ) -> Optional[str]:
+        """
+        尋找可增量續算的 Parquet（最新者優先）
+
+        條件：同名 _state.npz 存在、其數據指紋與 data 前段一致，且保存了 task_keys 中所有回測
+
+        Returns:
+            Optional[str]: Parquet 路徑，找不到時為 None
+        """
+        if not os.path.isdir(directory):
+            return None
+        state_paths = sorted(
+            (
+                os.path.join(directory, name)
+                for name in os.listdir(directory)
+                if name.endswith(STATE_SUFFIX)
+            ),
+            key=os.path.getmtime,
+            reverse=True,
+        )
+        fingerprints: Dict[int, str] = {}
+        for state_path in state_paths:
+            parquet_path = state_path[: -len(STATE_SUFFIX)] + ".parquet"
+            if not os.path.exists(parquet_path):
+                continue
+            try:
+                stored = IncrementalState_backtester.load_states(state_path)
+            except (OSError, ValueError, KeyError):
+                continue
+            n_old = stored["n_bars"]
+            if n_old > len(data):
+                continue
+            if n_old not in fingerprints:
+                fingerprints[n_old] = IncrementalState_backtester.data_fingerprint(
+                    data.iloc[:n_old]
+                )
+            if fingerprints[n_old] != stored["fingerprint"]:
+                continue
+            if task_keys.issubset(stored["task_key"]):
+                return parquet_path
+        return None
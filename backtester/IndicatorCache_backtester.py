@@ -0,0 +1,351 @@
+"""
+IndicatorCache_backtester.py
+
+【功能說明】
+------------------------------------------------------------
+本模組為 Lo2cin4BT 回測框架的持久化指標緩存，將已計算的指標陣列（MA 列、布林帶、
+滾動極值、滾動百分位、連續計數）以 .npy 檔案存放於磁碟，跨次回測重用。
+- 以內容定址：鍵為「預測因子數據指紋 + 指標類型 + 指標緩存鍵」的雜湊
+- 讀取時以記憶體映射（mmap）載入，不佔用額外記憶體
+- 依總容量上限進行 LRU 淘汰，並提供 info() / clear() 檢視與清除
+- 命令列入口 python backtester/IndicatorCache_backtester.py info|clear 檢視或清除緩存
+
+【流程與數據流】
+------------------------------------------------------------
+- VectorBacktestEngine 依 config["indicator_cache"] 建立 IndicatorDiskCache
+- 每次信號生成以 PersistentIndicatorCache 取代原本的 global_*_cache 字典
+- 指標模組照常以 dict 介面存取；未命中記憶體時查詢磁碟，寫入時同步落盤
+
+```mermaid
+flowchart TD
+    A[指標模組] -->|cache[key]| B[PersistentIndicatorCache]
+    B -->|記憶體未命中| C[IndicatorDiskCache]
+    C -->|mmap 載入 .npy| B
+    B -->|寫入陣列| C
+    C -->|超過容量| D[LRU 淘汰]
+```
+
+【維護與擴充重點】
+------------------------------------------------------------
+- 只有 ndarray 或等長 ndarray 組成的 tuple 會落盤，其他值（如 MA 週期索引）只保存在記憶體
+- 指標緩存鍵中與數據欄位同名的字串視為預測因子，替換為該欄位的數據指紋
+- 指標算法的數值語意改變時，請遞增 CACHE_VERSION 令舊緩存失效
+
+【常見易錯點】
+------------------------------------------------------------
+- 從緩存載入的陣列為唯讀，調用方不可原地修改
+- 多個進程可同時讀取；索引檔以原子替換寫入，最後寫入者的存取時間為準
+
+【範例】
+------------------------------------------------------------
+- cache = IndicatorDiskCache("records/indicator_cache", max_size_mb=2048)
+- global_ma_cache = PersistentIndicatorCache(cache, "MA", data, fingerprints)
+- cache.info() / cache.clear()
+- python backtester/IndicatorCache_backtester.py info --cache-dir records/indicator_cache
+- config["indicator_cache"] = {"enabled": True, "clear": True} 於回測前清除緩存
+
+【與其他模組的關聯】
+------------------------------------------------------------
+- 由 VectorBacktestEngine 建立，供 MovingAverage/BollingerBand/HL/VALUE/Percentile 指標模組透明使用
+"""
+
+import argparse
+import hashlib
+import json
+import os
+import time
+from typing import Any, Dict, List, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+from rich.console import Console
+from rich.panel import Panel
+
+# 指標算法語意版本，改變時所有舊緩存失效
+CACHE_VERSION = "1"
+
+INDEX_FILENAME = "index.json"
+
+
+class IndicatorDiskCache:
+    """內容定址的指標磁碟緩存，.npy 檔案 + LRU 索引"""
+
+    def __init__(self, cache_dir: Optional[str] = None, max_size_mb: float = 2048) -> None:
+        if cache_dir is None:
+            cache_dir = os.path.join(
+                os.path.dirname(os.path.dirname(__file__)),
+                "records",
+                "indicator_cache",
+            )
+        self.cache_dir = cache_dir
+        self.max_bytes = int(max_size_mb * 1024 * 1024)
+        os.makedirs(self.cache_dir, exist_ok=True)
+        self._index = self._load_index()
+        self._dirty = False
+        self.hits = 0
+        self.misses = 0
+
+    @staticmethod
+    def fingerprint(values: np.ndarray) -> str:
+        """預測因子數據指紋（內容雜湊）"""
+        values = np.ascontiguousarray(values, dtype=np.float64)
+        digest = hashlib.blake2b(digest_size=16)
+        digest.update(str(values.shape).encode())
+        digest.update(values.tobytes())
+        return digest.hexdigest()
+
+    @staticmethod
+    def make_key(indicator_type: str, key: Tuple[Any, ...]) -> str:
+        """由指標類型與（已替換指紋的）緩存鍵生成檔名鍵"""
+        raw = repr((CACHE_VERSION, indicator_type, key))
+        return hashlib.blake2b(raw.encode(), digest_size=20).hexdigest()
+
+    def _path(self, key: str) -> str:
+        return os.path.join(self.cache_dir, f"{key}.npy")
+
+    def _index_path(self) -> str:
+        return os.path.join(self.cache_dir, INDEX_FILENAME)
+
+    def _load_index(self) -> Dict[str, Dict[str, Any]]:
+        try:
+            with open(self._index_path(), "r", encoding="utf-8") as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return {}
+
+    def flush(self) -> None:
+        """將存取時間與新條目寫回索引檔（原子替換）"""
+        if not self._dirty:
+            return
+        tmp_path = f"{self._index_path()}.{os.getpid()}.tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(self._index, f)
+        os.replace(tmp_path, self._index_path())
+        self._dirty = False
+
+    def load(self, key: str) -> Optional[Any]:
+        """
+        讀取緩存陣列（記憶體映射、唯讀）
+
+        Returns:
+            ndarray、tuple of ndarray，或未命中時 None
+        """
+        entry = self._index.get(key)
+        if entry is None:
+            self.misses += 1
+            return None
+        try:
+            array = np.asarray(np.load(self._path(key), mmap_mode="r"))
+        except (OSError, ValueError):
+            # 檔案遺失或損壞：移除索引條目
+            self._index.pop(key, None)
+            self._dirty = True
+            self.misses += 1
+            return None
+
+        entry["last_access"] = time.time()
+        self._dirty = True
+        self.hits += 1
+        if entry.get("tuple"):
+            return tuple(array[i] for i in range(array.shape[0]))
+        return array
+
+    def save(self, key: str, value: Any, label: str = "") -> bool:
+        """
+        寫入緩存陣列；只接受 ndarray 或等長一維 ndarray 組成的 tuple
+
+        Returns:
+            bool: 是否已落盤
+        """
+        is_tuple = isinstance(value, tuple)
+        if is_tuple:
+            if not value or not all(isinstance(v, np.ndarray) for v in value):
+                return False
+            if len({v.shape for v in value}) != 1 or value[0].ndim != 1:
+                return False
+            array = np.stack(value)
+        elif isinstance(value, np.ndarray):
+            array = value
+        else:
+            return False
+
+        path = self._path(key)
+        tmp_path = f"{path}.{os.getpid()}.tmp"
+        with open(tmp_path, "wb") as f:
+            np.save(f, np.ascontiguousarray(array))
+        os.replace(tmp_path, path)
+
+        self._index[key] = {
+            "size": os.path.getsize(path),
+            "last_access": time.time(),
+            "tuple": is_tuple,
+            "label": label,
+        }
+        self._dirty = True
+        self._evict()
+        return True
+
+    def _evict(self) -> None:
+        """總容量超過上限時，依最後存取時間淘汰最舊條目"""
+        total = sum(entry["size"] for entry in self._index.values())
+        if total <= self.max_bytes:
+            return
+        for key, entry in sorted(
+            self._index.items(), key=lambda item: item[1]["last_access"]
+        ):
+            if total <= self.max_bytes:
+                break
+            try:
+                os.remove(self._path(key))
+            except OSError:
+                pass
+            total -= entry["size"]
+            del self._index[key]
+        self._dirty = True
+
+    def info(self) -> Dict[str, Any]:
+        """緩存統計：條目數、總容量、上限、各指標類型條目數與本次命中率"""
+        by_indicator: Dict[str, int] = {}
+        for entry in self._index.values():
+            indicator_type = entry.get("label", "").split(":", 1)[0] or "unknown"
+            by_indicator[indicator_type] = by_indicator.get(indicator_type, 0) + 1
+        return {
+            "cache_dir": self.cache_dir,
+            "entries": len(self._index),
+            "size_mb": sum(entry["size"] for entry in self._index.values())
+            / (1024 * 1024),
+            "max_size_mb": self.max_bytes / (1024 * 1024),
+            "by_indicator": by_indicator,
+            "hits": self.hits,
+            "misses": self.misses,
+        }
+
+    def clear(self) -> int:
+        """刪除所有緩存檔案與索引，回傳刪除的條目數"""
+        removed = 0
+        for key in list(self._index):
+            try:
+                os.remove(self._path(key))
+            except OSError:
+                pass
+            removed += 1
+        self._index = {}
+        self._dirty = False
+        try:
+            os.remove(self._index_path())
+        except OSError:
+            pass
+        return removed
+
+
+class PersistentIndicatorCache(dict):
+    """
+    dict 介面的指標緩存，記憶體未命中時查詢磁碟，寫入陣列時同步落盤
+
+    可直接替代 global_*_cache 字典傳入各指標模組的 vectorized_calculate_* 方法。
+    """
+
+    def __init__(
+        self,
+        disk_cache: IndicatorDiskCache,
+        indicator_type: str,
+        data: pd.DataFrame,
+        fingerprints: Optional[Dict[str, str]] = None,
+    ) -> None:
+        super().__init__()
+        self.disk_cache = disk_cache
+        self.indicator_type = indicator_type
+        self.data = data
+        # 預測因子指紋在同一份數據的所有緩存間共用，避免重複雜湊
+        self.fingerprints = fingerprints if fingerprints is not None else {}
+
+    def _predictor_fingerprint(self, column: str) -> str:
+        if column not in self.fingerprints:
+            values = np.nan_to_num(
+                self.data[column].to_numpy(dtype=np.float64), nan=0.0
+            )
+            self.fingerprints[column] = IndicatorDiskCache.fingerprint(values)
+        return self.fingerprints[column]
+
+    def _disk_key(self, key: Any) -> Optional[Tuple[str, str]]:
+        """緩存鍵中的預測因子名稱替換為數據指紋；不含預測因子的鍵不落盤"""
+        if not isinstance(key, tuple):
+            return None
+        has_predictor = False
+        parts = []
+        for part in key:
+            if isinstance(part, str) and part in self.data.columns:
+                parts.append(("data", self._predictor_fingerprint(part)))
+                has_predictor = True
+            else:
+                parts.append(part)
+        if not has_predictor:
+            return None
+        label = f"{self.indicator_type}:{key}"
+        return IndicatorDiskCache.make_key(self.indicator_type, tuple(parts)), label
+
+    def _load_from_disk(self, key: Any) -> bool:
+        disk_key = self._disk_key(key)
+        if disk_key is None:
+            return False
+        value = self.disk_cache.load(disk_key[0])
+        if value is None:
+            return False
+        super().__setitem__(key, value)
+        return True
+
+    def __contains__(self, key: object) -> bool:
+        return super().__contains__(key) or self._load_from_disk(key)
+
+    def __getitem__(self, key: Any) -> Any:
+        if not super().__contains__(key) and not self._load_from_disk(key):
+            raise KeyError(key)
+        return super().__getitem__(key)
+
+    def get(self, key: Any, default: Any = None) -> Any:
+        if key in self:
+            return super().__getitem__(key)
+        return default
+
+    def __setitem__(self, key: Any, value: Any) -> None:
+        super().__setitem__(key, value)
+        disk_key = self._disk_key(key)
+        if disk_key is not None:
+            self.disk_cache.save(disk_key[0], value, disk_key[1])
+
+
+def main(argv: Optional[List[str]] = None) -> Dict[str, Any]:
+    """命令列入口：python backtester/IndicatorCache_backtester.py info|clear"""
+    parser = argparse.ArgumentParser(description="Lo2cin4BT 持久化指標緩存管理")
+    parser.add_argument("action", choices=["info", "clear"], help="檢視或清除緩存")
+    parser.add_argument(
+        "--cache-dir", default=None, help="緩存目錄（預設 records/indicator_cache）"
+    )
+    args = parser.parse_args(argv)
+
+    cache = IndicatorDiskCache(args.cache_dir)
+    stats = cache.info()
+    if args.action == "clear":
+        stats["removed"] = cache.clear()
+        message = f"🗑️ 已清除 {stats['removed']} 條緩存（{stats['size_mb']:.1f} MB）"
+    else:
+        by_indicator = "、".join(
+            f"{name} {count}" for name, count in sorted(stats["by_indicator"].items())
+        )
+        message = (
+            f"📦 {stats['entries']} 條 / {stats['size_mb']:.1f} MB"
+            f"（上限 {stats['max_size_mb']:.0f} MB）\n"
+            f"📊 各指標條目數：{by_indicator or '無'}"
+        )
+    Console().print(
+        Panel(
+            f"{message}\n📁 {stats['cache_dir']}",
+            title="[bold #dbac30]💾 指標緩存[/bold #dbac30]",
+            border_style="#dbac30",
+        )
+    )
+    return stats
+
+
+if __name__ == "__main__":
+    main()
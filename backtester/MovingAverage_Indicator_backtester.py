@@ -80,6 +80,11 @@ flowchart TD
 - v2.0: 整合 Numba JIT 編譯優化
 - v2.1: 新增向量化批量計算
 - v2.2: 完善緩存機制與錯誤處理
+- v2.3: 新增多週期MA矩陣核心（SMA 共用累積和、EMA 單次掃描、WMA 滑動更新），向量化計算直接讀取矩陣
+- v2.4: MA9-MA12 改用連續計數（run length）陣列，每條均線只計算一次，所有 m 以門檻判斷
+- v2.5: 向量化信號改由 _batch_ma_signals_njit 以 prange 一次寫入 int8 信號張量
+- v2.6: MA 矩陣按 ("row", ma_type, period, predictor) 逐週期緩存，只計算缺少的週期（支援持久化指標緩存）
+- v2.7: 均線類型的任務全部缺少週期時跳過該類型，不再使整個預測因子的 MA 信號歸零
 
 【參考】
 ------------------------------------------------------------
@@ -98,7 +103,7 @@ from .IndicatorParams_backtester import IndicatorParams
 
 # 優化：嘗試導入 Numba 進行 JIT 編譯加速
 try:
-    from numba import njit
+    from numba import njit, prange
 
     NUMBA_AVAILABLE = True
 except ImportError:
@@ -150,57 +155,244 @@ def _calculate_ma_unified(values, period, ma_type):
             raise ValueError(f"不支援的 MA 類型: {ma_type}")
 
 
+_MA_TYPE_CODES = {"SMA": 0, "EMA": 1, "WMA": 2}
+
+
+def _calculate_ma_matrix(values, periods, ma_type):
+    """
+    批量計算多個週期的MA矩陣，形狀為 (n_periods, n_time)，第 k 列對應 periods[k]
+    """
+    values = np.asarray(values, dtype=np.float64)
+    values = np.nan_to_num(values, nan=0.0)
+
+    ma_type_code = _MA_TYPE_CODES.get(ma_type.upper())
+    if ma_type_code is None:
+        raise ValueError(f"不支援的 MA 類型: {ma_type}")
+
+    if NUMBA_AVAILABLE:
+        return _calculate_ma_matrix_njit(
+            values, np.asarray(periods, dtype=np.int64), ma_type_code
+        )
+    # numpy備用實現：逐週期計算
+    return np.array(
+        [_calculate_ma_unified(values, period, ma_type) for period in periods]
+    ).reshape(len(periods), len(values))
+
+
 # ============================================================================
 # Numba 加速函數
 # ============================================================================
 
 if NUMBA_AVAILABLE:
+    from .RollingWindow_backtester import run_length_njit
 
-    @njit(fastmath=True)
-    def _calculate_sma_njit(data, window):
-        """使用 Numba 計算簡單移動平均"""
+    # 不啟用 fastmath：重排浮點運算會抵銷累積和的 Neumaier 誤差補償
+    @njit
+    def _calculate_ma_matrix_njit(data, periods, ma_type_code):
+        """
+        使用 Numba 一次計算多個週期的移動平均矩陣
+
+        Args:
+            data: 預測因子數組
+            periods: 週期數組（int64）
+            ma_type_code: 0=SMA, 1=EMA, 2=WMA
+
+        Returns:
+            np.ndarray: 形狀為 (n_periods, n_time) 的矩陣，第 k 列對應 periods[k]；
+            SMA/WMA 在窗口未滿的位置為 0
+        """
         n = len(data)
-        result = np.zeros(n)
+        n_periods = len(periods)
+        result = np.zeros((n_periods, n))
+        if n == 0:
+            return result
+
+        if ma_type_code == 0:
+            # SMA：所有週期共用同一條累積和；以 Neumaier 補償保存捨入誤差，
+            # 使窗口和的誤差與窗口大小相關，而非與整條累積和的量級相關
+            cumsum = np.zeros(n + 1)
+            compensation = np.zeros(n + 1)
+            total = 0.0
+            carry = 0.0
+            for i in range(n):
+                value = data[i]
+                new_total = total + value
+                if abs(total) >= abs(value):
+                    carry += (total - new_total) + value
+                else:
+                    carry += (value - new_total) + total
+                total = new_total
+                cumsum[i + 1] = total
+                compensation[i + 1] = carry
+            for k in range(n_periods):
+                window = periods[k]
+                if window <= 0:
+                    continue
+                for i in range(window - 1, n):
+                    start = i + 1 - window
+                    window_sum = (cumsum[i + 1] - cumsum[start]) + (
+                        compensation[i + 1] - compensation[start]
+                    )
+                    result[k, i] = window_sum / window
+
+        elif ma_type_code == 1:
+            # EMA：單次時間掃描同時更新所有週期
+            alphas = np.empty(n_periods)
+            for k in range(n_periods):
+                alphas[k] = 2.0 / (periods[k] + 1)
+                result[k, 0] = data[0]
+            for i in range(1, n):
+                value = data[i]
+                for k in range(n_periods):
+                    result[k, i] = alphas[k] * value + (1 - alphas[k]) * result[k, i - 1]
 
-        for i in range(window - 1, n):
-            sum_val = 0.0
-            for j in range(i - window + 1, i + 1):
-                sum_val += data[j]
-            result[i] = sum_val / window
+        else:
+            # WMA：滑動更新分子（O(n)），每滑動 window 根重新精確計算一次以防漂移
+            for k in range(n_periods):
+                window = periods[k]
+                if window <= 0 or window > n:
+                    continue
+                weight_sum = window * (window + 1) / 2.0
+                numerator = 0.0
+                window_sum = 0.0
+                for i in range(window - 1, n):
+                    start = i - window + 1
+                    if start % window == 0:
+                        numerator = 0.0
+                        window_sum = 0.0
+                        for j in range(window):
+                            numerator += (j + 1) * data[start + j]
+                            window_sum += data[start + j]
+                    else:
+                        # 權重整體左移一位：減去上一窗口總和，加入新值的最大權重
+                        numerator += window * data[i] - window_sum
+                        window_sum += data[i] - data[start - 1]
+                    result[k, i] = numerator / weight_sum
 
         return result
 
-    @njit(fastmath=True)
+    # 單週期包裝同樣不啟用 fastmath：內聯後會重排矩陣核心的 Neumaier 補償運算，
+    # 使單指標與向量化路徑的MA值出現捨入差異
+    @njit
+    def _calculate_sma_njit(data, window):
+        """使用 Numba 計算簡單移動平均"""
+        periods = np.empty(1, dtype=np.int64)
+        periods[0] = window
+        return _calculate_ma_matrix_njit(data, periods, 0)[0]
+
+    @njit
     def _calculate_ema_njit(data, period):
         """使用 Numba 計算指數移動平均"""
-        n = len(data)
-        result = np.zeros(n)
-        alpha = 2.0 / (period + 1)
+        periods = np.empty(1, dtype=np.int64)
+        periods[0] = period
+        return _calculate_ma_matrix_njit(data, periods, 1)[0]
 
-        # 初始化第一個值
-        if n > 0:
-            result[0] = data[0]
+    @njit
+    def _calculate_wma_njit(data, period):
+        """使用 Numba 計算加權移動平均"""
+        periods = np.empty(1, dtype=np.int64)
+        periods[0] = period
+        return _calculate_ma_matrix_njit(data, periods, 2)[0]
 
-        for i in range(1, n):
-            result[i] = alpha * data[i] + (1 - alpha) * result[i - 1]
+    @njit(fastmath=True)
+    def _ma_streak_signals_njit(streak, strat_idx, period, m):
+        """
+        以連續計數陣列生成 MA9-MA12 信號
 
-        return result
+        streak[j] 為截至第 j 天價格連續位於MA以上（MA9/10）或以下（MA11/12）的天數，
+        「連續m日」等價於 streak[j] >= m，同一條 streak 可供所有 m 共用。
+        """
+        n = len(streak)
+        signals = np.zeros(n)
+        if strat_idx == 9 or strat_idx == 11:
+            signal_value = 1.0
+        else:
+            signal_value = -1.0
 
-    @njit(fastmath=True)
-    def _calculate_wma_njit(data, period):
-        """使用 Numba 計算加權移動平均"""
-        n = len(data)
-        result = np.zeros(n)
-        weights = np.arange(1, period + 1, dtype=np.float64)
-        weight_sum = np.sum(weights)
+        # 設置最小有效索引
+        min_valid_index = max(period + m - 2, 0)
+        for j in range(min_valid_index, n):
+            if streak[j] >= m:
+                signals[j] = signal_value
+        return signals
 
-        for i in range(period - 1, n):
-            sum_val = 0.0
-            for j in range(period):
-                sum_val += weights[j] * data[i - period + 1 + j]
-            result[i] = sum_val / weight_sum
+    @njit(parallel=True, fastmath=True)
+    def _batch_ma_signals_njit(
+        price_values,
+        ma_matrix,
+        streak_matrix,
+        strat_indices,
+        rows,
+        long_rows,
+        periods,
+        ms,
+        streak_rows,
+        task_cols,
+        indicator_cols,
+        signals_matrix,
+    ):
+        """
+        批量生成 MA1-MA12 信號，直接寫入 int8 信號張量
 
-        return result
+        以 prange 並行處理所有任務，第 k 個任務讀取 ma_matrix 的 rows[k] 列（雙均線時另讀
+        long_rows[k] 列），MA9-MA12 讀取 streak_matrix 的 streak_rows[k] 列，
+        結果寫入 signals_matrix[:, task_cols[k], indicator_cols[k]]。
+        前一日值與 np.roll 一致（t=0 取最後一根），與 _vectorized_generate_ma_signals_njit 保持一致。
+        """
+        n = len(price_values)
+        for k in prange(len(strat_indices)):
+            strat_idx = strat_indices[k]
+            row = rows[k]
+            col = task_cols[k]
+            indicator = indicator_cols[k]
+            period = periods[k]
+            if strat_idx in (1, 3, 5, 7, 9, 11):
+                signal_value = 1
+            else:
+                signal_value = -1
+
+            if 5 <= strat_idx <= 8:
+                # 雙均線策略（單均線模式下不產生信號）
+                long_row = long_rows[k]
+                if long_row < 0:
+                    continue
+                for t in range(max(period - 1, 0), n):
+                    prev_t = t - 1 if t > 0 else n - 1
+                    short_ma = ma_matrix[row, t]
+                    long_ma = ma_matrix[long_row, t]
+                    prev_short = ma_matrix[row, prev_t]
+                    prev_long = ma_matrix[long_row, prev_t]
+                    if strat_idx <= 6:  # 短均線升穿長均線
+                        if short_ma > long_ma and prev_short <= prev_long:
+                            signals_matrix[t, col, indicator] = signal_value
+                    else:  # 短均線跌穿長均線
+                        if short_ma < long_ma and prev_short >= prev_long:
+                            signals_matrix[t, col, indicator] = signal_value
+
+            elif 1 <= strat_idx <= 4:
+                # 價格與MA交叉策略
+                for t in range(max(period - 1, 0), n):
+                    prev_t = t - 1 if t > 0 else n - 1
+                    price = price_values[t]
+                    ma_value = ma_matrix[row, t]
+                    prev_price = price_values[prev_t]
+                    prev_ma = ma_matrix[row, prev_t]
+                    if strat_idx <= 2:  # 價格升穿MA
+                        if price > ma_value and prev_price <= prev_ma:
+                            signals_matrix[t, col, indicator] = signal_value
+                    else:  # 價格跌穿MA
+                        if price < ma_value and prev_price >= prev_ma:
+                            signals_matrix[t, col, indicator] = signal_value
+
+            elif 9 <= strat_idx <= 12:
+                # 連續日數策略：以連續計數門檻判斷
+                streak_row = streak_rows[k]
+                m = ms[k]
+                if streak_row < 0:
+                    continue
+                for t in range(max(period + m - 2, 0), n):
+                    if streak_matrix[streak_row, t] >= m:
+                        signals_matrix[t, col, indicator] = signal_value
 
     # 統一向量化信號生成函數（整合所有策略）
     @njit(fastmath=True)
@@ -291,38 +483,12 @@ if NUMBA_AVAILABLE:
                 signals[:min_valid_index] = 0
 
             elif strat_idx in [9, 10, 11, 12]:
-                # 連續日數策略
+                # 連續日數策略：連續計數陣列只算一次，再以 m 門檻判斷
                 if strat_idx in [9, 10]:  # 連續m日位於MA以上
-                    above_ma = price_values > ma_values
-                    consecutive_above = np.zeros_like(price_values, dtype=np.bool_)
-                    for j in range(m - 1, len(price_values)):  # 從第(m-1)天開始檢查
-                        if np.all(
-                            above_ma[j - m + 1 : j + 1]
-                        ):  # 檢查包含當天在內的連續m天
-                            consecutive_above[j] = True
-
-                    if strat_idx == 9:  # 做多
-                        signals = np.where(consecutive_above, 1.0, 0.0)
-                    else:  # strat_idx == 10, 做空
-                        signals = np.where(consecutive_above, -1.0, 0.0)
-
+                    streak = run_length_njit(price_values > ma_values)
                 else:  # strat_idx in [11, 12], 連續m日位於MA以下
-                    below_ma = price_values < ma_values
-                    consecutive_below = np.zeros_like(price_values, dtype=np.bool_)
-                    for j in range(m - 1, len(price_values)):  # 從第(m-1)天開始檢查
-                        if np.all(
-                            below_ma[j - m + 1 : j + 1]
-                        ):  # 檢查包含當天在內的連續m天
-                            consecutive_below[j] = True
-
-                    if strat_idx == 11:  # 做多
-                        signals = np.where(consecutive_below, 1.0, 0.0)
-                    else:  # strat_idx == 12, 做空
-                        signals = np.where(consecutive_below, -1.0, 0.0)
-
-                # 設置最小有效索引
-                min_valid_index = period + m - 2
-                signals[:min_valid_index] = 0
+                    streak = run_length_njit(price_values < ma_values)
+                signals = _ma_streak_signals_njit(streak, strat_idx, period, m)
 
         return signals
 
@@ -754,7 +920,7 @@ class MovingAverageIndicator:
     ):
         """
         向量化計算移動平均信號 - 只生成純粹的 +1/-1/0 信號，不區分開平倉
-        優化後使用統一的計算邏輯
+        每種均線類型的所有週期以 _calculate_ma_matrix 一次計算，信號直接讀取矩陣列
         """
         if global_ma_cache is None:
             global_ma_cache = {}
@@ -762,85 +928,188 @@ class MovingAverageIndicator:
         if data is None:
             raise ValueError("data 參數必須提供")
 
-        # 創建緩存管理器
-        cache_manager = MACacheManager()
-        cache_manager._cache = global_ma_cache
-
         # 獲取預測因子序列
         predictor_series = _get_predictor_series(data, predictor)
-        predictor_name = predictor
         predictor_values = predictor_series.values.astype(np.float64)
         predictor_values = np.nan_to_num(predictor_values, nan=0.0)
 
-        # 處理所有任務
-        for task_idx, indicator_idx, param in tasks:
-            try:
-                strat_idx = param.get_param("strat_idx", 1)
-                mode = param.get_param("mode", "single")
-                ma_type = param.get_param("ma_type", "SMA")
-
-                if mode == "single":
-                    period = param.get_param("period")
-                    if period is None:
-                        continue
-
-                    # 計算MA
-                    ma_values = cache_manager.get_or_calculate(
-                        predictor_values, period, ma_type, f"{predictor_name}_{period}"
-                    )
+        # 收集每種均線類型需要的所有週期，一次批量計算 (n_periods × n_time) 矩陣
+        required_periods = {}
+        for _, _, param in tasks:
+            ma_type = param.get_param("ma_type", "SMA")
+            if param.get_param("mode", "single") == "single":
+                periods = [param.get_param("period")]
+            else:
+                periods = [
+                    param.get_param("shortMA_period"),
+                    param.get_param("longMA_period"),
+                ]
+            required_periods.setdefault(ma_type, set()).update(
+                p for p in periods if p is not None
+            )
 
-                    # 生成信號 - 為MA9-MA12傳遞m參數
-                    if strat_idx in [9, 10, 11, 12]:
-                        m = param.get_param("m")
-                        if m is None:
-                            continue  # 跳過缺少m參數的任務
-                        signals = _generate_ma_signals_unified(
-                            predictor_values,
-                            ma_values,
-                            strat_idx,
-                            period,
-                            short_ma_values=None,
-                            long_ma_values=None,
-                            m=m,
+        # global_ma_cache[(ma_type, predictor)] = (週期 -> 矩陣列索引, MA矩陣)
+        # global_ma_cache[("row", ma_type, period, predictor)] = 單一週期的 MA 列（可由持久化緩存命中）
+        # global_ma_cache[("streak", ma_type, period, 方向, predictor)] = MA9-MA12 連續計數陣列
+        ma_matrices = {}
+        for ma_type, periods in required_periods.items():
+            if not periods:
+                continue  # 該均線類型的任務全部缺少週期參數
+            cache_key = (ma_type, predictor)
+            cached = global_ma_cache.get(cache_key)
+            if cached is None or not periods.issubset(cached[0]):
+                if cached is not None:
+                    periods = periods | set(cached[0])
+                periods = sorted(periods)
+                row_keys = [("row", ma_type, p, predictor) for p in periods]
+                missing = [p for p, key in zip(periods, row_keys) if key not in global_ma_cache]
+                try:
+                    if missing:
+                        missing_matrix = _calculate_ma_matrix(
+                            predictor_values, missing, ma_type
                         )
-                    else:
-                        signals = _generate_ma_signals_unified(
-                            predictor_values, ma_values, strat_idx, period
-                        )
-
-                else:  # 雙均線模式
-                    short_period = param.get_param("shortMA_period")
-                    long_period = param.get_param("longMA_period")
+                        for row, p in enumerate(missing):
+                            global_ma_cache[("row", ma_type, p, predictor)] = (
+                                missing_matrix[row]
+                            )
+                except ValueError:
+                    continue
+                if len(missing) == len(periods):
+                    matrix = missing_matrix
+                else:
+                    matrix = np.vstack([global_ma_cache[key] for key in row_keys])
+                cached = ({p: row for row, p in enumerate(periods)}, matrix)
+                global_ma_cache[cache_key] = cached
+            ma_matrices[ma_type] = cached
+
+        # 所有均線類型的矩陣堆疊成一個矩陣，記錄各類型的起始列
+        row_offsets = {}
+        stacked = []
+        offset = 0
+        for ma_type, (period_rows, ma_matrix) in ma_matrices.items():
+            row_offsets[ma_type] = offset
+            stacked.append(ma_matrix)
+            offset += ma_matrix.shape[0]
+
+        # 提取所有任務參數為定長陣列
+        # rows: 單均線（或短均線）所在列；long_rows: 長均線所在列（單均線模式為 -1）
+        # periods: 有效期計算用週期（雙均線模式為長均線週期）；ms: MA9-MA12 連續日數
+        task_cols = []
+        indicator_cols = []
+        strat_indices = []
+        rows = []
+        long_rows = []
+        periods = []
+        ms = []
+        streak_rows = []
+        streak_index = {}
+        streak_list = []
 
-                    if short_period is None or long_period is None:
-                        continue
+        for task_idx, indicator_idx, param in tasks:
+            strat_idx = param.get_param("strat_idx", 1)
+            mode = param.get_param("mode", "single")
+            ma_type = param.get_param("ma_type", "SMA")
+            if ma_type not in ma_matrices:
+                continue
+            period_rows, ma_matrix = ma_matrices[ma_type]
+
+            if mode == "single":
+                period = param.get_param("period")
+                if period is None:
+                    continue
+                row_period = period
+                long_row = -1
+                m = 2
+                if strat_idx in [9, 10, 11, 12]:
+                    m = param.get_param("m")
+                    if m is None:
+                        continue  # 跳過缺少m參數的任務
+            else:  # 雙均線模式
+                short_period = param.get_param("shortMA_period")
+                period = param.get_param("longMA_period")
+                if short_period is None or period is None:
+                    continue
+                row_period = short_period
+                long_row = row_offsets[ma_type] + period_rows[period]
+                m = 2
+
+            row = row_offsets[ma_type] + period_rows[row_period]
+
+            # 連續計數按 (均線, 方向, 預測因子) 緩存，所有 m 共用同一條陣列
+            streak_row = -1
+            if NUMBA_AVAILABLE and strat_idx in [9, 10, 11, 12]:
+                direction = "above" if strat_idx in [9, 10] else "below"
+                streak_key = ("streak", ma_type, row_period, direction, predictor)
+                if streak_key not in global_ma_cache:
+                    ma_values = ma_matrix[period_rows[row_period]]
+                    if direction == "above":
+                        condition = predictor_values > ma_values
+                    else:
+                        condition = predictor_values < ma_values
+                    global_ma_cache[streak_key] = run_length_njit(condition)
+                if streak_key not in streak_index:
+                    streak_index[streak_key] = len(streak_list)
+                    streak_list.append(global_ma_cache[streak_key])
+                streak_row = streak_index[streak_key]
+
+            task_cols.append(task_idx)
+            indicator_cols.append(indicator_idx)
+            strat_indices.append(strat_idx)
+            rows.append(row)
+            long_rows.append(long_row)
+            periods.append(period)
+            ms.append(m)
+            streak_rows.append(streak_row)
+
+        if not task_cols:
+            return signals_matrix
+
+        all_ma_matrix = np.vstack(stacked)
+
+        if NUMBA_AVAILABLE:
+            # 單次並行 Numba 調用寫入 int8 信號張量
+            if streak_list:
+                streak_matrix = np.vstack(streak_list)
+            else:
+                streak_matrix = np.zeros((0, len(predictor_values)), dtype=np.int64)
+            _batch_ma_signals_njit(
+                predictor_values,
+                all_ma_matrix,
+                streak_matrix,
+                np.array(strat_indices, dtype=np.int64),
+                np.array(rows, dtype=np.int64),
+                np.array(long_rows, dtype=np.int64),
+                np.array(periods, dtype=np.int64),
+                np.array(ms, dtype=np.int64),
+                np.array(streak_rows, dtype=np.int64),
+                np.array(task_cols, dtype=np.int64),
+                np.array(indicator_cols, dtype=np.int64),
+                signals_matrix,
+            )
+            return signals_matrix
 
-                    # 計算短均線和長均線
-                    short_ma_values = cache_manager.get_or_calculate(
-                        predictor_values,
-                        short_period,
-                        ma_type,
-                        f"{predictor_name}_short_{short_period}",
-                    )
-                    long_ma_values = cache_manager.get_or_calculate(
+        # 備用實現：逐任務生成信號
+        for k, (task_idx, indicator_idx) in enumerate(zip(task_cols, indicator_cols)):
+            try:
+                ma_values = all_ma_matrix[rows[k]]
+                if long_rows[k] >= 0:
+                    signals = _generate_ma_signals_unified(
                         predictor_values,
-                        long_period,
-                        ma_type,
-                        f"{predictor_name}_long_{long_period}",
+                        ma_values,
+                        strat_indices[k],
+                        periods[k],
+                        ma_values,
+                        all_ma_matrix[long_rows[k]],
                     )
-
-                    # 生成信號 - 修復參數順序
+                else:
                     signals = _generate_ma_signals_unified(
                         predictor_values,
-                        short_ma_values,
-                        strat_idx,
-                        long_period,
-                        short_ma_values,
-                        long_ma_values,
+                        ma_values,
+                        strat_indices[k],
+                        periods[k],
+                        m=ms[k],
                     )
-
                 signals_matrix[:, task_idx, indicator_idx] = signals
-
             except Exception:
                 signals_matrix[:, task_idx, indicator_idx] = 0
 
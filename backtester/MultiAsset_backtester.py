@@ -0,0 +1,187 @@
+"""
+MultiAsset_backtester.py
+
+【功能說明】
+------------------------------------------------------------
+本模組為 Lo2cin4BT 回測框架的多標的（cross-asset）批量回測工具，讓同一組參數網格在多個
+交易標的上只執行一次引擎流程：
+- 以共同時間軸對齊各標的數據，堆疊為 (K線 x 標的 x 欄位) 價格面板
+- 參數組合只展開一次，各標的共用；交易模擬以 asset_index 指定每個策略的價格欄，
+  (標的 x 策略) 在同一次 Numba 核心調用中完成
+- 結果導出為單一資料集，以 Trading_instrument 欄位做 hive 分區
+  （<資料集>/Trading_instrument=<標的>/<資料集>_<標的>.parquet）
+
+【流程與數據流】
+------------------------------------------------------------
+- VectorBacktestEngine.run_multi_asset(config, datasets) 調用 align_datasets 與 price_panel
+- 各標的以自身數據生成信號，信號矩陣依標的順序水平堆疊後一次模擬
+- TradeRecordExporter.export_partitioned_dataset 依 result_instrument 分組寫入各分區
+
+```mermaid
+flowchart TD
+    A[各標的 DataFrame] -->|align_datasets| B[共同時間軸]
+    B -->|price_panel| C[(K線 x 標的 x 欄位) 價格面板]
+    B -->|各標的信號生成| D[堆疊信號矩陣]
+    C & D -->|asset_index，一次核心調用| E[標的 x 策略 交易結果]
+    E -->|單一進程池，按欄讀取標的數據| G[結果與引擎內績效]
+    G -->|export_partitioned_dataset| F[Trading_instrument 分區資料集]
+```
+
+【維護與擴充重點】
+------------------------------------------------------------
+- 對齊採時間交集：上市較晚或有缺漏K線的標的會令其他標的的前段K線被捨棄，
+  align_datasets 回傳各標的被捨棄的K線數供顯示
+- 分區檔案本身不含 Trading_instrument 欄位（hive 慣例，讀取資料集時由目錄名還原），
+  並另存於 schema metadata 的 Trading_instrument
+- 分區目錄內的輔助檔（如 trades_only 的 _bars.npz）以底線開頭，資料集讀取時會被忽略
+- records_root 讓下游由分區檔案路徑找回 records 目錄，績效輸出不會寫進資料集目錄
+
+【常見易錯點】
+------------------------------------------------------------
+- 各標的需有 Time 欄位才能對齊；缺少時需各標的長度相同（以位置對齊）
+- 預測因子欄位需存在於每個標的的數據中，否則該標的的信號為零
+
+【範例】
+------------------------------------------------------------
+- results = engine.run_multi_asset(config, {"BTCUSDT": btc_df, "ETHUSDT": eth_df})
+- parts = exporter.export_partitioned_dataset(engine.instrument_data)
+- df = MultiAsset_backtester.read_dataset(dataset_dir, instruments=["ETHUSDT"])
+
+【與其他模組的關聯】
+------------------------------------------------------------
+- 由 VectorBacktestEngine.run_multi_asset 與 TradeRecordExporter.export_partitioned_dataset 調用
+- autorunner 以 dataloader.multi_asset 載入多個標的
+"""
+
+import os
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+import pyarrow.dataset as ds
+
+from .SparseRecords_backtester import SparseRecords_backtester
+
+# 分區欄位（hive 目錄名為 Trading_instrument=<標的>）
+PARTITION_COLUMN = "Trading_instrument"
+PANEL_FIELDS = ("Open", "High", "Low", "Close")
+
+
+class MultiAsset_backtester:
+    """多標的批量回測：數據對齊、價格面板與分區資料集工具"""
+
+    @staticmethod
+    def align_datasets(
+        datasets: Dict[str, pd.DataFrame],
+    ) -> Tuple[Dict[str, pd.DataFrame], Dict[str, Any]]:
+        """
+        以共同時間（交集）對齊各標的數據
+
+        Returns:
+            tuple: (對齊後的 {標的: DataFrame}（RangeIndex）, {"n_bars", "dropped"})
+        """
+        if not datasets:
+            raise ValueError("多標的回測需要至少一個標的的數據")
+        symbols = list(datasets)
+
+        if all("Time" in df.columns for df in datasets.values()):
+            common = pd.Index(datasets[symbols[0]]["Time"])
+            for symbol in symbols[1:]:
+                common = common.intersection(pd.Index(datasets[symbol]["Time"]))
+            common = common.sort_values()
+            aligned = {}
+            for symbol in symbols:
+                df = datasets[symbol]
+                mask = df["Time"].isin(common).to_numpy()
+                aligned[symbol] = (
+                    df.loc[mask].sort_values("Time", kind="stable").reset_index(drop=True)
+                )
+        else:
+            lengths = {len(df) for df in datasets.values()}
+            if len(lengths) != 1:
+                raise ValueError("各標的數據缺少 Time 欄位且長度不一致，無法對齊")
+            aligned = {
+                symbol: df.reset_index(drop=True) for symbol, df in datasets.items()
+            }
+
+        n_bars = len(aligned[symbols[0]])
+        if n_bars == 0:
+            raise ValueError("各標的數據沒有共同的時間點")
+        info = {
+            "n_bars": n_bars,
+            "dropped": {
+                symbol: len(datasets[symbol]) - len(aligned[symbol]) for symbol in symbols
+            },
+        }
+        return aligned, info
+
+    @staticmethod
+    def price_panel(
+        aligned: Dict[str, pd.DataFrame], fields: Iterable[str] = PANEL_FIELDS
+    ) -> np.ndarray:
+        """
+        堆疊 (K線 x 標的 x 欄位) float64 價格面板；數據缺少的欄位以 NaN 填充
+        """
+        fields = list(fields)
+        symbols = list(aligned)
+        n_bars = len(aligned[symbols[0]])
+        panel = np.full((n_bars, len(symbols), len(fields)), np.nan)
+        for a, symbol in enumerate(symbols):
+            df = aligned[symbol]
+            for f, field in enumerate(fields):
+                if field in df.columns:
+                    panel[:, a, f] = df[field].to_numpy(dtype=np.float64)
+        return panel
+
+    @staticmethod
+    def result_instrument(result: Dict[str, Any]) -> Optional[str]:
+        """結果所屬的交易標的（full 取自 records，trades_only 取自精簡陣列）"""
+        if SparseRecords_backtester.is_sparse_result(result):
+            return result["bar_data"].get(PARTITION_COLUMN)
+        records = result.get("records")
+        if (
+            isinstance(records, pd.DataFrame)
+            and not records.empty
+            and PARTITION_COLUMN in records.columns
+        ):
+            return str(records[PARTITION_COLUMN].iloc[0])
+        return result.get("trading_instrument")
+
+    @staticmethod
+    def partition_dir(dataset_dir: str, instrument: str) -> str:
+        """標的的 hive 分區目錄"""
+        return os.path.join(dataset_dir, f"{PARTITION_COLUMN}={instrument}")
+
+    @staticmethod
+    def records_root(parquet_path: str) -> str:
+        """
+        由回測 Parquet 路徑找回 records 目錄
+
+        一般檔案為 records/backtester/<檔名>.parquet；分區檔案為
+        records/backtester/<資料集>/Trading_instrument=<標的>/<檔名>.parquet
+        """
+        directory = os.path.dirname(os.path.abspath(parquet_path))
+        if os.path.basename(directory).startswith(f"{PARTITION_COLUMN}="):
+            directory = os.path.dirname(os.path.dirname(directory))
+        return os.path.dirname(directory)
+
+    @staticmethod
+    def read_dataset(
+        dataset_dir: str, instruments: Optional[List[str]] = None
+    ) -> pd.DataFrame:
+        """讀取分區資料集（還原 Trading_instrument 欄位），可只讀取指定標的"""
+        dataset = ds.dataset(
+            dataset_dir,
+            format="parquet",
+            partitioning="hive",
+            exclude_invalid_files=True,
+        )
+        filter_expr = (
+            ds.field(PARTITION_COLUMN).isin(list(instruments))
+            if instruments is not None
+            else None
+        )
+        df = dataset.to_table(filter=filter_expr).to_pandas()
+        if PARTITION_COLUMN in df.columns:
+            df[PARTITION_COLUMN] = df[PARTITION_COLUMN].astype(str)
+        return df
@@ -0,0 +1,511 @@
+"""
+ParameterSearch_backtester.py
+
+【功能說明】
+------------------------------------------------------------
+本模組為 Lo2cin4BT 回測框架的智能參數搜索，在與網格回測相同的參數空間中，以自適應方式
+分配計算預算，取代完整笛卡兒積（itertools.product）的窮舉回測：
+- halving：連續減半（successive halving），先在較短的近期歷史上評估大量組合，逐輪保留
+  前 1/eta 並延長歷史，最後一輪使用完整數據
+- tpe：樹狀 Parzen 估計器（TPE），依已評估組合的好/壞分布抽樣候選，選擇 l(x)/g(x) 最大者
+- genetic：遺傳演算法，錦標賽選擇、同策略均勻交叉、索引高斯突變與精英保留
+- 以 MetricsCalculatorMetricTracker 計算目標績效（Sharpe、Calmar 等）作為評分
+
+【流程與數據流】
+------------------------------------------------------------
+- VectorBacktestEngine.run_search(config) 建立 ParameterSearch 並提供批次評估函數
+- ParameterSpace 以「策略 + 各指標槽位的參數索引」編碼組合，不展開完整參數網格
+- 每批候選組合交由引擎的向量化回測一次評估，回傳前 top_k 個組合的完整數據回測結果
+
+```mermaid
+flowchart TD
+    A[config["search"]] -->|method| B[ParameterSearch]
+    B -->|抽樣/提議| C[ParameterSpace.decode]
+    C -->|參數組合批次| D[VectorBacktestEngine 向量化回測]
+    D -->|結果| E[MetricsCalculatorMetricTracker 評分]
+    E -->|分數| B
+    B -->|top_k 結果 + 每秒評估數| F[導出/績效分析]
+```
+
+【維護與擴充重點】
+------------------------------------------------------------
+- 參數空間與 generate_parameter_combinations 一致：每個條件配對的開倉/平倉指標槽位，
+  候選值為 config["indicator_params"] 中對應的 IndicatorParams 列表
+- 槽位內的相鄰索引視為相鄰參數（範圍參數依序生成），TPE 核密度與遺傳突變依此定義距離
+- 一個組合會對所有預測因子回測，組合分數取各預測因子的最高分
+- 新增搜索方法時，請同步更新 SEARCH_METHODS、README 與 autorunner 配置模板
+
+【常見易錯點】
+------------------------------------------------------------
+- max_evaluations 計算的是評估的參數組合數（連續減半中每輪重新評估都計入）
+- 無交易或指標為 NaN 的組合分數為 -inf，不會進入排行
+- 連續減半的短歷史只取最近的K線，指標暖身期會佔較大比例
+
+【範例】
+------------------------------------------------------------
+- config["search"] = {"method": "halving", "objective": "sharpe", "max_evaluations": 300}
+- config["search"] = {"method": "tpe", "objective": "calmar", "max_evaluations": 200, "batch_size": 16}
+- config["search"] = {"method": "genetic", "population": 32, "max_evaluations": 320}
+- results = VectorBacktestEngine(data, "1D").run_search(config)
+
+【與其他模組的關聯】
+------------------------------------------------------------
+- 由 VectorBacktestEngine.run_search 調用，autorunner 以 backtester.search 配置選擇
+- 依賴 metricstracker 的 MetricsCalculatorMetricTracker 計算目標績效
+"""
+
+import math
+import time
+from typing import Any, Callable, Dict, List, Optional, Sequence, Set, Tuple
+
+import numpy as np
+import pandas as pd
+
+from metricstracker.MetricsCalculator_metricstracker import (
+    MetricsCalculatorMetricTracker,
+)
+
+from .SparseRecords_backtester import SparseRecords_backtester
+
+SEARCH_METHODS = ("halving", "tpe", "genetic")
+
+# 可作為搜索目標的績效指標（MetricsCalculatorMetricTracker 的無參數方法）
+SEARCH_OBJECTIVES = (
+    "sharpe",
+    "sortino",
+    "calmar",
+    "total_return",
+    "annualized_return",
+    "recovery_factor",
+)
+
+# 組合編碼：(策略位置, 各槽位的參數索引)
+Genome = Tuple[int, Tuple[int, ...]]
+
+
+class ParameterSpace:
+    """參數空間：各條件配對的指標參數槽位，以索引編碼參數組合，不展開完整笛卡兒積"""
+
+    def __init__(
+        self, condition_pairs: List[Dict[str, Any]], indicator_params: Dict[str, List]
+    ) -> None:
+        self.strategies: List[Tuple[str, List[List[Any]]]] = []
+        for i, pair in enumerate(condition_pairs):
+            slots = [
+                indicator_params.get(f"{indicator}_strategy_{i + 1}", [])
+                for indicator in list(pair["entry"]) + list(pair["exit"])
+            ]
+            # 任一槽位沒有候選參數時，網格回測也不會產生該策略的組合
+            if any(len(slot) == 0 for slot in slots):
+                continue
+            self.strategies.append((f"strategy_{i + 1}", slots))
+        self.sizes = np.array(
+            [math.prod(len(slot) for slot in slots) for _, slots in self.strategies],
+            dtype=np.float64,
+        )
+        self.total = int(self.sizes.sum())
+
+    def decode(self, genome: Genome) -> Tuple[Any, ...]:
+        """編碼 → 參數組合（與 generate_parameter_combinations 的元素格式一致）"""
+        strategy_id, slots = self.strategies[genome[0]]
+        return tuple(slot[idx] for slot, idx in zip(slots, genome[1])) + (strategy_id,)
+
+    def slot_lengths(self, strategy_pos: int) -> List[int]:
+        """指定策略各槽位的候選參數數"""
+        return [len(slot) for slot in self.strategies[strategy_pos][1]]
+
+    def sample(self, rng: np.random.Generator) -> Genome:
+        """在整個參數空間中均勻抽樣一個組合"""
+        weights = self.sizes / self.sizes.sum()
+        strategy_pos = int(rng.choice(len(self.strategies), p=weights))
+        return strategy_pos, tuple(
+            int(rng.integers(length)) for length in self.slot_lengths(strategy_pos)
+        )
+
+    def enumerate_all(self) -> List[Genome]:
+        """列出所有組合（只在剩餘空間小於一個批次時使用）"""
+        genomes = []
+        for strategy_pos in range(len(self.strategies)):
+            for idx in np.ndindex(*self.slot_lengths(strategy_pos)):
+                genomes.append((strategy_pos, tuple(int(i) for i in idx)))
+        return genomes
+
+    def sample_unique(
+        self, rng: np.random.Generator, n: int, seen: Set[Genome]
+    ) -> List[Genome]:
+        """抽樣最多 n 個未評估過的組合"""
+        remaining = self.total - len(seen)
+        if remaining <= 0:
+            return []
+        if remaining <= n:
+            return [g for g in self.enumerate_all() if g not in seen]
+        picked: List[Genome] = []
+        picked_set: Set[Genome] = set()
+        attempts = 0
+        while len(picked) < n and attempts < n * 50:
+            genome = self.sample(rng)
+            attempts += 1
+            if genome not in seen and genome not in picked_set:
+                picked.append(genome)
+                picked_set.add(genome)
+        return picked
+
+
+class ParameterSearch:
+    """自適應參數搜索：連續減半、TPE、遺傳演算法"""
+
+    def __init__(
+        self,
+        space: ParameterSpace,
+        evaluate: Callable[[List[Tuple[Any, ...]], Optional[int]], List[Dict]],
+        n_predictors: int,
+        n_bars: int,
+        search_config: Dict[str, Any],
+    ) -> None:
+        """
+        Args:
+            space: 參數空間
+            evaluate: 批次評估函數 (參數組合列表, 最近K線數或 None) -> 回測結果列表，
+                結果順序為組合為外層、預測因子為內層
+            n_predictors: 每個組合回測的預測因子數
+            n_bars: 完整數據的K線數
+            search_config: config["search"]
+        """
+        self.space = space
+        self.evaluate = evaluate
+        self.n_predictors = max(int(n_predictors), 1)
+        self.n_bars = n_bars
+
+        self.method = search_config.get("method", "halving")
+        if self.method not in SEARCH_METHODS:
+            raise ValueError(f"不支援的搜索方法: {self.method}，可選值為 {SEARCH_METHODS}")
+        self.objective = search_config.get("objective", "sharpe")
+        if self.objective not in SEARCH_OBJECTIVES:
+            raise ValueError(
+                f"不支援的搜索目標: {self.objective}，可選值為 {SEARCH_OBJECTIVES}"
+            )
+        self.max_evaluations = int(search_config.get("max_evaluations", 200))
+        self.batch_size = max(1, int(search_config.get("batch_size", 32)))
+        self.top_k = max(1, int(search_config.get("top_k", 10)))
+        self.time_unit = float(search_config.get("time_unit", 365))
+        self.risk_free_rate = float(search_config.get("risk_free_rate", 0.04))
+        self.search_config = search_config
+        self.rng = np.random.default_rng(search_config.get("seed"))
+
+        self.n_evaluations = 0  # 已評估的參數組合數
+        self.n_backtests = 0  # 已執行的回測數（組合數 x 預測因子數）
+        self.scores: Dict[Genome, float] = {}  # 完整數據上的組合分數
+        self._best: List[Tuple[float, Genome, List[Dict]]] = []
+
+    # ------------------------------------------------------------------
+    # 評分
+    # ------------------------------------------------------------------
+
+    @staticmethod
+    def score_result(
+        result: Dict[str, Any], objective: str, time_unit: float, risk_free_rate: float
+    ) -> float:
+        """以 MetricsCalculatorMetricTracker 計算單個回測結果的目標績效，無效時為 -inf"""
+        if result.get("error") is not None:
+            return -np.inf
+        if SparseRecords_backtester.is_sparse_result(result):
+            bar_data = result["bar_data"]
+            returns = np.asarray(bar_data["returns"], dtype=np.float64)
+            equity = np.asarray(bar_data["equity_values"], dtype=np.float64)
+            has_trade = len(result["records"]) > 0
+        else:
+            records = result.get("records")
+            if not isinstance(records, pd.DataFrame) or records.empty:
+                return -np.inf
+            returns = records["Return"].to_numpy(dtype=np.float64)
+            equity = records["Equity_value"].to_numpy(dtype=np.float64)
+            has_trade = bool((records["Trade_action"] == 1).any())
+        if not has_trade or len(equity) < 2 or equity[0] == 0:
+            return -np.inf
+
+        calculator = MetricsCalculatorMetricTracker(
+            pd.DataFrame({"Return": returns, "Equity_value": equity}),
+            time_unit,
+            risk_free_rate,
+        )
+        value = getattr(calculator, objective)()
+        try:
+            value = float(value)
+        except (TypeError, ValueError):
+            return -np.inf
+        return value if np.isfinite(value) else -np.inf
+
+    def _evaluate_batch(
+        self, genomes: List[Genome], n_bars: Optional[int] = None
+    ) -> Tuple[List[float], List[List[Dict]]]:
+        """評估一批組合，回傳各組合分數（各預測因子最高分）與其回測結果"""
+        if not genomes:
+            return [], []
+        combos = [self.space.decode(g) for g in genomes]
+        results = self.evaluate(combos, n_bars)
+        if len(results) != len(combos) * self.n_predictors:
+            raise RuntimeError(
+                f"搜索評估結果數 {len(results)} 與任務數 "
+                f"{len(combos) * self.n_predictors} 不一致"
+            )
+        self.n_evaluations += len(genomes)
+        self.n_backtests += len(results)
+
+        scores = []
+        grouped = []
+        for i in range(len(genomes)):
+            combo_results = results[i * self.n_predictors : (i + 1) * self.n_predictors]
+            scores.append(
+                max(
+                    self.score_result(
+                        r, self.objective, self.time_unit, self.risk_free_rate
+                    )
+                    for r in combo_results
+                )
+            )
+            grouped.append(combo_results)
+        return scores, grouped
+
+    def _record_full(
+        self, genomes: List[Genome], scores: List[float], grouped: List[List[Dict]]
+    ) -> None:
+        """記錄完整數據上的分數，只保留前 top_k 個組合的回測結果"""
+        for genome, score, combo_results in zip(genomes, scores, grouped):
+            self.scores[genome] = score
+            self._best.append((score, genome, combo_results))
+        self._best.sort(key=lambda item: item[0], reverse=True)
+        del self._best[self.top_k :]
+
+    def _budget_left(self) -> int:
+        return self.max_evaluations - self.n_evaluations
+
+    # ------------------------------------------------------------------
+    # 搜索方法
+    # ------------------------------------------------------------------
+
+    def run(self) -> Dict[str, Any]:
+        """
+        執行搜索
+
+        Returns:
+            dict: results（前 top_k 組合的完整數據回測結果，依分數排序）、leaderboard、
+                  evaluations、backtests、elapsed、evaluations_per_second（參數組合/秒）、
+                  backtests_per_second（回測/秒）
+        """
+        if self.space.total == 0:
+            raise ValueError("參數空間為空，請檢查 condition_pairs 與 indicator_params")
+
+        start_time = time.time()
+        if self.method == "halving":
+            self._run_halving()
+        elif self.method == "tpe":
+            self._run_tpe()
+        else:
+            self._run_genetic()
+        elapsed = time.time() - start_time
+
+        results = [r for _, _, combo_results in self._best for r in combo_results]
+        leaderboard = [
+            {
+                "score": score,
+                "strategy_id": combo_results[0].get("strategy_id") if combo_results else "",
+                "params": combo_results[0].get("params") if combo_results else {},
+            }
+            for score, _, combo_results in self._best
+        ]
+        return {
+            "results": results,
+            "leaderboard": leaderboard,
+            "evaluations": self.n_evaluations,
+            "backtests": self.n_backtests,
+            "space_size": self.space.total,
+            "elapsed": elapsed,
+            "evaluations_per_second": (
+                self.n_evaluations / elapsed if elapsed > 0 else 0.0
+            ),
+            "backtests_per_second": self.n_backtests / elapsed if elapsed > 0 else 0.0,
+        }
+
+    def _run_halving(self) -> None:
+        """連續減半：短歷史上評估大量組合，逐輪保留前 1/eta 並延長歷史"""
+        eta = max(2, int(self.search_config.get("eta", 3)))
+        min_fraction = float(self.search_config.get("min_fraction", 0.25))
+        if self.n_bars:
+            min_fraction = max(min_fraction, 1.0 / self.n_bars)
+        min_fraction = min(min_fraction, 1.0)
+        n_rungs = max(1, int(math.floor(math.log(1.0 / min_fraction, eta) + 1e-9)) + 1)
+        fractions = [min(1.0, min_fraction * eta**k) for k in range(n_rungs)]
+        fractions[-1] = 1.0
+
+        # 初始組合數：各輪組合數依 1/eta 遞減，總評估數不超過 max_evaluations
+        n_initial = int(self.max_evaluations / sum(eta**-k for k in range(n_rungs)))
+        n_initial = max(1, min(n_initial, self.space.total))
+        survivors = self.space.sample_unique(self.rng, n_initial, set())
+
+        for rung, fraction in enumerate(fractions):
+            if rung > 0:
+                keep = max(1, len(survivors) // eta)
+                survivors = survivors[:keep]
+            n_bars = None if fraction >= 1.0 else max(2, int(self.n_bars * fraction))
+            scores: List[float] = []
+            grouped: List[List[Dict]] = []
+            for start in range(0, len(survivors), self.batch_size):
+                batch_scores, batch_results = self._evaluate_batch(
+                    survivors[start : start + self.batch_size], n_bars
+                )
+                scores.extend(batch_scores)
+                # 短歷史的結果只用於篩選，不保留
+                grouped.extend(
+                    batch_results if n_bars is None else [[]] * len(batch_scores)
+                )
+            if n_bars is None:
+                self._record_full(survivors, scores, grouped)
+                break
+            order = np.argsort(-np.asarray(scores), kind="stable")
+            survivors = [survivors[i] for i in order]
+
+    def _run_tpe(self) -> None:
+        """TPE：依好/壞組合的 Parzen 密度比 l(x)/g(x) 提議候選"""
+        n_startup = int(self.search_config.get("n_startup", max(self.batch_size, 10)))
+        while self._budget_left() > 0:
+            n = min(self.batch_size, self._budget_left())
+            if len(self.scores) < n_startup:
+                batch = self.space.sample_unique(
+                    self.rng, min(n, n_startup - len(self.scores)), set(self.scores)
+                )
+            else:
+                batch = self._tpe_propose(n)
+            if not batch:
+                break
+            self._record_full(batch, *self._evaluate_batch(batch))
+
+    def _tpe_propose(self, n: int) -> List[Genome]:
+        """由好/壞組合的離散核密度抽樣候選，選擇密度比最大的 n 個未評估組合"""
+        gamma = float(self.search_config.get("gamma", 0.25))
+        n_candidates = int(self.search_config.get("n_candidates", 64))
+        ranked = sorted(self.scores.items(), key=lambda item: item[1], reverse=True)
+        n_good = max(1, int(math.ceil(gamma * len(ranked))))
+        good = [g for g, _ in ranked[:n_good]]
+        bad = [g for g, _ in ranked[n_good:]] or good
+
+        n_strategies = len(self.space.strategies)
+        prior = self.space.sizes / self.space.sizes.sum()
+
+        def strategy_density(genomes: List[Genome]) -> np.ndarray:
+            counts = np.bincount([g[0] for g in genomes], minlength=n_strategies)
+            return (counts + prior) / (len(genomes) + 1.0)
+
+        def slot_density(genomes: List[Genome], strategy_pos: int) -> List[np.ndarray]:
+            densities = []
+            members = [g[1] for g in genomes if g[0] == strategy_pos]
+            for j, length in enumerate(self.space.slot_lengths(strategy_pos)):
+                grid = np.arange(length, dtype=np.float64)
+                density = np.full(length, 1.0 / length)
+                if members:
+                    bandwidth = max(1.0, length / (len(members) + 1.0))
+                    centers = np.array([m[j] for m in members], dtype=np.float64)
+                    distance = (grid[None, :] - centers[:, None]) / bandwidth
+                    kernel = np.exp(-0.5 * distance**2)
+                    kernel /= kernel.sum(axis=1, keepdims=True)
+                    density = (density + kernel.sum(axis=0)) / (len(members) + 1.0)
+                densities.append(density)
+            return densities
+
+        l_strategy, g_strategy = strategy_density(good), strategy_density(bad)
+        l_slots: Dict[int, List[np.ndarray]] = {}
+        g_slots: Dict[int, List[np.ndarray]] = {}
+
+        candidates: Dict[Genome, float] = {}
+        for _ in range(n_candidates):
+            strategy_pos = int(
+                self.rng.choice(n_strategies, p=l_strategy / l_strategy.sum())
+            )
+            if strategy_pos not in l_slots:
+                l_slots[strategy_pos] = slot_density(good, strategy_pos)
+                g_slots[strategy_pos] = slot_density(bad, strategy_pos)
+            idx = tuple(
+                int(self.rng.choice(len(density), p=density / density.sum()))
+                for density in l_slots[strategy_pos]
+            )
+            genome = (strategy_pos, idx)
+            if genome in self.scores or genome in candidates:
+                continue
+            log_ratio = math.log(l_strategy[strategy_pos]) - math.log(
+                g_strategy[strategy_pos]
+            )
+            for j, i in enumerate(idx):
+                log_ratio += math.log(l_slots[strategy_pos][j][i]) - math.log(
+                    g_slots[strategy_pos][j][i]
+                )
+            candidates[genome] = log_ratio
+
+        proposed = sorted(candidates, key=candidates.get, reverse=True)[:n]
+        if len(proposed) < n:
+            proposed += self.space.sample_unique(
+                self.rng, n - len(proposed), set(self.scores) | set(proposed)
+            )
+        return proposed
+
+    def _run_genetic(self) -> None:
+        """遺傳演算法：錦標賽選擇、同策略均勻交叉、索引高斯突變、精英保留"""
+        population_size = int(self.search_config.get("population", self.batch_size))
+        mutation_rate = float(self.search_config.get("mutation_rate", 0.2))
+        tournament = max(2, int(self.search_config.get("tournament_size", 3)))
+
+        population = self.space.sample_unique(
+            self.rng, min(population_size, self._budget_left()), set()
+        )
+        self._record_full(population, *self._evaluate_batch(population))
+
+        while self._budget_left() > 0:
+            n_children = min(population_size, self._budget_left())
+            children: List[Genome] = []
+            seen = set(self.scores)
+            for _ in range(n_children * 10):
+                if len(children) >= n_children:
+                    break
+                child = self._mutate(
+                    self._crossover(
+                        self._tournament(population, tournament),
+                        self._tournament(population, tournament),
+                    ),
+                    mutation_rate,
+                )
+                if child not in seen:
+                    children.append(child)
+                    seen.add(child)
+            if len(children) < n_children:
+                children += self.space.sample_unique(
+                    self.rng, n_children - len(children), seen
+                )
+            if not children:
+                break
+            self._record_full(children, *self._evaluate_batch(children))
+            population = sorted(
+                population + children, key=lambda g: self.scores[g], reverse=True
+            )[:population_size]
+
+    def _tournament(self, population: Sequence[Genome], size: int) -> Genome:
+        picks = self.rng.choice(
+            len(population), size=min(size, len(population)), replace=False
+        )
+        return max((population[i] for i in picks), key=lambda g: self.scores[g])
+
+    def _crossover(self, a: Genome, b: Genome) -> Genome:
+        if a[0] != b[0]:
+            return a
+        mask = self.rng.random(len(a[1])) < 0.5
+        return a[0], tuple(x if m else y for x, y, m in zip(a[1], b[1], mask))
+
+    def _mutate(self, genome: Genome, mutation_rate: float) -> Genome:
+        strategy_pos, idx = genome
+        lengths = self.space.slot_lengths(strategy_pos)
+        mutated = []
+        for i, length in zip(idx, lengths):
+            if length > 1 and self.rng.random() < mutation_rate:
+                step = int(round(self.rng.normal(0.0, max(1.0, length / 6.0)))) or int(
+                    self.rng.choice([-1, 1])
+                )
+                i = int(np.clip(i + step, 0, length - 1))
+            mutated.append(i)
+        return strategy_pos, tuple(mutated)
@@ -9,6 +9,8 @@ Percentile_Indicator_backtester.py
 - 支援單百分位和百分位區間兩種模式
 - 內建 Numba JIT 優化，提升計算性能
 - 支援向量化計算，適合批量參數優化
+- 滾動百分位使用排序環形緩衝區，每個窗口長度只滑動一次即可回答所有百分位；窗口含 NaN 時輸出 NaN，NaN 不進入排序陣列
+- 向量化信號由 _batch_percentile_signals_njit 以 prange 一次寫入 int8 信號張量
 
 架構流程：
 A[IndicatorsBacktester] -->|調用| B[Percentile_Indicator]
@@ -46,7 +48,7 @@ from .IndicatorParams_backtester import IndicatorParams
 
 # 優化：嘗試導入 Numba 進行 JIT 編譯加速
 try:
-    from numba import njit
+    from numba import njit, prange
 
     NUMBA_AVAILABLE = True
 except ImportError:
@@ -57,20 +59,159 @@ except ImportError:
 if NUMBA_AVAILABLE:
 
     @njit(fastmath=True, cache=True)
-    def _calculate_rolling_percentile_njit(data, window, percentile):
-        """使用 Numba 計算滾動百分位"""
+    def _sorted_search_njit(sorted_values, size, value):
+        """二分搜尋：回傳 value 在 sorted_values[:size] 中的插入位置（左側）"""
+        lo = 0
+        hi = size
+        while lo < hi:
+            mid = (lo + hi) // 2
+            if sorted_values[mid] < value:
+                lo = mid + 1
+            else:
+                hi = mid
+        return lo
+
+    # 不使用 fastmath：需保留 NaN 判斷，fastmath 會假設輸入不含 NaN 而省略檢查
+    @njit(cache=True)
+    def _calculate_rolling_percentiles_njit(data, window, percentiles):
+        """
+        使用排序環形緩衝區計算滾動百分位（一次滑動回答所有百分位）
+
+        窗口維持一份已排序陣列：每根K線以二分搜尋刪除離開窗口的舊值、插入新值，
+        再以與 np.percentile 相同的線性插值讀出所有要求的百分位。
+        每個窗口長度只需滑動一次，即可得到全部百分位。
+        NaN 不放入排序陣列（無法排序），只計數；窗口內含 NaN 時輸出 NaN（與 np.percentile 一致）。
+
+        Returns:
+            形狀為 (n_percentiles, n_time) 的矩陣，窗口未滿的位置為 0
+        """
         n = len(data)
-        result = np.zeros(n)
+        n_percentiles = len(percentiles)
+        result = np.zeros((n_percentiles, n))
+        if window <= 0 or window > n:
+            return result
+
+        # 預先計算各百分位的插值位置
+        lower_idx = np.empty(n_percentiles, dtype=np.int64)
+        upper_idx = np.empty(n_percentiles, dtype=np.int64)
+        fractions = np.empty(n_percentiles)
+        for k in range(n_percentiles):
+            rank = percentiles[k] / 100.0 * (window - 1)
+            lo = int(np.floor(rank))
+            if lo < 0:
+                lo = 0
+            if lo > window - 1:
+                lo = window - 1
+            lower_idx[k] = lo
+            upper_idx[k] = lo + 1 if lo + 1 < window else window - 1
+            fractions[k] = rank - lo
+
+        sorted_values = np.empty(window)
+        size = 0
+        n_nan = 0
+        for i in range(n):
+            # 移除離開窗口的舊值
+            if i >= window:
+                old_value = data[i - window]
+                if np.isnan(old_value):
+                    n_nan -= 1
+                else:
+                    pos = _sorted_search_njit(sorted_values, size, old_value)
+                    for j in range(pos, size - 1):
+                        sorted_values[j] = sorted_values[j + 1]
+                    size -= 1
+
+            # 插入新值
+            value = data[i]
+            if np.isnan(value):
+                n_nan += 1
+            else:
+                pos = _sorted_search_njit(sorted_values, size, value)
+                for j in range(size, pos, -1):
+                    sorted_values[j] = sorted_values[j - 1]
+                sorted_values[pos] = value
+                size += 1
+
+            if i >= window - 1:
+                if n_nan > 0:
+                    for k in range(n_percentiles):
+                        result[k, i] = np.nan
+                    continue
+                for k in range(n_percentiles):
+                    low_value = sorted_values[lower_idx[k]]
+                    high_value = sorted_values[upper_idx[k]]
+                    result[k, i] = low_value + (high_value - low_value) * fractions[k]
+
+        return result
 
-        for i in range(window - 1, n):
-            # 提取窗口數據
-            window_data = data[i - window + 1 : i + 1]
-            # 使用 numpy 的百分位計算（更準確）
-            result[i] = np.percentile(window_data, percentile)
+    @njit(fastmath=True, cache=True)
+    def _calculate_rolling_percentile_njit(data, window, percentile):
+        """使用 Numba 計算滾動百分位（排序環形緩衝區）"""
+        percentiles = np.empty(1)
+        percentiles[0] = percentile
+        result = _calculate_rolling_percentiles_njit(data, window, percentiles)[0]
 
         # 確保返回值的數據類型與輸入數據一致
         return result.astype(data.dtype)
 
+    @njit(parallel=True, fastmath=True, cache=True)
+    def _batch_percentile_signals_njit(
+        predictor_values,
+        percentile_matrix,
+        rows1,
+        rows2,
+        windows,
+        m1_values,
+        m2_values,
+        strat_indices,
+        task_cols,
+        indicator_cols,
+        signals_matrix,
+    ):
+        """
+        批量生成PERC1-6信號，直接寫入 int8 信號張量
+
+        PERC1-4 讀取 percentile_matrix 的 rows1[k] 列判斷升穿/跌破；
+        PERC5-6 判斷預測因子是否位於 rows1[k]（m1）與 rows2[k]（m2）兩列之間。
+        以 prange 並行處理所有任務，寫入 signals_matrix[:, task_cols[k], indicator_cols[k]]；
+        列索引 < 0 表示百分位不可用（如窗口超過數據長度），保持 0 信號。
+        """
+        n = len(predictor_values)
+        for k in prange(len(strat_indices)):
+            strat_idx = strat_indices[k]
+            row1 = rows1[k]
+            if row1 < 0:
+                continue
+            col = task_cols[k]
+            indicator = indicator_cols[k]
+            window = windows[k]
+            signal_value = 1 if (strat_idx % 2 == 1) else -1
+
+            if 1 <= strat_idx <= 4:
+                for i in range(max(window - 1, 1), n):
+                    prev_val = predictor_values[i - 1]
+                    curr_val = predictor_values[i]
+                    percentile_val = percentile_matrix[row1, i]
+                    if strat_idx <= 2:  # 升穿 m 百分位
+                        if prev_val <= percentile_val and curr_val > percentile_val:
+                            signals_matrix[i, col, indicator] = signal_value
+                    else:  # 跌破 m 百分位
+                        if prev_val >= percentile_val and curr_val < percentile_val:
+                            signals_matrix[i, col, indicator] = signal_value
+
+            elif strat_idx == 5 or strat_idx == 6:
+                row2 = rows2[k]
+                # 確保 m1 < m2
+                if row2 < 0 or m1_values[k] >= m2_values[k]:
+                    continue
+                for i in range(max(window - 1, 0), n):
+                    curr_val = predictor_values[i]
+                    if (
+                        curr_val >= percentile_matrix[row1, i]
+                        and curr_val <= percentile_matrix[row2, i]
+                    ):
+                        signals_matrix[i, col, indicator] = signal_value
+
     @njit(fastmath=True, cache=True)
     def _generate_percentile_signals_njit(
         predictor_values, percentile_values, strat_idx, window, m1=None, m2=None
@@ -361,7 +502,7 @@ class PercentileIndicator:
         Args:
             tasks: 任務列表，每個任務包含 (task_idx, indicator_idx, param)
             predictor: 預測因子名稱
-            signals_matrix: 信號矩陣 [時間點, 任務數, 指標數]
+            signals_matrix: int8 信號矩陣 [時間點, 任務數, 指標數]
             global_percentile_cache: 全局緩存字典，避免重複計算
             data: 數據DataFrame，如果為None則使用實例的data
 
@@ -414,18 +555,34 @@ class PercentileIndicator:
         predictor_values = np.nan_to_num(predictor_values, nan=0.0)
 
         # 批量計算所有參數的百分位值 - 使用Numba優化
-        unique_combinations = list(set(zip(windows, percentiles)))
+        # 按窗口長度歸集所有需要的百分位（含 PERC5/6 的 m1/m2），每個窗口只滑動一次
+        window_percentiles = {}
+        range_idx = 0
+        for window, percentile, strat_idx in zip(windows, percentiles, strat_indices):
+            if strat_idx in [1, 2, 3, 4]:
+                required = [percentile]
+            else:
+                required = [m1_values[range_idx], m2_values[range_idx]]
+                range_idx += 1
+            for value in required:
+                if (window, value, predictor) not in global_percentile_cache:
+                    window_percentiles.setdefault(window, set()).add(value)
 
-        for window, percentile in unique_combinations:
+        for window, required in window_percentiles.items():
             if window <= len(data):
-                cache_key = (window, percentile, predictor)
-                if cache_key not in global_percentile_cache:
-                    # 使用Numba優化的函數計算百分位
-                    if NUMBA_AVAILABLE:
-                        percentile_values = _calculate_rolling_percentile_njit(
-                            predictor_values, window, percentile
+                if NUMBA_AVAILABLE:
+                    required = sorted(required)
+                    percentile_matrix = _calculate_rolling_percentiles_njit(
+                        predictor_values,
+                        window,
+                        np.array(required, dtype=np.float64),
+                    )
+                    for row, percentile in enumerate(required):
+                        global_percentile_cache[(window, percentile, predictor)] = (
+                            percentile_matrix[row]
                         )
-                    else:
+                else:
+                    for percentile in required:
                         # 備用方案：使用pandas rolling
                         percentile_values = (
                             data[predictor]
@@ -434,9 +591,66 @@ class PercentileIndicator:
                             .values
                         )
                         percentile_values = np.nan_to_num(percentile_values, nan=0.0)
+                        global_percentile_cache[(window, percentile, predictor)] = (
+                            percentile_values
+                        )
 
-                    global_percentile_cache[cache_key] = percentile_values
+        if NUMBA_AVAILABLE:
+            # 將各任務需要的百分位堆疊成矩陣，以單次並行 Numba 調用寫入 int8 信號張量
+            percentile_index = {}
+            percentile_list = []
+
+            def percentile_row(key):
+                if key not in global_percentile_cache:
+                    return -1
+                if key not in percentile_index:
+                    percentile_index[key] = len(percentile_list)
+                    percentile_list.append(global_percentile_cache[key])
+                return percentile_index[key]
+
+            rows1 = []
+            rows2 = []
+            batch_m1 = []
+            batch_m2 = []
+            range_idx = 0
+            for window, percentile, strat_idx in zip(
+                windows, percentiles, strat_indices
+            ):
+                if strat_idx in [1, 2, 3, 4]:
+                    rows1.append(percentile_row((window, percentile, predictor)))
+                    rows2.append(-1)
+                    batch_m1.append(0.0)
+                    batch_m2.append(0.0)
+                else:
+                    m1 = m1_values[range_idx]
+                    m2 = m2_values[range_idx]
+                    range_idx += 1
+                    rows1.append(percentile_row((window, m1, predictor)))
+                    rows2.append(percentile_row((window, m2, predictor)))
+                    batch_m1.append(m1)
+                    batch_m2.append(m2)
+
+            if percentile_list:
+                percentile_matrix = np.vstack(percentile_list)
+            else:
+                percentile_matrix = np.zeros((0, len(predictor_values)))
+
+            _batch_percentile_signals_njit(
+                predictor_values,
+                percentile_matrix,
+                np.array(rows1, dtype=np.int64),
+                np.array(rows2, dtype=np.int64),
+                np.array(windows, dtype=np.int64),
+                np.array(batch_m1, dtype=np.float64),
+                np.array(batch_m2, dtype=np.float64),
+                np.array(strat_indices, dtype=np.int64),
+                np.array(task_indices, dtype=np.int64),
+                np.array(indicator_indices, dtype=np.int64),
+                signals_matrix,
+            )
+            return
 
+        # 備用實現：逐任務生成信號
         # 為每個任務生成信號 - 使用Numba優化
         for i, (window, percentile, strat_idx, task_idx, indicator_idx) in enumerate(
             zip(windows, percentiles, strat_indices, task_indices, indicator_indices)
@@ -0,0 +1,496 @@
+"""
+ResultStore_backtester.py
+
+【功能說明】
+------------------------------------------------------------
+本模組為 Lo2cin4BT 回測框架的分區結果儲存（result_store = "dataset"），取代「單一大 Parquet +
+_metadata.json」的導出格式，讓下游只讀取需要的策略、回測與欄位：
+- 資料集以策略條件組（Condition_pair，如 MA1_MA4）與 Predictor 做 hive 分區
+  （<資料集>/Condition_pair=<條件組>/Predictor=<預測因子>/part-0.parquet）
+- 分區檔案內每個 Backtest_id 佔一個 row group，row group 統計量讓 Backtest_id 篩選可跳過其他回測
+- 資料集根目錄的 _index.parquet 為指標索引：每個回測一列，包含 batch_metadata、績效指標
+  （有 inline_metrics 或 metricstracker 計算後）與檔案/row group 位置
+- 讀取時先以索引做謂詞下推（如 Sharpe > 1、Condition_pair = ...）挑選回測，
+  再只讀取對應分區與 row group 的指定欄位
+- 多標的回測再以 Trading_instrument 作為第一層分區
+  （<資料集>/Trading_instrument=<標的>/Condition_pair=.../Predictor=.../part-0.parquet）
+
+【流程與數據流】
+------------------------------------------------------------
+- TradeRecordExporter.export_dataset 調用 write_dataset 寫出資料集與索引
+- MetricsExporter.export_dataset 以 read_records 讀回完整記錄，計算績效後寫出
+  records/metricstracker/<資料集>_metrics/ 指標資料集（同樣分區並附索引）
+- plotter 與 records/Read_parquet.py 以 read_index / read 做欄位裁剪與謂詞下推
+
+```mermaid
+flowchart TD
+    A[TradeRecordExporter.export_dataset] -->|write_dataset| B[Condition_pair/Predictor 分區資料集]
+    A -->|batch_metadata + 指標| C[_index.parquet]
+    C -->|select 謂詞下推| D[Backtest_id 清單]
+    D -->|read 分區裁剪 + row group 統計| B
+    B -->|read_records| E[MetricsExporter / plotter / Read_parquet]
+```
+
+【維護與擴充重點】
+------------------------------------------------------------
+- 分區檔案不含 Condition_pair / Predictor 欄位（hive 慣例，讀取時由目錄名還原）
+- 底線開頭的輔助檔（_index.parquet、trades_only 的 _bars.npz）不會被資料集讀取
+- 所有分區檔案使用同一 schema（先合併再切分），資料集推斷 schema 時不會遺失欄位
+- batch_metadata 中的巢狀欄位（如 Entry_params）在索引中以 JSON 字串保存，
+  欄位名記錄於索引 schema metadata 的 json_columns，read_batch_metadata 會還原
+- 索引 schema metadata 的 metrics_config 記錄指標的 time_unit / risk_free_rate
+- 分區欄位依資料集而定（單標的 STORE_PARTITION_COLUMNS、多標的 MULTI_ASSET_PARTITION_COLUMNS），
+  記錄於索引 schema metadata 的 partition_columns，讀取時一律以 partition_columns() 取得
+
+【常見易錯點】
+------------------------------------------------------------
+- trades_only 稀疏資料集的共用K線按分區保存（各分區目錄下的 _bars.npz），
+  需經 read_records 才能還原完整記錄
+- 沒有任何記錄列的回測在索引中 File 為空、Row_group 為 -1
+- 增量回測（_state.npz 追加）仍使用單檔 Parquet 格式
+- 多標的 trades_only 的 _bars.npz 位於標的分區之下，各自保存該標的的K線
+
+【範例】
+------------------------------------------------------------
+- ResultStore_backtester.write_dataset(dataset_dir, records, batch_metadata, partitions, metadata)
+- ids = ResultStore_backtester.select(dataset_dir, filters=[("Sharpe", ">", 1.0)])
+- df = ResultStore_backtester.read(dataset_dir, ids, columns=["Time", "Equity_value", "Backtest_id"])
+- records = ResultStore_backtester.read_records(dataset_dir, ids)
+
+【與其他模組的關聯】
+------------------------------------------------------------
+- 由 TradeRecordExporter、MetricsExporter、MetricsRunner、plotter 與 records/Read_parquet.py 調用
+- trades_only 還原依賴 SparseRecords_backtester
+"""
+
+import json
+import os
+import shutil
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+from urllib.parse import quote
+
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+import pyarrow.dataset as ds
+import pyarrow.parquet as pq
+
+from .MultiAsset_backtester import PARTITION_COLUMN, MultiAsset_backtester
+from .SparseRecords_backtester import RESULT_MODE_TRADES_ONLY, SparseRecords_backtester
+
+# 結果儲存格式：單檔 Parquet（預設）或分區資料集
+RESULT_STORE_FILE = "file"
+RESULT_STORE_DATASET = "dataset"
+RESULT_STORES = (RESULT_STORE_FILE, RESULT_STORE_DATASET)
+
+# 分區欄位（hive 目錄名為 Condition_pair=<條件組>/Predictor=<預測因子>）
+STORE_PARTITION_COLUMNS = ("Condition_pair", "Predictor")
+# 多標的資料集先以 Trading_instrument 分區
+MULTI_ASSET_PARTITION_COLUMNS = (PARTITION_COLUMN, *STORE_PARTITION_COLUMNS)
+INDEX_FILENAME = "_index.parquet"
+PART_FILENAME = "part-0.parquet"
+BAR_STORE_FILENAME = "_bars.npz"
+# 索引中的位置欄位（相對資料集根目錄的檔案、row group 序號、列數）
+INDEX_LOCATION_COLUMNS = ("File", "Row_group", "Num_rows")
+
+_EMPTY_PARTITION_VALUE = "none"
+
+
+class ResultStore_backtester:
+    """Condition_pair / Predictor 分區的回測結果資料集與指標索引"""
+
+    @staticmethod
+    def index_path(dataset_dir: str) -> str:
+        """資料集的指標索引路徑"""
+        return os.path.join(dataset_dir, INDEX_FILENAME)
+
+    @staticmethod
+    def is_dataset(path: str) -> bool:
+        """路徑是否為本模組寫出的分區資料集（目錄內有 _index.parquet）"""
+        return os.path.isdir(path) and os.path.exists(
+            ResultStore_backtester.index_path(path)
+        )
+
+    @staticmethod
+    def condition_pair(params: Dict[str, Any]) -> str:
+        """
+        由 entry/exit 參數得出條件組名稱（如 MA1_MA4、HL2+VALUE3_HL4）
+
+        result["strategy_id"] 為逐參數組合的名稱，作為分區會令每個回測各佔一個目錄，
+        因此以條件組（開/平倉指標與編號）分區，同一條件組的參數網格位於同一分區。
+        """
+
+        def side(items: List[Any]) -> str:
+            names = []
+            for param in items:
+                if not isinstance(param, dict):
+                    param = {
+                        "indicator_type": getattr(param, "indicator_type", ""),
+                        **getattr(param, "params", {}),
+                    }
+                idx = param.get("strat_idx", param.get("strat", ""))
+                names.append(f"{param.get('indicator_type', '')}{idx}")
+            return "+".join(names)
+
+        entry = side(params.get("entry", []))
+        exit_ = side(params.get("exit", []))
+        return f"{entry}_{exit_}" if exit_ else entry
+
+    @staticmethod
+    def partition_values(
+        result: Dict[str, Any],
+        partition_columns: Tuple[str, ...] = STORE_PARTITION_COLUMNS,
+    ) -> Tuple[str, ...]:
+        """回測結果所屬的分區，如 (Condition_pair, Predictor) 或 (Trading_instrument, ...)"""
+        params = result.get("params") or {}
+        values = {
+            "Condition_pair": ResultStore_backtester.condition_pair(params),
+            "Predictor": params.get("predictor"),
+        }
+        if PARTITION_COLUMN in partition_columns:
+            values[PARTITION_COLUMN] = MultiAsset_backtester.result_instrument(result)
+        return tuple(
+            str(values[col])
+            if values.get(col) not in (None, "")
+            else _EMPTY_PARTITION_VALUE
+            for col in partition_columns
+        )
+
+    @staticmethod
+    def partition_columns(dataset_dir: str) -> Tuple[str, ...]:
+        """資料集的分區欄位（記錄於索引 schema metadata）"""
+        columns = ResultStore_backtester.read_index_metadata(dataset_dir).get(
+            "partition_columns"
+        )
+        return tuple(json.loads(columns)) if columns else STORE_PARTITION_COLUMNS
+
+    @staticmethod
+    def partition_dir(
+        dataset_dir: str,
+        values: Iterable[str],
+        partition_columns: Tuple[str, ...] = STORE_PARTITION_COLUMNS,
+    ) -> str:
+        """分區目錄（值以 URI 編碼，與 pyarrow hive 分區解碼一致）"""
+        return os.path.join(
+            dataset_dir,
+            *[
+                f"{col}={quote(str(value), safe='')}"
+                for col, value in zip(partition_columns, values)
+            ],
+        )
+
+    @staticmethod
+    def _partitioning(
+        partition_columns: Tuple[str, ...] = STORE_PARTITION_COLUMNS,
+    ) -> ds.Partitioning:
+        """分區欄位一律以字串還原，避免數字樣式的策略名或標的代號被推斷為整數"""
+        return ds.partitioning(
+            pa.schema([(col, pa.string()) for col in partition_columns]),
+            flavor="hive",
+        )
+
+    @staticmethod
+    def write_dataset(
+        dataset_dir: str,
+        records: pd.DataFrame,
+        batch_metadata: List[Dict[str, Any]],
+        partitions: Dict[str, Tuple[str, ...]],
+        metadata: Optional[Dict[str, str]] = None,
+        partition_columns: Tuple[str, ...] = STORE_PARTITION_COLUMNS,
+    ) -> str:
+        """
+        寫出分區資料集與指標索引
+
+        Args:
+            dataset_dir: 資料集根目錄（已存在的資料集會被整個覆寫）
+            records: 所有回測的記錄（同一回測的列不需連續）
+            batch_metadata: 每個回測一筆的元數據與指標，決定索引與 row group 順序
+            partitions: {Backtest_id: 分區值}，順序與 partition_columns 一致
+            metadata: 寫入索引 schema metadata 的資料集層級資訊（如 result_mode）
+            partition_columns: 分區欄位；多標的為 MULTI_ASSET_PARTITION_COLUMNS
+
+        Returns:
+            str: 索引檔路徑
+        """
+        if ResultStore_backtester.is_dataset(dataset_dir):
+            shutil.rmtree(dataset_dir)
+        os.makedirs(dataset_dir, exist_ok=True)
+
+        records = records.drop(columns=list(partition_columns), errors="ignore")
+        if records.empty or "Backtest_id" not in records.columns:
+            table = None
+            rows_by_id: Dict[str, np.ndarray] = {}
+        else:
+            # 先轉為單一 Table 再切分，所有分區檔案共用同一 schema
+            table = pa.Table.from_pandas(records, preserve_index=False)
+            rows_by_id = records.groupby("Backtest_id", sort=False).indices
+
+        groups: Dict[Tuple[str, ...], List[str]] = {}
+        for entry in batch_metadata:
+            backtest_id = entry["Backtest_id"]
+            values = partitions.get(
+                backtest_id, (_EMPTY_PARTITION_VALUE,) * len(partition_columns)
+            )
+            groups.setdefault(tuple(values), []).append(backtest_id)
+
+        locations: Dict[str, Tuple[str, int, int]] = {}
+        for values, backtest_ids in groups.items():
+            part_dir = ResultStore_backtester.partition_dir(
+                dataset_dir, values, partition_columns
+            )
+            os.makedirs(part_dir, exist_ok=True)
+            with_rows = [bid for bid in backtest_ids if bid in rows_by_id]
+            if table is None or not with_rows:
+                continue
+            part_path = os.path.join(part_dir, PART_FILENAME)
+            rel_path = os.path.relpath(part_path, dataset_dir).replace(os.sep, "/")
+            with pq.ParquetWriter(part_path, table.schema) as writer:
+                for row_group, backtest_id in enumerate(with_rows):
+                    rows = rows_by_id[backtest_id]
+                    if rows[-1] - rows[0] + 1 == len(rows):
+                        part = table.slice(int(rows[0]), len(rows))
+                    else:
+                        part = table.take(rows)
+                    # 每個回測一個 row group，Backtest_id 的 min/max 統計即可精確篩選
+                    writer.write_table(part, row_group_size=max(part.num_rows, 1))
+                    locations[backtest_id] = (rel_path, row_group, part.num_rows)
+
+        index_rows = []
+        for entry in batch_metadata:
+            backtest_id = entry["Backtest_id"]
+            values = partitions.get(
+                backtest_id, (_EMPTY_PARTITION_VALUE,) * len(partition_columns)
+            )
+            row = dict(entry)
+            row.update(zip(partition_columns, values))
+            row.update(
+                zip(INDEX_LOCATION_COLUMNS, locations.get(backtest_id, ("", -1, 0)))
+            )
+            index_rows.append(row)
+        return ResultStore_backtester._write_index(
+            dataset_dir, index_rows, metadata or {}, partition_columns
+        )
+
+    @staticmethod
+    def _write_index(
+        dataset_dir: str,
+        rows: List[Dict[str, Any]],
+        metadata: Dict[str, str],
+        partition_columns: Tuple[str, ...] = STORE_PARTITION_COLUMNS,
+    ) -> str:
+        """寫出 _index.parquet；巢狀欄位轉為 JSON 字串"""
+        json_columns = sorted(
+            {k for row in rows for k, v in row.items() if isinstance(v, (list, dict))}
+        )
+        # from_pylist 保留 NaN 與 None 的區別（from_pandas 會將 NaN 視為 null）
+        table = pa.Table.from_pylist(
+            [
+                {
+                    k: json.dumps(v, ensure_ascii=False) if k in json_columns else v
+                    for k, v in row.items()
+                }
+                for row in rows
+            ]
+        )
+        schema_meta = {
+            str(k).encode(): str(v).encode("utf-8") for k, v in metadata.items()
+        }
+        schema_meta[b"result_store"] = RESULT_STORE_DATASET.encode()
+        schema_meta[b"partition_columns"] = json.dumps(
+            list(partition_columns)
+        ).encode()
+        schema_meta[b"json_columns"] = json.dumps(json_columns).encode()
+        path = ResultStore_backtester.index_path(dataset_dir)
+        pq.write_table(table.replace_schema_metadata(schema_meta), path)
+        return path
+
+    @staticmethod
+    def read_index_metadata(dataset_dir: str) -> Dict[str, str]:
+        """讀取索引 schema metadata（只讀檔尾，不讀資料）"""
+        metadata = (
+            pq.read_schema(ResultStore_backtester.index_path(dataset_dir)).metadata
+            or {}
+        )
+        return {
+            k.decode("utf-8"): v.decode("utf-8")
+            for k, v in metadata.items()
+            if k != b"pandas"
+        }
+
+    @staticmethod
+    def read_index(
+        dataset_dir: str,
+        columns: Optional[List[str]] = None,
+        filters: Optional[Any] = None,
+    ) -> pd.DataFrame:
+        """
+        讀取指標索引
+
+        Args:
+            columns: 只讀取的欄位（欄位裁剪）
+            filters: pyarrow 篩選條件，如 [("Sharpe", ">", 1.0)] 或 ds.Expression
+        """
+        return pq.read_table(
+            ResultStore_backtester.index_path(dataset_dir),
+            columns=columns,
+            filters=filters,
+        ).to_pandas()
+
+    @staticmethod
+    def read_batch_metadata(
+        dataset_dir: str, filters: Optional[Any] = None
+    ) -> List[Dict[str, Any]]:
+        """
+        由索引還原 batch_metadata（JSON 欄位解碼、移除位置欄位）
+
+        Args:
+            filters: pyarrow 篩選條件，只還原符合條件的回測
+        """
+        metadata = ResultStore_backtester.read_index_metadata(dataset_dir)
+        json_columns = set(json.loads(metadata.get("json_columns", "[]")))
+        table = pq.read_table(
+            ResultStore_backtester.index_path(dataset_dir), filters=filters
+        )
+        table = table.drop_columns(
+            [col for col in INDEX_LOCATION_COLUMNS if col in table.column_names]
+        )
+        batch_metadata = []
+        for row in table.to_pylist():
+            for col in json_columns.intersection(row):
+                if isinstance(row[col], str):
+                    row[col] = json.loads(row[col])
+            batch_metadata.append(row)
+        return batch_metadata
+
+    @staticmethod
+    def select(dataset_dir: str, filters: Optional[Any] = None) -> List[str]:
+        """以索引做謂詞下推，回傳符合條件的 Backtest_id（依索引順序）"""
+        index = ResultStore_backtester.read_index(
+            dataset_dir, columns=["Backtest_id"], filters=filters
+        )
+        return index["Backtest_id"].astype(str).tolist()
+
+    @staticmethod
+    def read(
+        dataset_dir: str,
+        backtest_ids: Optional[Iterable[str]] = None,
+        columns: Optional[List[str]] = None,
+        row_filter: Optional[ds.Expression] = None,
+    ) -> pd.DataFrame:
+        """
+        讀取資料集記錄（不還原 trades_only 稀疏記錄）
+
+        指定 backtest_ids 時先由索引找出所屬分區，以分區條件跳過其他目錄，
+        再以 Backtest_id 條件配合 row group 統計量只讀取對應的 row group。
+        結果依索引順序排列。
+
+        Args:
+            backtest_ids: 只讀取的回測；None 時讀取全部
+            columns: 只讀取的欄位（可含 Trading_instrument / Condition_pair / Predictor 分區欄位）
+            row_filter: 額外的 pyarrow 篩選條件（如 ds.field("Time") >= ...）
+        """
+        partition_columns = ResultStore_backtester.partition_columns(dataset_dir)
+        index = ResultStore_backtester.read_index(
+            dataset_dir, columns=["Backtest_id", *partition_columns]
+        )
+        order = index["Backtest_id"].astype(str).tolist()
+        expr = row_filter
+        if backtest_ids is not None:
+            backtest_ids = [str(bid) for bid in backtest_ids]
+            selected = index[index["Backtest_id"].isin(backtest_ids)]
+            if selected.empty:
+                return pd.DataFrame(columns=columns or [])
+            for col in partition_columns:
+                part_expr = ds.field(col).isin(
+                    pa.array(selected[col].unique().tolist(), type=pa.string())
+                )
+                expr = part_expr if expr is None else expr & part_expr
+            id_expr = ds.field("Backtest_id").isin(
+                pa.array(backtest_ids, type=pa.string())
+            )
+            expr = id_expr if expr is None else expr & id_expr
+
+        dataset = ds.dataset(
+            dataset_dir,
+            format="parquet",
+            partitioning=ResultStore_backtester._partitioning(partition_columns),
+        )
+        if not dataset.files:
+            return pd.DataFrame(columns=columns or [])
+        if columns is not None:
+            columns = [col for col in columns if col in dataset.schema.names]
+        df = dataset.to_table(columns=columns, filter=expr).to_pandas()
+
+        if "Backtest_id" in df.columns and len(df) > 0:
+            codes = pd.Categorical(df["Backtest_id"], categories=order).codes
+            if not np.all(codes[:-1] <= codes[1:]):
+                df = df.iloc[np.argsort(codes, kind="stable")]
+            df = df.reset_index(drop=True)
+        return df
+
+    @staticmethod
+    def read_records(
+        dataset_dir: str,
+        backtest_ids: Optional[Iterable[str]] = None,
+        row_filter: Optional[ds.Expression] = None,
+    ) -> pd.DataFrame:
+        """
+        讀取完整記錄；trades_only 資料集以各分區的 _bars.npz 逐個回測還原
+
+        Args:
+            backtest_ids: 只讀取的回測；None 時讀取全部
+            row_filter: 額外的 pyarrow 篩選條件（稀疏資料集只作用於交易事件列）
+        """
+        df = ResultStore_backtester.read(
+            dataset_dir, backtest_ids, row_filter=row_filter
+        )
+        metadata = ResultStore_backtester.read_index_metadata(dataset_dir)
+        if metadata.get("result_mode") != RESULT_MODE_TRADES_ONLY:
+            return df
+
+        partition_columns = ResultStore_backtester.partition_columns(dataset_dir)
+        index = ResultStore_backtester.read_index(
+            dataset_dir, columns=["Backtest_id", *partition_columns]
+        )
+        if backtest_ids is not None:
+            index = index[index["Backtest_id"].isin([str(b) for b in backtest_ids])]
+        events = df.drop(columns=list(partition_columns), errors="ignore")
+        expanded: Dict[str, pd.DataFrame] = {}
+        for values, part in index.groupby(list(partition_columns), sort=False):
+            bar_store_path = os.path.join(
+                ResultStore_backtester.partition_dir(
+                    dataset_dir, values, partition_columns
+                ),
+                BAR_STORE_FILENAME,
+            )
+            if not os.path.exists(bar_store_path):
+                continue
+            store = SparseRecords_backtester.load_bar_store(bar_store_path)
+            part_ids = part["Backtest_id"].tolist()
+            part_events = (
+                events[events["Backtest_id"].isin(part_ids)]
+                if "Backtest_id" in events.columns
+                else events
+            )
+            # 與單檔導出相同，先移除各回測全為 NA 的欄位（如無交易回測的 Open_time）
+            for backtest_id, group in SparseRecords_backtester.iter_expanded_records(
+                part_events, store, part_ids
+            ):
+                expanded[backtest_id] = group.dropna(axis=1, how="all")
+        ordered = [
+            expanded[bid] for bid in index["Backtest_id"].tolist() if bid in expanded
+        ]
+        return pd.concat(ordered, ignore_index=True) if ordered else events.iloc[0:0]
+
+    @staticmethod
+    def partitions_from_index(
+        index: pd.DataFrame,
+        partition_columns: Tuple[str, ...] = STORE_PARTITION_COLUMNS,
+    ) -> Dict[str, Tuple[str, ...]]:
+        """由索引取得 {Backtest_id: 分區值}，供衍生資料集沿用分區"""
+        return {
+            str(row[0]): tuple(str(v) for v in row[1:])
+            for row in index[["Backtest_id", *partition_columns]].itertuples(
+                index=False
+            )
+        }
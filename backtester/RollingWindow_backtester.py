@@ -0,0 +1,149 @@
+"""
+RollingWindow_backtester.py
+
+【功能說明】
+------------------------------------------------------------
+本模組為 Lo2cin4BT 回測框架的共享滾動窗口運算核心，提供 O(n) 的滾動最大值、
+最小值、總和與連續計數 Numba 函數，供 HL、VALUE 等指標的信號生成共用。
+- 滾動最大/最小值使用單調雙端佇列（monotonic deque），每個元素最多入隊出隊各一次
+- 滾動總和使用累加/扣減滑動更新
+- 連續計數（run length）用於「連續 n 日滿足條件」類型的判斷
+
+【流程與數據流】
+------------------------------------------------------------
+- 指標模組先以 rolling_max_njit / rolling_min_njit 計算滾動極值（可按窗口長度緩存）
+- 再以極值與預測因子比較得到布林條件，最後以 run_length_njit 判斷連續天數
+
+```mermaid
+flowchart TD
+    A[預測因子] -->|rolling_max/min_njit| B[滾動極值]
+    B -->|按 (窗口, 預測因子) 緩存| C[HL / VALUE 指標]
+    C -->|run_length_njit| D[連續條件信號]
+```
+
+【維護與擴充重點】
+------------------------------------------------------------
+- 所有函數只接受 ndarray，並在 Numba 可用時才定義（與各指標模組一致）
+- 窗口未滿的位置回傳「已見數據」的部分窗口結果，調用方需自行將無效區間歸零
+- 新增滾動運算時，請保持 O(n) 複雜度並同步更新本註解
+
+【常見易錯點】
+------------------------------------------------------------
+- 輸入含 NaN 時比較結果不可預期，調用前請先 nan_to_num
+- window <= 0 時回傳全 0（或原值），不會拋出例外
+
+【範例】
+------------------------------------------------------------
+- highs = rolling_max_njit(predictor_values, m_length)
+- at_high = np.abs(predictor_values - highs) <= 1e-10
+- streak = run_length_njit(at_high)
+
+【與其他模組的關聯】
+------------------------------------------------------------
+- 由 HL_Indicator_backtester、VALUE_Indicator_backtester 調用
+
+【參考】
+------------------------------------------------------------
+- Numba 官方文檔：https://numba.pydata.org/
+"""
+
+import numpy as np
+
+# 優化：嘗試導入 Numba 進行 JIT 編譯加速
+try:
+    from numba import njit
+
+    NUMBA_AVAILABLE = True
+except ImportError:
+    NUMBA_AVAILABLE = False
+    # Numba 未安裝，將使用標準 Python 計算
+
+# 核心算法：純 Numba + ndarray 實現
+if NUMBA_AVAILABLE:
+
+    @njit(fastmath=True, cache=True)  # type: ignore[misc]
+    def _rolling_extreme_njit(values, window, is_max):  # type: ignore[no-untyped-def]
+        """
+        單調雙端佇列滾動極值
+
+        佇列保存候選索引，對應數值單調遞減（最大值）或遞增（最小值），
+        隊首即為當前窗口極值；離開窗口的索引從隊首移除。
+        """
+        n = len(values)
+        result = np.zeros(n)
+        if window <= 0:
+            return result
+
+        # 以環形陣列實現雙端佇列，容量為 window
+        deque = np.empty(window, dtype=np.int64)
+        head = 0
+        size = 0
+        for i in range(n):
+            value = values[i]
+
+            # 移除離開窗口的隊首
+            if size > 0 and deque[head] <= i - window:
+                head = (head + 1) % window
+                size -= 1
+
+            # 從隊尾移除被新值支配的候選
+            while size > 0:
+                tail = deque[(head + size - 1) % window]
+                if is_max:
+                    dominated = values[tail] <= value
+                else:
+                    dominated = values[tail] >= value
+                if not dominated:
+                    break
+                size -= 1
+
+            deque[(head + size) % window] = i
+            size += 1
+
+            result[i] = values[deque[head]]
+
+        return result
+
+    @njit(fastmath=True, cache=True)  # type: ignore[misc]
+    def rolling_max_njit(values, window):  # type: ignore[no-untyped-def]
+        """O(n) 滾動最大值（窗口未滿時為已見數據的最大值）"""
+        return _rolling_extreme_njit(values, window, True)
+
+    @njit(fastmath=True, cache=True)  # type: ignore[misc]
+    def rolling_min_njit(values, window):  # type: ignore[no-untyped-def]
+        """O(n) 滾動最小值（窗口未滿時為已見數據的最小值）"""
+        return _rolling_extreme_njit(values, window, False)
+
+    @njit(fastmath=True, cache=True)  # type: ignore[misc]
+    def rolling_sum_njit(values, window):  # type: ignore[no-untyped-def]
+        """O(n) 滾動總和（窗口未滿時為已見數據的總和）"""
+        n = len(values)
+        result = np.zeros(n)
+        if window <= 0:
+            return result
+
+        total = 0.0
+        for i in range(n):
+            total += values[i]
+            if i >= window:
+                total -= values[i - window]
+            result[i] = total
+        return result
+
+    @njit(fastmath=True, cache=True)  # type: ignore[misc]
+    def run_length_njit(condition):  # type: ignore[no-untyped-def]
+        """
+        連續計數：result[i] 為截至第 i 根K線（含）條件連續成立的根數
+
+        「連續 n 日成立」等價於 result[i] >= n。
+        """
+        n = len(condition)
+        result = np.zeros(n, dtype=np.int64)
+        count = 0
+        for i in range(n):
+            if condition[i]:
+                count += 1
+            else:
+                count = 0
+            result[i] = count
+        return result
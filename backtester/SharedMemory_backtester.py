@@ -0,0 +1,136 @@
+"""
+SharedMemory_backtester.py
+
+【功能說明】
+------------------------------------------------------------
+本模組為 Lo2cin4BT 回測框架的共享記憶體數據平面，負責在多進程結果生成時，
+將價格數據與 positions/returns/trade_actions/equity_values/信號矩陣放入共享記憶體，
+子進程只接收區塊名稱、形狀、dtype（handles）與欄位索引，不再序列化整個回測引擎。
+- 主進程一次性寫入共享記憶體，所有批次共用同一份數據
+- 子進程依 handles 附加共享記憶體並只取出所屬批次的欄位
+- IPC 傳輸量與子進程啟動時間不隨K線數量增長
+
+【流程與數據流】
+------------------------------------------------------------
+- VectorBacktestEngine 在多批次並行前建立 SharedArrayStore
+- 每個批次只提交 handles + 欄位索引 + 任務參數
+- 子進程以 SharedArrayStore.attach() 讀取數據，處理完即關閉
+
+```mermaid
+flowchart TD
+    A[VectorBacktestEngine] -->|put 矩陣/價格| B[SharedArrayStore]
+    B -->|handles| C[ProcessPoolExecutor]
+    C -->|attach + 欄位索引| D[子進程批次]
+    D -->|結果| A
+    A -->|close/unlink| B
+```
+
+【維護與擴充重點】
+------------------------------------------------------------
+- 只能放入非 object dtype 的 numpy 陣列；object 欄位（如帶時區時間）需另行傳遞
+- 主進程負責 unlink，子進程只 close，避免提前釋放
+- 子進程取出的陣列需複製後再關閉共享記憶體，避免殘留指向已關閉緩衝區的視圖
+
+【常見易錯點】
+------------------------------------------------------------
+- 忘記 close() 會在 /dev/shm 殘留區塊
+- 在共享記憶體關閉後仍使用其視圖會導致 BufferError 或崩潰
+- 大小為 0 的陣列無法建立共享記憶體，需以至少 1 byte 建立
+
+【範例】
+------------------------------------------------------------
+- with SharedArrayStore() as store:
+      store.put("positions", positions)
+      payload = {"handles": store.handles}
+- with SharedArrayStore.attach(payload["handles"]) as arrays:
+      positions = arrays["positions"][:, start:stop].copy()
+
+【與其他模組的關聯】
+------------------------------------------------------------
+- 由 VectorBacktestEngine 的多批次結果生成流程使用
+
+【參考】
+------------------------------------------------------------
+- Python 官方文件 multiprocessing.shared_memory
+"""
+
+from contextlib import contextmanager
+from multiprocessing import shared_memory
+from typing import Dict, Iterator, List, Tuple
+
+import numpy as np
+
+# handle 格式：(共享記憶體名稱, 形狀, dtype 字串)
+SharedArrayHandle = Tuple[str, Tuple[int, ...], str]
+
+
+class SharedArrayStore:
+    """在主進程建立並持有共享記憶體區塊，子進程以 handles 附加讀取。"""
+
+    def __init__(self) -> None:
+        self._blocks: List[shared_memory.SharedMemory] = []
+        self.handles: Dict[str, SharedArrayHandle] = {}
+
+    def put(self, key: str, array: np.ndarray) -> None:
+        """將陣列複製到新的共享記憶體區塊，並記錄其 handle"""
+        array = np.ascontiguousarray(array)
+        if array.dtype == object:
+            raise TypeError(f"共享記憶體不支援 object dtype 陣列: {key}")
+        block = shared_memory.SharedMemory(create=True, size=max(1, array.nbytes))
+        self._blocks.append(block)
+        shared = np.ndarray(array.shape, dtype=array.dtype, buffer=block.buf)
+        shared[...] = array
+        self.handles[key] = (block.name, array.shape, array.dtype.str)
+
+    @property
+    def nbytes(self) -> int:
+        """共享記憶體總大小（bytes）"""
+        return sum(block.size for block in self._blocks)
+
+    def close(self) -> None:
+        """關閉並釋放所有共享記憶體區塊（僅主進程調用）"""
+        for block in self._blocks:
+            try:
+                block.close()
+                block.unlink()
+            except FileNotFoundError:
+                pass
+        self._blocks = []
+        self.handles = {}
+
+    def __enter__(self) -> "SharedArrayStore":
+        return self
+
+    def __exit__(self, *exc_info: object) -> None:
+        self.close()
+
+    @staticmethod
+    @contextmanager
+    def attach(
+        handles: Dict[str, SharedArrayHandle]
+    ) -> Iterator[Dict[str, np.ndarray]]:
+        """
+        於子進程附加共享記憶體，回傳唯讀視圖；離開 context 後視圖即失效
+
+        Args:
+            handles: SharedArrayStore.handles
+
+        Yields:
+            dict: key -> 指向共享記憶體的 numpy 視圖
+        """
+        blocks = []
+        arrays: Dict[str, np.ndarray] = {}
+        view = None
+        try:
+            for key, (name, shape, dtype) in handles.items():
+                block = shared_memory.SharedMemory(name=name)
+                blocks.append(block)
+                view = np.ndarray(shape, dtype=np.dtype(dtype), buffer=block.buf)
+                view.flags.writeable = False
+                arrays[key] = view
+            yield arrays
+        finally:
+            arrays.clear()
+            view = None  # 釋放最後一個視圖，避免 close 時出現 BufferError
+            for block in blocks:
+                block.close()
@@ -0,0 +1,369 @@
+"""
+SparseRecords_backtester.py
+
+【功能說明】
+------------------------------------------------------------
+本模組為 Lo2cin4BT 回測框架的稀疏交易記錄（trades_only 模式）工具，負責在大型參數掃描時
+只保留開/平倉事件列與每個回測的精簡陣列，並在下游需要時按需還原完整的逐K線交易記錄。
+- 稀疏結果：records 只含 Trade_action != 0 的列，附 Bar_index 指向共用K線
+- 精簡陣列：每個回測只保存 Equity_value、Return 與開/平倉信號陣列
+- 共用K線：Time/Open/High/Low/Close 與預測因子只儲存一次，以索引引用
+- 按需還原：expand_records() 重建與 full 模式完全一致的 records DataFrame
+- 磁碟格式：交易事件寫入 Parquet，共用K線與精簡陣列寫入同名 _bars.npz
+
+【流程與數據流】
+------------------------------------------------------------
+- VectorBacktestEngine 以 result_mode="trades_only" 產生稀疏結果
+- TradeRecordExporter 導出稀疏 Parquet 與 _bars.npz
+- MetricsExporter 讀取 Parquet 時偵測 result_mode，逐個回測還原完整記錄後計算績效
+
+```mermaid
+flowchart TD
+    A[VectorBacktestEngine] -->|trades_only 結果| B[SparseRecords]
+    B -->|save_bar_store| C[_bars.npz]
+    A -->|稀疏 records| D[TradeRecordExporter]
+    D -->|Parquet + npz| E[MetricsExporter]
+    E -->|iter_expanded_records| F[完整 records]
+```
+
+【維護與擴充重點】
+------------------------------------------------------------
+- 還原邏輯重用 TradeSimulator 的 build_trade_record_columns，交易欄位規則只維護一處
+- records 欄位若有變動，需確認 expand_records 仍能由事件列與精簡陣列重建
+- _bars.npz 的鍵名若有變動，需同步更新 load_bar_store 與 MetricsExporter
+
+【常見易錯點】
+------------------------------------------------------------
+- 無交易的回測在 Parquet 中沒有任何列，需以 _bars.npz 的 Backtest_id 清單為準
+- 還原時必須使用與回測相同的K線數據，否則 Bar_index 會錯位
+- 信號以 int8 保存，僅支援 -1/0/1 信號
+
+【範例】
+------------------------------------------------------------
+- 還原單個結果：records = SparseRecords_backtester.expand_result(result, data)
+- 導出共用K線：SparseRecords_backtester.save_bar_store(path, data, results)
+- 讀取並逐個還原：for bid, df in SparseRecords_backtester.iter_expanded_records(trades, store): ...
+
+【與其他模組的關聯】
+------------------------------------------------------------
+- 由 TradeSimulator 產生稀疏結果，由 VectorBacktestEngine 傳遞 result_mode
+- TradeRecordExporter、MetricsExporter 依賴本模組還原完整記錄
+
+【參考】
+------------------------------------------------------------
+- TradeSimulator_backtester.py、TradeRecordExporter_backtester.py
+- metricstracker/MetricsExporter_metricstracker.py
+"""
+
+import os
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+
+from .TradeSimulator_backtester import (
+    bar_time_values,
+    build_trade_record_columns,
+    records_frame_from_columns,
+)
+
+RESULT_MODE_FULL = "full"
+RESULT_MODE_TRADES_ONLY = "trades_only"
+RESULT_MODES = (RESULT_MODE_FULL, RESULT_MODE_TRADES_ONLY)
+
+# 共用K線與精簡陣列的檔名後綴（與 Parquet 同名）
+BAR_STORE_SUFFIX = "_bars.npz"
+
+_PREDICTOR_PREFIX = "predictor::"
+
+
+class SparseRecords_backtester:
+    """稀疏交易記錄（trades_only）的建構、儲存與還原工具。"""
+
+    @staticmethod
+    def is_sparse_result(result: Dict[str, Any]) -> bool:
+        """判斷回測結果是否為 trades_only 稀疏結果"""
+        return result.get("result_mode") == RESULT_MODE_TRADES_ONLY
+
+    @staticmethod
+    def build_shared_bars(
+        data: pd.DataFrame, predictors: Optional[List[str]] = None
+    ) -> pd.DataFrame:
+        """
+        建立共用K線表：Time/Open/High/Low/Close 與所需預測因子，只保存一次
+
+        Args:
+            data: 回測使用的原始數據
+            predictors: 需要保留的預測因子欄位，None 時不保留
+
+        Returns:
+            pd.DataFrame: 共用K線表（RangeIndex，列號即 Bar_index）
+        """
+        bars = pd.DataFrame(
+            {
+                "Time": bar_time_values(data),
+                "Open": data["Open"].to_numpy(),
+                "High": data["High"].to_numpy(),
+                "Low": data["Low"].to_numpy(),
+                "Close": data["Close"].to_numpy(),
+            }
+        )
+        for predictor in predictors or []:
+            if predictor in data.columns and predictor not in bars.columns:
+                bars[predictor] = data[predictor].to_numpy()
+        return bars
+
+    @staticmethod
+    def expand_records(
+        trade_records: pd.DataFrame,
+        bar_data: Dict[str, Any],
+        bars: pd.DataFrame,
+        predictor: str,
+        backtest_id: str,
+        parameter_set_id: str,
+    ) -> pd.DataFrame:
+        """
+        由交易事件列與精簡陣列還原完整的逐K線 records
+
+        持倉由開倉列的 Position_size 累加、平倉列扣回得出；成交價格只在事件列使用，
+        因此直接取自事件列的開/平倉價格，再交由 build_trade_record_columns 重建。
+
+        Args:
+            trade_records: 稀疏 records（含 Bar_index）
+            bar_data: 精簡陣列（equity_values/returns/entry_signal/exit_signal）
+            bars: 共用K線表，或包含 Open/High/Low/Close 的原始數據
+            predictor: 預測因子名稱
+            backtest_id: 回測ID
+            parameter_set_id: 參數集ID（即 strategy_id）
+
+        Returns:
+            pd.DataFrame: 與 full 模式一致的 records
+        """
+        n_bars = len(bar_data["equity_values"])
+        bars = bars.iloc[:n_bars]
+        if "Bar_index" in trade_records.columns:
+            trade_rows = trade_records.sort_values("Bar_index", kind="stable")
+        else:
+            trade_rows = trade_records
+        if trade_rows.empty:
+            trade_rows = pd.DataFrame(
+                {"Bar_index": [], "Trade_action": [], "Position_size": []}
+            )
+        bar_index = trade_rows["Bar_index"].to_numpy(dtype=np.int64)
+        actions = trade_rows["Trade_action"].to_numpy(dtype=np.float64)
+        is_open = actions == 1
+        is_close = actions == 4
+
+        trade_actions = np.zeros(n_bars, dtype=np.float64)
+        trade_actions[bar_index] = actions
+
+        # 持倉：開倉列 +Position_size，平倉列扣回最近一次開倉的 Position_size
+        open_size = np.where(
+            is_open, trade_rows["Position_size"].to_numpy(dtype=np.float64), np.nan
+        )
+        open_size = pd.Series(open_size).ffill().fillna(0.0).to_numpy()
+        delta = np.zeros(n_bars, dtype=np.float64)
+        delta[bar_index[is_open]] += open_size[is_open]
+        delta[bar_index[is_close]] -= open_size[is_close]
+        position = np.cumsum(delta)
+
+        current_prices = np.zeros(n_bars, dtype=np.float64)
+        if len(bar_index) > 0:
+            open_prices = trade_rows["Open_position_price"].to_numpy()
+            close_prices = trade_rows["Close_position_price"].to_numpy()
+            current_prices[bar_index[is_open]] = open_prices[is_open]
+            current_prices[bar_index[is_close]] = close_prices[is_close]
+            group_labels = trade_rows["Trade_group_id"].to_numpy()[is_open].tolist()
+            transaction_cost = float(trade_rows["Transaction_cost"].iloc[0])
+            slippage = float(trade_rows["Slippage_cost"].iloc[0])
+        else:
+            group_labels = []
+            transaction_cost = 0.0
+            slippage = 0.0
+
+        if predictor in bars.columns:
+            predictor_values = bars[predictor].to_numpy()
+        else:
+            predictor_values = np.zeros(n_bars)
+
+        columns = build_trade_record_columns(
+            bars,
+            bar_time_values(bars),
+            current_prices,
+            position,
+            bar_data["returns"],
+            trade_actions,
+            bar_data["equity_values"],
+            np.asarray(bar_data["entry_signal"], dtype=np.float64),
+            np.asarray(bar_data["exit_signal"], dtype=np.float64),
+            predictor_values,
+            bar_data.get("Trading_instrument", "X"),
+            parameter_set_id,
+            backtest_id,
+            transaction_cost,
+            slippage,
+            group_labels=group_labels,
+        )
+        return records_frame_from_columns(columns)
+
+    @staticmethod
+    def expand_result(result: Dict[str, Any], data: pd.DataFrame) -> pd.DataFrame:
+        """還原單個回測結果的完整 records；非稀疏結果直接回傳原 records"""
+        if not SparseRecords_backtester.is_sparse_result(result):
+            return result["records"]
+        return SparseRecords_backtester.expand_records(
+            result["records"],
+            result["bar_data"],
+            data,
+            result.get("params", {}).get("predictor", ""),
+            result["Backtest_id"],
+            result.get("strategy_id", ""),
+        )
+
+    @staticmethod
+    def bar_store_path(parquet_path: str) -> str:
+        """由 Parquet 路徑推得共用K線檔案路徑"""
+        return os.path.splitext(parquet_path)[0] + BAR_STORE_SUFFIX
+
+    @staticmethod
+    def save_bar_store(
+        path: str, data: pd.DataFrame, results: List[Dict[str, Any]]
+    ) -> str:
+        """
+        將共用K線與所有稀疏結果的精簡陣列寫入單一 npz 檔案
+
+        Args:
+            path: 輸出路徑（建議由 bar_store_path 產生）
+            data: 回測使用的原始數據
+            results: 回測結果列表（只寫入稀疏結果）
+
+        Returns:
+            str: 實際寫入的檔案路徑
+        """
+        sparse_results = [
+            r
+            for r in results
+            if SparseRecords_backtester.is_sparse_result(r) and r.get("error") is None
+        ]
+        predictors = sorted(
+            {r.get("params", {}).get("predictor", "") for r in sparse_results}
+        )
+        bars = SparseRecords_backtester.build_shared_bars(data, predictors)
+        n_bars = len(bars)
+
+        arrays: Dict[str, np.ndarray] = {}
+        time_values = bars["Time"]
+        if isinstance(time_values.dtype, pd.DatetimeTZDtype):
+            arrays["time_tz"] = np.array(str(time_values.dt.tz))
+            time_values = time_values.dt.tz_convert("UTC").dt.tz_localize(None)
+        if time_values.dtype == object:
+            time_values = time_values.astype(str)
+        arrays["time"] = time_values.to_numpy()
+        for col in ["Open", "High", "Low", "Close"]:
+            arrays[col] = bars[col].to_numpy(dtype=np.float64)
+        for predictor in predictors:
+            if predictor in bars.columns:
+                arrays[_PREDICTOR_PREFIX + predictor] = bars[predictor].to_numpy()
+
+        def stack(key: str, dtype: Any) -> np.ndarray:
+            if not sparse_results:
+                return np.zeros((n_bars, 0), dtype=dtype)
+            return np.column_stack(
+                [np.asarray(r["bar_data"][key], dtype=dtype) for r in sparse_results]
+            )
+
+        arrays["backtest_ids"] = np.array(
+            [r["Backtest_id"] for r in sparse_results], dtype=str
+        )
+        arrays["parameter_set_ids"] = np.array(
+            [r.get("strategy_id", "") for r in sparse_results], dtype=str
+        )
+        arrays["predictors"] = np.array(
+            [r.get("params", {}).get("predictor", "") for r in sparse_results],
+            dtype=str,
+        )
+        arrays["trading_instruments"] = np.array(
+            [r["bar_data"].get("Trading_instrument", "X") for r in sparse_results],
+            dtype=str,
+        )
+        arrays["equity_values"] = stack("equity_values", np.float64)
+        arrays["returns"] = stack("returns", np.float64)
+        arrays["entry_signals"] = stack("entry_signal", np.int8)
+        arrays["exit_signals"] = stack("exit_signal", np.int8)
+
+        np.savez_compressed(path, **arrays)
+        return path
+
+    @staticmethod
+    def load_bar_store(path: str) -> Dict[str, Any]:
+        """
+        讀取共用K線檔案
+
+        Returns:
+            dict: {"bars": 共用K線表, "backtest_ids", "parameter_set_ids", "predictors",
+                   "trading_instruments", "equity_values", "returns",
+                   "entry_signals", "exit_signals"}
+        """
+        with np.load(path, allow_pickle=False) as npz:
+            arrays = {key: npz[key] for key in npz.files}
+
+        time_values = pd.Series(arrays.pop("time"))
+        if "time_tz" in arrays:
+            time_values = time_values.dt.tz_localize("UTC").dt.tz_convert(
+                str(arrays.pop("time_tz"))
+            )
+        bars = pd.DataFrame({"Time": time_values})
+        for col in ["Open", "High", "Low", "Close"]:
+            bars[col] = arrays.pop(col)
+        for key in [k for k in arrays if k.startswith(_PREDICTOR_PREFIX)]:
+            bars[key[len(_PREDICTOR_PREFIX):]] = arrays.pop(key)
+
+        store: Dict[str, Any] = {"bars": bars}
+        for key in ["backtest_ids", "parameter_set_ids", "predictors", "trading_instruments"]:
+            store[key] = arrays[key].tolist()
+        for key in ["equity_values", "returns", "entry_signals", "exit_signals"]:
+            store[key] = arrays[key]
+        return store
+
+    @staticmethod
+    def iter_expanded_records(
+        trade_records: pd.DataFrame,
+        store: Dict[str, Any],
+        backtest_ids: Optional[Iterable[str]] = None,
+    ) -> Iterator[Tuple[str, pd.DataFrame]]:
+        """
+        逐個回測還原完整 records，避免一次性展開所有回測
+
+        Args:
+            trade_records: 從稀疏 Parquet 讀取的交易事件列
+            store: load_bar_store 的回傳值
+            backtest_ids: 只還原指定的回測；None 時還原 store 內全部回測
+
+        Yields:
+            (Backtest_id, 完整 records)
+        """
+        if "Backtest_id" in trade_records.columns and not trade_records.empty:
+            grouped = dict(tuple(trade_records.groupby("Backtest_id", sort=False)))
+        else:
+            grouped = {}
+        empty = trade_records.iloc[0:0]
+        selected = set(backtest_ids) if backtest_ids is not None else None
+
+        for j, backtest_id in enumerate(store["backtest_ids"]):
+            if selected is not None and backtest_id not in selected:
+                continue
+            bar_data = {
+                "Trading_instrument": store["trading_instruments"][j],
+                "equity_values": store["equity_values"][:, j],
+                "returns": store["returns"][:, j],
+                "entry_signal": store["entry_signals"][:, j],
+                "exit_signal": store["exit_signals"][:, j],
+            }
+            yield backtest_id, SparseRecords_backtester.expand_records(
+                grouped.get(backtest_id, empty),
+                bar_data,
+                store["bars"],
+                store["predictors"][j],
+                backtest_id,
+                store["parameter_set_ids"][j],
+            )
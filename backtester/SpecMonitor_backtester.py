@@ -71,6 +71,7 @@ flowchart TD
 - 檢查記憶體安全性：status = SpecMonitor.check_memory_safety(n_tasks)
 - 收集配置信息：config_info = SpecMonitor.collect_config_info(n_tasks)
 - 獲取記憶體使用量：memory_used = SpecMonitor.get_memory_usage()
+- 計算串流區塊大小：chunk_size, info = SpecMonitor.get_chunk_size(n_time, n_tasks, bytes_per_task_bar, max_memory_mb)
 - 顯示向量化監控：SpecMonitor.display_vectorization_monitor(initial_memory, console)
 
 【與其他模組的關聯】
@@ -88,6 +89,7 @@ flowchart TD
 - v2.0: 整合向量化性能監控
 - v2.1: 新增跨平台兼容性支援
 - v2.2: 完善錯誤處理與優化建議
+- v2.3: 新增 get_chunk_size()，依記憶體閾值與K線數計算串流區塊大小
 
 【參考】
 ------------------------------------------------------------
@@ -488,6 +490,37 @@ class SpecMonitor:
                 "total_memory_gb": 0,
             }
 
+    @staticmethod
+    def get_chunk_size(
+        n_time: int,
+        n_tasks: int,
+        bytes_per_task_bar: float,
+        max_memory_mb: Optional[float] = None,
+    ) -> Tuple[int, str]:
+        """
+        根據記憶體閾值與K線數計算串流處理每個區塊的任務數
+
+        記憶體預算取 get_memory_thresholds()["warning"] 與 max_memory_mb 的較小者，
+        每個任務的估算佔用為 n_time * bytes_per_task_bar。
+        """
+        memory_thresholds = SpecMonitor.get_memory_thresholds()
+        budget_mb = memory_thresholds["warning"]
+        if max_memory_mb is not None and max_memory_mb > 0:
+            budget_mb = min(budget_mb, max_memory_mb)
+
+        per_task_mb = max(n_time, 1) * bytes_per_task_bar / (1024**2)
+        if per_task_mb > 0:
+            chunk_size = int(budget_mb // per_task_mb)
+        else:
+            chunk_size = n_tasks
+        chunk_size = max(1, min(max(n_tasks, 1), chunk_size))
+
+        config_info = (
+            f"💾 串流分塊: 記憶體預算 {budget_mb:.0f}MB, "
+            f"每任務約 {per_task_mb:.3f}MB, 每區塊 {chunk_size} 個任務"
+        )
+        return chunk_size, config_info
+
     @staticmethod
     def collect_config_info(n_tasks: int) -> List[str]:
         """預先收集配置信息"""
@@ -20,8 +20,9 @@ flowchart TD
     B -->|智能摘要| C[display_backtest_summary]
     B -->|導出CSV| D[export_to_csv]
     B -->|導出Parquet| E[export_to_parquet]
+    B -->|導出分區資料集| H[export_dataset]
     B -->|策略分析| F[display_results_by_strategy]
-    C & D & E & F -->|結果| G[用戶/下游模組]
+    C & D & E & F & H -->|結果| G[用戶/下游模組]
 ```
 
 【主要功能】
@@ -61,6 +62,9 @@ flowchart TD
 - 顯示智能摘要：exporter.display_backtest_summary()
 - 導出CSV：exporter.export_to_csv(backtest_id)
 - 導出Parquet：exporter.export_to_parquet(backtest_id)
+- 導出多標的分區資料集：exporter.export_partitioned_dataset(engine.instrument_data)
+- 導出策略/預測因子分區資料集與指標索引：exporter.export_dataset()
+- 還原稀疏結果：exporter.get_full_records(result)
 - 策略分析：exporter.display_results_by_strategy()
 
 【與其他模組的關聯】
@@ -78,6 +82,13 @@ flowchart TD
 - v2.0: 新增智能摘要與策略分析
 - v2.1: 完善分頁顯示與篩選功能
 - v2.2: 優化記憶體使用與錯誤處理
+- v2.3: 支援 trades_only 稀疏結果：Parquet 只寫交易事件，共用K線與權益陣列另存 _bars.npz
+- v2.4: 結果附帶 end_state 時另存 _state.npz，供增量回測續算
+- v2.5: export_partitioned_dataset 將多標的回測導出為以 Trading_instrument 分區的單一資料集
+- v2.6: 結果附帶引擎內績效（inline_metrics）時同時寫出 metricstracker 的 _metadata.json，無需再讀回 Parquet 計算
+- v2.7: export_dataset 導出以條件組 / Predictor 分區、每個 Backtest_id 一個 row group 的資料集，
+        batch_metadata 與績效寫入 _index.parquet 指標索引
+- v2.8: export_dataset(data_by_instrument=...) 支援多標的，以 Trading_instrument 作為第一層分區
 
 【參考】
 ------------------------------------------------------------
@@ -88,6 +99,7 @@ flowchart TD
 - 專案 README
 """
 
+import copy
 import json
 import logging
 import os
@@ -103,6 +115,18 @@ from rich.panel import Panel
 from rich.table import Table
 from rich.text import Text
 
+from metricstracker.BatchMetrics_metricstracker import TRADE_RETURN_METRICS
+
+from .IncrementalState_backtester import IncrementalState_backtester
+from .MultiAsset_backtester import PARTITION_COLUMN, MultiAsset_backtester
+from .ResultStore_backtester import (
+    BAR_STORE_FILENAME,
+    MULTI_ASSET_PARTITION_COLUMNS,
+    STORE_PARTITION_COLUMNS,
+    ResultStore_backtester,
+)
+from .SparseRecords_backtester import RESULT_MODE_TRADES_ONLY, SparseRecords_backtester
+
 # 移除重複的logging設置，使用main.py中設置的logger
 
 console = Console()
@@ -142,13 +166,18 @@ class TradeRecordExporter_backtester:
         self.predictor_column = predictor_column
         self.logger = logging.getLogger(self.__class__.__name__)
 
-        self.output_dir = os.path.join(
+        self.output_dir = self.default_output_dir()
+        os.makedirs(self.output_dir, exist_ok=True)
+        self.last_exported_path: Optional[str] = None
+
+    @staticmethod
+    def default_output_dir() -> str:
+        """預設導出目錄 records/backtester"""
+        return os.path.join(
             os.path.dirname(os.path.dirname(__file__)),
             "records",
             "backtester",
         )
-        os.makedirs(self.output_dir, exist_ok=True)
-        self.last_exported_path: Optional[str] = None
 
     def _get_strategy_name(self, params: Optional[dict]) -> str:  # noqa: C901
         """根據 entry/exit 參數產生 strategy 字串，格式為 entry1+entry2_exit1+exit2"""
@@ -354,7 +383,10 @@ class TradeRecordExporter_backtester:
                 # 導出CSV
                 # 新增 Backtest_id 欄位，確保主表格與 metadata 一一對應
                 # 優化：只在需要時才拷貝，避免不必要的記憶體使用
-                if "Backtest_id" not in result["records"].columns:
+                if SparseRecords_backtester.is_sparse_result(result):
+                    # 稀疏結果：按需還原完整逐K線記錄
+                    records_to_export = self.get_full_records(result)
+                elif "Backtest_id" not in result["records"].columns:
                     records_to_export = result["records"].copy()
                     records_to_export["Backtest_id"] = Backtest_id
                 else:
@@ -382,7 +414,17 @@ class TradeRecordExporter_backtester:
             )
             raise
 
-    def _create_parquet_filename(self) -> tuple[str, str]:
+    def get_full_records(self, result: dict) -> pd.DataFrame:
+        """取得單個回測結果的完整逐K線記錄（trades_only 稀疏結果會按需還原）"""
+        if not SparseRecords_backtester.is_sparse_result(result):
+            return result["records"]
+        if self.data is None:
+            raise ValueError("還原 trades_only 稀疏結果需要提供原始數據 data")
+        return SparseRecords_backtester.expand_result(result, self.data)
+
+    def _create_parquet_filename(
+        self, trading_instrument: Optional[str] = None
+    ) -> tuple[str, str]:
         """創建 Parquet 文件名和路徑
 
         格式: {date}_{Trading_instrument}_{predictor_file_name}_{predictor_column}_{random_id}_{Backtest_id}.parquet
@@ -394,7 +436,7 @@ class TradeRecordExporter_backtester:
         random_id = uuid.uuid4().hex[:8]
 
         # 獲取交易標的
-        trading_instrument = self._get_trading_instrument()
+        trading_instrument = trading_instrument or self._get_trading_instrument()
 
         # 獲取預測因子文件名和列名
         if self.predictor_file_name and self.predictor_column:
@@ -464,10 +506,11 @@ class TradeRecordExporter_backtester:
             entry_details = [param_to_dict(p) for p in params.get("entry", [])]
             exit_details = [param_to_dict(p) for p in params.get("exit", [])]
 
-            meta = {
-                "Backtest_id": result["Backtest_id"],
-                "Frequency": self.frequency,
-                "Asset": (
+            if SparseRecords_backtester.is_sparse_result(result):
+                # 稀疏結果可能沒有任何事件列，交易標的取自精簡陣列
+                asset = result["bar_data"].get("Trading_instrument", "ALL")
+            else:
+                asset = (
                     result.get("records", pd.DataFrame())
                     .get("Trading_instrument", pd.Series())
                     .iloc[0]
@@ -475,7 +518,12 @@ class TradeRecordExporter_backtester:
                     and "Trading_instrument"
                     in result.get("records", pd.DataFrame()).columns
                     else "ALL"
-                ),
+                )
+
+            meta = {
+                "Backtest_id": result["Backtest_id"],
+                "Frequency": self.frequency,
+                "Asset": asset,
                 "Strategy": self._get_strategy_name(params),
                 "Predictor": params.get("predictor", ""),
                 "Entry_params": entry_details,
@@ -598,6 +646,75 @@ class TradeRecordExporter_backtester:
 
         return combined_records
 
+    def _collect_inline_metrics(
+        self, results_to_export: List[dict]
+    ) -> Optional[tuple[Dict[str, dict], str]]:
+        """
+        收集結果附帶的引擎內績效（result["metrics"]）
+
+        任一成功結果缺少指標或各結果的年化參數不一致時回傳 None。
+
+        Returns:
+            Optional[tuple]: ({Backtest_id: 指標}, metrics_config JSON 字串)
+        """
+        exported = [
+            r
+            for r in results_to_export
+            if r.get("error") is None and r.get("params") is not None
+        ]
+        if not exported or any("metrics" not in r for r in exported):
+            return None
+        configs = {
+            json.dumps(r.get("metrics_config"), sort_keys=True) for r in exported
+        }
+        if len(configs) != 1:
+            return None
+
+        metrics_by_id = {r["Backtest_id"]: dict(r["metrics"]) for r in exported}
+        if all(
+            m.get("Avg_trade_return") is None or np.isnan(m["Avg_trade_return"])
+            for m in metrics_by_id.values()
+        ):
+            # 整個檔案沒有任何平倉收益率時 Trade_return 欄位不會導出，與讀回計算保持一致
+            for metrics in metrics_by_id.values():
+                metrics.update(dict.fromkeys(TRADE_RETURN_METRICS))
+        return metrics_by_id, configs.pop()
+
+    def _write_inline_metrics(
+        self, results_to_export: List[dict], metadata: dict, filepath: str
+    ) -> Optional[str]:
+        """
+        結果附帶引擎內績效（result["metrics"]）時，直接寫出 metricstracker 的 _metadata.json
+
+        內容與 MetricsExporter 讀回 Parquet 後計算的 batch_metadata 相同（回測元數據 + 績效指標），
+        並在 Parquet metadata 記錄 inline_metrics（time_unit / risk_free_rate），
+        供 MetricsRunner 判斷可否跳過第二次計算。任一成功結果缺少指標時不寫出。
+
+        Returns:
+            Optional[str]: _metadata.json 路徑；未寫出時為 None
+        """
+        collected = self._collect_inline_metrics(results_to_export)
+        if collected is None:
+            return None
+        metrics_by_id, config = collected
+
+        batch_metadata = json.loads(metadata["batch_metadata"])
+        for entry in batch_metadata:
+            entry.update(metrics_by_id.get(entry.get("Backtest_id"), {}))
+
+        out_dir = os.path.join(MultiAsset_backtester.records_root(filepath), "metricstracker")
+        os.makedirs(out_dir, exist_ok=True)
+        orig_name = os.path.splitext(os.path.basename(filepath))[0]
+        metadata_json_path = os.path.join(out_dir, f"{orig_name}_metadata.json")
+        with open(metadata_json_path, "w", encoding="utf-8") as f:
+            json.dump(batch_metadata, f, ensure_ascii=False, indent=2)
+        metadata["inline_metrics"] = config
+        self.logger.info(
+            f"引擎內績效已導出至: {metadata_json_path}",
+            extra={"Backtest_id": self.Backtest_id},
+        )
+        return metadata_json_path
+
     def _save_parquet_file(
         self, combined_records: pd.DataFrame, metadata: dict, filepath: str
     ) -> None:
@@ -647,6 +764,33 @@ class TradeRecordExporter_backtester:
             # 合併記錄
             combined_records = self._combine_records(results_to_export)
 
+            # trades_only 稀疏結果：共用K線與精簡權益陣列另存為同名 npz
+            if any(
+                SparseRecords_backtester.is_sparse_result(r) for r in results_to_export
+            ):
+                if self.data is None:
+                    raise ValueError("導出 trades_only 稀疏結果需要提供原始數據 data")
+                bar_store_path = SparseRecords_backtester.bar_store_path(filepath)
+                SparseRecords_backtester.save_bar_store(
+                    bar_store_path, self.data, results_to_export
+                )
+                metadata["result_mode"] = RESULT_MODE_TRADES_ONLY
+                metadata["bar_store"] = os.path.basename(bar_store_path)
+
+            # 增量回測：保存各回測的末端交易狀態為同名 _state.npz
+            if self.data is not None and any(
+                r.get("end_state") is not None for r in results_to_export
+            ):
+                state_path = IncrementalState_backtester.state_path(filepath)
+                IncrementalState_backtester.save_states(
+                    state_path, self.data, results_to_export
+                )
+                metadata["incremental_state"] = os.path.basename(state_path)
+
+            # 引擎內績效：直接寫出 _metadata.json
+            if results_to_export:
+                self._write_inline_metrics(results_to_export, metadata, filepath)
+
             # 保存文件
             self._save_parquet_file(combined_records, metadata, filepath)
 
@@ -661,6 +805,197 @@ class TradeRecordExporter_backtester:
             )
             raise
 
+    def export_partitioned_dataset(
+        self, data_by_instrument: Dict[str, pd.DataFrame]
+    ) -> List[str]:
+        """導出多標的回測結果為以 Trading_instrument 分區的單一資料集
+
+        目錄結構為 <資料集>/Trading_instrument=<標的>/<資料集>_<標的>.parquet（hive 分區），
+        每個分區檔案帶有該標的的 batch_metadata，可照常交由 metricstracker 計算績效。
+
+        Args:
+            data_by_instrument: {標的: 對齊後數據}（VectorBacktestEngine.instrument_data）
+
+        Returns:
+            List[str]: 各分區 Parquet 檔案路徑
+        """
+        try:
+            _, filepath = self._create_parquet_filename("MULTI")
+            dataset_dir = os.path.splitext(filepath)[0]
+            dataset_name = os.path.basename(dataset_dir)
+            date_str = datetime.now().strftime("%Y%m%d")
+
+            results_by_instrument: Dict[str, List[dict]] = {}
+            for result in self.results:
+                instrument = MultiAsset_backtester.result_instrument(result)
+                results_by_instrument.setdefault(str(instrument), []).append(result)
+
+            part_paths = []
+            for instrument, data in data_by_instrument.items():
+                results_to_export = results_by_instrument.get(str(instrument))
+                if not results_to_export:
+                    continue
+                part_dir = MultiAsset_backtester.partition_dir(dataset_dir, instrument)
+                os.makedirs(part_dir, exist_ok=True)
+                part_path = os.path.join(part_dir, f"{dataset_name}_{instrument}.parquet")
+
+                # 分區導出器：只替換數據與結果，其餘交易參數沿用
+                part_exporter = copy.copy(self)
+                part_exporter.data = data
+                part_exporter.results = results_to_export
+                metadata = part_exporter._create_batch_metadata(
+                    results_to_export, date_str
+                )
+                metadata[PARTITION_COLUMN] = instrument
+                # 分區欄位由目錄名還原，檔案內不重複保存
+                combined_records = part_exporter._combine_records(
+                    results_to_export
+                ).drop(columns=[PARTITION_COLUMN], errors="ignore")
+
+                if any(
+                    SparseRecords_backtester.is_sparse_result(r)
+                    for r in results_to_export
+                ):
+                    # 底線開頭的輔助檔不會被資料集讀取
+                    bar_store_path = os.path.join(
+                        part_dir,
+                        "_"
+                        + os.path.basename(
+                            SparseRecords_backtester.bar_store_path(part_path)
+                        ),
+                    )
+                    SparseRecords_backtester.save_bar_store(
+                        bar_store_path, data, results_to_export
+                    )
+                    metadata["result_mode"] = RESULT_MODE_TRADES_ONLY
+                    metadata["bar_store"] = os.path.basename(bar_store_path)
+
+                part_exporter._write_inline_metrics(
+                    results_to_export, metadata, part_path
+                )
+                part_exporter._save_parquet_file(combined_records, metadata, part_path)
+                part_paths.append(part_path)
+
+            self.last_exported_path = dataset_dir
+            self.logger.info(
+                f"多標的交易記錄已導出至分區資料集: {dataset_dir}（{len(part_paths)} 個標的）",
+                extra={"Backtest_id": self.Backtest_id},
+            )
+            return part_paths
+        except Exception as e:
+            self.logger.error(
+                f"分區資料集導出失敗: {e}",
+                extra={"Backtest_id": self.Backtest_id},
+            )
+            raise
+
+    def export_dataset(
+        self,
+        backtest_id: Optional[str] = None,
+        data_by_instrument: Optional[Dict[str, pd.DataFrame]] = None,
+    ) -> Optional[str]:
+        """導出回測結果為以條件組 / Predictor 分區的資料集（result_store = "dataset"）
+
+        目錄結構為 <資料集>/Condition_pair=<條件組>/Predictor=<預測因子>/part-0.parquet，
+        每個 Backtest_id 一個 row group；batch_metadata 與引擎內績效寫入 <資料集>/_index.parquet，
+        不再另存 _metadata.json。多標的回測（提供 data_by_instrument）再以 Trading_instrument
+        作為第一層分區，trades_only 的 _bars.npz 保存各標的自己的K線。
+
+        Args:
+            backtest_id: 指定要導出的回測ID，如果為None則導出所有結果
+            data_by_instrument: 多標的回測的 {標的: 對齊後數據}（VectorBacktestEngine.instrument_data）
+
+        Returns:
+            Optional[str]: 資料集目錄；沒有可導出的結果時為 None
+        """
+        try:
+            partition_columns = (
+                MULTI_ASSET_PARTITION_COLUMNS
+                if data_by_instrument is not None
+                else STORE_PARTITION_COLUMNS
+            )
+            _, filepath = self._create_parquet_filename(
+                "MULTI" if data_by_instrument is not None else None
+            )
+            dataset_dir = os.path.splitext(filepath)[0]
+
+            results_to_export = self._get_results_to_export(backtest_id)
+            if not results_to_export:
+                return None
+
+            date_str = datetime.now().strftime("%Y%m%d")
+            metadata = self._create_batch_metadata(results_to_export, date_str)
+            batch_metadata = json.loads(metadata.pop("batch_metadata"))
+            combined_records = self._combine_records(results_to_export)
+            partitions = {
+                r["Backtest_id"]: ResultStore_backtester.partition_values(
+                    r, partition_columns
+                )
+                for r in results_to_export
+                if "Backtest_id" in r
+            }
+
+            # 引擎內績效直接寫入索引
+            collected = self._collect_inline_metrics(results_to_export)
+            if collected is not None:
+                metrics_by_id, metadata["metrics_config"] = collected
+                for entry in batch_metadata:
+                    entry.update(metrics_by_id.get(entry["Backtest_id"], {}))
+
+            sparse_results = [
+                r
+                for r in results_to_export
+                if SparseRecords_backtester.is_sparse_result(r)
+            ]
+            if sparse_results:
+                if self.data is None:
+                    raise ValueError("導出 trades_only 稀疏結果需要提供原始數據 data")
+                metadata["result_mode"] = RESULT_MODE_TRADES_ONLY
+
+            ResultStore_backtester.write_dataset(
+                dataset_dir,
+                combined_records,
+                batch_metadata,
+                partitions,
+                metadata,
+                partition_columns,
+            )
+
+            # trades_only：共用K線與精簡陣列按分區保存，讀取單一分區時不需載入其他策略
+            results_by_partition: Dict[tuple, List[dict]] = {}
+            for result in sparse_results:
+                results_by_partition.setdefault(
+                    ResultStore_backtester.partition_values(result, partition_columns),
+                    [],
+                ).append(result)
+            for values, part_results in results_by_partition.items():
+                SparseRecords_backtester.save_bar_store(
+                    os.path.join(
+                        ResultStore_backtester.partition_dir(
+                            dataset_dir, values, partition_columns
+                        ),
+                        BAR_STORE_FILENAME,
+                    ),
+                    # 多標的：第一層分區為標的，保存該標的的K線
+                    data_by_instrument[values[0]]
+                    if data_by_instrument is not None
+                    else self.data,
+                    part_results,
+                )
+
+            self.last_exported_path = dataset_dir
+            self.logger.info(
+                f"交易記錄已導出至分區資料集: {dataset_dir}（{len(batch_metadata)} 個回測）",
+                extra={"Backtest_id": self.Backtest_id},
+            )
+            return dataset_dir
+        except Exception as e:
+            self.logger.error(
+                f"分區資料集導出失敗: {e}",
+                extra={"Backtest_id": self.Backtest_id},
+            )
+            raise
+
     def display_backtest_summary(self) -> None:
         """顯示回測摘要，包含預覽表格和操作選項。"""
         if not self.results:
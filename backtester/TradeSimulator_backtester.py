@@ -37,8 +37,11 @@ flowchart TD
 ------------------------------------------------------------
 - simulate_trades(): 單個策略交易模擬（向後兼容）
 - simulate_trades_vectorized(): 向量化交易模擬（供 VBT 調用）
-- generate_single_result(): 生成完整交易記錄
-- _vectorized_trade_simulation_njit(): Numba 加速的向量化交易邏輯
+- generate_single_result(): 生成完整交易記錄（欄位式一次組裝 DataFrame）
+- vectorized_trade_simulation(): 分配 int8/float 結果矩陣並調用並行交易模擬核心
+- _vectorized_trade_simulation_njit(): Numba parallel=True 交易邏輯，prange 並行處理所有策略
+- _build_trade_record_arrays_njit(): Numba 單次掃描生成交易組、持倉期數、開平倉價格與交易收益率陣列
+- trade_return_matrix(): 不建構 records，直接由交易矩陣批量計算 Trade_return 矩陣（供引擎內績效計算）
 
 【維護與擴充重點】
 ------------------------------------------------------------
@@ -47,6 +50,7 @@ flowchart TD
 - 若信號產生邏輯有變動（如允許2, -2等複合信號），需同步調整本模組的判斷邏輯
 - **每次開發新 indicator 或信號型態時，務必檢查本模組的持倉/平倉判斷是否仍然正確**
 - 任何涉及 position, signal 判斷的邏輯都在本檔案 for 迴圈內
+- 交易記錄欄位邏輯集中於 _build_trade_record_arrays_njit，修改時需保持與交易模擬一致
 - 若有新信號型態，需同步更新本檔案的判斷分支
 - 若有交易記錄欄位變動，需同步更新 record 結構
 - 向量化邏輯需要與單個策略邏輯保持一致
@@ -90,6 +94,12 @@ flowchart TD
 - v2.0: 新增向量化交易模擬，統一接口
 - v2.1: 整合 Numba JIT 編譯優化
 - v2.2: 完善錯誤處理與邏輯驗證
+- v2.3: 交易記錄改為欄位式建構，移除逐行 iloc 與 dict 組裝
+- v2.4: 交易模擬核心改為 prange 並行、整數價格模式，positions/trade_actions 以 int8 儲存，returns/equity_values 可選 float32
+- v2.5: 交易模擬可自指定K線與起始狀態續算並回傳末端狀態（final_state），支援增量回測
+- v2.6: 交易模擬可指定結束K線（end_index），只模擬樣本窗口，供滾動前進分析使用
+- v2.7: 交易模擬價格改為 (K線 x 標的) 矩陣，asset_index 指定每個策略的標的，多標的可在同一次核心調用中模擬
+- v2.8: 新增 trade_return_matrix，以 prange 並行核心批量計算與交易記錄一致的 Trade_return 矩陣
 
 【參考】
 ------------------------------------------------------------
@@ -106,44 +116,81 @@ import numpy as np
 import pandas as pd
 
 # 導入 Numba 進行 JIT 編譯加速
-from numba import njit
+from numba import njit, prange
 
 # 導入型別
 from .IndicatorParams_backtester import IndicatorParams
 
 
+# 成交價格模式代碼（避免在 Numba 內層迴圈比較字串）
+TRADE_PRICE_OPEN = 0
+TRADE_PRICE_CLOSE = 1
+
+# 結果精度：positions/trade_actions 固定為 int8，returns/equity_values 可選 float32
+RESULT_PRECISIONS = {"float64": np.float64, "float32": np.float32}
+
+
+def trade_price_mode(trade_price: str) -> int:
+    """將 trade_price 字串轉為價格模式代碼（非 close 一律視為 open，與原邏輯一致）"""
+    return TRADE_PRICE_CLOSE if trade_price == "close" else TRADE_PRICE_OPEN
+
+
 # 核心算法：向量化 Numba 實現
-@njit(fastmath=True, cache=True)
+@njit(parallel=True, fastmath=True, cache=True)
 def _vectorized_trade_simulation_njit(  # pylint: disable=too-complex
     entry_signals: np.ndarray,
     exit_signals: np.ndarray,
     close_prices: np.ndarray,
     open_prices: np.ndarray,
+    asset_index: np.ndarray,
     transaction_cost: float,
     slippage: float,
-    trade_price: str = "open",
-    trade_delay: int = 1,
-) -> Dict[str, Any]:
+    price_mode: int,
+    trade_delay: int,
+    start_index: int,
+    end_index: int,
+    state: np.ndarray,
+    positions: np.ndarray,
+    returns: np.ndarray,
+    trade_actions: np.ndarray,
+    equity_values: np.ndarray,
+) -> None:
     """
-    向量化交易模擬 - 移植自 VBT
+    向量化交易模擬 - 以 prange 並行處理所有策略，結果寫入預先分配的矩陣
+
+    Args:
+        close_prices, open_prices: (n_time, n_assets) 價格矩陣，單一標的時 n_assets = 1
+        asset_index: (n_strategies,) 每個策略使用的價格欄（標的）索引
+        price_mode: TRADE_PRICE_OPEN / TRADE_PRICE_CLOSE
+        start_index: 從第幾根K線開始模擬（增量回測時為既有K線數）
+        end_index: 模擬到第幾根K線為止（不含；滾動前進分析的樣本窗口）
+        state: (n_strategies, 5) float64 狀態矩陣，欄位見 STATE_COLUMNS；
+            讀取為起始狀態，模擬結束後寫回末端狀態
+        positions, trade_actions: int8 矩陣 (end_index - start_index, n_strategies)
+        returns, equity_values: float64 或 float32 矩陣 (end_index - start_index, n_strategies)
+
+    各策略的狀態機完全獨立，內部運算一律使用 float64，只在寫入時轉為輸出精度。
     """
     n_time, n_strategies = entry_signals.shape
 
-    # 預分配結果矩陣
-    positions = np.zeros((n_time, n_strategies))
-    returns = np.zeros((n_time, n_strategies))
-    trade_actions = np.zeros((n_time, n_strategies))
-    equity_values = np.zeros((n_time, n_strategies))
+    # 依價格模式選定成交價格序列
+    if price_mode == TRADE_PRICE_CLOSE:
+        trade_prices = close_prices
+    else:
+        trade_prices = open_prices
 
     # 對每個策略進行優化的狀態機處理
-    for s in range(n_strategies):
+    for s in prange(n_strategies):
+        asset = asset_index[s]
         # 狀態機：最小化記憶依賴
-        current_state = 0.0  # 0=空倉, 1=多倉, -1=空倉
-        equity = 1.0
-        open_price = 0.0  # 追蹤開倉價格
-        open_equity = 1.0  # 追蹤開倉時的權益
-
-        for t in range(n_time):
+        current_state = int(state[s, 0])  # 0=空倉, 1=多倉, -1=空倉
+        equity = state[s, 1]
+        open_price = state[s, 2]  # 追蹤開倉價格
+        open_equity = state[s, 3]  # 追蹤開倉時的權益
+        prev_equity_value = state[s, 4]  # 昨日資金曲線（x100）
+
+        for t in range(start_index, end_index):
+            row = t - start_index
             # 計算信號索引（考慮交易延遲）
             signal_index = t - trade_delay
             entry_sig = (
@@ -154,76 +201,427 @@ def _vectorized_trade_simulation_njit(  # pylint: disable=too-complex
             )
 
             # 計算資金曲線和每日收益率
-            if t > 0 and current_state != 0.0 and open_price > 0.0:
-                if trade_price == "close":
-                    current_close = close_prices[t]
-                    if current_state == 1.0:  # 做多
-                        price_return = (current_close - open_price) / open_price
-                    else:  # 做空
-                        price_return = (open_price - current_close) / open_price
-                else:  # trade_price == 'open'
-                    current_open = open_prices[t]
-                    if current_state == 1.0:  # 做多
-                        price_return = (current_open - open_price) / open_price
-                    else:  # 做空
-                        price_return = (open_price - current_open) / open_price
+            daily_return = 0.0
+            if t > 0 and current_state != 0 and open_price > 0.0:
+                current_price = trade_prices[t, asset]
+                if current_state == 1:  # 做多
+                    price_return = (current_price - open_price) / open_price
+                else:  # 做空
+                    price_return = (open_price - current_price) / open_price
 
                 # 計算資金曲線：開倉時權益 * (1 + 價格收益率)
                 equity = open_equity * (1.0 + price_return)
-                
+
                 # 計算每日收益率：今日資金曲線 / 昨日資金曲線 - 1
-                if equity_values[t-1, s] > 0:
-                    returns[t, s] = (equity * 100.0) / equity_values[t-1, s] - 1.0
-                else:
-                    returns[t, s] = 0.0
-            else:
-                returns[t, s] = 0.0
+                if prev_equity_value > 0:
+                    daily_return = (equity * 100.0) / prev_equity_value - 1.0
+            returns[row, s] = daily_return
 
             # 狀態轉換邏輯（優化版本）
-            if current_state == 0.0:  # 空倉
-                if entry_sig == 1.0:  # 開多倉
-                    current_state = 1.0
-                    trade_actions[t, s] = 1
-                    # 設置開倉價格
-                    if trade_price == "close":
-                        open_price = close_prices[t]
-                    else:
-                        open_price = open_prices[t]
-                    # 扣除滑點與手續費
-                    equity *= (1.0 - slippage) * (1.0 - transaction_cost)
-                    open_equity = equity  # 記錄開倉時的權益（扣除成本後）
-                elif entry_sig == -1.0:  # 開空倉
-                    current_state = -1.0
-                    trade_actions[t, s] = 1
+            if current_state == 0:  # 空倉
+                if entry_sig == 1.0 or entry_sig == -1.0:  # 開多倉 / 開空倉
+                    current_state = 1 if entry_sig == 1.0 else -1
+                    trade_actions[row, s] = 1
                     # 設置開倉價格
-                    if trade_price == "close":
-                        open_price = close_prices[t]
-                    else:
-                        open_price = open_prices[t]
+                    open_price = trade_prices[t, asset]
                     # 扣除滑點與手續費
                     equity *= (1.0 - slippage) * (1.0 - transaction_cost)
                     open_equity = equity  # 記錄開倉時的權益（扣除成本後）
-            elif current_state == 1.0:  # 多倉
-                if exit_sig == -1.0:  # 平多倉
-                    current_state = 0.0
-                    trade_actions[t, s] = 4
-                    open_price = 0.0  # 重置開倉價格
-                    open_equity = 1.0  # 重置開倉權益
-                    # 扣除滑點與手續費
-                    equity *= (1.0 - slippage) * (1.0 - transaction_cost)
-            elif current_state == -1.0:  # 空倉
-                if exit_sig == 1.0:  # 平空倉
-                    current_state = 0.0
-                    trade_actions[t, s] = 4
-                    open_price = 0.0  # 重置開倉價格
-                    open_equity = 1.0  # 重置開倉權益
-                    # 扣除滑點與手續費
-                    equity *= (1.0 - slippage) * (1.0 - transaction_cost)
+            elif (current_state == 1 and exit_sig == -1.0) or (
+                current_state == -1 and exit_sig == 1.0
+            ):  # 平多倉 / 平空倉
+                current_state = 0
+                trade_actions[row, s] = 4
+                open_price = 0.0  # 重置開倉價格
+                open_equity = 1.0  # 重置開倉權益
+                # 扣除滑點與手續費
+                equity *= (1.0 - slippage) * (1.0 - transaction_cost)
+
+            positions[row, s] = current_state
+            prev_equity_value = equity * 100.0
+            equity_values[row, s] = prev_equity_value
 
-            positions[t, s] = current_state
-            equity_values[t, s] = equity * 100.0
+        state[s, 0] = current_state
+        state[s, 1] = equity
+        state[s, 2] = open_price
+        state[s, 3] = open_equity
+        state[s, 4] = prev_equity_value
 
-    return {"positions": positions, "returns": returns, "trade_actions": trade_actions, "equity_values": equity_values}
+
+# 交易狀態矩陣欄位（增量回測保存/恢復用）
+STATE_COLUMNS = ("position", "equity", "open_price", "open_equity", "prev_equity_value")
+
+
+def initial_trade_state(n_strategies: int) -> np.ndarray:
+    """全新模擬的起始狀態：空倉、權益 1.0"""
+    state = np.zeros((n_strategies, len(STATE_COLUMNS)), dtype=np.float64)
+    state[:, 1] = 1.0
+    state[:, 3] = 1.0
+    return state
+
+
+def vectorized_trade_simulation(
+    entry_signals: np.ndarray,
+    exit_signals: np.ndarray,
+    close_prices: np.ndarray,
+    open_prices: np.ndarray,
+    transaction_cost: float,
+    slippage: float,
+    trade_price: str = "open",
+    trade_delay: int = 1,
+    result_precision: str = "float64",
+    start_index: int = 0,
+    initial_state: Optional[np.ndarray] = None,
+    end_index: Optional[int] = None,
+    asset_index: Optional[np.ndarray] = None,
+) -> Dict[str, np.ndarray]:
+    """
+    分配結果矩陣並執行並行交易模擬
+
+    Args:
+        close_prices, open_prices: (n_time,) 單一標的價格，或 (n_time, n_assets) 多標的價格矩陣
+        asset_index: 多標的時每個策略的價格欄索引；None 時全部使用第 0 欄
+        start_index: 從第幾根K線開始模擬，結果矩陣只含 start_index 之後的K線
+        end_index: 模擬到第幾根K線為止（不含）；None 時到數據結尾
+        initial_state: (n_strategies, 5) 起始狀態；None 時為全新模擬
+
+    Returns:
+        dict: positions/trade_actions 為 int8，returns/equity_values 為 result_precision，
+              final_state 為模擬結束時的狀態矩陣
+    """
+    if result_precision not in RESULT_PRECISIONS:
+        raise ValueError(
+            f"不支援的 result_precision: {result_precision}，可選 {list(RESULT_PRECISIONS)}"
+        )
+    float_dtype = RESULT_PRECISIONS[result_precision]
+    n_time, n_strategies = entry_signals.shape
+    if end_index is None:
+        end_index = n_time
+    n_rows = end_index - start_index
+
+    if initial_state is None:
+        state = initial_trade_state(n_strategies)
+    else:
+        state = np.array(initial_state, dtype=np.float64, copy=True)
+
+    positions = np.zeros((n_rows, n_strategies), dtype=np.int8)
+    returns = np.zeros((n_rows, n_strategies), dtype=float_dtype)
+    trade_actions = np.zeros((n_rows, n_strategies), dtype=np.int8)
+    equity_values = np.zeros((n_rows, n_strategies), dtype=float_dtype)
+
+    close_matrix = np.asarray(close_prices, dtype=np.float64)
+    open_matrix = np.asarray(open_prices, dtype=np.float64)
+    if close_matrix.ndim == 1:
+        close_matrix = close_matrix.reshape(-1, 1)
+        open_matrix = open_matrix.reshape(-1, 1)
+    if asset_index is None:
+        asset_index = np.zeros(n_strategies, dtype=np.int64)
+
+    _vectorized_trade_simulation_njit(
+        entry_signals,
+        exit_signals,
+        close_matrix,
+        open_matrix,
+        np.asarray(asset_index, dtype=np.int64),
+        float(transaction_cost),
+        float(slippage),
+        trade_price_mode(trade_price),
+        int(trade_delay),
+        int(start_index),
+        int(end_index),
+        state,
+        positions,
+        returns,
+        trade_actions,
+        equity_values,
+    )
+    return {
+        "positions": positions,
+        "returns": returns,
+        "trade_actions": trade_actions,
+        "equity_values": equity_values,
+        "final_state": state,
+    }
+
+
+# Position_type 代碼對照：0=None, 1=new_long, 2=new_short, 3=close_long, 4=close_short
+_POSITION_TYPE_LABELS = np.array(
+    [None, "new_long", "new_short", "close_long", "close_short"], dtype=object
+)
+
+
+@njit(cache=True)
+def _build_trade_record_arrays_njit(  # pylint: disable=too-complex
+    position: np.ndarray,
+    trade_actions: np.ndarray,
+    current_prices: np.ndarray,
+):
+    """
+    單次掃描 trade_actions/position，以欄位陣列形式生成交易記錄
+
+    與逐行建構 record 的邏輯完全一致，缺值以 -1（索引）或 NaN（浮點）表示。
+
+    Returns:
+        tuple: (group_idx, position_code, open_position_price, close_position_price,
+                open_idx, close_idx, holding_period_count, holding_period,
+                trade_return, n_groups)
+    """
+    n = len(position)
+    group_idx = np.full(n, -1, dtype=np.int64)
+    position_code = np.zeros(n, dtype=np.int64)
+    open_position_price = np.zeros(n, dtype=np.float64)
+    close_position_price = np.zeros(n, dtype=np.float64)
+    open_idx = np.full(n, -1, dtype=np.int64)
+    close_idx = np.full(n, -1, dtype=np.int64)
+    holding_period_count = np.zeros(n, dtype=np.int64)
+    holding_period = np.full(n, np.nan, dtype=np.float64)
+    trade_return = np.full(n, np.nan, dtype=np.float64)
+
+    n_groups = 0
+    current_group = -1
+    current_open_idx = -1
+    current_open_price = 0.0
+    count = 0
+
+    for i in range(n):
+        if trade_actions[i] == 1:  # 開倉
+            position_code[i] = 1 if position[i] > 0 else 2
+            open_position_price[i] = current_prices[i]
+            open_idx[i] = i
+            # 生成新的交易組
+            current_group = n_groups
+            n_groups += 1
+            group_idx[i] = current_group
+            current_open_idx = i
+            current_open_price = current_prices[i]
+            count = 0
+        elif trade_actions[i] == 4:  # 平倉
+            close_position_price[i] = current_prices[i]
+            close_idx[i] = i
+            if i > 0:
+                if position[i - 1] > 0:
+                    position_code[i] = 3
+                elif position[i - 1] < 0:
+                    position_code[i] = 4
+            group_idx[i] = current_group
+            if current_group >= 0:
+                open_idx[i] = current_open_idx
+                # 平倉當日也要計算持倉期數
+                count += 1
+                holding_period[i] = count
+                if current_open_price > 0:
+                    if position_code[i] == 3:
+                        trade_return[i] = (
+                            current_prices[i] - current_open_price
+                        ) / current_open_price
+                    else:  # close_short
+                        trade_return[i] = (
+                            current_open_price - current_prices[i]
+                        ) / current_open_price
+            current_group = -1
+            count = 0
+        elif current_group >= 0:  # 持倉期間，累加持倉期數
+            count += 1
+            group_idx[i] = current_group
+        holding_period_count[i] = count
+
+    return (
+        group_idx,
+        position_code,
+        open_position_price,
+        close_position_price,
+        open_idx,
+        close_idx,
+        holding_period_count,
+        holding_period,
+        trade_return,
+        n_groups,
+    )
+
+
+@njit(parallel=True, cache=True)
+def _trade_return_matrix_njit(
+    positions: np.ndarray,
+    trade_actions: np.ndarray,
+    current_prices: np.ndarray,
+) -> np.ndarray:
+    """
+    批量計算 Trade_return 矩陣（策略間以 prange 並行）
+
+    與 _build_trade_record_arrays_njit 的 trade_return 完全一致：平倉K線依前一根持倉方向
+    計算多/空收益率，其餘K線為 NaN。
+    """
+    n_time, n_strategies = trade_actions.shape
+    trade_return = np.full((n_time, n_strategies), np.nan)
+    for s in prange(n_strategies):
+        has_open = False
+        open_price = 0.0
+        for i in range(n_time):
+            action = trade_actions[i, s]
+            if action == 1:
+                has_open = True
+                open_price = current_prices[i]
+            elif action == 4:
+                if has_open and open_price > 0:
+                    price = current_prices[i]
+                    if i > 0 and positions[i - 1, s] > 0:
+                        trade_return[i, s] = (price - open_price) / open_price
+                    else:  # close_short
+                        trade_return[i, s] = (open_price - price) / open_price
+                has_open = False
+    return trade_return
+
+
+def trade_return_matrix(
+    positions: np.ndarray, trade_actions: np.ndarray, current_prices: np.ndarray
+) -> np.ndarray:
+    """
+    由交易模擬結果直接計算 (K線 x 策略) Trade_return 矩陣，不需逐策略建構 records
+
+    Args:
+        positions: (K線, 策略) 持倉矩陣
+        trade_actions: (K線, 策略) 交易動作矩陣
+        current_prices: 依 trade_price 選定的成交價格序列（所有策略共用）
+
+    Returns:
+        np.ndarray: float64 矩陣，非平倉K線為 NaN
+    """
+    return _trade_return_matrix_njit(
+        positions, trade_actions, np.asarray(current_prices, dtype=np.float64)
+    )
+
+
+def _take_optional_values(values: pd.Series, idx: np.ndarray) -> Any:
+    """依索引取值，idx == -1 處為缺值；全缺時回傳 None 物件欄位（與逐行建構一致）"""
+    valid = idx >= 0
+    if not valid.any():
+        return np.full(len(idx), None, dtype=object)
+    taken = values.iloc[np.where(valid, idx, 0)].reset_index(drop=True)
+    return taken.where(valid)
+
+
+def _optional_float_values(values: np.ndarray) -> np.ndarray:
+    """NaN 代表缺值；全缺時回傳 None 物件欄位（與逐行建構一致）"""
+    if np.isnan(values).all():
+        return np.full(len(values), None, dtype=object)
+    return values
+
+
+def bar_time_values(data: pd.DataFrame) -> pd.Series:
+    """取得每根K線的時間值：優先 DatetimeIndex，其次 Time 欄位，否則使用數字索引"""
+    if isinstance(data.index, pd.DatetimeIndex):
+        return pd.Series(data.index)
+    if "Time" in data.columns:
+        return data["Time"].reset_index(drop=True)
+    return pd.Series(np.arange(len(data)))
+
+
+def build_trade_record_columns(  # pylint: disable=too-many-arguments
+    bars: pd.DataFrame,
+    time_values: pd.Series,
+    current_prices: np.ndarray,
+    position: np.ndarray,
+    returns: np.ndarray,
+    trade_actions: np.ndarray,
+    equity_values: np.ndarray,
+    entry_signal: np.ndarray,
+    exit_signal: np.ndarray,
+    predictor_values: np.ndarray,
+    trading_instrument: str,
+    parameter_set_id: str,
+    backtest_id: str,
+    transaction_cost: float,
+    slippage: float,
+    group_labels: Optional[List[str]] = None,
+) -> Dict[str, Any]:
+    """
+    以欄位陣列形式生成交易記錄（欄位順序即 records DataFrame 欄位順序）
+
+    Args:
+        bars: 含 Open/High/Low/Close 的K線數據
+        time_values: 每根K線的時間值
+        current_prices: 依 trade_price 選定的成交價格序列
+        group_labels: 既有的交易組ID（依開倉順序）；None 時自動生成新的ID
+
+    Returns:
+        dict: 欄位名稱 -> 陣列/Series/常數
+    """
+    import uuid
+
+    (
+        group_idx,
+        position_code,
+        open_position_price,
+        close_position_price,
+        open_idx,
+        close_idx,
+        holding_period_count,
+        holding_period,
+        trade_return,
+        n_groups,
+    ) = _build_trade_record_arrays_njit(
+        np.asarray(position, dtype=np.float64),
+        np.asarray(trade_actions, dtype=np.float64),
+        np.asarray(current_prices, dtype=np.float64),
+    )
+
+    # 交易組ID（最後一格為 None，對應 group_idx == -1）
+    labels = np.empty(n_groups + 1, dtype=object)
+    if group_labels is None:
+        labels[:n_groups] = [f"T{str(uuid.uuid4())[:8]}" for _ in range(n_groups)]
+    else:
+        labels[:n_groups] = list(group_labels)
+    labels[n_groups] = None
+
+    trade_action_values = np.asarray(trade_actions)
+    is_trade = (trade_action_values == 1) | (trade_action_values == 4)
+
+    return {
+        "Time": time_values,
+        "Open": bars["Open"].to_numpy(),
+        "High": bars["High"].to_numpy(),
+        "Low": bars["Low"].to_numpy(),
+        "Close": bars["Close"].to_numpy(),
+        "Trading_instrument": trading_instrument,
+        "Position_type": _POSITION_TYPE_LABELS[position_code],
+        "Open_position_price": open_position_price,
+        "Close_position_price": close_position_price,
+        "Position_size": np.asarray(position, dtype=np.float64),
+        "Return": np.asarray(returns, dtype=np.float64),
+        "Trade_group_id": labels[group_idx],
+        "Trade_action": trade_action_values.astype(np.int64),
+        "Open_time": _take_optional_values(time_values, open_idx),
+        "Close_time": _take_optional_values(time_values, close_idx),
+        "Parameter_set_id": parameter_set_id,
+        "Equity_value": np.asarray(equity_values, dtype=np.float64),
+        "Transaction_cost": np.where(is_trade, transaction_cost, 0.0),
+        "Slippage_cost": np.where(is_trade, slippage, 0.0),
+        "Predictor_value": predictor_values,
+        "Entry_signal": np.asarray(entry_signal),
+        "Exit_signal": np.asarray(exit_signal),
+        "Holding_period_count": holding_period_count,
+        "Holding_period": _optional_float_values(holding_period),
+        "Trade_return": _optional_float_values(trade_return),
+        "Backtest_id": backtest_id,
+    }
+
+
+def records_frame_from_columns(
+    columns: Dict[str, Any], rows: Optional[np.ndarray] = None
+) -> pd.DataFrame:
+    """由欄位陣列組裝 records DataFrame；rows 不為 None 時只取指定列"""
+    if rows is None:
+        return pd.DataFrame(columns)
+
+    selected = {}
+    for name, values in columns.items():
+        if isinstance(values, pd.Series):
+            selected[name] = values.iloc[rows].reset_index(drop=True)
+        elif isinstance(values, np.ndarray):
+            selected[name] = values[rows]
+        else:
+            selected[name] = [values] * len(rows)
+    return pd.DataFrame(selected)
 
 
 logger = logging.getLogger("lo2cin4bt")
@@ -337,7 +735,11 @@ class TradeSimulator_backtester:
         return result["records"], None  # 返回 records_df 和 warning_msg
 
     def simulate_trades_vectorized(  # pylint: disable=unused-argument
-        self, entry_signals_matrix: pd.Series, exit_signals_matrix: pd.Series, trading_params: Dict[str, Any]
+        self,
+        entry_signals_matrix: pd.Series,
+        exit_signals_matrix: pd.Series,
+        trading_params: Dict[str, Any],
+        result_precision: str = "float64",
     ) -> Dict[str, Any]:
         """
         向量化交易模擬 - 供 VBT 調用
@@ -346,12 +748,13 @@ class TradeSimulator_backtester:
             entry_signals_matrix: numpy.ndarray, shape (n_time, n_strategies)
             exit_signals_matrix: numpy.ndarray, shape (n_time, n_strategies)
             trading_params: dict, 包含交易參數
+            result_precision: returns/equity_values 的精度（"float64" 或 "float32"）
 
         Returns:
-            dict: 包含向量化交易結果
+            dict: 包含向量化交易結果（positions/trade_actions 為 int8）
         """
-        # 使用 Numba 加速的向量化交易模擬
-        result = _vectorized_trade_simulation_njit(
+        # 使用 Numba 並行加速的向量化交易模擬
+        return vectorized_trade_simulation(
             entry_signals_matrix,
             exit_signals_matrix,
             self.data["Close"].values.astype(np.float64),
@@ -360,18 +763,8 @@ class TradeSimulator_backtester:
             trading_params.get("slippage", 0.0005),
             trading_params.get("trade_price", "close"),
             trading_params.get("trade_delay", 0),
+            result_precision,
         )
-        positions = result["positions"]
-        returns = result["returns"]
-        trade_actions = result["trade_actions"]
-        equity_values = result["equity_values"]
-
-        return {
-            "positions": positions,
-            "returns": returns,
-            "trade_actions": trade_actions,
-            "equity_values": equity_values,
-        }
 
     def generate_single_result(  # pylint: disable=too-complex
         self,
@@ -387,149 +780,60 @@ class TradeSimulator_backtester:
         entry_params: Dict[str, Any],
         exit_params: Dict[str, Any],
         trading_params: Dict[str, Any],
+        result_mode: str = "full",
     ) -> Dict[str, Any]:
         """
         生成單個任務的結果 - 移植自 VBT 的 _generate_single_result
+
+        result_mode="trades_only" 時 records 只含開/平倉列（附 Bar_index），
+        並於 result["bar_data"] 保存權益、收益率與信號陣列，供下游按需還原完整記錄。
         """
-        import uuid
-
-        records = []
-        current_trade_group_id = None
-        open_price_map = {}
-        open_time_map = {}
-        holding_period_count = 0
-
-        for i in range(len(position)):
-            row = self.data.iloc[i]
-            # 確保使用正確的時間索引
-            if isinstance(self.data.index, pd.DatetimeIndex):
-                time_index = self.data.index[i]
-            elif "Time" in self.data.columns:
-                time_index = row["Time"]
-            else:
-                time_index = i  # 如果沒有時間索引，使用數字索引
-
-            # 根據trade_actions判斷交易類型
-            position_type = None
-            open_position_price = 0.0
-            close_position_price = 0.0
-            open_time = None
-            close_time = None
-            trade_group_id = None
-            transaction_cost = 0.0
-            slippage_cost = 0.0
-            holding_period = None
-            trade_return = None
-
-            # 根據trade_price設置當前時間點的價格（無論是否有交易動作）
-            trade_price = trading_params.get("trade_price", "close")
-            current_price = row["Open"] if trade_price == "open" else row["Close"]
-
-            if trade_actions[i] == 1:  # 開倉
-                if position[i] > 0:
-                    position_type = "new_long"
-                else:
-                    position_type = "new_short"
-                open_position_price = current_price
-                open_time = time_index
-                # 生成新的交易組ID
-                trade_group_id = f"T{str(uuid.uuid4())[:8]}"
-                current_trade_group_id = trade_group_id
-                # 記錄開倉價格和時間
-                open_price_map[trade_group_id] = open_position_price
-                open_time_map[trade_group_id] = open_time
-                # 計算交易成本
-                transaction_cost = trading_params.get("transaction_cost", 0.001)
-                slippage_cost = trading_params.get("slippage", 0.0005)
-                holding_period_count = 0
-            elif trade_actions[i] == 4:  # 平倉
-                close_position_price = current_price
-                close_time = time_index
-                # 補上平倉時的 Position_type
-                if i > 0:
-                    if position[i - 1] > 0:
-                        position_type = "close_long"
-                    elif position[i - 1] < 0:
-                        position_type = "close_short"
-                # 使用當前的交易組ID
-                trade_group_id = current_trade_group_id
-                # 計算交易成本
-                transaction_cost = trading_params.get("transaction_cost", 0.001)
-                slippage_cost = trading_params.get("slippage", 0.0005)
-                # 計算持倉期間和交易收益率
-                if trade_group_id and trade_group_id in open_time_map:
-                    open_time = open_time_map[trade_group_id]
-                    open_price = open_price_map[trade_group_id]
-                    # 先累加持倉期數（平倉當日也要計算）
-                    if current_trade_group_id is not None:
-                        holding_period_count += 1
-                    # 使用正確的 holding_period_count 作為 holding_period
-                    holding_period = holding_period_count
-                    # 計算交易收益率
-                    if open_price > 0:
-                        if position_type == "close_long":
-                            trade_return = (
-                                close_position_price - open_price
-                            ) / open_price
-                        else:  # close_short
-                            trade_return = (
-                                open_price - close_position_price
-                            ) / open_price
-                # 清理交易組記錄
-                if trade_group_id in open_price_map:
-                    open_price_map.pop(trade_group_id)
-                if trade_group_id in open_time_map:
-                    open_time_map.pop(trade_group_id)
-                current_trade_group_id = None
-                # 平倉後重置 holding_period_count 為 0
-                holding_period_count = 0
-            else:
-                # 持倉期間，累加持倉期數
-                if current_trade_group_id is not None:
-                    holding_period_count += 1
-                    trade_group_id = current_trade_group_id
-
-            record = {
-                "Time": time_index,
-                "Open": row["Open"],
-                "High": row["High"],
-                "Low": row["Low"],
-                "Close": row["Close"],
-                "Trading_instrument": getattr(self, 'trading_instrument', 'X'),
-                "Position_type": position_type,
-                "Open_position_price": open_position_price,
-                "Close_position_price": close_position_price,
-                "Position_size": position[i],
-                "Return": returns[i],
-                "Trade_group_id": trade_group_id,
-                "Trade_action": int(trade_actions[i]),
-                "Open_time": open_time,
-                "Close_time": close_time,
-                "Parameter_set_id": self._generate_parameter_set_id(
-                    entry_params, exit_params, predictor
-                ),
-                "Equity_value": equity_values[i],
-                "Transaction_cost": transaction_cost,
-                "Slippage_cost": slippage_cost,
-                "Predictor_value": (
-                    row[predictor] if predictor in self.data.columns else 0.0
-                ),
-                "Entry_signal": entry_signal[i],
-                "Exit_signal": exit_signal[i],
-                "Holding_period_count": holding_period_count,
-                "Holding_period": holding_period,
-                "Trade_return": trade_return,
-                "Backtest_id": backtest_id,
-            }
-            records.append(record)
+        n_rows = len(position)
+        data = self.data.iloc[:n_rows]
+        time_values = bar_time_values(data)
 
-        # 轉換為DataFrame
-        records_df = pd.DataFrame(records)
+        # 根據trade_price設置當前時間點的價格（無論是否有交易動作）
+        trade_price = trading_params.get("trade_price", "close")
+        current_prices = (
+            data["Open"] if trade_price == "open" else data["Close"]
+        ).to_numpy(dtype=np.float64)
 
-        # 生成策略名稱
-        strategy_name = self._generate_parameter_set_id(
+        parameter_set_id = self._generate_parameter_set_id(
             entry_params, exit_params, predictor
         )
+        if predictor in data.columns:
+            predictor_values = data[predictor].to_numpy()
+        else:
+            predictor_values = np.zeros(n_rows)
+
+        columns = build_trade_record_columns(
+            data,
+            time_values,
+            current_prices,
+            position,
+            returns,
+            trade_actions,
+            equity_values,
+            entry_signal,
+            exit_signal,
+            predictor_values,
+            getattr(self, "trading_instrument", "X"),
+            parameter_set_id,
+            backtest_id,
+            trading_params.get("transaction_cost", 0.001),
+            trading_params.get("slippage", 0.0005),
+        )
+
+        if result_mode == "trades_only":
+            # 稀疏模式：只保留開/平倉事件列，K 線層級數據另存為精簡陣列
+            columns["Bar_index"] = np.arange(n_rows, dtype=np.int64)
+            trade_rows = np.flatnonzero(np.asarray(trade_actions) != 0)
+            records_df = records_frame_from_columns(columns, trade_rows)
+        else:
+            records_df = records_frame_from_columns(columns)
+
+        # 生成策略名稱
+        strategy_name = parameter_set_id
 
         # 轉換參數為字典格式 - 與BacktestEngine格式一致
         params_dict = {
@@ -561,6 +865,16 @@ class TradeSimulator_backtester:
             "error": None,
         }
 
+        if result_mode == "trades_only":
+            result["result_mode"] = "trades_only"
+            result["bar_data"] = {
+                "Trading_instrument": getattr(self, "trading_instrument", "X"),
+                "equity_values": np.asarray(equity_values, dtype=np.float64),
+                "returns": np.asarray(returns, dtype=np.float64),
+                "entry_signal": np.asarray(entry_signal).astype(np.int8),
+                "exit_signal": np.asarray(exit_signal).astype(np.int8),
+            }
+
         return result
 
     def _param_to_dict(self, param: Any) -> Dict[str, Any]:  # pylint: disable=unused-argument
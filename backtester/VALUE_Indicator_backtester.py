@@ -82,6 +82,8 @@ flowchart TD
 - v2.0: 整合 Numba JIT 編譯優化
 - v2.1: 新增向量化批量計算
 - v2.2: 完善緩存機制與性能優化
+- v2.3: 改用 RollingWindow_backtester 單調佇列 O(n) 滾動極值，並按 (n_length, 預測因子) 緩存
+- v2.4: 向量化信號改由 _batch_value_signals_njit 以 prange 一次寫入 int8 信號張量
 
 【參考】
 ------------------------------------------------------------
@@ -101,7 +103,7 @@ from .IndicatorParams_backtester import IndicatorParams
 
 # 優化：嘗試導入 Numba 進行 JIT 編譯加速
 try:
-    from numba import njit
+    from numba import njit, prange
 
     NUMBA_AVAILABLE = True
 except ImportError:
@@ -110,67 +112,109 @@ except ImportError:
 
 # 核心算法：純 Numba + ndarray 實現
 if NUMBA_AVAILABLE:
+    from .RollingWindow_backtester import rolling_max_njit, rolling_min_njit
 
     @njit(fastmath=True, cache=True)  # type: ignore[misc]
-    def _generate_value_signals_njit(
-        predictor_values, n_length, m_value, strat_idx
-    ):  # type: ignore[no-untyped-def] # pylint: disable=unused-argument
+    def _value_signals_from_extremes_njit(
+        extremes, n_length, m_value, strat_idx
+    ):  # type: ignore[no-untyped-def]
         """
-        使用 Numba 生成VALUE突破信號 - VALUE1-4
-        全程使用 ndarray，無 pandas 依賴
+        以預先計算的滾動極值生成VALUE1-4信號（O(n)）
 
-        邏輯：
-        - VALUE1: 連續N日升穿M值時做多
-        - VALUE2: 連續N日升穿M值時做空
-        - VALUE3: 連續N日跌穿M值時做多
-        - VALUE4: 連續N日跌穿M值時做空
+        連續N日都高於M值 ⟺ 過去N日最小值 > M；連續N日都低於M值 ⟺ 過去N日最大值 < M。
+        extremes 為過去 n 天的滾動最小值（VALUE1/2）或最大值（VALUE3/4），
+        可按 (預測因子, n_length) 緩存並在所有 m_value 組合間共用。
         """
-        n = len(predictor_values)
+        n = len(extremes)
         signals = np.zeros(n)
 
-        # 生成信號
-        # 需要確保有足夠的數據進行連續次數檢查
         # 起始點應該是 n_length - 1，這樣檢查連續n天時，每天都有足夠的數據
-        for i in range(n_length - 1, n):
-            # 檢查連續N日是否都滿足條件
+        for i in range(max(n_length - 1, 0), n):
             if strat_idx == 1:  # VALUE1: 連續N日升穿M值時做多
-                all_above = True
-                for j in range(i - n_length + 1, i + 1):
-                    if predictor_values[j] <= m_value:
-                        all_above = False
-                        break
-                if all_above:
+                if extremes[i] > m_value:
                     signals[i] = 1.0
-
             elif strat_idx == 2:  # VALUE2: 連續N日升穿M值時做空
-                all_above = True
-                for j in range(i - n_length + 1, i + 1):
-                    if predictor_values[j] <= m_value:
-                        all_above = False
-                        break
-                if all_above:
+                if extremes[i] > m_value:
                     signals[i] = -1.0
-
             elif strat_idx == 3:  # VALUE3: 連續N日跌穿M值時做多
-                all_below = True
-                for j in range(i - n_length + 1, i + 1):
-                    if predictor_values[j] >= m_value:
-                        all_below = False
-                        break
-                if all_below:
+                if extremes[i] < m_value:
                     signals[i] = 1.0
-
             elif strat_idx == 4:  # VALUE4: 連續N日跌穿M值時做空
-                all_below = True
-                for j in range(i - n_length + 1, i + 1):
-                    if predictor_values[j] >= m_value:
-                        all_below = False
-                        break
-                if all_below:
+                if extremes[i] < m_value:
                     signals[i] = -1.0
 
         return signals
 
+    @njit(fastmath=True, cache=True)  # type: ignore[misc]
+    def _generate_value_signals_njit(
+        predictor_values, n_length, m_value, strat_idx
+    ):  # type: ignore[no-untyped-def]
+        """
+        使用 Numba 生成VALUE突破信號 - VALUE1-4（單調佇列 O(n) 版本）
+        全程使用 ndarray，無 pandas 依賴
+
+        邏輯：
+        - VALUE1: 連續N日升穿M值時做多
+        - VALUE2: 連續N日升穿M值時做空
+        - VALUE3: 連續N日跌穿M值時做多
+        - VALUE4: 連續N日跌穿M值時做空
+        """
+        if strat_idx == 1 or strat_idx == 2:
+            extremes = rolling_min_njit(predictor_values, n_length)
+        else:
+            extremes = rolling_max_njit(predictor_values, n_length)
+        return _value_signals_from_extremes_njit(extremes, n_length, m_value, strat_idx)
+
+    @njit(parallel=True, fastmath=True, cache=True)  # type: ignore[misc]
+    def _batch_value_signals_njit(
+        predictor_values,
+        extreme_matrix,
+        extreme_rows,
+        n_lengths,
+        m_values,
+        m1_values,
+        m2_values,
+        strat_indices,
+        task_cols,
+        indicator_cols,
+        signals_matrix,
+    ):  # type: ignore[no-untyped-def]
+        """
+        批量生成VALUE1-6信號，直接寫入 int8 信號張量
+
+        VALUE1-4 讀取 extreme_matrix 的 extreme_rows[k] 列（過去 n 日最小/最大值）與 m_values[k] 比較；
+        VALUE5-6 直接以預測因子與 [m1_values[k], m2_values[k]] 比較。
+        以 prange 並行處理所有任務，寫入 signals_matrix[:, task_cols[k], indicator_cols[k]]。
+        """
+        n = len(predictor_values)
+        for k in prange(len(strat_indices)):
+            strat_idx = strat_indices[k]
+            col = task_cols[k]
+            indicator = indicator_cols[k]
+            signal_value = 1 if (strat_idx % 2 == 1) else -1
+
+            if 1 <= strat_idx <= 4:
+                row = extreme_rows[k]
+                m_value = m_values[k]
+                # 確保在有效期間之前不產生信號
+                for t in range(max(n_lengths[k] - 1, 0), n):
+                    if strat_idx <= 2:  # 連續N日升穿M值
+                        if extreme_matrix[row, t] > m_value:
+                            signals_matrix[t, col, indicator] = signal_value
+                    else:  # 連續N日跌穿M值
+                        if extreme_matrix[row, t] < m_value:
+                            signals_matrix[t, col, indicator] = signal_value
+
+            elif strat_idx == 5 or strat_idx == 6:
+                m1_value = m1_values[k]
+                m2_value = m2_values[k]
+                # 確保 m1 < m2
+                if m1_value >= m2_value:
+                    continue
+                for t in range(n):
+                    if m1_value <= predictor_values[t] <= m2_value:
+                        signals_matrix[t, col, indicator] = signal_value
+
     @njit(fastmath=True, cache=True)  # type: ignore[misc]
     def _generate_value_range_signals_njit(  # type: ignore[no-untyped-def] # pylint: disable=unused-argument
         predictor_values, m1_value, m2_value, strat_idx
@@ -426,7 +470,7 @@ class VALUEIndicator:
         Args:
             tasks: 任務列表，每個任務包含 (task_idx, indicator_idx, param)
             predictor: 預測因子名稱
-            signals_matrix: 信號矩陣 [時間點, 任務數, 指標數]
+            signals_matrix: int8 信號矩陣 [時間點, 任務數, 指標數]
             global_value_cache: 全局緩存字典，避免重複計算
             data: 數據DataFrame，如果為None則使用實例的data
 
@@ -443,49 +487,86 @@ class VALUEIndicator:
         predictor_values = data[predictor].values.astype(np.float64)
         predictor_values = np.nan_to_num(predictor_values, nan=0.0)
 
-        # 直接為每個任務生成信號 - 真正的向量化處理
-        for task_idx, indicator_idx, param in tasks:
-            try:
-                strat_idx = param.get_param("strat_idx")
-
-                if strat_idx in [1, 2, 3, 4]:
-                    # VALUE1-4: 連續突破策略
-                    n_length = param.get_param("n_length")
-                    m_value = param.get_param("m_value")
-
-                    if n_length is not None and m_value is not None:
-                        # 使用 Numba 優化的函數計算VALUE信號
-                        signal_values = _generate_value_signals_njit(
-                            predictor_values, n_length, m_value, strat_idx
-                        )
-
-                        # 確保在有效期間之前不產生信號
-                        signal_values[: n_length - 1] = 0.0
-
-                        # 直接寫入信號矩陣
-                        signals_matrix[:, task_idx, indicator_idx] = signal_values
+        # 提取所有VALUE參數；VALUE1-4 的滾動極值按 (n_length, 極值類型, 預測因子) 緩存，所有 m_value 組合共用
+        extreme_index: Dict[Tuple[Any, str], int] = {}
+        extreme_list = []
+        extreme_rows = []
+        n_lengths = []
+        m_values = []
+        m1_values = []
+        m2_values = []
+        strat_indices = []
+        task_indices = []
+        indicator_indices = []
 
-                elif strat_idx in [5, 6]:
-                    # VALUE5-6: 範圍策略
-                    m1_value = param.get_param("m1_value")
-                    m2_value = param.get_param("m2_value")
+        for task_idx, indicator_idx, param in tasks:
+            strat_idx = param.get_param("strat_idx")
+            row = -1
+            n_length = 0
+            m_value = m1_value = m2_value = 0.0
 
-                    if m1_value is not None and m2_value is not None:
-                        # 使用 Numba 優化的函數計算VALUE範圍信號
-                        signal_values = _generate_value_range_signals_njit(
-                            predictor_values, m1_value, m2_value, strat_idx
+            if strat_idx in [1, 2, 3, 4]:
+                # VALUE1-4: 連續突破策略
+                n_length = param.get_param("n_length")
+                m_value = param.get_param("m_value")
+                if n_length is None or m_value is None:
+                    continue
+
+                extreme_type = "min" if strat_idx in [1, 2] else "max"
+                cache_key = (n_length, extreme_type, predictor)
+                if cache_key not in global_value_cache:
+                    if extreme_type == "min":
+                        global_value_cache[cache_key] = rolling_min_njit(
+                            predictor_values, n_length
                         )
+                    else:
+                        global_value_cache[cache_key] = rolling_max_njit(
+                            predictor_values, n_length
+                        )
+                if (n_length, extreme_type) not in extreme_index:
+                    extreme_index[(n_length, extreme_type)] = len(extreme_list)
+                    extreme_list.append(global_value_cache[cache_key])
+                row = extreme_index[(n_length, extreme_type)]
 
-                        # 直接寫入信號矩陣
-                        signals_matrix[:, task_idx, indicator_idx] = signal_values
-
-            except Exception as e:
-                # 記錄錯誤但不中斷處理
-                if hasattr(VALUEIndicator, "logger"):
-                    VALUEIndicator.logger.warning(
-                        f"VALUE突破信號生成失敗 (task_idx={task_idx}, indicator_idx={indicator_idx}): {e}"
-                    )
-                signals_matrix[:, task_idx, indicator_idx] = 0
-
-    # 注意：緩存機制已簡化，直接使用 Numba 函數進行計算
-    # 如需緩存功能，可在 VectorBacktestEngine 中實現
+            elif strat_idx in [5, 6]:
+                # VALUE5-6: 範圍策略
+                m1_value = param.get_param("m1_value")
+                m2_value = param.get_param("m2_value")
+                if m1_value is None or m2_value is None:
+                    continue
+            else:
+                continue
+
+            extreme_rows.append(row)
+            n_lengths.append(n_length)
+            m_values.append(m_value)
+            m1_values.append(m1_value)
+            m2_values.append(m2_value)
+            strat_indices.append(strat_idx)
+            task_indices.append(task_idx)
+            indicator_indices.append(indicator_idx)
+
+        if not strat_indices:
+            return
+
+        if extreme_list:
+            extreme_matrix = np.vstack(extreme_list)
+        else:
+            extreme_matrix = np.zeros((0, len(predictor_values)))
+
+        # 單次並行 Numba 調用寫入 int8 信號張量
+        _batch_value_signals_njit(
+            predictor_values,
+            extreme_matrix,
+            np.array(extreme_rows, dtype=np.int64),
+            np.array(n_lengths, dtype=np.int64),
+            np.array(m_values, dtype=np.float64),
+            np.array(m1_values, dtype=np.float64),
+            np.array(m2_values, dtype=np.float64),
+            np.array(strat_indices, dtype=np.int64),
+            np.array(task_indices, dtype=np.int64),
+            np.array(indicator_indices, dtype=np.int64),
+            signals_matrix,
+        )
+
+    # 注意：global_value_cache 只緩存滾動極值，VALUE1-6 信號由 _batch_value_signals_njit 以 O(n) 並行生成
@@ -62,6 +62,16 @@ flowchart TD
 【範例】
 ------------------------------------------------------------
 - 執行向量化回測：VectorBacktestEngine(data, frequency).run_backtests(config)
+- 稀疏結果模式：config["result_mode"] = "trades_only"，只保留交易事件與精簡權益陣列
+- 低精度中間結果：config["result_precision"] = "float32"（交易記錄輸出仍為 float64）
+- 串流導出：run_backtests(config, chunk_callback=export_chunk)，config["max_memory_mb"] 控制區塊大小
+- 持久化指標緩存：config["indicator_cache"] = {"enabled": True, "max_size_mb": 2048}
+- 檢查點續跑：config["checkpoint"] = {"enabled": True}
+- 增量回測：config["incremental"] = True 完整回測一次，之後 run_incremental(config, parquet_path)
+- 智能參數搜索：config["search"] = {"method": "tpe", "objective": "sharpe"}; run_search(config)
+- 滾動前進分析：config["walk_forward"] = {"in_sample": 500, "out_of_sample": 100}; run_walk_forward(config)
+- 多標的回測：run_multi_asset(config, {"BTCUSDT": btc_df, "ETHUSDT": eth_df})
+- 引擎內績效計算：config["inline_metrics"] = {"time_unit": 365, "risk_free_rate": 0.04}，結果附帶 result["metrics"]
 - 批量參數組合：generate_parameter_combinations(config)
 - 向量化信號生成：_generate_all_signals_vectorized(all_tasks, condition_pairs)
 
@@ -71,6 +81,7 @@ flowchart TD
 - 調用相同的 Indicators、TradeSimulator 等模組
 - 依賴 SpecMonitor 進行系統資源監控
 - 與 TradeRecordExporter 配合導出結果
+- inline_metrics 啟用時調用 metricstracker 的 BatchMetricsMetricTracker，直接由交易模擬矩陣計算績效
 
 【版本與變更記錄】
 ------------------------------------------------------------
@@ -80,6 +91,24 @@ flowchart TD
 - v2.0: 新增多進程並行處理
 - v2.1: 整合進度監控與性能優化
 - v2.2: 完善錯誤處理與系統適配
+- v2.3: 多批次結果生成改用共享記憶體數據平面，子進程只接收 handles 與欄位索引
+- v2.4: 信號張量改為 int8，各指標以批量 prange Numba 核心直接寫入
+- v2.5: 交易模擬結果 positions/trade_actions 改為 int8，config["result_precision"] = "float32" 可減半 returns/equity 記憶體
+- v2.6: 依 SpecMonitor 記憶體閾值與K線數分塊串流處理，每塊 信號→模擬→結果 後釋放，可選 chunk_callback 逐塊導出
+- v2.7: config["indicator_cache"] 啟用持久化指標緩存，指標陣列以數據指紋為鍵存於磁碟並跨次回測重用
+- v2.8: config["checkpoint"] 啟用區塊級檢查點，崩潰或超時後重跑會跳過已完成組合並合併舊結果
+- v2.9: config["incremental"] 保存末端交易狀態，run_incremental 只模擬新增K線並追加到既有 Parquet
+- v3.0: run_search 以連續減半/TPE/遺傳演算法在相同參數空間中自適應搜索，報告每秒評估數
+- v3.1: run_walk_forward 滾動前進分析，信號只計算一次，逐窗口樣本內評分、樣本外模擬並接續資金曲線
+- v3.2: run_multi_asset 多標的批量回測，參數組合只展開一次，(標的 x 策略) 在同一次交易模擬核心調用中完成
+- v3.3: config["inline_metrics"] 在回測管線內由記憶體中的權益/收益率矩陣計算績效指標，導出時直接寫出 _metadata.json
+- v3.4: 多批次結果生成的進程池改用 spawn 啟動，不再修改全域 Numba 執行緒層設定
+- v3.5: 串流模式（chunk_callback）預設逐區塊計算引擎內績效，回傳空列表，結果僅經由回調交付
+- v3.6: 檢查點區塊改存 Parquet + JSON，串流續跑沿用 manifest 記錄的導出檔案（self.resumed_exports）
+- v3.7: find_incremental_parquet 尋找可續算的既有 Parquet，供 autorunner 的 config["incremental"] 自動增量回測
+- v3.8: run_backtests 的所有串流區塊共用指標緩存（上限為區塊記憶體預算的 1/4）與同一個 spawn 結果生成進程池
+- v3.9: 檢查點以 Backtest_id 對應任務鍵，無法記錄的任務會記錄警告而非靜默略過整個區塊
+- v4.0: 多標的區塊以 (標的 x 任務) 堆疊矩陣一次生成結果與引擎內績效，共用單一共享記憶體與進程池（all_tasks["assets"/"asset_index"] 記錄每欄標的）
 
 【參考】
 ------------------------------------------------------------
@@ -89,13 +118,16 @@ flowchart TD
 - 並行處理與多進程編程
 """
 
+import contextlib
 import gc
 import itertools
 import logging
+import multiprocessing
+import os
 import time
 import uuid
 from concurrent.futures import ProcessPoolExecutor
-from typing import Any, Dict, List, Optional, Tuple
+from typing import Any, Callable, Dict, Iterator, List, Optional, Tuple
 
 import numpy as np
 import pandas as pd
@@ -104,14 +136,31 @@ from rich.panel import Panel
 from rich.text import Text
 
 from .BollingerBand_Indicator_backtester import BollingerBandIndicator
+from .Checkpoint_backtester import BacktestCheckpoint
 from .HL_Indicator_backtester import HLIndicator
+from .IncrementalState_backtester import IncrementalState_backtester
+from metricstracker.BatchMetrics_metricstracker import BatchMetricsMetricTracker
+
+from .IndicatorCache_backtester import IndicatorDiskCache, PersistentIndicatorCache
 from .Indicators_backtester import IndicatorsBacktester
+from .MultiAsset_backtester import MultiAsset_backtester
+from .SharedMemory_backtester import SharedArrayStore
+from .SparseRecords_backtester import (
+    RESULT_MODE_FULL,
+    RESULT_MODE_TRADES_ONLY,
+    RESULT_MODES,
+    SparseRecords_backtester,
+)
 from .SpecMonitor_backtester import SpecMonitor
 from .TradeSimulator_backtester import (
+    RESULT_PRECISIONS,
     TradeSimulator_backtester,
-    _vectorized_trade_simulation_njit,
+    bar_time_values,
+    trade_return_matrix,
+    vectorized_trade_simulation,
 )
 from .VALUE_Indicator_backtester import VALUEIndicator
+from .WalkForward_backtester import WalkForward_backtester
 
 # 嘗試導入 Numba
 try:
@@ -121,6 +170,29 @@ try:
 except ImportError:
     NUMBA_AVAILABLE = False
 
+# 串流分塊的記憶體估算：每任務每根K線的位元組數（信號、交易矩陣與結果記錄）
+_BYTES_PER_TASK_BAR = {
+    RESULT_MODE_FULL: 320,
+    RESULT_MODE_TRADES_ONLY: 96,
+}
+# 引擎內績效計算額外的 (K線 x 任務) 矩陣：Trade_return、回撤與 float64 權益/收益率
+_INLINE_METRICS_BYTES_PER_TASK_BAR = 40
+# 向量化信號生成使用指標緩存的指標類型
+_INDICATOR_TYPES = ("MA", "BOLL", "HL", "VALUE", "PERC")
+# 跨區塊共用的指標緩存上限：每個串流區塊記憶體預算的比例，超過時清空記憶體層
+_INDICATOR_CACHE_MEMORY_FRACTION = 0.25
+
+
+def _cache_nbytes(value: Any) -> int:
+    """估算指標緩存值（陣列或其 tuple/list/dict 組合）佔用的位元組數"""
+    if isinstance(value, np.ndarray):
+        return value.nbytes
+    if isinstance(value, dict):
+        return sum(_cache_nbytes(v) for v in value.values())
+    if isinstance(value, (tuple, list)):
+        return sum(_cache_nbytes(v) for v in value)
+    return 0
+
 
 class ProgressMonitor:
     """獨立的進度監控器 - 簡化版本，專門針對批次處理優化"""
@@ -229,7 +301,20 @@ class VectorBacktestEngine:
         self.results: List[Dict[str, Any]] = []
 
         # 向量化配置
-        self.max_memory_mb = 1000  # 最大記憶體使用量（MB）
+        self.max_memory_mb = 1000  # 每個串流區塊的記憶體預算上限（MB）
+        self.result_mode = RESULT_MODE_FULL  # full=逐K線記錄，trades_only=只保留交易事件
+        self.result_precision = "float64"  # returns/equity_values 中間矩陣精度
+        self.indicator_cache: Optional[IndicatorDiskCache] = None  # 持久化指標緩存（預設關閉）
+        self.incremental = False  # 結果附帶末端交易狀態，供增量回測續算
+        self.inline_metrics: Optional[Dict[str, float]] = None  # 引擎內績效計算配置（預設關閉）
+        self.search_summary: Dict[str, Any] = {}  # 最近一次智能參數搜索的摘要
+        self.instrument_data: Dict[str, pd.DataFrame] = {}  # 多標的回測對齊後的各標的數據
+        self.resumed_exports: List[str] = []  # 串流續跑時沿用的先前區塊導出檔案
+        self._predictor_fingerprints: Dict[str, str] = {}
+        # 運行範圍（_run_scope）內各區塊共用的指標緩存與結果生成進程池
+        self._run_caches: Optional[Dict[str, Dict[Any, Any]]] = None
+        self._run_pool_enabled = False
+        self._result_executor: Optional[ProcessPoolExecutor] = None
 
         # 全局緩存
         self._ma_cache: Dict[str, Any] = {}
@@ -334,20 +419,34 @@ class VectorBacktestEngine:
 
         return combinations
 
-    def run_backtests(self, config: Dict) -> List[Dict]:  # pylint: disable=too-complex
+    def run_backtests(  # pylint: disable=too-complex
+        self,
+        config: Dict,
+        chunk_callback: Optional[Callable[[List[Dict]], None]] = None,
+    ) -> List[Dict]:
         """
-        執行真正的向量化回測 - 一次性處理所有任務
+        執行向量化回測 - 依記憶體預算分塊串流處理所有任務
 
         Args:
-            config (Dict): 回測配置，包含條件配對、指標參數、預測因子、交易參數等
+            config (Dict): 回測配置，包含條件配對、指標參數、預測因子、交易參數等；
+                可選 max_memory_mb 覆寫每個區塊的記憶體預算
+            chunk_callback: 每個區塊完成後以該區塊結果調用（例如導出 Parquet）；
+                提供時引擎不保留結果，回傳空列表。回調可回傳導出的檔案路徑列表，
+                啟用檢查點時記錄於 manifest，續跑時沿用並列於 self.resumed_exports。config 未設定 inline_metrics 時
+                串流模式預設在每個區塊內計算績效，結果附帶 result["metrics"]
 
         Returns:
-            List[Dict]: 回測結果列表，每個元素包含一個策略的回測結果
+            List[Dict]: 回測結果列表，每個元素包含一個策略的回測結果；
+                串流模式（chunk_callback）下為空列表，結果僅經由回調交付
         """
         all_combinations = self.generate_parameter_combinations(config)
         condition_pairs = config["condition_pairs"]
         predictors = config["predictors"]
         trading_params = config["trading_params"]
+        self._configure_run(config)
+        if chunk_callback is not None and "inline_metrics" not in config:
+            # 串流模式不保留結果：績效須在區塊內計算並隨結果交由回調
+            self.inline_metrics = self._resolve_inline_metrics(True)
 
         total_backtests = len(all_combinations) * len(predictors)
 
@@ -382,10 +481,128 @@ class VectorBacktestEngine:
         if config_info:
             SpecMonitor.display_config_info(config_info, console)
 
-        # 向量化處理 - 一次性處理所有任務
-        all_results = self._true_vectorized_backtest(
-            all_combinations, condition_pairs, predictors, trading_params
+        all_results: List[Dict] = []
+        self.resumed_exports = []
+        stats = {"success": 0, "error": 0, "zero_trade": 0, "sample_no_trade": None}
+
+        # 檢查點：跳過已完成的參數組合，舊結果合併回本次結果
+        checkpoint = None
+        checkpoint_config = config.get("checkpoint") or {}
+        pending_combinations = all_combinations
+        if checkpoint_config.get("enabled", False):
+            checkpoint = BacktestCheckpoint.for_run(
+                config, self.data, checkpoint_config.get("checkpoint_dir")
+            )
+            combination_hashes = [
+                BacktestCheckpoint.combination_hash(combo) for combo in all_combinations
+            ]
+            completed = checkpoint.completed_combinations(combination_hashes, predictors)
+            if completed:
+                resumed_count = 0
+                for chunk_index, resumed_results, exported in checkpoint.iter_chunks(
+                    {
+                        BacktestCheckpoint.task_hash(combo_hash, predictor)
+                        for combo_hash in completed
+                        for predictor in predictors
+                    }
+                ):
+                    resumed_count += len(resumed_results)
+                    self._tally_results(resumed_results, stats)
+                    if chunk_callback is None:
+                        all_results.extend(resumed_results)
+                    elif exported and all(os.path.exists(path) for path in exported):
+                        # 串流模式：先前已導出的檔案仍存在，直接沿用
+                        self.resumed_exports.extend(exported)
+                    else:
+                        # 導出檔案已不存在：以檢查點結果重新交由回調導出
+                        checkpoint.record_exports(
+                            chunk_index, chunk_callback(resumed_results) or []
+                        )
+                    del resumed_results
+                pending = [
+                    (combo, combo_hash)
+                    for combo, combo_hash in zip(all_combinations, combination_hashes)
+                    if combo_hash not in completed
+                ]
+                pending_combinations = [combo for combo, _ in pending]
+                combination_hashes = [combo_hash for _, combo_hash in pending]
+                console.print(
+                    Panel(
+                        f"♻️ 從檢查點恢復：已完成 {len(completed)} 種參數組合"
+                        f"（{resumed_count} 次回測），"
+                        f"剩餘 {len(pending_combinations)} 種\n📁 {checkpoint.run_dir}",
+                        title="[bold #dbac30]💾 檢查點[/bold #dbac30]",
+                        border_style="#dbac30",
+                    )
+                )
+
+        # 串流處理 - 依記憶體預算將參數組合分塊，每塊完成 信號→模擬→結果 後即釋放
+        chunk_size, chunk_info = SpecMonitor.get_chunk_size(
+            len(self.data),
+            total_backtests,
+            self._bytes_per_task_bar(),
+            self.max_memory_mb,
         )
+        combos_per_chunk = max(1, chunk_size // max(len(predictors), 1))
+        chunk_starts = list(range(0, len(pending_combinations), combos_per_chunk))
+        n_chunks = len(chunk_starts)
+        if n_chunks > 1:
+            console.print(
+                Panel(
+                    f"{chunk_info}\n🔧 共 {n_chunks} 個區塊",
+                    title="[bold #dbac30]💾 記憶體管理[/bold #dbac30]",
+                    border_style="#dbac30",
+                )
+            )
+
+        # 指標緩存與結果生成進程池在所有區塊間共用
+        with self._run_scope():
+            for chunk_idx, chunk_start in enumerate(chunk_starts):
+                chunk_combinations = pending_combinations[
+                    chunk_start : chunk_start + combos_per_chunk
+                ]
+                if n_chunks > 1:
+                    console.print(
+                        Panel(
+                            f"🔄 區塊 {chunk_idx + 1}/{n_chunks}: "
+                            f"{len(chunk_combinations) * len(predictors)} 次回測",
+                            title="[bold #dbac30]💾 記憶體管理[/bold #dbac30]",
+                            border_style="#dbac30",
+                        )
+                    )
+
+                # Backtest_id -> 區塊內任務索引，供檢查點以 ID 對應任務鍵
+                task_index: Dict[str, int] = {}
+                chunk_results = self._true_vectorized_backtest(
+                    chunk_combinations,
+                    condition_pairs,
+                    predictors,
+                    trading_params,
+                    task_index,
+                )
+                self._tally_results(chunk_results, stats)
+
+                chunk_exports = None
+                if chunk_callback is not None:
+                    # 串流模式：交由回調導出/計算績效，引擎不保留結果
+                    chunk_exports = chunk_callback(chunk_results)
+                else:
+                    all_results.extend(chunk_results)
+
+                # 回調成功後才記錄為完成，導出失敗的區塊會在續跑時重新計算
+                if checkpoint is not None:
+                    self._save_checkpoint_chunk(
+                        checkpoint,
+                        chunk_results,
+                        task_index,
+                        combination_hashes[chunk_start : chunk_start + combos_per_chunk],
+                        predictors,
+                        chunk_exports,
+                        chunk_idx,
+                    )
+                del chunk_results
+                if n_chunks > 1:
+                    gc.collect()
 
         # 記憶體管理 - 使用動態閾值
         current_memory = SpecMonitor.get_memory_usage()
@@ -421,58 +638,31 @@ class VectorBacktestEngine:
         final_memory = SpecMonitor.get_memory_usage()
         memory_used = final_memory - initial_memory
 
-        # 修復統計邏輯，確保與狀態顯示一致
-        # 成功：無錯誤且有實際開倉交易
-        success_count = len(
-            [
-                r
-                for r in all_results
-                if r.get("error") is None
-                and "records" in r
-                and isinstance(r.get("records"), pd.DataFrame)
-                and not r.get("records").empty
-                and (r.get("records")["Trade_action"] == 1).sum() > 0
-            ]
-        )
-        # 失敗：有錯誤
-        error_count = len([r for r in all_results if r.get("error") is not None])
-
-        # 更準確的無交易統計：檢查是否有實際交易記錄
-        zero_trade_count = 0
-
-        for r in all_results:
-            if r.get("error") is None:
-                records = r.get("records", pd.DataFrame())
-                # 檢查是否有開倉交易（Trade_action == 1）
-                if len(records) == 0 or (records["Trade_action"] == 1).sum() == 0:
-                    zero_trade_count += 1
+        success_count = stats["success"]
+        error_count = stats["error"]
+        zero_trade_count = stats["zero_trade"]
 
         # 添加診斷信息
         diagnostic_info = ""
-        if zero_trade_count > 0:
-            # 分析無交易的原因
-            sample_no_trade = None
-            for r in all_results:
-                if r.get("error") is None:
-                    records = r.get("records", pd.DataFrame())
-                    if len(records) == 0 or (
-                        len(records) > 0 and (records["Trade_action"] == 1).sum() == 0
-                    ):
-                        sample_no_trade = r
-                        break
-
-            if sample_no_trade:
-                entry_signal = sample_no_trade.get("entry_signal", None)
-                exit_signal = sample_no_trade.get("exit_signal", None)
-                if entry_signal is not None and exit_signal is not None:
-                    entry_counts = np.unique(entry_signal, return_counts=True)
-                    exit_counts = np.unique(exit_signal, return_counts=True)
-                    diagnostic_info = (
-                        f"\n🔍 診斷信息：\n"
-                        f"• 開倉信號分布：{dict(zip(entry_counts[0], entry_counts[1]))}\n"
-                        f"• 平倉信號分布：{dict(zip(exit_counts[0], exit_counts[1]))}"
-                    )
+        sample_no_trade = stats["sample_no_trade"]
+        if zero_trade_count > 0 and sample_no_trade:
+            entry_signal = sample_no_trade.get("entry_signal", None)
+            exit_signal = sample_no_trade.get("exit_signal", None)
+            if entry_signal is not None and exit_signal is not None:
+                entry_counts = np.unique(entry_signal, return_counts=True)
+                exit_counts = np.unique(exit_signal, return_counts=True)
+                diagnostic_info = (
+                    f"\n🔍 診斷信息：\n"
+                    f"• 開倉信號分布：{dict(zip(entry_counts[0], entry_counts[1]))}\n"
+                    f"• 平倉信號分布：{dict(zip(exit_counts[0], exit_counts[1]))}"
+                )
 
+        if self.indicator_cache is not None:
+            cache_stats = self.indicator_cache.info()
+            diagnostic_info += (
+                f"\n• 指標緩存：命中 {cache_stats['hits']}，未命中 {cache_stats['misses']}，"
+                f"{cache_stats['entries']} 條 / {cache_stats['size_mb']:.1f} MB"
+            )
 
         summary_text = f"""
 ✅ 向量化回測完成！
@@ -495,17 +685,852 @@ class VectorBacktestEngine:
             )
         )
 
+        # 全部完成後刪除檢查點（keep=True 時保留，供之後擴大參數網格重用）
+        if checkpoint is not None and not checkpoint_config.get("keep", False):
+            checkpoint.clear()
+
         self.results = all_results
         return all_results
 
+    def run_search(self, config: Dict) -> List[Dict]:
+        """
+        智能參數搜索 - 在與網格回測相同的參數空間中以連續減半/TPE/遺傳演算法分配預算
+
+        Args:
+            config (Dict): 回測配置，config["search"] 指定 method、objective、max_evaluations、
+                top_k 等（見 ParameterSearch_backtester）
+
+        Returns:
+            List[Dict]: 前 top_k 個參數組合的完整數據回測結果（依目標績效排序）；
+                搜索摘要保存在 self.search_summary
+        """
+        from .ParameterSearch_backtester import ParameterSearch, ParameterSpace
+
+        self._configure_run(config)
+        # 搜索批次以 objective 評分，不在每次評估時計算完整績效（結果照常導出後再分析）
+        self.inline_metrics = None
+        search_config = dict(config.get("search") or {})
+        condition_pairs = config["condition_pairs"]
+        predictors = config["predictors"]
+        trading_params = config["trading_params"]
+
+        # 每批評估的組合數受記憶體預算限制
+        chunk_size, _ = SpecMonitor.get_chunk_size(
+            len(self.data),
+            search_config.get("batch_size", 32) * len(predictors),
+            self._bytes_per_task_bar(),
+            self.max_memory_mb,
+        )
+        search_config["batch_size"] = max(1, chunk_size // max(len(predictors), 1))
+
+        space = ParameterSpace(condition_pairs, config["indicator_params"])
+        search = ParameterSearch(
+            space,
+            lambda combos, n_bars: self._evaluate_combinations(
+                combos, condition_pairs, predictors, trading_params, n_bars
+            ),
+            len(predictors),
+            len(self.data),
+            search_config,
+        )
+
+        console = Console()
+        console.print(
+            Panel(
+                f"🔍 搜索方法：{search.method}，目標：{search.objective}\n"
+                f"• 參數空間：{space.total} 種參數組合 x {len(predictors)} 個預測因子\n"
+                f"• 評估預算：{search.max_evaluations} 種參數組合，每批 {search.batch_size} 種\n"
+                f"交易參數：{trading_params}",
+                title="[bold #8f1511]🚀 智能參數搜索[/bold #8f1511]",
+                border_style="#dbac30",
+            )
+        )
+
+        summary = search.run()
+
+        leaderboard = "\n".join(
+            f"{rank}. {entry['score']:.4f}  {entry['strategy_id']}"
+            for rank, entry in enumerate(summary["leaderboard"], 1)
+        )
+        console.print(
+            Panel(
+                f"✅ 搜索完成！\n\n"
+                f"• 已評估：{summary['evaluations']} 種參數組合"
+                f"（{summary['backtests']} 次回測，空間共 {summary['space_size']} 種）\n"
+                f"• 總耗時：{summary['elapsed']:.1f}秒\n"
+                f"• 評估速度：{summary['evaluations_per_second']:.1f} 種參數組合/秒"
+                f"（{summary['backtests_per_second']:.1f} 次回測/秒）\n\n"
+                f"🏆 前 {len(summary['leaderboard'])} 名（{search.objective}）：\n{leaderboard}",
+                title="[bold #dbac30]🎯 智能參數搜索結果[/bold #dbac30]",
+                border_style="#dbac30",
+            )
+        )
+
+        self.search_summary = {k: v for k, v in summary.items() if k != "results"}
+        self.results = summary["results"]
+        return self.results
+
+    def _evaluate_combinations(
+        self,
+        combinations: List[Tuple],
+        condition_pairs: List[Dict],
+        predictors: List[str],
+        trading_params: Dict,
+        n_bars: Optional[int] = None,
+    ) -> List[Dict]:
+        """回測一批參數組合；n_bars 指定時只使用最近 n_bars 根K線"""
+        if n_bars is None or n_bars >= len(self.data):
+            return self._true_vectorized_backtest(
+                combinations, condition_pairs, predictors, trading_params
+            )
+        engine = VectorBacktestEngine(
+            self.data.iloc[len(self.data) - n_bars :],
+            self.frequency,
+            self.logger,
+            self.symbol,
+        )
+        engine.result_mode = self.result_mode
+        engine.result_precision = self.result_precision
+        engine.indicator_cache = self.indicator_cache
+        return engine._true_vectorized_backtest(  # pylint: disable=protected-access
+            combinations, condition_pairs, predictors, trading_params
+        )
+
+    def run_walk_forward(self, config: Dict) -> Dict[str, Any]:  # pylint: disable=too-complex
+        """
+        滾動前進分析 - 指標只在完整歷史上計算一次，逐窗口選出樣本內最佳組合並於樣本外模擬
+
+        Args:
+            config (Dict): 回測配置，config["walk_forward"] 指定 in_sample、out_of_sample、
+                step、anchored、objective（見 WalkForward_backtester）
+
+        Returns:
+            Dict: folds（每個窗口的元數據）、oos_equity（接續的樣本外資金曲線）、
+                  results（每個窗口樣本外的回測結果，可照常導出）
+        """
+        self._configure_run(config)
+        wf_config = dict(config.get("walk_forward") or {})
+        objective = wf_config.get("objective", "sharpe")
+        time_unit = float(wf_config.get("time_unit", 365))
+        risk_free_rate = float(wf_config.get("risk_free_rate", 0.04))
+        folds = WalkForward_backtester.make_folds(
+            len(self.data),
+            wf_config.get("in_sample", 0),
+            wf_config.get("out_of_sample", 0),
+            wf_config.get("step"),
+            wf_config.get("anchored", False),
+        )
+        if not folds:
+            raise ValueError(
+                f"數據只有 {len(self.data)} 根K線，不足以切分 walk_forward 窗口"
+            )
+
+        condition_pairs = config["condition_pairs"]
+        predictors = config["predictors"]
+        trading_params = config["trading_params"]
+        all_combinations = self.generate_parameter_combinations(config)
+        close_prices = self.data["Close"].values.astype(np.float64)
+        open_prices = self.data["Open"].values.astype(np.float64)
+
+        def simulate(entry: np.ndarray, exit_: np.ndarray, start: int, end: int) -> Dict:
+            return vectorized_trade_simulation(
+                entry,
+                exit_,
+                close_prices,
+                open_prices,
+                trading_params.get("transaction_cost", 0.001),
+                trading_params.get("slippage", 0.0005),
+                trading_params.get("trade_price", "close"),
+                trading_params.get("trade_delay", 0),
+                self.result_precision,
+                start_index=start,
+                end_index=end,
+            )
+
+        console = Console()
+        console.print(
+            Panel(
+                f"🔁 滾動前進分析：{len(folds)} 個窗口"
+                f"（樣本內 {wf_config.get('in_sample')} / 樣本外 {wf_config.get('out_of_sample')} 根K線"
+                f"{'，錨定' if wf_config.get('anchored', False) else ''}），目標：{objective}\n"
+                f"• 候選：{len(all_combinations)} 種參數組合 x {len(predictors)} 個預測因子\n"
+                f"交易參數：{trading_params}",
+                title="[bold #8f1511]🚀 滾動前進分析[/bold #8f1511]",
+                border_style="#dbac30",
+            )
+        )
+        start_time = time.time()
+
+        # 每個窗口目前的最佳候選：(分數, 組合, 預測因子, 開倉信號, 平倉信號)
+        best: List[Tuple[float, Any, Any, Any, Any]] = [
+            (-np.inf, None, None, None, None) for _ in folds
+        ]
+        chunk_size, _ = SpecMonitor.get_chunk_size(
+            len(self.data),
+            len(all_combinations) * len(predictors),
+            _BYTES_PER_TASK_BAR[RESULT_MODE_TRADES_ONLY],
+            self.max_memory_mb,
+        )
+        combos_per_chunk = max(1, chunk_size // max(len(predictors), 1))
+        for chunk_start in range(0, len(all_combinations), combos_per_chunk):
+            chunk_tasks = self._generate_all_tasks_matrix(
+                all_combinations[chunk_start : chunk_start + combos_per_chunk],
+                predictors,
+            )
+            # 信號在完整歷史上只生成一次，所有窗口共用
+            signals = self._generate_all_signals_vectorized(chunk_tasks, condition_pairs)
+            for fold_idx, fold in enumerate(folds):
+                trade_results = simulate(
+                    signals["entry_signals"],
+                    signals["exit_signals"],
+                    fold["is_start"],
+                    fold["is_end"],
+                )
+                scores = WalkForward_backtester.score_matrix(
+                    trade_results["returns"],
+                    trade_results["equity_values"],
+                    trade_results["trade_actions"],
+                    objective,
+                    time_unit,
+                    risk_free_rate,
+                )
+                task_idx = int(np.argmax(scores))
+                if scores[task_idx] > best[fold_idx][0]:
+                    best[fold_idx] = (
+                        float(scores[task_idx]),
+                        chunk_tasks["combinations"][task_idx],
+                        chunk_tasks["predictors"][task_idx],
+                        signals["entry_signals"][:, task_idx].copy(),
+                        signals["exit_signals"][:, task_idx].copy(),
+                    )
+                del trade_results
+            del signals
+            gc.collect()
+
+        # 樣本外：每個窗口的最佳組合以其完整歷史信號模擬
+        fold_meta: List[Dict[str, Any]] = []
+        fold_curves: List[Optional[Dict[str, np.ndarray]]] = []
+        results: List[Dict] = []
+        time_values = bar_time_values(self.data)
+        for fold_idx, fold in enumerate(folds):
+            is_score, combo, predictor, entry_signal, exit_signal = best[fold_idx]
+            meta: Dict[str, Any] = {
+                "Fold": fold_idx,
+                "In_sample_start": str(time_values.iloc[fold["is_start"]]),
+                "In_sample_end": str(time_values.iloc[fold["is_end"] - 1]),
+                "Out_of_sample_start": str(time_values.iloc[fold["oos_start"]]),
+                "Out_of_sample_end": str(time_values.iloc[fold["oos_end"] - 1]),
+                "Objective": objective,
+                "In_sample_score": is_score if np.isfinite(is_score) else None,
+                "Out_of_sample_score": None,
+                "Backtest_id": None,
+                "strategy_id": None,
+                "params": None,
+            }
+            if combo is None:
+                fold_meta.append(meta)
+                fold_curves.append(None)
+                continue
+
+            trade_results = simulate(
+                entry_signal[:, None], exit_signal[:, None], fold["oos_start"], fold["oos_end"]
+            )
+            oos_score = WalkForward_backtester.score_matrix(
+                trade_results["returns"],
+                trade_results["equity_values"],
+                trade_results["trade_actions"],
+                objective,
+                time_unit,
+                risk_free_rate,
+            )[0]
+
+            condition_pair = condition_pairs[self._parse_strategy_id(combo[-1])]
+            n_entry = len(condition_pair["entry"])
+            window = slice(fold["oos_start"], fold["oos_end"])
+            result = self._generate_result_with_simulator(
+                self.data.iloc[window],
+                self.symbol,
+                self.result_mode,
+                fold_idx,
+                entry_signal[window],
+                exit_signal[window],
+                trade_results["positions"][:, 0],
+                trade_results["returns"][:, 0],
+                trade_results["trade_actions"][:, 0],
+                trade_results["equity_values"][:, 0],
+                predictor,
+                str(uuid.uuid4())[:16],
+                list(combo[:n_entry]),
+                list(combo[n_entry : n_entry + len(condition_pair["exit"])]),
+                trading_params,
+            )
+            result["walk_forward_fold"] = fold_idx
+            results.append(result)
+
+            meta.update(
+                {
+                    "Out_of_sample_score": float(oos_score) if np.isfinite(oos_score) else None,
+                    "Backtest_id": result["Backtest_id"],
+                    "strategy_id": result["strategy_id"],
+                    "params": result["params"],
+                }
+            )
+            fold_meta.append(meta)
+            fold_curves.append({k: v[:, 0] for k, v in trade_results.items() if k != "final_state"})
+
+        for fold, meta in zip(folds, fold_meta):
+            fold["Backtest_id"] = meta["Backtest_id"]
+        oos_equity = WalkForward_backtester.stitch_equity(self.data, folds, fold_curves)
+
+        total_return = oos_equity["Equity_value"].iloc[-1] / 100.0 - 1
+        fold_lines = "\n".join(
+            f"{m['Fold'] + 1}. {m['Out_of_sample_start']} ~ {m['Out_of_sample_end']}  "
+            f"IS {m['In_sample_score'] if m['In_sample_score'] is not None else '-'}"
+            f" / OOS {m['Out_of_sample_score'] if m['Out_of_sample_score'] is not None else '-'}"
+            f"  {m['strategy_id'] or '（無入選組合）'}"
+            for m in fold_meta
+        )
+        console.print(
+            Panel(
+                f"✅ 滾動前進分析完成！\n\n"
+                f"• 窗口數：{len(folds)}\n"
+                f"• 樣本外總回報：{total_return:.2%}\n"
+                f"• 總耗時：{time.time() - start_time:.1f}秒\n\n{fold_lines}",
+                title="[bold #dbac30]🎯 滾動前進分析結果[/bold #dbac30]",
+                border_style="#dbac30",
+            )
+        )
+
+        self.results = results
+        return {
+            "folds": fold_meta,
+            "oos_equity": oos_equity,
+            "results": results,
+            "config": wf_config,
+        }
+
+    def run_multi_asset(
+        self, config: Dict, datasets: Dict[str, pd.DataFrame]
+    ) -> List[Dict]:
+        """
+        多標的批量回測 - 同一參數網格在所有標的上只執行一次引擎流程
+
+        參數組合只展開一次；各標的以自身數據生成信號，信號矩陣依標的順序堆疊後
+        以 (K線 x 標的) 價格矩陣在同一次交易模擬核心調用中完成。本實例的 data 不參與回測，
+        對齊後的各標的數據保存於 self.instrument_data 供導出使用。
+
+        Args:
+            config (Dict): 回測配置（與 run_backtests 相同）
+            datasets (Dict[str, pd.DataFrame]): {標的代號: 數據}
+
+        Returns:
+            List[Dict]: 所有標的的回測結果，records/bar_data 的 Trading_instrument 為標的代號
+        """
+        aligned, align_info = MultiAsset_backtester.align_datasets(datasets)
+        self.instrument_data = aligned
+        self._configure_run(config)
+        symbols = list(aligned)
+        condition_pairs = config["condition_pairs"]
+        predictors = config["predictors"]
+        trading_params = config["trading_params"]
+        all_combinations = self.generate_parameter_combinations(config)
+        total_backtests = len(all_combinations) * len(predictors) * len(symbols)
+
+        engines = {}
+        for symbol in symbols:
+            engine = VectorBacktestEngine(
+                aligned[symbol], self.frequency, self.logger, symbol=symbol
+            )
+            engine._configure_run(config)
+            engine.incremental = False
+            # 各標的的跨區塊指標緩存共用一份記憶體預算
+            engine.max_memory_mb = self.max_memory_mb / len(symbols)
+            engines[symbol] = engine
+
+        console = Console()
+        dropped = ", ".join(
+            f"{symbol} -{count}"
+            for symbol, count in align_info["dropped"].items()
+            if count
+        )
+        console.print(
+            Panel(
+                f"將執行多標的向量化回測：{len(all_combinations)} 種參數組合 x "
+                f"{len(predictors)} 個預測因子 x {len(symbols)} 個標的 = {total_backtests} 次回測\n"
+                f"• 標的：{', '.join(symbols)}\n"
+                f"• 共同K線：{align_info['n_bars']}"
+                f"{f'（對齊捨棄：{dropped}）' if dropped else ''}\n"
+                f"交易參數：{trading_params}",
+                title="[bold #8f1511]🚀 多標的向量化回測[/bold #8f1511]",
+                border_style="#dbac30",
+            )
+        )
+        if self.incremental:
+            console.print(
+                Panel(
+                    "⚠️ 多標的回測不保存增量末端狀態，incremental 設定將被忽略",
+                    title="[bold #dbac30]🌐 多標的回測[/bold #dbac30]",
+                    border_style="#dbac30",
+                )
+            )
+            self.incremental = False
+
+        start_time = time.time()
+        price_panel = MultiAsset_backtester.price_panel(aligned, ("Close", "Open"))
+        close_prices = np.ascontiguousarray(price_panel[:, :, 0])
+        open_prices = np.ascontiguousarray(price_panel[:, :, 1])
+        del price_panel
+
+        chunk_size, chunk_info = SpecMonitor.get_chunk_size(
+            align_info["n_bars"],
+            total_backtests,
+            self._bytes_per_task_bar(),
+            self.max_memory_mb,
+        )
+        combos_per_chunk = max(1, chunk_size // max(len(predictors) * len(symbols), 1))
+        chunk_starts = list(range(0, len(all_combinations), combos_per_chunk))
+        if len(chunk_starts) > 1:
+            console.print(
+                Panel(
+                    f"{chunk_info}\n🔧 共 {len(chunk_starts)} 個區塊",
+                    title="[bold #dbac30]💾 記憶體管理[/bold #dbac30]",
+                    border_style="#dbac30",
+                )
+            )
+
+        all_results: List[Dict] = []
+        self.resumed_exports = []
+        stats = {"success": 0, "error": 0, "zero_trade": 0, "sample_no_trade": None}
+        # 各標的指標緩存與結果生成進程池在所有區塊間共用
+        with contextlib.ExitStack() as scopes:
+            scopes.enter_context(self._run_scope())
+            for engine in engines.values():
+                scopes.enter_context(engine._run_scope())
+            for chunk_start in chunk_starts:
+                chunk_results = self._multi_asset_chunk(
+                    engines,
+                    all_combinations[chunk_start : chunk_start + combos_per_chunk],
+                    condition_pairs,
+                    predictors,
+                    trading_params,
+                    close_prices,
+                    open_prices,
+                )
+                self._tally_results(chunk_results, stats)
+                all_results.extend(chunk_results)
+                del chunk_results
+                if len(chunk_starts) > 1:
+                    gc.collect()
+
+        total_time = time.time() - start_time
+        console.print(
+            Panel(
+                f"✅ 多標的向量化回測完成！\n\n"
+                f"• 總任務數：{total_backtests}（{len(symbols)} 個標的）\n"
+                f"• 成功：{stats['success']}\n"
+                f"• 失敗：{stats['error']}\n"
+                f"• 無交易：{stats['zero_trade']}\n"
+                f"• 總耗時：{total_time:.1f}秒\n"
+                f"• 平均速度：{total_backtests / max(total_time, 1e-9):.0f} 任務/秒",
+                title="[bold #dbac30]🎯 多標的向量化回測結果[/bold #dbac30]",
+                border_style="#dbac30",
+            )
+        )
+
+        self.results = all_results
+        return all_results
+
+    def _multi_asset_chunk(
+        self,
+        engines: Dict[str, "VectorBacktestEngine"],
+        combinations: List[Tuple],
+        condition_pairs: List[Dict],
+        predictors: List[str],
+        trading_params: Dict,
+        close_prices: np.ndarray,
+        open_prices: np.ndarray,
+    ) -> List[Dict]:
+        """多標的區塊：逐標的生成信號，堆疊後一次交易模擬，再以單一進程池批量生成所有標的的結果"""
+        tasks_by_symbol = {}
+        entry_blocks = []
+        exit_blocks = []
+        for symbol, engine in engines.items():
+            all_tasks = engine._generate_all_tasks_matrix(combinations, predictors)
+            signals = engine._generate_all_signals_vectorized(all_tasks, condition_pairs)
+            tasks_by_symbol[symbol] = all_tasks
+            entry_blocks.append(signals["entry_signals"])
+            exit_blocks.append(signals["exit_signals"])
+
+        # 信號矩陣依標的順序水平堆疊（標的為外層），asset_index 指定每欄的價格欄
+        n_tasks = len(combinations) * len(predictors)
+        entry_signals = np.hstack(entry_blocks)
+        exit_signals = np.hstack(exit_blocks)
+        del entry_blocks, exit_blocks
+        trade_results = vectorized_trade_simulation(
+            entry_signals,
+            exit_signals,
+            close_prices,
+            open_prices,
+            trading_params.get("transaction_cost", 0.001),
+            trading_params.get("slippage", 0.0005),
+            trading_params.get("trade_price", "close"),
+            trading_params.get("trade_delay", 0),
+            self.result_precision,
+            asset_index=np.repeat(np.arange(len(engines), dtype=np.int64), n_tasks),
+        )
+
+        # 合併各標的任務（標的為外層），每欄附帶所屬標的，結果生成按欄讀取標的數據
+        all_tasks = {
+            key: [value for tasks in tasks_by_symbol.values() for value in tasks[key]]
+            for key in next(iter(tasks_by_symbol.values()))
+        }
+        all_tasks["assets"] = [(symbol, engine.data) for symbol, engine in engines.items()]
+        all_tasks["asset_index"] = np.repeat(
+            np.arange(len(engines), dtype=np.int64), n_tasks
+        )
+        all_trade_results = {
+            key: trade_results[key]
+            for key in ["positions", "returns", "trade_actions", "equity_values"]
+        }
+        del trade_results
+        results = self._generate_all_results_vectorized(
+            all_tasks,
+            all_trade_results,
+            {"entry_signals": entry_signals, "exit_signals": exit_signals},
+            condition_pairs,
+            trading_params,
+        )
+        if self.inline_metrics is not None:
+            self._attach_inline_metrics(
+                all_tasks, all_trade_results, results, trading_params
+            )
+        return results
+
+    def find_incremental_parquet(self, config: Dict, directory: str) -> Optional[str]:
+        """
+        在 directory 中尋找可對 self.data 增量續算的 Parquet
+
+        狀態檔需與 self.data 前段的數據指紋一致，且涵蓋配置中所有參數組合 x 預測因子；
+        擴大參數網格或更改數據時回傳 None，應重新完整回測。
+        """
+        task_keys = {
+            BacktestCheckpoint.task_hash(
+                BacktestCheckpoint.combination_hash(combo), predictor
+            )
+            for combo in self.generate_parameter_combinations(config)
+            for predictor in config["predictors"]
+        }
+        return IncrementalState_backtester.find_parquet(directory, self.data, task_keys)
+
+    def run_incremental(self, config: Dict, parquet_path: str) -> Dict[str, Any]:
+        """
+        增量回測 - 只模擬上次回測之後新增的K線，並追加到既有 Parquet
+
+        self.data 必須為「上次回測的數據 + 追加的新K線」；既有K線被修改時拒絕執行。
+        信號在完整數據上重新計算，交易模擬自上次的末端狀態續算。
+
+        Args:
+            config (Dict): 與上次完整回測相同的回測配置
+            parquet_path: 上次導出的 Parquet（需有同名 _state.npz）
+
+        Returns:
+            Dict: new_bars、updated_backtests、appended_rows、skipped_backtests
+        """
+        self._configure_run(config)
+        if self.result_mode != RESULT_MODE_FULL:
+            raise ValueError("增量回測只支援 full 結果模式，trades_only 請重新完整回測")
+
+        state_path = IncrementalState_backtester.state_path(parquet_path)
+        if not os.path.exists(state_path):
+            raise FileNotFoundError(
+                f"找不到增量狀態檔: {state_path}，請以 config['incremental'] = True 完整回測一次"
+            )
+        stored = IncrementalState_backtester.load_states(state_path)
+        n_old = stored["n_bars"]
+        n_time = len(self.data)
+        if n_time < n_old or IncrementalState_backtester.data_fingerprint(
+            self.data.iloc[:n_old]
+        ) != stored["fingerprint"]:
+            raise ValueError("既有K線與上次回測數據不一致，無法增量回測，請重新完整回測")
+
+        summary = {
+            "new_bars": n_time - n_old,
+            "updated_backtests": 0,
+            "appended_rows": 0,
+            "skipped_backtests": 0,
+        }
+        console = Console()
+        if n_time == n_old:
+            console.print(
+                Panel(
+                    "沒有新增K線，無需增量回測",
+                    title="[bold #dbac30]🔁 增量回測[/bold #dbac30]",
+                    border_style="#dbac30",
+                )
+            )
+            return summary
+
+        start_time = time.time()
+        condition_pairs = config["condition_pairs"]
+        trading_params = config["trading_params"]
+        all_tasks: Dict[str, List[Any]] = {
+            "combinations": [],
+            "predictors": [],
+            "backtest_ids": [],
+            "strategy_ids": [],
+            "entry_params_list": [],
+            "exit_params_list": [],
+        }
+        state_rows: List[int] = []
+        for combo in self.generate_parameter_combinations(config):
+            combo_hash = BacktestCheckpoint.combination_hash(combo)
+            for predictor in config["predictors"]:
+                row = IncrementalState_backtester.find_state(
+                    stored, BacktestCheckpoint.task_hash(combo_hash, predictor)
+                )
+                if row is None:
+                    summary["skipped_backtests"] += 1
+                    continue
+                all_tasks["combinations"].append(combo)
+                all_tasks["predictors"].append(predictor)
+                all_tasks["backtest_ids"].append(stored["Backtest_id"][row])
+                all_tasks["strategy_ids"].append(combo[-1])
+                all_tasks["entry_params_list"].append([])
+                all_tasks["exit_params_list"].append([])
+                state_rows.append(row)
+        if not state_rows:
+            raise ValueError("配置中沒有任何參數組合對應到已保存的增量狀態")
+
+        all_signals = self._generate_all_signals_vectorized(all_tasks, condition_pairs)
+        trade_results = vectorized_trade_simulation(
+            all_signals["entry_signals"],
+            all_signals["exit_signals"],
+            self.data["Close"].values.astype(np.float64),
+            self.data["Open"].values.astype(np.float64),
+            trading_params.get("transaction_cost", 0.001),
+            trading_params.get("slippage", 0.0005),
+            trading_params.get("trade_price", "close"),
+            trading_params.get("trade_delay", 0),
+            self.result_precision,
+            start_index=n_old,
+            initial_state=stored["state"][state_rows],
+        )
+
+        simulator = TradeSimulator_backtester(
+            self.data,
+            pd.Series(0, index=self.data.index),
+            pd.Series(0, index=self.data.index),
+            trading_params.get("transaction_cost", 0.001),
+            trading_params.get("slippage", 0.0005),
+            trading_params.get("trade_delay", 0),
+            trading_params.get("trade_price", "close"),
+            None,  # Backtest_id
+            None,  # parameter_set_id
+            None,  # predictor
+            1.0,  # initial_equity
+            None,  # indicators
+            self.symbol,  # trading_instrument
+        )
+        new_records = []
+        new_states = []
+        for task_idx, row in enumerate(state_rows):
+            combo = all_tasks["combinations"][task_idx]
+            predictor = all_tasks["predictors"][task_idx]
+            condition_pair = condition_pairs[self._parse_strategy_id(combo[-1])]
+            n_entry = len(condition_pair["entry"])
+            entry_params = list(combo[:n_entry])
+            exit_params = list(combo[n_entry : n_entry + len(condition_pair["exit"])])
+            trade_actions = trade_results["trade_actions"][:, task_idx]
+
+            records = IncrementalState_backtester.build_tail_records(
+                self.data,
+                n_old,
+                stored["state"][row, 0],
+                int(stored["open_bar"][row]),
+                stored["open_group"][row],
+                trade_results["positions"][:, task_idx],
+                trade_results["returns"][:, task_idx],
+                trade_actions,
+                trade_results["equity_values"][:, task_idx],
+                all_signals["entry_signals"][:, task_idx],
+                all_signals["exit_signals"][:, task_idx],
+                predictor,
+                self.symbol,
+                simulator._generate_parameter_set_id(  # pylint: disable=protected-access
+                    entry_params, exit_params, predictor
+                ),
+                stored["Backtest_id"][row],
+                trading_params,
+            )
+            new_records.append(records)
+
+            # 更新末端狀態：新開倉取新K線中的開倉位置，延續中的交易沿用原開倉K線
+            final_state = trade_results["final_state"][task_idx]
+            open_bar, open_group = -1, ""
+            if final_state[0] != 0:
+                opens = np.flatnonzero(trade_actions == 1)
+                if len(opens) > 0:
+                    open_bar = n_old + int(opens[-1])
+                    open_group = str(records["Trade_group_id"].iloc[opens[-1]])
+                else:
+                    open_bar = int(stored["open_bar"][row])
+                    open_group = stored["open_group"][row]
+            new_states.append(
+                {
+                    "Backtest_id": stored["Backtest_id"][row],
+                    "end_state": {
+                        "task_key": stored["task_key"][row],
+                        "state": final_state,
+                        "open_bar": open_bar,
+                        "open_group": open_group,
+                    },
+                }
+            )
+
+        summary["updated_backtests"] = len(new_records)
+        summary["appended_rows"] = IncrementalState_backtester.append_to_parquet(
+            parquet_path, new_records, self.data
+        )
+        # 未包含在本次配置中的回測無法續算，保留其舊狀態會與 Parquet 不一致，故不再保存
+        IncrementalState_backtester.save_states(state_path, self.data, new_states)
+
+        console.print(
+            Panel(
+                f"🔁 新增K線：{summary['new_bars']}（{n_old} → {n_time}）\n"
+                f"• 更新回測：{summary['updated_backtests']}\n"
+                f"• 追加記錄：{summary['appended_rows']} 列\n"
+                f"• 未匹配狀態而跳過：{summary['skipped_backtests']}\n"
+                f"• 總耗時：{time.time() - start_time:.1f}秒\n📁 {parquet_path}",
+                title="[bold #dbac30]🔁 增量回測[/bold #dbac30]",
+                border_style="#dbac30",
+            )
+        )
+        return summary
+
+    def _configure_run(self, config: Dict) -> None:
+        """讀取結果模式、精度、記憶體預算、指標緩存與增量狀態等運行配置"""
+        self.result_mode = config.get("result_mode", RESULT_MODE_FULL)
+        if self.result_mode not in RESULT_MODES:
+            raise ValueError(
+                f"不支援的 result_mode: {self.result_mode}，可選值為 {RESULT_MODES}"
+            )
+        self.max_memory_mb = config.get("max_memory_mb", self.max_memory_mb)
+        cache_config = config.get("indicator_cache") or {}
+        if cache_config.get("enabled", False):
+            self.indicator_cache = IndicatorDiskCache(
+                cache_config.get("cache_dir"), cache_config.get("max_size_mb", 2048)
+            )
+            if cache_config.get("clear", False):
+                # 配置動作：回測前清除舊緩存（例如指標算法或數據來源變更後）
+                self.indicator_cache.clear()
+        self.result_precision = config.get("result_precision", "float64")
+        if self.result_precision not in RESULT_PRECISIONS:
+            raise ValueError(
+                f"不支援的 result_precision: {self.result_precision}，"
+                f"可選值為 {list(RESULT_PRECISIONS)}"
+            )
+        self.incremental = bool(config.get("incremental", False))
+        self.inline_metrics = self._resolve_inline_metrics(config.get("inline_metrics"))
+
+    @staticmethod
+    def _resolve_inline_metrics(value: Any) -> Optional[Dict[str, float]]:
+        """inline_metrics 配置：true 或非空 dict（未設 enabled=false）時啟用，回傳年化參數"""
+        if not value:
+            return None
+        if value is True:
+            value = {}
+        if not isinstance(value, dict) or not value.get("enabled", True):
+            return None
+        risk_free_rate = float(value.get("risk_free_rate", 0.04))
+        if risk_free_rate > 1:
+            risk_free_rate /= 100.0
+        return {
+            "time_unit": int(value.get("time_unit", 365)),
+            "risk_free_rate": risk_free_rate,
+        }
+
+    def _bytes_per_task_bar(self) -> int:
+        """串流分塊使用的每任務每K線位元組估算（依結果模式與是否啟用引擎內績效計算）"""
+        size = _BYTES_PER_TASK_BAR.get(
+            self.result_mode, _BYTES_PER_TASK_BAR[RESULT_MODE_FULL]
+        )
+        if self.inline_metrics is not None:
+            size += _INLINE_METRICS_BYTES_PER_TASK_BAR
+        return size
+
+    @staticmethod
+    def _tally_results(results: List[Dict], stats: Dict[str, Any]) -> None:
+        """累計區塊結果的成功/失敗/無交易統計（串流模式下結果不會被保留）"""
+        for r in results:
+            if r.get("error") is not None:
+                # 失敗：有錯誤
+                stats["error"] += 1
+                continue
+
+            # 檢查是否有開倉交易（Trade_action == 1）
+            records = r.get("records", pd.DataFrame())
+            has_trade = (
+                isinstance(records, pd.DataFrame)
+                and not records.empty
+                and (records["Trade_action"] == 1).sum() > 0
+            )
+            if has_trade:
+                # 成功：無錯誤且有實際開倉交易
+                stats["success"] += 1
+            else:
+                stats["zero_trade"] += 1
+                if stats["sample_no_trade"] is None:
+                    stats["sample_no_trade"] = r
+
+    def _save_checkpoint_chunk(
+        self,
+        checkpoint: BacktestCheckpoint,
+        chunk_results: List[Dict],
+        task_index: Dict[str, int],
+        combination_hashes: List[str],
+        predictors: List[str],
+        chunk_exports: Optional[List[str]],
+        chunk_idx: int,
+    ) -> None:
+        """
+        以 Backtest_id 將區塊結果對應到任務鍵後保存檢查點
+
+        任務索引順序與 _generate_all_tasks_matrix 一致：組合為外層、預測因子為內層。
+        無法對應的成功結果與缺少結果的任務不會記錄為完成（續跑時重新計算），並記錄警告。
+        """
+        results, task_hashes = [], []
+        unmatched = 0
+        for result in chunk_results:
+            idx = task_index.get(result.get("Backtest_id"))
+            if idx is None:
+                unmatched += result.get("error") is None
+                continue
+            combo_hash = combination_hashes[idx // len(predictors)]
+            results.append(result)
+            task_hashes.append(
+                BacktestCheckpoint.task_hash(combo_hash, predictors[idx % len(predictors)])
+            )
+        missing = len(task_index) - len(results)
+        if unmatched or missing:
+            self.logger.warning(
+                f"區塊 {chunk_idx + 1}: {missing} 個任務缺少結果、{unmatched} 個成功結果"
+                f"無法對應任務鍵，這些任務未記錄於檢查點，續跑時將重新計算"
+            )
+        checkpoint.save_chunk(results, task_hashes, chunk_exports)
+
     def _true_vectorized_backtest(
         self,
         all_combinations: List[Tuple],
         condition_pairs: List[Dict],
         predictors: List[str],
         trading_params: Dict,
+        task_index: Optional[Dict[str, int]] = None,
     ) -> List[Dict]:
-        """向量化回測 - 一次性處理所有任務"""
+        """
+        向量化回測 - 一次性處理單個串流區塊內的所有任務
+
+        task_index 提供時填入 Backtest_id -> 任務索引（組合為外層、預測因子為內層）
+        """
         total_backtests = len(all_combinations) * len(predictors)
 
         # 創建並行處理進度條
@@ -537,6 +1562,10 @@ class VectorBacktestEngine:
         # 先執行不需要進度條的步驟
         # 步驟1: 生成任務矩陣
         all_tasks = self._generate_all_tasks_matrix(all_combinations, predictors)
+        if task_index is not None:
+            task_index.update(
+                (backtest_id, idx) for idx, backtest_id in enumerate(all_tasks["backtest_ids"])
+            )
 
         # 步驟2: 向量化信號生成
         all_signals = self._generate_all_signals_vectorized(
@@ -610,8 +1639,112 @@ class VectorBacktestEngine:
                 total_backtests,
             )
 
+        if self.incremental:
+            self._attach_end_states(all_tasks, all_trade_results, all_results)
+        if self.inline_metrics is not None:
+            self._attach_inline_metrics(
+                all_tasks, all_trade_results, all_results, trading_params
+            )
+
         return all_results
 
+    def _attach_inline_metrics(
+        self,
+        all_tasks: Dict[str, Any],
+        all_trade_results: Dict[str, Any],
+        all_results: List[Dict],
+        trading_params: Dict,
+    ) -> None:
+        """
+        由記憶體中的交易模擬矩陣一次計算所有任務的績效指標，附於成功結果的 result["metrics"]
+
+        指標與 MetricsExporter 讀回 Parquet 後的計算一致；result["metrics_config"] 記錄
+        所用的 time_unit / risk_free_rate，供導出與 MetricsRunner 判斷是否可直接沿用。
+        多標的任務矩陣按欄使用所屬標的的價格。
+        """
+        if not all_results:
+            return
+        price_column = "Open" if trading_params.get("trade_price", "close") == "open" else "Close"
+        positions = all_trade_results["positions"]
+        trade_actions = all_trade_results["trade_actions"]
+        assets, asset_index = self._task_assets(all_tasks)
+        closes = [data["Close"].to_numpy(dtype=np.float64) for _, data in assets]
+        prices = [data[price_column].to_numpy(dtype=np.float64) for _, data in assets]
+        if len(assets) == 1:
+            close = closes[0]
+            trade_returns = trade_return_matrix(positions, trade_actions, prices[0])
+        else:
+            close = np.column_stack(closes)[:, asset_index]
+            trade_returns = np.empty(positions.shape, dtype=np.float64)
+            for asset, asset_prices in enumerate(prices):
+                columns = np.flatnonzero(asset_index == asset)
+                trade_returns[:, columns] = trade_return_matrix(
+                    positions[:, columns], trade_actions[:, columns], asset_prices
+                )
+        batch = BatchMetricsMetricTracker.from_arrays(
+            all_tasks["backtest_ids"],
+            all_trade_results["equity_values"],
+            all_trade_results["returns"],
+            close,
+            trade_actions,
+            positions,
+            trade_returns,
+        )
+        table = BatchMetricsMetricTracker.compute(
+            batch, self.inline_metrics["time_unit"], self.inline_metrics["risk_free_rate"]
+        )
+        del batch
+        metrics_by_id = {
+            row.pop("Backtest_id"): row
+            for row in BatchMetricsMetricTracker.to_batch_metadata(table)
+        }
+        for result in all_results:
+            metrics = metrics_by_id.get(result.get("Backtest_id"))
+            if metrics is None or result.get("error") is not None:
+                continue
+            result["metrics"] = metrics
+            result["metrics_config"] = dict(self.inline_metrics)
+
+    def _task_assets(
+        self, all_tasks: Dict[str, Any]
+    ) -> Tuple[List[Tuple[str, pd.DataFrame]], np.ndarray]:
+        """
+        任務矩陣的標的資訊：(標的代號與數據列表, 每欄所屬標的索引)
+
+        多標的區塊的 all_tasks 帶有 assets / asset_index；單標的任務全部對應本實例的數據。
+        """
+        if "asset_index" in all_tasks:
+            return all_tasks["assets"], np.asarray(all_tasks["asset_index"])
+        n_tasks = len(all_tasks["combinations"])
+        return [(self.symbol, self.data)], np.zeros(n_tasks, dtype=np.int64)
+
+    @staticmethod
+    def _attach_end_states(
+        all_tasks: Dict[str, Any],
+        all_trade_results: Dict[str, Any],
+        all_results: List[Dict],
+    ) -> None:
+        """為每個成功結果附上末端交易狀態（end_state），供導出時保存"""
+        task_index = {
+            backtest_id: idx for idx, backtest_id in enumerate(all_tasks["backtest_ids"])
+        }
+        combination_hashes: Dict[int, str] = {}
+        for result in all_results:
+            task_idx = task_index.get(result.get("Backtest_id"))
+            if task_idx is None or result.get("error") is not None:
+                continue
+            combo = all_tasks["combinations"][task_idx]
+            if id(combo) not in combination_hashes:
+                combination_hashes[id(combo)] = BacktestCheckpoint.combination_hash(combo)
+            result["end_state"] = IncrementalState_backtester.end_state(
+                BacktestCheckpoint.task_hash(
+                    combination_hashes[id(combo)], all_tasks["predictors"][task_idx]
+                ),
+                all_trade_results["final_state"][task_idx],
+                all_trade_results["trade_actions"][:, task_idx],
+                result["records"],
+            )
+
     def _generate_all_tasks_matrix(
         self, all_combinations: List[Tuple], predictors: List[str]
     ) -> Dict:
@@ -887,7 +2020,7 @@ class VectorBacktestEngine:
 
             # 調用 TradeSimulator 的向量化方法
             trade_results = simulator.simulate_trades_vectorized(
-                entry_signals, exit_signals, trading_params
+                entry_signals, exit_signals, trading_params, self.result_precision
             )
             
             trade_progress.update(trade_task, completed=2, description=f"📈 [2/3] 交易模擬 - 完成 {n_strategies} 個策略")
@@ -932,13 +2065,17 @@ class VectorBacktestEngine:
         else:
             batch_size = max(400, n_tasks // (n_cores * 3))  # 基於核心數計算
 
-        # 準備批次索引
+        # 準備批次索引：批次不跨標的，batch_assets 記錄各批次所屬標的
+        assets, asset_index = self._task_assets(all_tasks)
         batch_indices = []
+        batch_assets = []
         batch_sizes = []  # 記錄每個批次的大小
-        for i in range(0, n_tasks, batch_size):
-            end_idx = min(i + batch_size, n_tasks)
-            batch_indices.append(list(range(i, end_idx)))
-            batch_sizes.append(end_idx - i)
+        for asset in range(len(assets)):
+            columns = np.flatnonzero(asset_index == asset).tolist()
+            for i in range(0, len(columns), batch_size):
+                batch_indices.append(columns[i : i + batch_size])
+                batch_assets.append(asset)
+                batch_sizes.append(len(batch_indices[-1]))
 
         # 創建改進的進度監控器
         from rich.console import Console
@@ -962,7 +2099,10 @@ class VectorBacktestEngine:
                 condition_pairs,
                 trading_params,  # 傳入 trading_params
             )
-            results = self._process_batch_results_optimized(batch_data)
+            symbol, data = assets[batch_assets[0]]
+            results = VectorBacktestEngine._build_batch_results(
+                batch_data, data, symbol, self.result_mode
+            )
 
             # 通知進度監控器批次完成
             if progress_monitor is not None:
@@ -1004,23 +2144,46 @@ class VectorBacktestEngine:
         else:
             # 多批次並行處理
             results = []
+            # 共享記憶體數據平面：價格與矩陣只寫入一次，子進程只接收 handles 與欄位索引
+            shared_store, shared_payload = self._create_shared_store(
+                all_tasks, all_trade_results, all_signals
+            )
+            batch_failed = False
             try:
-                with ProcessPoolExecutor(max_workers=n_cores) as executor:
+                # 運行範圍內各區塊共用同一個 spawn 進程池（見 _result_pool）
+                with self._result_pool(n_cores) as executor:
                     futures = []
 
-                    # 分批提交任務，直接傳遞 numpy 數組
+                    # 分批提交任務
                     for batch_idx, batch_idx_list in enumerate(batch_indices):
-                        batch_data = self._prepare_batch_data(
-                            batch_idx_list,
-                            all_tasks,
-                            all_trade_results,
-                            all_signals,
-                            condition_pairs,
-                            trading_params,  # 傳入 trading_params
-                        )
-                        future = executor.submit(
-                            self._process_batch_results_optimized, batch_data
-                        )
+                        symbol, data = assets[batch_assets[batch_idx]]
+                        if shared_store is not None:
+                            payload = self._prepare_shared_batch_payload(
+                                batch_idx_list,
+                                all_tasks,
+                                condition_pairs,
+                                trading_params,
+                                shared_payload,
+                                batch_assets[batch_idx],
+                            )
+                            future = executor.submit(_process_shared_batch, payload)
+                        else:
+                            # 共享記憶體不可用時，回退為直接傳遞 numpy 數組
+                            batch_data = self._prepare_batch_data(
+                                batch_idx_list,
+                                all_tasks,
+                                all_trade_results,
+                                all_signals,
+                                condition_pairs,
+                                trading_params,  # 傳入 trading_params
+                            )
+                            future = executor.submit(
+                                VectorBacktestEngine._build_batch_results,
+                                batch_data,
+                                data,
+                                symbol,
+                                self.result_mode,
+                            )
                         futures.append((batch_idx, future))
 
                 # 收集結果並更新進度
@@ -1074,6 +2237,7 @@ class VectorBacktestEngine:
                                 gc.collect()
 
                     except Exception as batch_error:
+                        batch_failed = True
                         console.print(
                             Panel(
                                 f"批次 {batch_idx + 1} 處理失敗: {batch_error}",
@@ -1112,8 +2276,11 @@ class VectorBacktestEngine:
                 # 完成進度監控
                 if progress_monitor is not None:
                     progress_monitor.finish()
+                if batch_failed:
+                    self._discard_result_pool()
 
             except Exception as e:
+                self._discard_result_pool()
                 console.print(
                     Panel(
                         f"並行處理失敗: {e}",
@@ -1138,9 +2305,102 @@ class VectorBacktestEngine:
                     task,
                     total_backtests,
                 )
+            finally:
+                if shared_store is not None:
+                    shared_store.close()
 
         return results
 
+    def _create_shared_store(
+        self,
+        all_tasks: Dict[str, Any],
+        all_trade_results: Dict[str, Any],
+        all_signals: Dict[str, Any],
+    ) -> Tuple[Optional[SharedArrayStore], Dict[str, Any]]:
+        """
+        將價格數據與交易/信號矩陣寫入共享記憶體
+
+        各標的的K線以 bar::<標的索引>::<欄位> 寫入，多標的區塊只需一個共享記憶體與進程池。
+
+        Returns:
+            tuple: (SharedArrayStore 或 None, 各批次共用的 payload 欄位)；
+                   建立失敗時回傳 (None, {})，由調用方回退為序列化批次
+        """
+        store = SharedArrayStore()
+        assets, asset_index = self._task_assets(all_tasks)
+        task_predictors = np.asarray(all_tasks["predictors"], dtype=object)
+        asset_payloads = []
+        try:
+            for asset, (symbol, data) in enumerate(assets):
+                predictors = list(dict.fromkeys(task_predictors[asset_index == asset]))
+                bars = SparseRecords_backtester.build_shared_bars(data, predictors)
+                extra_columns = {}
+                for col in bars.columns:
+                    values = bars[col].to_numpy()
+                    if values.dtype == object:
+                        # object 欄位（如帶時區時間）無法放入共享記憶體，隨 payload 傳遞
+                        extra_columns[col] = bars[col]
+                    else:
+                        store.put(f"bar::{asset}::{col}", values)
+                asset_payloads.append(
+                    {
+                        "bar_columns": list(bars.columns),
+                        "extra_columns": extra_columns,
+                        "symbol": symbol,
+                    }
+                )
+            for key in ["positions", "returns", "trade_actions", "equity_values"]:
+                store.put(key, all_trade_results[key])
+            for key in ["entry_signals", "exit_signals"]:
+                store.put(key, all_signals[key])
+        except (OSError, TypeError, ValueError) as e:
+            store.close()
+            Console().print(
+                Panel(
+                    f"⚠️ 無法建立共享記憶體，改為直接傳遞批次數據: {e}",
+                    title=Text("👨‍💻 交易回測 Backtester", style="bold #8f1511"),
+                    border_style="#dbac30",
+                )
+            )
+            return None, {}
+
+        shared_payload = {
+            "handles": store.handles,
+            "assets": asset_payloads,
+            "result_mode": self.result_mode,
+        }
+        return store, shared_payload
+
+    def _prepare_shared_batch_payload(
+        self,
+        batch_indices: List[int],
+        all_tasks: Dict,
+        condition_pairs: List[Dict],
+        trading_params: Dict,
+        shared_payload: Dict[str, Any],
+        asset: int = 0,
+    ) -> Dict[str, Any]:
+        """準備共享記憶體批次：只包含 handles、欄位索引、所屬標的的K線欄位與任務參數"""
+        payload = {
+            "handles": shared_payload["handles"],
+            "result_mode": shared_payload["result_mode"],
+            "asset": asset,
+            **shared_payload["assets"][asset],
+        }
+        payload["batch_indices"] = batch_indices
+        payload["condition_pairs"] = condition_pairs
+        payload["trading_params"] = trading_params
+        payload["task_data"] = {
+            idx: {
+                "predictor": all_tasks["predictors"][idx],
+                "backtest_id": all_tasks["backtest_ids"][idx],
+                "strategy_id": all_tasks["strategy_ids"][idx],
+                "combo": all_tasks["combinations"][idx],
+            }
+            for idx in batch_indices
+        }
+        return payload
+
     def _prepare_batch_data(
         self,
         batch_indices: List[int],
@@ -1187,6 +2447,15 @@ class VectorBacktestEngine:
 
     def _process_batch_results_optimized(self, batch_data: Dict) -> List[Dict]:
         """優化的批次處理函數，直接使用 numpy 數組"""
+        return VectorBacktestEngine._build_batch_results(
+            batch_data, self.data, self.symbol, self.result_mode
+        )
+
+    @staticmethod
+    def _build_batch_results(  # pylint: disable=too-complex
+        batch_data: Dict, data: pd.DataFrame, symbol: str, result_mode: str
+    ) -> List[Dict]:
+        """批次生成結果，不依賴引擎實例（供主進程與共享記憶體子進程共用）"""
 
         batch_indices = batch_data["batch_indices"]
         condition_pairs = batch_data["condition_pairs"]
@@ -1210,7 +2479,7 @@ class VectorBacktestEngine:
                 try:
                     # 解析策略參數
                     strategy_id = task_data[task_idx]["strategy_id"]
-                    strategy_idx = self._parse_strategy_id(strategy_id)
+                    strategy_idx = VectorBacktestEngine._parse_strategy_id(strategy_id)
                     condition_pair = condition_pairs[strategy_idx]
 
                     combo = task_data[task_idx]["combo"]
@@ -1232,7 +2501,10 @@ class VectorBacktestEngine:
                     equity_values = trade_results["equity_values"][:, batch_idx]
 
                     # 生成單個結果
-                    result = self._generate_single_result(
+                    result = VectorBacktestEngine._generate_result_with_simulator(
+                        data,
+                        symbol,
+                        result_mode,
                         task_idx,
                         entry_signal,
                         exit_signal,
@@ -1335,6 +2607,7 @@ class VectorBacktestEngine:
             )
 
         results = []
+        assets, asset_index = self._task_assets(all_tasks)
 
         for task_idx in range(n_tasks):
             try:
@@ -1358,12 +2631,12 @@ class VectorBacktestEngine:
                     (
                         entry_signals[:, task_idx]
                         if task_idx < entry_signals.shape[1]
-                        else np.zeros(len(self.data))
+                        else np.zeros(entry_signals.shape[0])
                     ),
                     (
                         exit_signals[:, task_idx]
                         if task_idx < exit_signals.shape[1]
-                        else np.zeros(len(self.data))
+                        else np.zeros(entry_signals.shape[0])
                     ),
                     all_trade_results["positions"][:, task_idx],
                     all_trade_results["returns"][:, task_idx],
@@ -1374,6 +2647,7 @@ class VectorBacktestEngine:
                     entry_params,
                     exit_params,
                     {"transaction_cost": 0.001, "slippage": 0.0005},
+                    assets[asset_index[task_idx]],
                 )
                 results.append(result)
 
@@ -1471,12 +2745,51 @@ class VectorBacktestEngine:
         entry_params: List,
         exit_params: List,
         trading_params: Dict,
+        asset: Optional[Tuple[str, pd.DataFrame]] = None,
     ) -> Dict:
-        """生成單個任務的結果 - 改為調用 TradeSimulator"""
+        """生成單個任務的結果 - 改為調用 TradeSimulator；asset 為 (標的代號, 數據)，預設本實例"""
+        symbol, data = asset if asset is not None else (self.symbol, self.data)
+        return VectorBacktestEngine._generate_result_with_simulator(
+            data,
+            symbol,
+            self.result_mode,
+            task_idx,
+            entry_signal,
+            exit_signal,
+            position,
+            returns,
+            trade_actions,
+            equity_values,
+            predictor,
+            backtest_id,
+            entry_params,
+            exit_params,
+            trading_params,
+        )
+
+    @staticmethod
+    def _generate_result_with_simulator(
+        data: pd.DataFrame,
+        symbol: str,
+        result_mode: str,
+        task_idx: int,
+        entry_signal: np.ndarray,
+        exit_signal: np.ndarray,
+        position: np.ndarray,
+        returns: np.ndarray,
+        trade_actions: np.ndarray,
+        equity_values: np.ndarray,
+        predictor: str,
+        backtest_id: str,
+        entry_params: List,
+        exit_params: List,
+        trading_params: Dict,
+    ) -> Dict:
+        """以指定數據調用 TradeSimulator 生成單個任務的結果"""
 
         # 創建 TradeSimulator 實例
         simulator = TradeSimulator_backtester(
-            self.data,
+            data,
             pd.Series(entry_signal),
             pd.Series(exit_signal),
             trading_params.get("transaction_cost", 0.001),
@@ -1488,7 +2801,7 @@ class VectorBacktestEngine:
             predictor,
             1.0,  # initial_equity
             None,  # indicators
-            self.symbol,  # trading_instrument
+            symbol,  # trading_instrument
         )
 
         # 調用 TradeSimulator 的 generate_single_result 方法
@@ -1505,6 +2818,7 @@ class VectorBacktestEngine:
             entry_params,
             exit_params,
             trading_params,
+            result_mode=result_mode,
         )
 
         return result
@@ -1532,15 +2846,17 @@ class VectorBacktestEngine:
 
         n_time = len(self.data)
 
-        # 初始化信號矩陣
-        signals_matrix = np.zeros((n_time, n_tasks, n_indicators))
+        # 初始化信號矩陣（int8：信號只有 +1/-1/0，記憶體為 float64 的 1/8）
+        # 各指標以批量 Numba 核心直接寫入此張量
+        signals_matrix = np.zeros((n_time, n_tasks, n_indicators), dtype=np.int8)
 
-        # 初始化全局快取
-        global_ma_cache: Dict[str, Any] = {}
-        global_boll_cache: Dict[str, Any] = {}
-        global_hl_cache: Dict[str, Any] = {}
-        global_value_cache: Dict[str, Any] = {}
-        global_percentile_cache: Dict[str, Any] = {}
+        # 全局快取：運行範圍內跨區塊共用（啟用持久化指標緩存時，未命中記憶體會查詢磁碟）
+        caches = self._indicator_caches()
+        global_ma_cache = caches["MA"]
+        global_boll_cache = caches["BOLL"]
+        global_hl_cache = caches["HL"]
+        global_value_cache = caches["VALUE"]
+        global_percentile_cache = caches["PERC"]
 
         # 按指標類型分組任務
         indicator_groups: Dict[str, List[Any]] = {}
@@ -1620,6 +2936,9 @@ class VectorBacktestEngine:
                 for task_idx, indicator_idx, param in tasks:
                     signals_matrix[:, task_idx, indicator_idx] = 0
 
+        if self.indicator_cache is not None:
+            self.indicator_cache.flush()
+
         # 強制垃圾回收
         import gc
 
@@ -1627,6 +2946,70 @@ class VectorBacktestEngine:
 
         return signals_matrix
 
+    def _new_indicator_cache(self, indicator_type: str) -> Dict[Any, Any]:
+        """建立單次信號生成用的指標緩存字典"""
+        if self.indicator_cache is None:
+            return {}
+        return PersistentIndicatorCache(
+            self.indicator_cache,
+            indicator_type,
+            self.data,
+            self._predictor_fingerprints,
+        )
+
+    def _indicator_caches(self) -> Dict[str, Dict[Any, Any]]:
+        """
+        各指標類型的緩存字典：運行範圍內回傳跨區塊共用的緩存，否則每次建立新緩存
+
+        共用緩存超過區塊記憶體預算的 _INDICATOR_CACHE_MEMORY_FRACTION 時先清空記憶體層
+        （持久化指標緩存的磁碟內容不受影響）。
+        """
+        if self._run_caches is None:
+            return {t: self._new_indicator_cache(t) for t in _INDICATOR_TYPES}
+        budget = self.max_memory_mb * _INDICATOR_CACHE_MEMORY_FRACTION * 1024 * 1024
+        if sum(_cache_nbytes(cache) for cache in self._run_caches.values()) > budget:
+            for cache in self._run_caches.values():
+                cache.clear()
+        return self._run_caches
+
+    @contextlib.contextmanager
+    def _run_scope(self) -> Iterator[None]:
+        """運行範圍：所有串流區塊共用指標緩存與一個結果生成進程池，結束時釋放"""
+        self._run_caches = {t: self._new_indicator_cache(t) for t in _INDICATOR_TYPES}
+        self._run_pool_enabled = True
+        try:
+            yield
+        finally:
+            self._run_caches = None
+            self._run_pool_enabled = False
+            self._discard_result_pool()
+
+    @contextlib.contextmanager
+    def _result_pool(self, n_workers: int) -> Iterator[ProcessPoolExecutor]:
+        """
+        結果生成進程池：運行範圍內沿用同一個池，範圍外每次調用建立並關閉
+
+        子進程以 spawn 啟動：fork 會複製主進程已初始化的 Numba 執行緒池
+        （GNU OpenMP 不支援 fork），spawn 的子進程會自行初始化執行緒層
+        """
+        if not self._run_pool_enabled:
+            with ProcessPoolExecutor(
+                max_workers=n_workers, mp_context=multiprocessing.get_context("spawn")
+            ) as executor:
+                yield executor
+            return
+        if self._result_executor is None:
+            self._result_executor = ProcessPoolExecutor(
+                max_workers=n_workers, mp_context=multiprocessing.get_context("spawn")
+            )
+        yield self._result_executor
+
+    def _discard_result_pool(self) -> None:
+        """關閉運行範圍的進程池（運行結束或批次失敗後，避免沿用已損壞的池）"""
+        if self._result_executor is not None:
+            self._result_executor.shutdown(wait=True, cancel_futures=True)
+            self._result_executor = None
+
     def _vectorized_combine_signals(  # pylint: disable=too-complex
         self, signals_matrix: np.ndarray, is_exit_signals: bool = False
     ) -> np.ndarray:
@@ -1705,18 +3088,21 @@ class VectorBacktestEngine:
 
         # 向量化交易模擬
         if NUMBA_AVAILABLE:
-            positions, returns, trade_actions, equity_values = (
-                _vectorized_trade_simulation_njit(
-                    entry_signals,
-                    exit_signals,
-                    close_prices,
-                    open_prices,
-                    float(trading_params["transaction_cost"]),
-                    float(trading_params["slippage"]),
-                    str(trading_params["trade_price"]),
-                    int(trading_params["trade_delay"]),
-                )
+            sim_results = vectorized_trade_simulation(
+                entry_signals,
+                exit_signals,
+                close_prices,
+                open_prices,
+                float(trading_params["transaction_cost"]),
+                float(trading_params["slippage"]),
+                str(trading_params["trade_price"]),
+                int(trading_params["trade_delay"]),
+                self.result_precision,
             )
+            positions = sim_results["positions"]
+            returns = sim_results["returns"]
+            trade_actions = sim_results["trade_actions"]
+            equity_values = sim_results["equity_values"]
         else:
             # 備用實現
             positions, returns, trade_actions, equity_values = (
@@ -1750,7 +3136,8 @@ class VectorBacktestEngine:
 
     # 備用交易模擬實現已移植到 TradeSimulator 中
 
-    def _parse_strategy_id(self, strategy_id: str) -> int:
+    @staticmethod
+    def _parse_strategy_id(strategy_id: str) -> int:
         """解析策略ID"""
         try:
             if strategy_id.startswith("strategy_"):
@@ -1823,3 +3210,50 @@ class VectorBacktestEngine:
             }
         except Exception:
             return {"strategy_idx": strategy_idx, "combo": combo}
+
+
+def _process_shared_batch(payload: Dict[str, Any]) -> List[Dict]:
+    """
+    子進程入口：依 handles 附加共享記憶體，只取出本批次欄位後生成結果
+
+    取出的數據皆為複製品，離開 attach 後共享記憶體即可安全關閉。
+    """
+    batch_indices = payload["batch_indices"]
+    start, stop = batch_indices[0], batch_indices[-1] + 1
+    # 批次索引為連續區間時使用切片，避免花式索引
+    columns: Any = (
+        slice(start, stop) if stop - start == len(batch_indices) else batch_indices
+    )
+
+    prefix = f"bar::{payload['asset']}::"
+    with SharedArrayStore.attach(payload["handles"]) as arrays:
+        data = pd.DataFrame(
+            {
+                col: (
+                    np.array(arrays[prefix + col])
+                    if prefix + col in arrays
+                    else payload["extra_columns"][col]
+                )
+                for col in payload["bar_columns"]
+            }
+        )
+        signals = {
+            key: np.array(arrays[key][:, columns])
+            for key in ["entry_signals", "exit_signals"]
+        }
+        trade_results = {
+            key: np.array(arrays[key][:, columns])
+            for key in ["positions", "returns", "trade_actions", "equity_values"]
+        }
+
+    batch_data = {
+        "batch_indices": batch_indices,
+        "condition_pairs": payload["condition_pairs"],
+        "task_data": payload["task_data"],
+        "signals": signals,
+        "trade_results": trade_results,
+        "trading_params": payload["trading_params"],
+    }
+    return VectorBacktestEngine._build_batch_results(
+        batch_data, data, payload["symbol"], payload["result_mode"]
+    )
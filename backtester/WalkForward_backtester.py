@@ -0,0 +1,231 @@
+"""
+WalkForward_backtester.py
+
+【功能說明】
+------------------------------------------------------------
+本模組為 Lo2cin4BT 回測框架的滾動前進分析（walk-forward optimisation）工具：
+- 依樣本內（in-sample）/樣本外（out-of-sample）K線數與步長切分滾動或錨定窗口
+- 指標與信號在完整歷史上只計算一次，每個窗口只重新執行交易模擬（end_index 切窗）
+- 以向量化矩陣指標為所有參數組合評分，選出每個窗口的最佳組合並在樣本外模擬
+- 將各窗口樣本外資金曲線接續為一條完整曲線，並記錄每個窗口的元數據
+
+【流程與數據流】
+------------------------------------------------------------
+- VectorBacktestEngine.run_walk_forward(config) 依 config["walk_forward"] 調用本模組
+- make_folds 切分窗口；score_matrix 為 (K線 x 任務) 的收益/權益矩陣批量評分
+- stitch_equity 接續樣本外資金曲線；save 以 Parquet + metadata 保存結果
+
+```mermaid
+flowchart TD
+    A[完整歷史信號（只計算一次）] -->|每個窗口 start/end_index| B[樣本內交易模擬]
+    B -->|score_matrix| C[每窗口最佳組合]
+    C -->|樣本外交易模擬| D[各窗口樣本外結果]
+    D -->|stitch_equity| E[接續的樣本外資金曲線]
+    D -->|元數據| F[folds]
+```
+
+【維護與擴充重點】
+------------------------------------------------------------
+- score_matrix 的指標定義需與 MetricsCalculatorMetricTracker 一致（Sharpe/Sortino/Calmar 等）
+- 每個窗口的交易模擬從空倉開始；樣本外窗口結束時的未平倉部位以市值計入，不另扣平倉成本
+- 信號延遲（trade_delay）在窗口起點仍讀取完整歷史中的前一根信號，與完整回測一致
+
+【常見易錯點】
+------------------------------------------------------------
+- step 小於 out_of_sample 會令樣本外窗口重疊，無法接續資金曲線，因此不允許
+- 樣本內沒有任何組合產生交易或績效有效時，該窗口樣本外保持空倉（資金曲線持平）
+
+【範例】
+------------------------------------------------------------
+- config["walk_forward"] = {"in_sample": 500, "out_of_sample": 100, "objective": "sharpe"}
+- config["walk_forward"] = {"in_sample": 500, "out_of_sample": 100, "step": 100, "anchored": True}
+- summary = VectorBacktestEngine(data, "1D").run_walk_forward(config)
+
+【與其他模組的關聯】
+------------------------------------------------------------
+- 由 VectorBacktestEngine.run_walk_forward 調用，autorunner 以 backtester.walk_forward 配置啟用
+- 評分目標與 ParameterSearch_backtester 共用 SEARCH_OBJECTIVES
+"""
+
+import json
+from typing import Any, Dict, List, Optional
+
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+import pyarrow.parquet as pq
+
+from .ParameterSearch_backtester import SEARCH_OBJECTIVES
+from .TradeSimulator_backtester import bar_time_values
+
+
+class WalkForward_backtester:
+    """滾動前進分析：窗口切分、矩陣批量評分、樣本外資金曲線接續"""
+
+    @staticmethod
+    def make_folds(
+        n_bars: int,
+        in_sample: int,
+        out_of_sample: int,
+        step: Optional[int] = None,
+        anchored: bool = False,
+    ) -> List[Dict[str, int]]:
+        """
+        切分滾動（或錨定）窗口
+
+        Returns:
+            List[Dict]: 每個窗口的 is_start/is_end/oos_start/oos_end（K線索引，end 不含）
+        """
+        in_sample = int(in_sample)
+        out_of_sample = int(out_of_sample)
+        step = out_of_sample if step is None else int(step)
+        if in_sample < 2 or out_of_sample < 1:
+            raise ValueError(
+                "walk_forward 的 in_sample 需至少 2 根K線，out_of_sample 需至少 1 根"
+            )
+        if step < out_of_sample:
+            raise ValueError(
+                "walk_forward 的 step 不可小於 out_of_sample（樣本外窗口會重疊）"
+            )
+
+        folds = []
+        is_end = in_sample
+        while is_end < n_bars:
+            folds.append(
+                {
+                    "is_start": 0 if anchored else is_end - in_sample,
+                    "is_end": is_end,
+                    "oos_start": is_end,
+                    "oos_end": min(is_end + out_of_sample, n_bars),
+                }
+            )
+            is_end += step
+        return folds
+
+    @staticmethod
+    def score_matrix(
+        returns: np.ndarray,
+        equity_values: np.ndarray,
+        trade_actions: np.ndarray,
+        objective: str,
+        time_unit: float,
+        risk_free_rate: float,
+    ) -> np.ndarray:
+        """
+        為 (K線 x 任務) 矩陣的每一欄計算目標績效，定義與 MetricsCalculatorMetricTracker 一致
+
+        Returns:
+            ndarray: 每個任務的分數；無交易或指標無效時為 -inf
+        """
+        if objective not in SEARCH_OBJECTIVES:
+            raise ValueError(
+                f"不支援的評分目標: {objective}，可選值為 {SEARCH_OBJECTIVES}"
+            )
+        returns = np.asarray(returns, dtype=np.float64)
+        equity = np.asarray(equity_values, dtype=np.float64)
+        n_rows, n_tasks = returns.shape
+        if n_rows < 2:
+            return np.full(n_tasks, -np.inf)
+        years = n_rows / time_unit if n_rows / time_unit > 0 else 1.0
+
+        with np.errstate(all="ignore"):
+            total_return = equity[-1] / equity[0] - 1
+            if objective in ("sharpe", "sortino"):
+                excess = returns.mean(axis=0) - risk_free_rate / time_unit
+                if objective == "sharpe":
+                    risk = returns.std(axis=0, ddof=1)
+                else:
+                    negative = returns < 0
+                    n_negative = negative.sum(axis=0)
+                    risk = np.sqrt(
+                        np.where(negative, returns**2, 0.0).sum(axis=0)
+                        / np.maximum(n_negative, 1)
+                    )
+                score = np.where(risk == 0, np.nan, excess / risk * np.sqrt(time_unit))
+            elif objective == "total_return":
+                score = total_return
+            else:
+                base = 1 + total_return
+                annualized = (
+                    np.where(base > 0, np.power(np.abs(base), 1 / years), 0.0) - 1
+                )
+                if objective == "annualized_return":
+                    score = annualized
+                else:
+                    roll_max = np.maximum.accumulate(equity, axis=0)
+                    max_drawdown = np.abs(((equity - roll_max) / roll_max).min(axis=0))
+                    numerator = (
+                        annualized - risk_free_rate
+                        if objective == "calmar"
+                        else total_return
+                    )
+                    score = np.where(
+                        max_drawdown == 0, np.nan, numerator / max_drawdown
+                    )
+
+        score = np.asarray(score, dtype=np.float64).copy()
+        has_trade = (np.asarray(trade_actions) == 1).any(axis=0)
+        score[~has_trade | ~np.isfinite(score) | (equity[0] == 0)] = -np.inf
+        return score
+
+    @staticmethod
+    def stitch_equity(
+        data: pd.DataFrame,
+        folds: List[Dict[str, Any]],
+        fold_curves: List[Optional[Dict[str, np.ndarray]]],
+    ) -> pd.DataFrame:
+        """
+        接續各窗口樣本外資金曲線（每個窗口的權益以上一窗口期末權益為基數）
+
+        Args:
+            fold_curves: 每個窗口的 returns/equity_values/positions/trade_actions（x100 權益），
+                None 表示該窗口沒有入選組合（空倉）
+        """
+        time_values = bar_time_values(data)
+        frames = []
+        base = 100.0
+        for fold_idx, (fold, curve) in enumerate(zip(folds, fold_curves)):
+            n_rows = fold["oos_end"] - fold["oos_start"]
+            if curve is None:
+                returns = np.zeros(n_rows)
+                equity = np.full(n_rows, 100.0)
+                positions = np.zeros(n_rows)
+                actions = np.zeros(n_rows, dtype=np.int64)
+            else:
+                returns = np.asarray(curve["returns"], dtype=np.float64)
+                equity = np.asarray(curve["equity_values"], dtype=np.float64)
+                positions = np.asarray(curve["positions"], dtype=np.float64)
+                actions = np.asarray(curve["trade_actions"], dtype=np.int64)
+            stitched = equity * (base / 100.0)
+            frames.append(
+                pd.DataFrame(
+                    {
+                        "Time": time_values.iloc[
+                            fold["oos_start"] : fold["oos_end"]
+                        ].to_numpy(),
+                        "Fold": fold_idx,
+                        "Backtest_id": fold.get("Backtest_id"),
+                        "Position_size": positions,
+                        "Trade_action": actions,
+                        "Return": returns,
+                        "Equity_value": stitched,
+                    }
+                )
+            )
+            if n_rows:
+                base = float(stitched[-1])
+        return pd.concat(frames, ignore_index=True)
+
+    @staticmethod
+    def save(summary: Dict[str, Any], path: str) -> str:
+        """將接續的樣本外資金曲線保存為 Parquet，窗口元數據寫入 schema metadata"""
+        table = pa.Table.from_pandas(summary["oos_equity"])
+        metadata = dict(table.schema.metadata or {})
+        metadata[b"walk_forward_folds"] = json.dumps(
+            summary["folds"], ensure_ascii=False, default=str
+        ).encode("utf-8")
+        metadata[b"walk_forward_config"] = json.dumps(
+            summary.get("config", {}), ensure_ascii=False, default=str
+        ).encode("utf-8")
+        pq.write_table(table.replace_schema_metadata(metadata), path)
+        return path
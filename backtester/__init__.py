@@ -44,8 +44,12 @@ flowchart TD
 
 from .Base_backtester import BaseBacktester
 from .DataImporter_backtester import DataImporter
+from .IndicatorCache_backtester import IndicatorDiskCache
 from .Indicators_backtester import IndicatorsBacktester
+from .MultiAsset_backtester import MultiAsset_backtester
+from .ResultStore_backtester import ResultStore_backtester
 from .TradeRecorder_backtester import TradeRecorder_backtester
+from .SparseRecords_backtester import SparseRecords_backtester
 from .TradeRecordExporter_backtester import TradeRecordExporter_backtester
 from .TradeSimulator_backtester import TradeSimulator_backtester
 
@@ -56,4 +60,8 @@ __all__ = [
     "TradeSimulator_backtester",
     "TradeRecorder_backtester",
     "TradeRecordExporter_backtester",
+    "SparseRecords_backtester",
+    "IndicatorDiskCache",
+    "MultiAsset_backtester",
+    "ResultStore_backtester",
 ]
@@ -0,0 +1,674 @@
+"""
+BatchMetrics_metricstracker.py
+
+【功能說明】
+------------------------------------------------------------
+本模組為 Lo2cin4BT 績效分析框架的批量績效指標計算核心，將同一 Parquet 檔案中所有回測的
+Equity_value / Return / Trade_return / Trade_action / Position_size / Close 重組為
+(K線 x 回測) 矩陣，一次以向量化與 Numba 計算全部策略與 Buy & Hold 指標：
+- 與 MetricsCalculatorMetricTracker 的逐回測計算結果一致（含 None / NaN 的回傳語義）
+- 回撤、BAH 權益/回報/回撤欄位以矩陣計算後直接寫回 records，不需逐組 copy
+- 回撤矩陣與路徑相關指標（最大/平均回撤、回撤持續期、回復時間、連續虧損/獲利、持倉）
+  以 prange 並行的 Numba 核心單次掃描計算（path_metrics），MetricsCalculatorMetricTracker 亦共用
+
+【流程與數據流】
+------------------------------------------------------------
+- MetricsExporter.export 調用 load_matrices；回測長度不一致或缺少 Close 時回傳 None，
+  改用 MetricsCalculatorMetricTracker 逐回測計算
+- compute 回傳以 Backtest_id 為索引的指標表，to_batch_metadata 轉為 batch_metadata 列表
+- VectorBacktestEngine 啟用 inline_metrics 時以 from_arrays 直接由交易模擬矩陣建立 batch，
+  回測結束即得到指標，不需先寫出再讀回 Parquet
+
+```mermaid
+flowchart TD
+    A[records DataFrame] -->|load_matrices| B[(K線 x 回測) 矩陣]
+    B -->|derive| C[Drawdown / BAH 矩陣]
+    B & C -->|compute| D[指標表]
+    D -->|to_batch_metadata| E[batch_metadata]
+    C -->|records_frame| F[含回撤與 BAH 欄位的 records]
+```
+
+【維護與擴充重點】
+------------------------------------------------------------
+- MetricsCalculatorMetricTracker 新增或修改指標時，需同步更新 STRATEGY_METRICS / BAH_METRICS 與 compute
+- _safe_division / _safe_power 為 MetricsCalculatorMetricTracker 同名方法的向量化版本，邊界處理需保持一致
+- 可回傳 None 的指標（Information_ratio、Beta、Alpha、交易類指標）以 object 欄位保存 None
+
+【常見易錯點】
+------------------------------------------------------------
+- 各回測需有相同K線數（同一次回測導出的檔案皆滿足）；不一致時 load_matrices 回傳 None
+- Return 以 skipna 計算均值與標準差，Beta 的共變異數沿用 np.cov（不跳過 NaN），與逐回測計算一致
+- Position_size 為 NaN 時視為持倉（與 != 0 的判斷一致）
+
+【範例】
+------------------------------------------------------------
+- batch = BatchMetricsMetricTracker.load_matrices(df)
+  table = BatchMetricsMetricTracker.compute(batch, time_unit=365, risk_free_rate=0.04)
+- records = BatchMetricsMetricTracker.records_frame(batch)
+- path = BatchMetricsMetricTracker.path_metrics(equity_matrix, trade_returns, positions)
+  path["Drawdown"], path["Max_drawdown_duration"], path["Recovery_time"]
+- batch = BatchMetricsMetricTracker.from_arrays(ids, equity, returns, close, actions, positions, trade_returns)
+
+【與其他模組的關聯】
+------------------------------------------------------------
+- 由 MetricsExporter.export 與 VectorBacktestEngine（inline_metrics）調用；指標定義以 MetricsCalculatorMetricTracker 為準
+"""
+
+from typing import Any, Dict, List, Optional
+
+import numpy as np
+import pandas as pd
+from numba import njit, prange
+
+STRATEGY_METRICS = (
+    "Total_return",
+    "Annualized_return (CAGR)",
+    "Std",
+    "Annualized_std",
+    "Downside_risk",
+    "Annualized_downside_risk",
+    "Max_drawdown",
+    "Average_drawdown",
+    "Recovery_factor",
+    "Sharpe",
+    "Sortino",
+    "Calmar",
+    "Information_ratio",
+    "Alpha",
+    "Beta",
+    "Trade_count",
+    "Win_rate",
+    "Profit_factor",
+    "Avg_trade_return",
+    "Max_consecutive_losses",
+    "Exposure_time",
+    "Max_holding_period_ratio",
+)
+BAH_METRICS = (
+    "BAH_Total_return",
+    "BAH_Annualized_return (CAGR)",
+    "BAH_Std",
+    "BAH_Annualized_std",
+    "BAH_Downside_risk",
+    "BAH_Annualized_downside_risk",
+    "BAH_Max_drawdown",
+    "BAH_Average_drawdown",
+    "BAH_Recovery_factor",
+    "BAH_Sharpe",
+    "BAH_Sortino",
+    "BAH_Calmar",
+)
+# 依賴 Trade_return 欄位的指標：整個檔案都沒有平倉收益率時該欄位不會導出，這些指標為 None
+TRADE_RETURN_METRICS = (
+    "Win_rate",
+    "Profit_factor",
+    "Avg_trade_return",
+    "Max_consecutive_losses",
+)
+# path_metrics 回傳的逐回測路徑指標（K線數或比例以外皆為小數）
+PATH_METRICS = (
+    "Max_drawdown",
+    "Average_drawdown",
+    "Max_drawdown_duration",
+    "Recovery_time",
+    "Max_consecutive_losses",
+    "Max_consecutive_wins",
+    "Max_holding_period",
+    "Exposure_bars",
+)
+MATRIX_COLUMNS = (
+    "Equity_value",
+    "Return",
+    "Close",
+    "Trade_return",
+    "Trade_action",
+    "Position_size",
+)
+
+
+@njit(parallel=True, cache=True)
+def _path_metrics_njit(  # pylint: disable=too-complex
+    equity, trade_returns, active
+):  # type: ignore[no-untyped-def]
+    """
+    單次掃描逐回測計算回撤矩陣與所有路徑相關指標（欄位間以 prange 並行）
+
+    Args:
+        equity: (K線, 回測) 權益
+        trade_returns: (K線, 回測) Trade_return（NaN 為非平倉K線）；0 列表示欄位缺失
+        active: (K線, 回測) 是否持倉；0 列表示欄位缺失
+
+    Returns:
+        tuple: (回撤矩陣, (8, 回測) 指標矩陣，順序同 PATH_METRICS)
+    """
+    n_bars, n_series = equity.shape
+    has_trades = trade_returns.shape[0] > 0
+    has_positions = active.shape[0] > 0
+    drawdown = np.empty((n_bars, n_series))
+    stats = np.full((8, n_series), np.nan)
+    for j in prange(n_series):
+        peak = np.nan
+        max_drawdown = np.nan
+        trough = -1
+        recovery = np.nan
+        waiting = False
+        # 回撤段：連續回撤（< 0）為一段，NaN 視為回撤結束（與逐回測計算一致）
+        in_drawdown = False
+        current = 0.0
+        total = 0.0
+        count = 0
+        length = 0
+        longest_drawdown = 0
+        for t in range(n_bars):
+            level = equity[t, j]
+            if not np.isnan(level) and (np.isnan(peak) or level > peak):
+                peak = level
+            if np.isnan(level) or np.isnan(peak):
+                value = np.nan
+            elif peak == 0:
+                value = np.nan if level == 0 else -np.inf
+            else:
+                value = (level - peak) / peak
+            drawdown[t, j] = value
+
+            if not np.isnan(value):
+                if np.isnan(max_drawdown) or value < max_drawdown:
+                    # 新的最深點：重新等待回到前高
+                    max_drawdown = value
+                    trough = t
+                    waiting = value < 0
+                    recovery = np.nan
+                elif waiting and value >= 0:
+                    recovery = t - trough
+                    waiting = False
+
+            if value < 0:
+                if not in_drawdown:
+                    in_drawdown = True
+                    current = value
+                    length = 0
+                elif value < current:
+                    current = value
+                length += 1
+                if length > longest_drawdown:
+                    longest_drawdown = length
+            elif in_drawdown:
+                total += current
+                count += 1
+                in_drawdown = False
+        if in_drawdown:
+            total += current
+            count += 1
+
+        stats[0, j] = max_drawdown
+        stats[1, j] = total / count if count > 0 else 0.0
+        stats[2, j] = longest_drawdown
+        stats[3, j] = 0.0 if max_drawdown == 0 else recovery
+
+        if has_trades:
+            # 最大連續虧損/獲利：略過 NaN，0 回報同時中斷兩種連續
+            losses = 0
+            wins = 0
+            longest_losses = 0
+            longest_wins = 0
+            for t in range(n_bars):
+                value = trade_returns[t, j]
+                if np.isnan(value):
+                    continue
+                if value < 0:
+                    losses += 1
+                    wins = 0
+                    if losses > longest_losses:
+                        longest_losses = losses
+                elif value > 0:
+                    wins += 1
+                    losses = 0
+                    if wins > longest_wins:
+                        longest_wins = wins
+                else:
+                    losses = 0
+                    wins = 0
+            stats[4, j] = longest_losses
+            stats[5, j] = longest_wins
+
+        if has_positions:
+            # 最長持倉與持倉K線數
+            streak = 0
+            longest = 0
+            exposure = 0
+            for t in range(n_bars):
+                if active[t, j]:
+                    exposure += 1
+                    streak += 1
+                    if streak > longest:
+                        longest = streak
+                else:
+                    streak = 0
+            stats[6, j] = longest
+            stats[7, j] = exposure
+    return drawdown, stats
+
+
+def _safe_division(numerator: Any, denominator: Any) -> np.ndarray:
+    """MetricsCalculatorMetricTracker._safe_division 的向量化版本（無效時為 0.0）"""
+    numerator = np.asarray(numerator, dtype=np.float64)
+    denominator = np.asarray(denominator, dtype=np.float64)
+    with np.errstate(divide="ignore", invalid="ignore", over="ignore"):
+        result = numerator / denominator
+    invalid = (
+        (denominator == 0)
+        | ~np.isfinite(denominator)
+        | ~np.isfinite(numerator)
+        | ~np.isfinite(result)
+    )
+    return np.where(invalid, 0.0, result)
+
+
+def _safe_power(base: np.ndarray, exponent: float) -> np.ndarray:
+    """MetricsCalculatorMetricTracker._safe_power 的向量化版本（exponent 為正數，無效時為 0.0）"""
+    base = np.asarray(base, dtype=np.float64)
+    result = np.zeros_like(base)
+    positive = base > 0
+    with np.errstate(divide="ignore", invalid="ignore", over="ignore"):
+        if abs(exponent) > 1000:
+            log_result = exponent * np.log(np.where(positive, base, 1.0))
+            in_range = positive & (log_result <= 700) & (log_result >= -700)
+            powered = np.exp(np.where(in_range, log_result, 0.0))
+            result = np.where(in_range, powered, 0.0)
+        else:
+            powered = np.power(np.where(positive, base, 1.0), exponent)
+            result = np.where(positive & np.isfinite(powered), powered, 0.0)
+    if exponent > 100:
+        result = np.where(np.abs(base) < 1e-10, 0.0, result)
+    result = np.where(np.abs(base - 1) < 1e-10, 1.0, result)
+    return np.where(np.isnan(base), 0.0, result)
+
+
+def _nan_std(values: np.ndarray) -> np.ndarray:
+    """逐欄 skipna 樣本標準差（ddof=1，有效值不足 2 個時為 NaN）"""
+    counts = np.sum(~np.isnan(values), axis=0)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        means = np.nanmean(values, axis=0)
+        sq = np.nansum((values - means) ** 2, axis=0)
+        return np.where(counts > 1, np.sqrt(sq / (counts - 1)), np.nan)
+
+
+def _nan_mean(values: np.ndarray) -> np.ndarray:
+    """逐欄 skipna 均值（全為 NaN 時為 NaN，不發出警告）"""
+    counts = np.sum(~np.isnan(values), axis=0)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        return np.where(counts > 0, np.nansum(values, axis=0) / counts, np.nan)
+
+
+def _as_object(values: np.ndarray, missing: np.ndarray) -> np.ndarray:
+    """轉為 object 陣列，missing 位置為 None（對應逐回測計算回傳 None 的情況）"""
+    out = np.empty(len(values), dtype=object)
+    out[:] = values.tolist()
+    out[missing] = None
+    return out
+
+
+class BatchMetricsMetricTracker:
+    """以 (K線 x 回測) 矩陣批量計算所有回測的策略與 Buy & Hold 績效指標"""
+
+    @staticmethod
+    def load_matrices(
+        df: pd.DataFrame, backtest_ids: Optional[List[str]] = None
+    ) -> Optional[Dict[str, Any]]:
+        """
+        將 records 依 Backtest_id 重組為 (K線 x 回測) 矩陣
+
+        Args:
+            df: 完整 records（full 模式或已還原的 trades_only records）
+            backtest_ids: 回測順序；None 時依 Backtest_id 排序（與 groupby 相同）
+
+        Returns:
+            dict | None: {"ids", "frame"（依回測排序的 records）, 各欄位矩陣}；
+                         缺少必要欄位或各回測K線數不一致時回傳 None
+        """
+        required = ("Backtest_id", "Equity_value", "Return", "Close")
+        if df.empty or any(col not in df.columns for col in required):
+            return None
+
+        if backtest_ids is None:
+            ids = pd.Categorical(df["Backtest_id"])
+        else:
+            ids = pd.Categorical(df["Backtest_id"], categories=list(backtest_ids))
+        codes = ids.codes
+        n_series = len(ids.categories)
+        if n_series == 0 or (codes < 0).any():
+            return None
+        counts = np.bincount(codes, minlength=n_series)
+        if counts.min() != counts.max() or counts[0] == 0:
+            return None
+        n_bars = int(counts[0])
+
+        if np.all(codes[:-1] <= codes[1:]):
+            frame = df.reset_index(drop=True)
+        else:
+            frame = df.iloc[np.argsort(codes, kind="stable")].reset_index(drop=True)
+
+        batch: Dict[str, Any] = {
+            "ids": [str(bid) for bid in ids.categories],
+            "frame": frame,
+        }
+        for col in MATRIX_COLUMNS:
+            if col not in frame.columns:
+                batch[col] = None
+                continue
+            values = pd.to_numeric(frame[col], errors="coerce").to_numpy(
+                dtype=np.float64
+            )
+            # (回測, K線) C 連續 -> 轉置為 (K線, 回測) 視圖，沿時間軸的運算仍為連續記憶體
+            batch[col] = values.reshape(n_series, n_bars).T
+        return batch
+
+    @staticmethod
+    def from_arrays(  # pylint: disable=too-many-arguments
+        backtest_ids: List[str],
+        equity_values: np.ndarray,
+        returns: np.ndarray,
+        close: np.ndarray,
+        trade_actions: Optional[np.ndarray] = None,
+        positions: Optional[np.ndarray] = None,
+        trade_returns: Optional[np.ndarray] = None,
+    ) -> Dict[str, Any]:
+        """
+        由記憶體中的 (K線 x 回測) 交易模擬矩陣直接建立 batch，不經 records DataFrame
+
+        Args:
+            backtest_ids: 各欄對應的 Backtest_id
+            equity_values / returns: (K線, 回測) 權益與收益率（float32 會轉為 float64，與 records 一致）
+            close: 收盤價；一維時所有回測共用
+            trade_actions / positions / trade_returns: (K線, 回測) 交易矩陣，None 視同欄位缺失
+
+        Returns:
+            dict: 與 load_matrices 相同結構的 batch（frame 為 None，不能調用 records_frame）
+        """
+        close = np.asarray(close, dtype=np.float64)
+        batch: Dict[str, Any] = {
+            "ids": [str(bid) for bid in backtest_ids],
+            "frame": None,
+            "Equity_value": np.asarray(equity_values, dtype=np.float64),
+            "Return": np.asarray(returns, dtype=np.float64),
+            "Close": close.reshape(-1, 1) if close.ndim == 1 else close,
+            "Trade_action": trade_actions,
+            "Position_size": positions,
+            "Trade_return": trade_returns,
+        }
+        return batch
+
+    @staticmethod
+    def path_metrics(
+        equity: np.ndarray,
+        trade_returns: Optional[np.ndarray] = None,
+        positions: Optional[np.ndarray] = None,
+    ) -> Dict[str, np.ndarray]:
+        """
+        以單次 Numba 掃描計算 (K線 x 回測) 權益矩陣的回撤與所有路徑相關指標
+
+        Args:
+            equity: (K線, 回測) 權益（一維視為單一回測）
+            trade_returns: 同形狀 Trade_return（NaN 為非平倉K線），None 時交易連續指標為 NaN
+            positions: 同形狀持倉（!= 0 視為持倉，NaN 亦然），None 時持倉指標為 NaN
+
+        Returns:
+            dict: "Drawdown"（(K線, 回測) 回撤矩陣，(權益 - 累計高點) / 累計高點）與 PATH_METRICS 各項
+                  (回測,) 陣列：Max_drawdown_duration 為最長連續回撤K線數，Recovery_time 為最深點回到前高
+                  所需K線數（未回復為 NaN，無回撤為 0），Max_holding_period / Exposure_bars 為K線數
+        """
+        equity = np.asarray(equity, dtype=np.float64)
+        if equity.ndim == 1:
+            equity = equity.reshape(-1, 1)
+        n_series = equity.shape[1]
+
+        def as_matrix(values: Optional[np.ndarray]) -> Optional[np.ndarray]:
+            if values is None:
+                return None
+            values = np.asarray(values)
+            return values.reshape(-1, 1) if values.ndim == 1 else values
+
+        trade_returns = as_matrix(trade_returns)
+        positions = as_matrix(positions)
+        drawdown, stats = _path_metrics_njit(
+            equity,
+            (
+                np.asarray(trade_returns, dtype=np.float64)
+                if trade_returns is not None
+                else np.empty((0, n_series))
+            ),
+            (
+                positions != 0
+                if positions is not None
+                else np.empty((0, n_series), dtype=np.bool_)
+            ),
+        )
+        result = {"Drawdown": drawdown}
+        for k, name in enumerate(PATH_METRICS):
+            result[name] = stats[k]
+        return result
+
+    @staticmethod
+    def derive(batch: Dict[str, Any]) -> Dict[str, Any]:
+        """計算 Drawdown、BAH_Equity、BAH_Return 與 BAH_Drawdown 矩陣（寫入 batch）"""
+        if "Drawdown" in batch:
+            return batch
+        equity = batch["Equity_value"]
+        close = batch["Close"]
+        batch["Path"] = BatchMetricsMetricTracker.path_metrics(
+            equity, batch["Trade_return"], batch["Position_size"]
+        )
+        batch["Drawdown"] = batch["Path"]["Drawdown"]
+        start = equity[0]
+        if close.shape[1] == 1 and np.all(start == start[0]):
+            # 共用價格序列且初始權益相同時，BAH 矩陣只需一欄，計算時再廣播
+            start = start[:1]
+        with np.errstate(divide="ignore", invalid="ignore"):
+            bah_equity = start * (close / close[0])
+            bah_return = np.zeros_like(bah_equity)
+            bah_return[1:] = bah_equity[1:] / bah_equity[:-1] - 1
+        batch["BAH_Equity"] = bah_equity
+        batch["BAH_Return"] = np.where(np.isnan(bah_return), 0.0, bah_return)
+        batch["BAH_Path"] = BatchMetricsMetricTracker.path_metrics(bah_equity)
+        batch["BAH_Drawdown"] = batch["BAH_Path"]["Drawdown"]
+        return batch
+
+    @staticmethod
+    def _return_metrics(
+        equity: np.ndarray,
+        returns: np.ndarray,
+        max_drawdown: np.ndarray,
+        years: float,
+        time_unit: float,
+        risk_free_rate: float,
+    ) -> Dict[str, np.ndarray]:
+        """策略與 BAH 共用的回報/風險指標"""
+        sqrt_unit = (
+            float(np.sqrt(time_unit)) if np.isfinite(time_unit) and time_unit >= 0 else 0.0
+        )
+        rf = risk_free_rate / time_unit
+
+        with np.errstate(divide="ignore", invalid="ignore"):
+            total_return = equity[-1] / equity[0] - 1
+        annualized = _safe_power(1 + total_return, 1 / years) - 1
+        std = _nan_std(returns)
+        mean = _nan_mean(returns)
+
+        downside_mask = returns < 0
+        downside_count = downside_mask.sum(axis=0)
+        with np.errstate(divide="ignore", invalid="ignore"):
+            downside = np.where(
+                downside_count > 0,
+                np.sqrt(
+                    np.where(downside_mask, returns**2, 0.0).sum(axis=0)
+                    / np.maximum(downside_count, 1)
+                ),
+                0.0,
+            )
+        downside = np.where(np.isfinite(downside), downside, 0.0)
+
+        abs_mdd = np.abs(max_drawdown)
+
+        return {
+            "Total_return": total_return,
+            "Annualized_return (CAGR)": annualized,
+            "Std": std,
+            "Annualized_std": std * sqrt_unit,
+            "Downside_risk": downside,
+            "Annualized_downside_risk": downside * sqrt_unit,
+            "Max_drawdown": max_drawdown,
+            "Recovery_factor": np.where(
+                abs_mdd == 0, np.nan, _safe_division(total_return, abs_mdd)
+            ),
+            "Sharpe": np.where(
+                std == 0, np.nan, _safe_division(mean - rf, std) * sqrt_unit
+            ),
+            "Sortino": np.where(
+                downside == 0, np.nan, _safe_division(mean - rf, downside) * sqrt_unit
+            ),
+            "Calmar": np.where(
+                abs_mdd == 0,
+                np.nan,
+                _safe_division(annualized - risk_free_rate, abs_mdd),
+            ),
+        }
+
+    @staticmethod
+    def compute(  # pylint: disable=too-complex
+        batch: Dict[str, Any], time_unit: float, risk_free_rate: float
+    ) -> pd.DataFrame:
+        """
+        一次計算所有回測的策略與 BAH 指標
+
+        Returns:
+            pd.DataFrame: 以 Backtest_id 為索引，欄位為 STRATEGY_METRICS + BAH_METRICS；
+                          逐回測計算會回傳 None 的位置保存為 None
+        """
+        BatchMetricsMetricTracker.derive(batch)
+        equity = batch["Equity_value"]
+        returns = batch["Return"]
+        bah_returns = batch["BAH_Return"]
+        n_bars, n_series = equity.shape
+        years = n_bars / time_unit
+        if years <= 0:
+            years = 1.0
+        rf = risk_free_rate / time_unit
+
+        path = batch["Path"]
+        strategy = BatchMetricsMetricTracker._return_metrics(
+            equity, returns, path["Max_drawdown"], years, time_unit, risk_free_rate
+        )
+        bah = BatchMetricsMetricTracker._return_metrics(
+            batch["BAH_Equity"],
+            bah_returns,
+            batch["BAH_Path"]["Max_drawdown"],
+            years,
+            time_unit,
+            risk_free_rate,
+        )
+
+        trade_returns = batch["Trade_return"]
+        positions = batch["Position_size"]
+        average_drawdown = path["Average_drawdown"]
+        bah_drawdown = batch["BAH_Drawdown"]
+        bah_negative = bah_drawdown < 0
+        bah_negative_count = bah_negative.sum(axis=0)
+        bah_average_drawdown = np.where(
+            bah_negative_count > 0,
+            np.where(bah_negative, bah_drawdown, 0.0).sum(axis=0)
+            / np.maximum(bah_negative_count, 1),
+            0.0,
+        )
+
+        # 相對 Buy & Hold：資訊比率、Beta（np.cov 不跳過 NaN）、Alpha
+        diff = returns - bah_returns
+        diff_mean = _nan_mean(diff)
+        tracking_error = _nan_std(diff)
+        with np.errstate(divide="ignore", invalid="ignore"):
+            information_ratio = diff_mean / tracking_error
+            covariance = np.sum(
+                (returns - returns.mean(axis=0)) * (bah_returns - bah_returns.mean(axis=0)),
+                axis=0,
+            ) / (n_bars - 1)
+            bah_variance = _nan_std(bah_returns) ** 2
+            beta = covariance / bah_variance
+        alpha = _nan_mean(returns) - (rf + beta * (_nan_mean(bah_returns) - rf))
+
+        columns: Dict[str, Any] = {
+            "Total_return": strategy["Total_return"],
+            "Annualized_return (CAGR)": strategy["Annualized_return (CAGR)"],
+            "Std": strategy["Std"],
+            "Annualized_std": strategy["Annualized_std"],
+            "Downside_risk": strategy["Downside_risk"],
+            "Annualized_downside_risk": strategy["Annualized_downside_risk"],
+            "Max_drawdown": strategy["Max_drawdown"],
+            "Average_drawdown": average_drawdown,
+            "Recovery_factor": strategy["Recovery_factor"],
+            "Sharpe": strategy["Sharpe"],
+            "Sortino": strategy["Sortino"],
+            "Calmar": strategy["Calmar"],
+            "Information_ratio": _as_object(information_ratio, tracking_error == 0),
+            "Alpha": _as_object(alpha, np.broadcast_to(bah_variance == 0, n_series)),
+            "Beta": _as_object(beta, np.broadcast_to(bah_variance == 0, n_series)),
+        }
+
+        none_column = np.full(n_series, None, dtype=object)
+        trade_actions = batch["Trade_action"]
+        if trade_actions is not None:
+            columns["Trade_count"] = (trade_actions == 1).sum(axis=0).astype(np.int64)
+        else:
+            columns["Trade_count"] = none_column
+        if trade_actions is not None and trade_returns is not None:
+            closed = trade_actions == 4
+            n_closed = closed.sum(axis=0)
+            wins = (closed & (trade_returns > 0)).sum(axis=0)
+            columns["Win_rate"] = _as_object(
+                wins / np.maximum(n_closed, 1), n_closed == 0
+            )
+        else:
+            columns["Win_rate"] = none_column
+        if trade_returns is not None:
+            profits = np.where(trade_returns > 0, trade_returns, 0.0).sum(axis=0)
+            losses = np.where(trade_returns < 0, trade_returns, 0.0).sum(axis=0)
+            columns["Profit_factor"] = _as_object(
+                _safe_division(profits, np.abs(losses)), losses == 0
+            )
+            columns["Avg_trade_return"] = _nan_mean(trade_returns)
+            columns["Max_consecutive_losses"] = path["Max_consecutive_losses"].astype(
+                np.int64
+            )
+        else:
+            columns["Profit_factor"] = none_column
+            columns["Avg_trade_return"] = none_column
+            columns["Max_consecutive_losses"] = none_column
+        if positions is not None:
+            columns["Exposure_time"] = path["Exposure_bars"] / n_bars * 100
+            columns["Max_holding_period_ratio"] = path["Max_holding_period"] / n_bars
+        else:
+            columns["Exposure_time"] = none_column
+            columns["Max_holding_period_ratio"] = none_column
+
+        for name in BAH_METRICS:
+            key = name[len("BAH_"):]
+            columns[name] = np.broadcast_to(
+                bah_average_drawdown if key == "Average_drawdown" else bah[key],
+                n_series,
+            )
+
+        table = pd.DataFrame(columns, index=pd.Index(batch["ids"], name="Backtest_id"))
+        return table[list(STRATEGY_METRICS + BAH_METRICS)]
+
+    @staticmethod
+    def to_batch_metadata(table: pd.DataFrame) -> List[Dict[str, Any]]:
+        """指標表轉為 batch_metadata 列表（每個回測一個 dict，Backtest_id 在首位）"""
+        return table.reset_index().to_dict("records")
+
+    @staticmethod
+    def records_frame(batch: Dict[str, Any]) -> pd.DataFrame:
+        """回傳依回測排序、附加 Drawdown 與 BAH 欄位的 records"""
+        BatchMetricsMetricTracker.derive(batch)
+        frame = batch["frame"]
+        shape = batch["Equity_value"].shape
+        for col in ("Drawdown", "BAH_Equity", "BAH_Return", "BAH_Drawdown"):
+            frame[col] = np.ravel(np.broadcast_to(batch[col], shape).T)
+        return frame
@@ -42,6 +42,9 @@ flowchart TD
 ------------------------------------------------------------
 - 計算績效指標：calculator = MetricsCalculator(); metrics = calculator.calculate_metrics(df)
 - 計算特定指標：calculate_sharpe_ratio(returns)
+- 滾動指標（多回測一次計算）：MetricsCalculatorMetricTracker.rolling_metrics(equity, returns, window=60, time_unit=365, risk_free_rate=0.04)
+- 年/月分段指標：MetricsCalculatorMetricTracker.period_metrics(equity, returns, times, freq="Y", time_unit=365, risk_free_rate=0.04)
+- 單一回測：calc.rolling(60)、calc.period_breakdown("M")
 
 【與其他模組的關聯】
 ------------------------------------------------------------
@@ -53,6 +56,12 @@ flowchart TD
 - v1.0: 初始版本，支援基本績效指標
 - v1.1: 新增風險調整指標
 - v1.2: 新增多維度績效分析
+- v1.3: 新增滾動指標與年/月分段指標 API，Numba O(n) 滾動動差與單調佇列滾動高點，
+        可一次處理 (K線 x 回測) 矩陣並回傳 float32 陣列
+- v1.4: 平均回撤、最大連續虧損、最長持倉改用 BatchMetricsMetricTracker.path_metrics 單次掃描 Numba 核心，
+        新增回撤持續期、回復時間與最大連續獲利
+- v1.5: 滾動窗口內收益率全部相同（如空倉期全為 0）時動差精確歸位，
+        不再因 Welford 移除累積的殘差產生極大的滾動夏普
 
 【參考】
 ------------------------------------------------------------
@@ -60,8 +69,187 @@ flowchart TD
 - 其他模組如有依賴本模組，請於對應檔案頂部註解標明
 """
 
+from typing import Any, Dict, Tuple
+
 import numpy as np
 import pandas as pd
+from numba import njit, prange
+
+from .BatchMetrics_metricstracker import BatchMetricsMetricTracker
+
+# 滾動指標與分段指標的輸出欄位（皆為 float32）
+ROLLING_METRICS = (
+    "Rolling_return",
+    "Rolling_std",
+    "Rolling_sharpe",
+    "Rolling_sortino",
+    "Rolling_drawdown",
+)
+PERIOD_METRICS = ("Return", "Std", "Sharpe", "Max_drawdown")
+_PERIOD_FREQS = ("Y", "Q", "M", "W")
+
+
+@njit(parallel=True, cache=True)
+def _rolling_metrics_njit(  # pylint: disable=too-complex
+    equity, returns, window, min_periods, sqrt_unit, rf
+):  # type: ignore[no-untyped-def]
+    """
+    逐回測 O(n) 計算滾動指標（回測間以 prange 並行）
+
+    Args:
+        equity / returns: (回測, K線) float64，C 連續
+        window: 窗口K線數
+        min_periods: 窗口內最少有效收益率數（回撤為最少K線數）
+        sqrt_unit: sqrt(time_unit)
+        rf: 每期無風險利率
+
+    Returns:
+        np.ndarray: (指標, 回測, K線) float32，順序同 ROLLING_METRICS
+    """
+    n_series, n_bars = returns.shape
+    out = np.full((5, n_series, n_bars), np.nan, dtype=np.float32)
+    for j in prange(n_series):
+        # 收益率動差：Welford 加入/移除，避免累計平方和相減的精度損失
+        count = 0
+        mean = 0.0
+        m2 = 0.0
+        # 最近連續相同的有效收益率個數：涵蓋窗口內全部有效值時動差可精確得出
+        run = 0
+        last = 0.0
+        neg_count = 0
+        neg_sq = 0.0
+        # 單調遞減佇列（存K線索引），隊首為窗口內最高權益
+        queue = np.empty(n_bars, dtype=np.int64)
+        head = 0
+        tail = 0
+        for t in range(n_bars):
+            value = returns[j, t]
+            if not np.isnan(value):
+                count += 1
+                delta = value - mean
+                mean += delta / count
+                m2 += delta * (value - mean)
+                if value < 0:
+                    neg_count += 1
+                    neg_sq += value * value
+                run = run + 1 if run > 0 and value == last else 1
+                last = value
+            if t >= window:
+                old = returns[j, t - window]
+                if not np.isnan(old):
+                    count -= 1
+                    if count == 0:
+                        mean = 0.0
+                        m2 = 0.0
+                    else:
+                        delta = old - mean
+                        mean -= delta / count
+                        m2 -= delta * (old - mean)
+                    if old < 0:
+                        neg_count -= 1
+                        neg_sq -= old * old
+            if count > 0 and run >= count:
+                # 窗口內有效收益率全部相同（如空倉期）：移除舊值的殘差會令 m2 成為極小正數，
+                # 標準差應為 0，直接重設為精確值
+                mean = last
+                m2 = 0.0
+                if last < 0:
+                    neg_sq = count * last * last
+            elif m2 <= 1e-12 * count * mean * mean or m2 < 0:
+                m2 = 0.0
+            if neg_count == 0:
+                neg_sq = 0.0
+
+            if count >= min_periods and count >= 2:
+                std = np.sqrt(m2 / (count - 1))
+                out[1, j, t] = std * sqrt_unit
+                if std > 0:
+                    out[2, j, t] = (mean - rf) / std * sqrt_unit
+                if neg_count > 0 and neg_sq > 0:
+                    out[3, j, t] = (mean - rf) / np.sqrt(neg_sq / neg_count) * sqrt_unit
+
+            level = equity[j, t]
+            if t >= window:
+                base = equity[j, t - window]
+                if base > 0 and not np.isnan(level):
+                    out[0, j, t] = level / base - 1
+
+            # 滾動回撤：相對窗口內最高權益
+            while head < tail and queue[head] <= t - window:
+                head += 1
+            if not np.isnan(level):
+                while head < tail and equity[j, queue[tail - 1]] <= level:
+                    tail -= 1
+                queue[tail] = t
+                tail += 1
+                peak = equity[j, queue[head]]
+                if peak > 0 and min(t + 1, window) >= min_periods:
+                    out[4, j, t] = level / peak - 1
+    return out
+
+
+@njit(parallel=True, cache=True)
+def _period_metrics_njit(equity, returns, starts, sqrt_unit, rf):  # type: ignore[no-untyped-def]
+    """
+    逐回測單次掃描計算每個時間分段的指標（回測間以 prange 並行）
+
+    Args:
+        equity / returns: (回測, K線) float64，C 連續
+        starts: 各分段起始K線索引（遞增，長度為分段數 + 1，最後一個為 K線數）
+
+    Returns:
+        np.ndarray: (指標, 分段, 回測) float32，順序同 PERIOD_METRICS
+    """
+    n_series = returns.shape[0]
+    n_periods = len(starts) - 1
+    out = np.full((4, n_periods, n_series), np.nan, dtype=np.float32)
+    for j in prange(n_series):
+        for b in range(n_periods):
+            start = starts[b]
+            end = starts[b + 1]
+            # 分段基準為上一分段最後權益（第一段為首根K線）
+            base = equity[j, start - 1] if start > 0 else equity[j, start]
+            if base > 0 and not np.isnan(equity[j, end - 1]):
+                out[0, b, j] = equity[j, end - 1] / base - 1
+
+            count = 0
+            mean = 0.0
+            m2 = 0.0
+            peak = base
+            worst = 0.0
+            for t in range(start, end):
+                value = returns[j, t]
+                if not np.isnan(value):
+                    count += 1
+                    delta = value - mean
+                    mean += delta / count
+                    m2 += delta * (value - mean)
+                level = equity[j, t]
+                if not np.isnan(level):
+                    if np.isnan(peak) or level > peak:
+                        peak = level
+                    if peak > 0 and level / peak - 1 < worst:
+                        worst = level / peak - 1
+            out[3, b, j] = worst
+            if count >= 2:
+                std = np.sqrt(m2 / (count - 1))
+                out[1, b, j] = std * sqrt_unit
+                if std > 0:
+                    out[2, b, j] = (mean - rf) / std * sqrt_unit
+    return out
+
+
+def _series_major(values: Any) -> Tuple[np.ndarray, bool]:
+    """
+    (K線,) 或 (K線, 回測) 轉為 (回測, K線) C 連續 float64
+
+    一維輸入只需重塑；(K線 x 回測) 的 C 連續矩陣轉置後需複製一次（O(K線 x 回測)），
+    讓 Numba 核心沿時間軸掃描時讀取連續記憶體。
+    """
+    array = np.asarray(values, dtype=np.float64)
+    if array.ndim == 1:
+        return np.ascontiguousarray(array.reshape(1, -1)), True
+    return np.ascontiguousarray(array.T), False
 
 
 class MetricsCalculatorMetricTracker:
@@ -76,6 +264,7 @@ class MetricsCalculatorMetricTracker:
         self.years = total_periods / self.time_unit
         if self.years <= 0:
             self.years = 1.0
+        self._path = None
         ##print(f"[Metrics] 自動偵測回測年數: {self.years:.3f} 年 (總週期: {total_periods}, 年化單位: {self.time_unit})")
 
     def _get_data_source(self, source_type="strategy"):
@@ -93,6 +282,23 @@ class MetricsCalculatorMetricTracker:
                 "drawdown": None,
             }
 
+    def _path_metrics(self):
+        """策略權益的回撤與路徑指標（單次掃描，結果快取）"""
+        if self._path is None:
+            optional = {}
+            for key, col in (("trade_returns", "Trade_return"), ("positions", "Position_size")):
+                if col in self.df.columns:
+                    optional[key] = pd.to_numeric(self.df[col], errors="coerce").to_numpy(
+                        dtype=np.float64
+                    )
+            self._path = BatchMetricsMetricTracker.path_metrics(
+                pd.to_numeric(self.df["Equity_value"], errors="coerce").to_numpy(
+                    dtype=np.float64
+                ),
+                **optional,
+            )
+        return self._path
+
     def _calculate_total_return(self, source_type="strategy"):
         """總回報率計算"""
         data = self._get_data_source(source_type)
@@ -140,6 +346,8 @@ class MetricsCalculatorMetricTracker:
         data = self._get_data_source(source_type)
         if source_type == "bah" and data["drawdown"] is not None:
             return data["drawdown"].min()
+        if source_type == "strategy":
+            return self._path_metrics()["Max_drawdown"][0]
 
         equity = data["equity"]
         roll_max = equity.cummax()
@@ -220,33 +428,16 @@ class MetricsCalculatorMetricTracker:
         return self._calculate_max_drawdown("strategy")
 
     def average_drawdown(self):
-        # 平均回撤（小數值）
-        equity = self.df["Equity_value"]
-        roll_max = equity.cummax()
-        drawdown = (equity - roll_max) / roll_max
-        dd = drawdown[drawdown < 0]
-        if len(dd) == 0:
-            return 0.0
-        # 分段計算每次回撤
-        in_drawdown = False
-        dds = []
-        cur_dd = 0
-        for val in drawdown:
-            if val < 0:
-                if not in_drawdown:
-                    in_drawdown = True
-                    cur_dd = val
-                else:
-                    cur_dd = min(cur_dd, val)
-            else:
-                if in_drawdown:
-                    dds.append(cur_dd)
-                    in_drawdown = False
-        if in_drawdown:
-            dds.append(cur_dd)
-        if len(dds) == 0:
-            return 0.0
-        return np.mean(dds)
+        # 平均回撤（小數值）：每段連續回撤的最深值取平均
+        return float(self._path_metrics()["Average_drawdown"][0])
+
+    def max_drawdown_duration(self):
+        # 最長回撤持續期（K線數）：連續低於前高的最長區間
+        return int(self._path_metrics()["Max_drawdown_duration"][0])
+
+    def recovery_time(self):
+        # 回復時間（K線數）：最大回撤最深點回到前高所需K線數，尚未回復為 NaN，無回撤為 0
+        return float(self._path_metrics()["Recovery_time"][0])
 
     def recovery_factor(self):
         # 恢復因子 = 總回報率 / abs(最大回撤)
@@ -265,6 +456,131 @@ class MetricsCalculatorMetricTracker:
         return sigma / mu
     """
 
+    @staticmethod
+    def rolling_metrics(
+        equity: Any,
+        returns: Any,
+        window: int,
+        time_unit: float,
+        risk_free_rate: float,
+        min_periods: Any = None,
+    ) -> Dict[str, np.ndarray]:
+        """
+        滾動指標：一次計算多個回測的滾動回報、年化波動、Sharpe、Sortino 與回撤
+
+        每根K線的值只使用最近 window 根K線（含當根），以 Numba O(n) 滾動動差與單調佇列計算，
+        Sharpe / Sortino 的定義與全期間指標相同（skipna 均值、ddof=1、下行風險只計負收益）。
+
+        Args:
+            equity: (K線,) 或 (K線, 回測) 權益，例如 BatchMetricsMetricTracker 的 batch["Equity_value"]
+            returns: 與 equity 同形狀的每期收益率
+            window: 窗口K線數
+            time_unit: 年化單位
+            risk_free_rate: 年化無風險利率
+            min_periods: 窗口內最少有效收益率數（預設為 window）
+
+        Returns:
+            dict: ROLLING_METRICS 名稱 -> 與輸入同形狀的 float32 陣列，不足窗口處為 NaN；
+                  Rolling_return 為 equity[t] / equity[t - window] - 1，Rolling_drawdown 相對窗口內最高權益
+        """
+        window = int(window)
+        if window < 2:
+            raise ValueError(f"window 必須至少為 2: {window}")
+        equity_rows, is_1d = _series_major(equity)
+        returns_rows, _ = _series_major(returns)
+        if equity_rows.shape != returns_rows.shape:
+            raise ValueError(
+                f"equity 與 returns 形狀不一致: {equity_rows.shape} vs {returns_rows.shape}"
+            )
+        min_periods = window if min_periods is None else max(int(min_periods), 1)
+        out = _rolling_metrics_njit(
+            equity_rows,
+            returns_rows,
+            window,
+            min_periods,
+            float(np.sqrt(time_unit)) if time_unit > 0 else 0.0,
+            risk_free_rate / time_unit,
+        )
+        return {
+            name: out[k, 0] if is_1d else out[k].T
+            for k, name in enumerate(ROLLING_METRICS)
+        }
+
+    @staticmethod
+    def period_metrics(
+        equity: Any,
+        returns: Any,
+        times: Any,
+        freq: str,
+        time_unit: float,
+        risk_free_rate: float,
+    ) -> Tuple[pd.Index, Dict[str, np.ndarray]]:
+        """
+        年/季/月/週分段指標：一次計算多個回測每個分段的回報、年化波動、Sharpe 與分段內最大回撤
+
+        Args:
+            equity / returns: (K線,) 或 (K線, 回測) 權益與收益率
+            times: 每根K線的時間（需已排序）
+            freq: "Y" / "Q" / "M" / "W"
+            time_unit / risk_free_rate: 年化參數
+
+        Returns:
+            tuple: (分段標籤 PeriodIndex, PERIOD_METRICS 名稱 -> (分段,) 或 (分段, 回測) float32 陣列)；
+                   分段回報以上一分段最後權益為基準，分段最大回撤的高點自基準起算
+        """
+        if freq not in _PERIOD_FREQS:
+            raise ValueError(f"不支援的 freq: {freq}，可選值為 {list(_PERIOD_FREQS)}")
+        equity_rows, is_1d = _series_major(equity)
+        returns_rows, _ = _series_major(returns)
+        periods = pd.DatetimeIndex(pd.to_datetime(np.asarray(times))).to_period(freq)
+        if len(periods) != equity_rows.shape[1]:
+            raise ValueError(
+                f"times 長度 ({len(periods)}) 與K線數 ({equity_rows.shape[1]}) 不一致"
+            )
+        if len(periods) == 0:
+            return periods[:0], {name: np.empty((0,), dtype=np.float32) for name in PERIOD_METRICS}
+        codes = periods.asi8
+        if np.any(codes[1:] < codes[:-1]):
+            raise ValueError("times 需依時間排序")
+        boundaries = np.flatnonzero(codes[1:] != codes[:-1]) + 1
+        starts = np.concatenate(([0], boundaries, [len(codes)])).astype(np.int64)
+        out = _period_metrics_njit(
+            equity_rows,
+            returns_rows,
+            starts,
+            float(np.sqrt(time_unit)) if time_unit > 0 else 0.0,
+            risk_free_rate / time_unit,
+        )
+        metrics = {
+            name: out[k, :, 0] if is_1d else out[k]
+            for k, name in enumerate(PERIOD_METRICS)
+        }
+        return periods[starts[:-1]], metrics
+
+    def rolling(self, window, min_periods=None):
+        """單一回測的滾動指標 DataFrame（欄位同 ROLLING_METRICS，索引同 self.df）"""
+        metrics = self.rolling_metrics(
+            self.df["Equity_value"].to_numpy(),
+            self.daily_returns.to_numpy(),
+            window,
+            self.time_unit,
+            self.risk_free_rate,
+            min_periods,
+        )
+        return pd.DataFrame(metrics, index=self.df.index)
+
+    def period_breakdown(self, freq="Y"):
+        """單一回測的年/月分段指標 DataFrame（索引為分段，欄位同 PERIOD_METRICS）"""
+        labels, metrics = self.period_metrics(
+            self.df["Equity_value"].to_numpy(),
+            self.daily_returns.to_numpy(),
+            self.df["Time"].to_numpy(),
+            freq,
+            self.time_unit,
+            self.risk_free_rate,
+        )
+        return pd.DataFrame(metrics, index=labels)
+
     def bah_total_return(self):
         return self._calculate_total_return("bah")
 
@@ -414,15 +730,13 @@ class MetricsCalculatorMetricTracker:
         """最大連續虧損 (Max_consecutive_losses)：連續虧損交易的最大次數"""
         if "Trade_return" not in self.df.columns:
             return None
-        trade_returns = self.df["Trade_return"].dropna()
-        max_count = count = 0
-        for r in trade_returns:
-            if r < 0:
-                count += 1
-                max_count = max(max_count, count)
-            else:
-                count = 0
-        return max_count
+        return int(self._path_metrics()["Max_consecutive_losses"][0])
+
+    def max_consecutive_wins(self):
+        """最大連續獲利 (Max_consecutive_wins)：連續獲利交易的最大次數"""
+        if "Trade_return" not in self.df.columns:
+            return None
+        return int(self._path_metrics()["Max_consecutive_wins"][0])
 
     def exposure_time(self):
         """持倉時間比例 (Exposure_time)：持倉時間佔總時間的比例"""
@@ -436,16 +750,9 @@ class MetricsCalculatorMetricTracker:
         """最長持倉時間比例 (Max_holding_period_ratio)：單次持倉時間的最長持續時間佔總回測時間的比例"""
         if "Position_size" not in self.df.columns:
             return None
-        max_period = period = 0
-        for p in self.df["Position_size"]:
-            if p != 0:
-                period += 1
-                max_period = max(max_period, period)
-            else:
-                period = 0
         if len(self.df["Position_size"]) == 0:
             return None
-        return max_period / len(self.df["Position_size"])
+        return self._path_metrics()["Max_holding_period"][0] / len(self.df["Position_size"])
 
     def calc_strategy_metrics(self):
         return {
@@ -27,11 +27,17 @@ flowchart TD
 - 導出格式錯誤或欄位缺失會導致導出失敗
 - 檔案權限不足會導致寫入失敗
 - 數據結構變動會影響下游分析
+- trades_only 稀疏 Parquet 需與同名 _bars.npz 放在同一目錄，否則無法還原完整記錄
+- 各回測K線數一致時由 BatchMetricsMetricTracker 以矩陣一次計算所有回測的指標，
+  不一致時才逐回測使用 MetricsCalculatorMetricTracker，兩者結果需保持一致
+- 分區資料集（result_store = "dataset"）由 export_dataset 處理，輸出 <資料集>_metrics/ 指標資料集，
+  batch_metadata 與績效寫入其 _index.parquet，不再寫出 _metadata.json
 
 【範例】
 ------------------------------------------------------------
 - exporter = MetricsExporter()
   exporter.export_metrics(metrics, format='csv')
+- 分區資料集：MetricsExporter.export_dataset(dataset_dir, time_unit, risk_free_rate)
 
 【與其他模組的關聯】
 ------------------------------------------------------------
@@ -48,12 +54,21 @@ flowchart TD
 import json
 import os
 
+import numpy as np
 import pandas as pd
 import pyarrow as pa
 import pyarrow.parquet as pq
 from rich.console import Console
 from rich.panel import Panel
 
+from backtester.MultiAsset_backtester import MultiAsset_backtester
+from backtester.ResultStore_backtester import ResultStore_backtester
+from backtester.SparseRecords_backtester import (
+    RESULT_MODE_TRADES_ONLY,
+    SparseRecords_backtester,
+)
+
+from .BatchMetrics_metricstracker import BatchMetricsMetricTracker
 from .MetricsCalculator_metricstracker import MetricsCalculatorMetricTracker
 
 console = Console()
@@ -64,18 +79,88 @@ class MetricsExporter:
     def add_drawdown_bah(df):
         df = df.copy()
         equity = df["Equity_value"]
-        roll_max = equity.cummax()
-        df["Drawdown"] = (equity - roll_max) / roll_max
+        # 回撤以 path_metrics 的 Numba 單次掃描計算（與矩陣批量計算共用同一核心）
+        df["Drawdown"] = BatchMetricsMetricTracker.path_metrics(
+            equity.to_numpy(dtype=np.float64)
+        )["Drawdown"][:, 0]
         if "Close" in df.columns:
             initial_equity = equity.iloc[0]
             initial_price = df["Close"].iloc[0]
             df["BAH_Equity"] = initial_equity * (df["Close"] / initial_price)
             df["BAH_Return"] = df["BAH_Equity"].pct_change().fillna(0)
             # 新增 BAH_Drawdown
-            bah_roll_max = df["BAH_Equity"].cummax()
-            df["BAH_Drawdown"] = (df["BAH_Equity"] - bah_roll_max) / bah_roll_max
+            df["BAH_Drawdown"] = BatchMetricsMetricTracker.path_metrics(
+                df["BAH_Equity"].to_numpy(dtype=np.float64)
+            )["Drawdown"][:, 0]
         return df
 
+    @staticmethod
+    def _compute_records_and_metrics(df, backtest_ids, time_unit, risk_free_rate):
+        """計算所有回測的績效指標，回傳 (附回撤/BAH 欄位的 records, batch_metadata)"""
+        batch_metadata = []
+        all_df = []
+        # 各回測K線數一致時以 (K線 x 回測) 矩陣一次計算，否則逐回測計算
+        batch = BatchMetricsMetricTracker.load_matrices(df, backtest_ids)
+        if batch is not None:
+            table = BatchMetricsMetricTracker.compute(batch, time_unit, risk_free_rate)
+            batch_metadata = BatchMetricsMetricTracker.to_batch_metadata(table)
+            all_df.append(BatchMetricsMetricTracker.records_frame(batch))
+        else:
+            if "Backtest_id" not in df.columns:
+                grouped = [(None, df)]
+            else:
+                grouped = df.groupby("Backtest_id", sort=backtest_ids is None)
+            for Backtest_id, group in grouped:
+                group = MetricsExporter.add_drawdown_bah(group)
+                all_df.append(group)
+                calc = MetricsCalculatorMetricTracker(group, time_unit, risk_free_rate)
+                strategy_metrics = calc.calc_strategy_metrics()
+                bah_metrics = calc.calc_bah_metrics()
+                meta = {"Backtest_id": Backtest_id} if Backtest_id is not None else {}
+                for k in strategy_metrics:
+                    meta[k] = strategy_metrics[k]
+                for k in bah_metrics:
+                    meta[k] = bah_metrics[k]
+                batch_metadata.append(meta)
+        # 過濾空的 DataFrame 以避免 FutureWarning
+        filtered_df = []
+        for df_item in all_df:
+            if not df_item.empty and len(df_item.columns) > 0:
+                # 清理 DataFrame：移除全為 NA 的列
+                cleaned_df = df_item.dropna(axis=1, how="all")
+                if not cleaned_df.empty:
+                    filtered_df.append(cleaned_df)
+
+        if filtered_df:
+            # 使用更安全的 concat 方式
+            try:
+                df = pd.concat(filtered_df, ignore_index=True, sort=False)
+            except Exception:
+                # 如果 concat 失敗，嘗試逐個合併
+                df = filtered_df[0]
+                for df_item in filtered_df[1:]:
+                    df = pd.concat([df, df_item], ignore_index=True, sort=False)
+        else:
+            df = pd.DataFrame()
+        return df, batch_metadata
+
+    @staticmethod
+    def _merge_batch_metadata(old_batch_metadata, batch_metadata):
+        """欄位級合併新舊 batch_metadata（新欄位覆蓋舊欄位），依舊順序、新增的接在後面"""
+        new_map = {m["Backtest_id"]: m for m in batch_metadata if "Backtest_id" in m}
+        merged = []
+        seen = set()
+        for old in old_batch_metadata:
+            bid = old.get("Backtest_id")
+            if bid is None:
+                continue
+            merged_dict = dict(old)
+            merged_dict.update(new_map.get(bid, {}))
+            merged.append(merged_dict)
+            seen.add(bid)
+        merged.extend(m for bid, m in new_map.items() if bid not in seen)
+        return merged
+
     @staticmethod
     def export(df, orig_parquet_path, time_unit, risk_free_rate):
         # 嘗試讀取原始 parquet 檔案
@@ -102,17 +187,27 @@ class MetricsExporter:
             )
 
         # 統一 batch_metadata 寫入，不論單/多策略
-        grouped = (
-            df.groupby("Backtest_id") if "Backtest_id" in df.columns else [(None, df)]
-        )
-        batch_metadata = []
-        all_df = []
+        if orig_meta.get(b"result_mode") == RESULT_MODE_TRADES_ONLY.encode():
+            # trades_only 稀疏檔案：逐個回測由共用K線與權益陣列還原完整記錄
+            bar_store_path = os.path.join(
+                os.path.dirname(orig_parquet_path), orig_meta[b"bar_store"].decode()
+            )
+            store = SparseRecords_backtester.load_bar_store(bar_store_path)
+            # 與逐組合併時相同，先移除各回測全為 NA 的欄位（如無交易回測的 Open_time）
+            expanded = [
+                group.dropna(axis=1, how="all")
+                for _, group in SparseRecords_backtester.iter_expanded_records(df, store)
+            ]
+            df = pd.concat(expanded, ignore_index=True) if expanded else df.iloc[0:0]
+            backtest_ids = store["backtest_ids"]
+        else:
+            backtest_ids = None
 
         # 先讀取舊的 batch_metadata（從分離的 JSON 檔案）
         old_batch_metadata = []
         orig_name = os.path.splitext(os.path.basename(orig_parquet_path))[0]
         out_dir = os.path.join(
-            os.path.dirname(os.path.dirname(orig_parquet_path)), "metricstracker"
+            MultiAsset_backtester.records_root(orig_parquet_path), "metricstracker"
         )
         metadata_json_path = os.path.join(out_dir, f"{orig_name}_metadata.json")
 
@@ -153,58 +248,14 @@ class MetricsExporter:
                         border_style="#8f1511",
                     )
                 )
-        for Backtest_id, group in grouped:
-            group = MetricsExporter.add_drawdown_bah(group)
-            all_df.append(group)
-            calc = MetricsCalculatorMetricTracker(group, time_unit, risk_free_rate)
-            strategy_metrics = calc.calc_strategy_metrics()
-            bah_metrics = calc.calc_bah_metrics()
-            meta = {"Backtest_id": Backtest_id} if Backtest_id is not None else {}
-            for k in strategy_metrics:
-                meta[k] = strategy_metrics[k]
-            for k in bah_metrics:
-                meta[k] = bah_metrics[k]
-            batch_metadata.append(meta)
+        df, batch_metadata = MetricsExporter._compute_records_and_metrics(
+            df, backtest_ids, time_unit, risk_free_rate
+        )
         # 合併舊的 batch_metadata（欄位級合併）
         if old_batch_metadata:
-            old_map = {
-                m["Backtest_id"]: m for m in old_batch_metadata if "Backtest_id" in m
-            }
-            new_map = {
-                m["Backtest_id"]: m for m in batch_metadata if "Backtest_id" in m
-            }
-            all_ids = set(old_map.keys()) | set(new_map.keys())
-            merged = []
-            for bid in all_ids:
-                if bid in old_map and bid in new_map:
-                    merged_dict = dict(old_map[bid])
-                    merged_dict.update(new_map[bid])  # 新欄位覆蓋舊欄位
-                    merged.append(merged_dict)
-                elif bid in new_map:
-                    merged.append(new_map[bid])
-                else:
-                    merged.append(old_map[bid])
-            batch_metadata = merged
-        # 過濾空的 DataFrame 以避免 FutureWarning
-        filtered_df = []
-        for df_item in all_df:
-            if not df_item.empty and len(df_item.columns) > 0:
-                # 清理 DataFrame：移除全為 NA 的列
-                cleaned_df = df_item.dropna(axis=1, how="all")
-                if not cleaned_df.empty:
-                    filtered_df.append(cleaned_df)
-
-        if filtered_df:
-            # 使用更安全的 concat 方式
-            try:
-                df = pd.concat(filtered_df, ignore_index=True, sort=False)
-            except Exception:
-                # 如果 concat 失敗，嘗試逐個合併
-                df = filtered_df[0]
-                for df_item in filtered_df[1:]:
-                    df = pd.concat([df, df_item], ignore_index=True, sort=False)
-        else:
-            df = pd.DataFrame()
+            batch_metadata = MetricsExporter._merge_batch_metadata(
+                old_batch_metadata, batch_metadata
+            )
         # 將 batch_metadata 儲存到獨立的 JSON 檔案
         os.makedirs(out_dir, exist_ok=True)
         with open(metadata_json_path, "w", encoding="utf-8") as f:
@@ -267,3 +318,60 @@ class MetricsExporter:
                 border_style="#dbac30",
             )
         )
+
+    @staticmethod
+    def export_dataset(dataset_dir, time_unit, risk_free_rate):
+        """
+        計算分區資料集（result_store = "dataset"）的績效，寫出同樣分區的指標資料集
+
+        輸出為 records/metricstracker/<資料集>_metrics/，其 _index.parquet 為指標索引
+        （batch_metadata + 績效指標，每個回測一列），取代 _metrics.parquet + _metadata.json。
+
+        Returns:
+            str: 指標資料集目錄
+        """
+        dataset_name = os.path.basename(os.path.normpath(dataset_dir))
+        out_dir = os.path.join(
+            MultiAsset_backtester.records_root(dataset_dir),
+            "metricstracker",
+            f"{dataset_name}_metrics",
+        )
+        # 沿用來源資料集的分區（多標的另含 Trading_instrument）
+        partition_columns = ResultStore_backtester.partition_columns(dataset_dir)
+        index = ResultStore_backtester.read_index(
+            dataset_dir, columns=["Backtest_id", *partition_columns]
+        )
+        old_batch_metadata = ResultStore_backtester.read_batch_metadata(dataset_dir)
+        # trades_only 資料集由各分區的 _bars.npz 還原完整記錄
+        df = ResultStore_backtester.read_records(dataset_dir)
+        present = set(df["Backtest_id"]) if "Backtest_id" in df.columns else set()
+        backtest_ids = [bid for bid in index["Backtest_id"] if bid in present]
+
+        df, batch_metadata = MetricsExporter._compute_records_and_metrics(
+            df, backtest_ids, time_unit, risk_free_rate
+        )
+        batch_metadata = MetricsExporter._merge_batch_metadata(
+            old_batch_metadata, batch_metadata
+        )
+        metrics_config = json.dumps(
+            {"time_unit": int(time_unit), "risk_free_rate": float(risk_free_rate)},
+            sort_keys=True,
+        )
+        ResultStore_backtester.write_dataset(
+            out_dir,
+            df,
+            batch_metadata,
+            ResultStore_backtester.partitions_from_index(index, partition_columns),
+            {"metrics_config": metrics_config, "source_dataset": dataset_name},
+            partition_columns,
+        )
+
+        console.print(
+            Panel(
+                f"績效指標已計算並輸出為分區資料集：\n📊 資料集: {out_dir}\n"
+                f"📋 指標索引: {ResultStore_backtester.index_path(out_dir)}",
+                title="[bold #8f1511]🚦 Metricstracker 交易分析[/bold #8f1511]",
+                border_style="#dbac30",
+            )
+        )
+        return out_dir
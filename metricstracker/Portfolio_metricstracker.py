@@ -0,0 +1,401 @@
+"""
+Portfolio_metricstracker.py
+
+【功能說明】
+------------------------------------------------------------
+本模組為 Lo2cin4BT 績效分析框架的投資組合合成工具，將參數掃描產生的多條策略資金曲線
+合併為一條投資組合資金曲線：
+- 權重方法：等權重（equal）、反波動率（inverse_vol）、依績效排名前 K 名等權（top_k）
+- 再平衡頻率可設定：不再平衡（權重隨淨值漂移）、每 N 根K線、或依日曆週期（W/M/Q/Y 等）
+- 組合權益、收益率與回撤全部以 (K線 x 策略) 權益矩陣的向量運算完成，
+  trades_only 檔案直接取用 _bars.npz 的權益矩陣，不需還原逐K線記錄
+
+【流程與數據流】
+------------------------------------------------------------
+- MetricsExporter.export 先寫出 <檔名>_metadata.json（top_k 依其中的績效排名）
+- load_equity_matrix 取得所選回測的權益矩陣；rebalance_points 決定再平衡K線
+- compute_weights 在每個再平衡點計算權重（反波動率只使用該點之前的收益率）
+- combine 以區段淨值比值一次算出組合權益，結果寫入 <檔名>_portfolio.parquet
+
+```mermaid
+flowchart TD
+    A[回測 Parquet / _bars.npz] -->|load_equity_matrix| B[(K線 x 策略) 權益矩陣]
+    C[_metadata.json 排名] -->|top_k| B
+    B -->|rebalance_points + compute_weights| D[(再平衡點 x 策略) 權重矩陣]
+    B & D -->|combine（向量化）| E[組合權益 / 收益率 / 回撤]
+    E -->|export| F[_portfolio.parquet]
+```
+
+【維護與擴充重點】
+------------------------------------------------------------
+- 組合以各策略的 Equity_value（含交易成本）合成，再平衡本身不另計成本
+- 兩個再平衡點之間權重隨各策略淨值漂移：區段內組合淨值 = Σ w_i x G_i[t] / G_i[起點]
+- 反波動率權重以再平衡點前 lookback 根K線的收益率標準差計算（累積和 O(1) 取窗口），
+  不使用未來數據；波動為零（無交易）的策略權重為 0，歷史不足兩根或全部策略波動為零時退回等權重
+- 指標定義（夏普比率、年化報酬、最大回撤）與 MetricsCalculatorMetricTracker 一致
+- 新增權重方法時，請同步更新 WEIGHTING_METHODS、compute_weights 與 README
+
+【常見易錯點】
+------------------------------------------------------------
+- top_k 以全期績效排名挑選策略，屬事後選擇，結果會高估樣本外表現
+- 日曆再平衡需要 Time 欄位；無 Time 時只能使用整數K線數
+- 不同檔案（不同標的/K線數）的權益矩陣無法直接合併，一次只合成單一回測檔案
+
+【範例】
+------------------------------------------------------------
+- PortfolioMetricTracker.export(df, parquet_path, 365, 0.04, {"weighting": "inverse_vol", "rebalance": "M"})
+- config["portfolio"] = {"weighting": "top_k", "top_k": 20, "rank_by": "Sharpe", "rebalance": 20}
+- config["portfolio"] = {"backtest_ids": ["a1b2...", "c3d4..."], "weighting": "equal"}
+
+【與其他模組的關聯】
+------------------------------------------------------------
+- 由 MetricsRunner_autorunner 在 MetricsExporter.export 之後調用（metricstracker.portfolio 配置）
+- trades_only 權益矩陣由 SparseRecords_backtester.load_bar_store 讀取
+"""
+
+import json
+import os
+from typing import Any, Dict, List, Optional, Union
+
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+import pyarrow.parquet as pq
+from rich.console import Console
+from rich.panel import Panel
+
+from backtester.MultiAsset_backtester import MultiAsset_backtester
+from backtester.SparseRecords_backtester import (
+    RESULT_MODE_TRADES_ONLY,
+    SparseRecords_backtester,
+)
+
+console = Console()
+
+WEIGHTING_METHODS = ("equal", "inverse_vol", "top_k")
+PORTFOLIO_SUFFIX = "_portfolio.parquet"
+
+
+class PortfolioMetricTracker:
+    """投資組合合成：權益矩陣載入、權重計算、再平衡與組合績效導出"""
+
+    @staticmethod
+    def load_equity_matrix(
+        df: pd.DataFrame,
+        orig_parquet_path: str,
+        backtest_ids: Optional[List[Any]] = None,
+    ) -> Dict[str, Any]:
+        """
+        取得所選回測的 (K線 x 策略) 權益矩陣
+
+        Returns:
+            dict: {"backtest_ids", "time"（K線時間，可能為 None）, "equity"（float64）}
+        """
+        try:
+            orig_meta = pq.read_schema(orig_parquet_path).metadata or {}
+        except Exception:
+            orig_meta = {}
+
+        if orig_meta.get(b"result_mode") == RESULT_MODE_TRADES_ONLY.encode():
+            # 稀疏檔案：直接取共用權益矩陣的欄位
+            store = SparseRecords_backtester.load_bar_store(
+                os.path.join(
+                    os.path.dirname(orig_parquet_path), orig_meta[b"bar_store"].decode()
+                )
+            )
+            column = {bid: j for j, bid in enumerate(store["backtest_ids"])}
+            ids = [
+                bid
+                for bid in (store["backtest_ids"] if backtest_ids is None else backtest_ids)
+                if bid in column
+            ]
+            return {
+                "backtest_ids": ids,
+                "time": store["bars"]["Time"].to_numpy(),
+                "equity": np.asarray(
+                    store["equity_values"][:, [column[bid] for bid in ids]],
+                    dtype=np.float64,
+                ),
+            }
+
+        # full 檔案：每個回測的逐K線記錄等長且連續，依回測分組後重塑為矩陣
+        all_ids = list(pd.unique(df["Backtest_id"]))
+        known = set(all_ids)
+        ids = all_ids if backtest_ids is None else [b for b in backtest_ids if b in known]
+        if not ids:
+            return {"backtest_ids": [], "time": None, "equity": np.zeros((0, 0))}
+        subset = df.loc[df["Backtest_id"].isin(ids), ["Backtest_id", "Equity_value"]]
+        codes = pd.Categorical(subset["Backtest_id"], categories=ids).codes
+        n_bars = len(subset) // len(ids)
+        if n_bars * len(ids) != len(subset):
+            raise ValueError("各回測的K線數不一致，無法組成權益矩陣")
+        order = np.argsort(codes, kind="stable")
+        equity = (
+            subset["Equity_value"].to_numpy(dtype=np.float64)[order]
+            .reshape(len(ids), n_bars)
+            .T
+        )
+        time_values = None
+        if "Time" in df.columns:
+            time_values = df.loc[df["Backtest_id"] == ids[0], "Time"].to_numpy()
+        return {"backtest_ids": ids, "time": time_values, "equity": equity}
+
+    @staticmethod
+    def rebalance_points(
+        n_bars: int,
+        rebalance: Union[None, int, str] = None,
+        time_values: Optional[np.ndarray] = None,
+    ) -> np.ndarray:
+        """
+        再平衡K線索引（第一個必為 0）
+
+        Args:
+            rebalance: None/"none" 不再平衡；整數為每 N 根K線；字串為 pandas 週期（W/M/Q/Y），
+                每個新週期的第一根K線再平衡
+        """
+        if rebalance is None or (isinstance(rebalance, str) and rebalance.lower() == "none"):
+            return np.zeros(1, dtype=np.int64)
+        if isinstance(rebalance, (int, np.integer)) or str(rebalance).isdigit():
+            step = int(rebalance)
+            if step < 1:
+                raise ValueError("rebalance 的K線數需至少為 1")
+            return np.arange(0, n_bars, step, dtype=np.int64)
+        if time_values is None:
+            raise ValueError(f"依週期再平衡（{rebalance}）需要 Time 欄位")
+        periods = pd.DatetimeIndex(pd.to_datetime(time_values)).to_period(str(rebalance))
+        codes = np.asarray(periods.asi8)
+        starts = np.flatnonzero(np.r_[True, codes[1:] != codes[:-1]])
+        return starts.astype(np.int64)
+
+    @staticmethod
+    def compute_weights(
+        equity: np.ndarray,
+        points: np.ndarray,
+        weighting: str = "equal",
+        lookback: Optional[int] = None,
+    ) -> np.ndarray:
+        """
+        計算每個再平衡點的權重
+
+        Args:
+            equity: (K線 x 策略) 權益矩陣
+            points: 再平衡K線索引
+            weighting: equal / inverse_vol / top_k（top_k 的篩選在載入時完成，此處等權）
+            lookback: 反波動率的回看K線數；None 時使用再平衡點之前的全部歷史
+
+        Returns:
+            ndarray: (再平衡點 x 策略) 權重，每列總和為 1
+        """
+        if weighting not in WEIGHTING_METHODS:
+            raise ValueError(
+                f"不支援的 weighting: {weighting}，可選值為 {WEIGHTING_METHODS}"
+            )
+        n_bars, n_series = equity.shape
+        weights = np.full((len(points), n_series), 1.0 / max(n_series, 1))
+        if weighting != "inverse_vol" or n_bars < 3:
+            return weights
+
+        with np.errstate(divide="ignore", invalid="ignore"):
+            bar_returns = np.nan_to_num(equity[1:] / equity[:-1] - 1.0)
+        # 收益率 r[t] 對應 K線 t+1；累積和讓任意窗口的均值/方差為 O(1)
+        zero_row = np.zeros((1, n_series))
+        cum_sum = np.vstack([zero_row, np.cumsum(bar_returns, axis=0)])
+        cum_sq = np.vstack([zero_row, np.cumsum(bar_returns**2, axis=0)])
+        window_end = np.asarray(points, dtype=np.int64)  # 只使用再平衡點（含）之前的收益率
+        window_start = (
+            np.zeros_like(window_end)
+            if lookback is None
+            else np.maximum(window_end - int(lookback), 0)
+        )
+        count = (window_end - window_start)[:, None].astype(np.float64)
+        sums = cum_sum[window_end] - cum_sum[window_start]
+        squares = cum_sq[window_end] - cum_sq[window_start]
+        with np.errstate(divide="ignore", invalid="ignore"):
+            variance = (squares - sums**2 / count) / (count - 1)
+            inverse_vol = np.where(variance > 1e-24, 1.0 / np.sqrt(variance), 0.0)
+        totals = inverse_vol.sum(axis=1, keepdims=True)
+        usable = (count[:, 0] >= 2) & (totals[:, 0] > 0)
+        weights[usable] = inverse_vol[usable] / totals[usable]
+        return weights
+
+    @staticmethod
+    def combine(
+        equity: np.ndarray, points: np.ndarray, weights: np.ndarray
+    ) -> Dict[str, np.ndarray]:
+        """
+        合成投資組合（向量化）：區段內權重隨淨值漂移，再平衡點重設為目標權重
+
+        Returns:
+            dict: equity（起始 1.0）、returns、drawdown
+        """
+        n_bars = equity.shape[0]
+        with np.errstate(divide="ignore", invalid="ignore"):
+            growth = np.nan_to_num(equity / equity[0], nan=1.0, posinf=1.0)
+        points = np.asarray(points, dtype=np.int64)
+        # 每根K線所屬的再平衡區段與區段起點
+        segment = np.searchsorted(points, np.arange(n_bars), side="right") - 1
+        start = points[segment]
+        with np.errstate(divide="ignore", invalid="ignore"):
+            ratio = np.nan_to_num(growth / growth[start], nan=1.0, posinf=1.0)
+        within = np.einsum("ij,ij->i", ratio, weights[segment])
+
+        # 區段期末淨值（下一個再平衡點的K線）接續為下一區段的起始淨值
+        if len(points) > 1:
+            ends = points[1:]
+            with np.errstate(divide="ignore", invalid="ignore"):
+                end_ratio = np.nan_to_num(
+                    growth[ends] / growth[points[:-1]], nan=1.0, posinf=1.0
+                )
+            segment_growth = np.einsum("ij,ij->i", end_ratio, weights[:-1])
+            base = np.concatenate([[1.0], np.cumprod(segment_growth)])
+        else:
+            base = np.ones(1)
+        portfolio = base[segment] * within
+
+        returns = np.zeros(n_bars)
+        with np.errstate(divide="ignore", invalid="ignore"):
+            returns[1:] = np.nan_to_num(portfolio[1:] / portfolio[:-1] - 1.0)
+        running_max = np.maximum.accumulate(portfolio)
+        drawdown = np.where(running_max > 0, portfolio / running_max - 1.0, 0.0)
+        return {"equity": portfolio, "returns": returns, "drawdown": drawdown}
+
+    @staticmethod
+    def summarize(
+        combined: Dict[str, np.ndarray], time_unit: float, risk_free_rate: float
+    ) -> Dict[str, Optional[float]]:
+        """組合績效：總回報、年化報酬、年化波動、夏普比率、最大回撤"""
+        equity = combined["equity"]
+        returns = combined["returns"]
+        n_bars = len(equity)
+        total_return = float(equity[-1] / equity[0] - 1) if n_bars else None
+        years = n_bars / time_unit if time_unit else 0
+        annualized = (
+            float((1 + total_return) ** (1 / years) - 1)
+            if total_return is not None and years > 0 and total_return > -1
+            else None
+        )
+        std = float(np.std(returns, ddof=1)) if n_bars > 1 else 0.0
+        sharpe = (
+            float((np.mean(returns) - risk_free_rate / time_unit) / std * np.sqrt(time_unit))
+            if std > 0
+            else None
+        )
+        return {
+            "Total_return": total_return,
+            "Annualized_return": annualized,
+            "Annualized_volatility": float(std * np.sqrt(time_unit)) if n_bars > 1 else None,
+            "Sharpe": sharpe,
+            "Max_drawdown": float(abs(combined["drawdown"].min())) if n_bars else None,
+        }
+
+    @staticmethod
+    def export(
+        df: pd.DataFrame,
+        orig_parquet_path: str,
+        time_unit: float,
+        risk_free_rate: float,
+        config: Optional[Dict[str, Any]] = None,
+    ) -> Optional[str]:
+        """
+        合成回測 Parquet 中所選回測的投資組合，輸出 <檔名>_portfolio.parquet
+
+        Args:
+            config: backtest_ids/weighting/top_k/rank_by/rebalance/lookback
+
+        Returns:
+            str: 輸出的 Parquet 路徑；沒有可合成的回測時為 None
+        """
+        config = dict(config or {})
+        weighting = config.get("weighting", "equal")
+        if weighting not in WEIGHTING_METHODS:
+            raise ValueError(
+                f"不支援的 weighting: {weighting}，可選值為 {WEIGHTING_METHODS}"
+            )
+        orig_name = os.path.splitext(os.path.basename(orig_parquet_path))[0]
+        out_dir = os.path.join(
+            MultiAsset_backtester.records_root(orig_parquet_path), "metricstracker"
+        )
+
+        selected = config.get("backtest_ids")
+        if weighting == "top_k" and selected is None:
+            metadata_json_path = os.path.join(out_dir, f"{orig_name}_metadata.json")
+            if not os.path.exists(metadata_json_path):
+                raise ValueError(f"top_k 需要績效排名：找不到 {metadata_json_path}")
+            rank_by = config.get("rank_by", "Sharpe")
+            with open(metadata_json_path, "r", encoding="utf-8") as f:
+                ranked = [
+                    (meta[rank_by], meta.get("Backtest_id"))
+                    for meta in json.load(f)
+                    if isinstance(meta.get(rank_by), (int, float))
+                    and np.isfinite(meta[rank_by])
+                ]
+            ranked.sort(key=lambda item: item[0], reverse=True)
+            selected = [bid for _, bid in ranked[: int(config.get("top_k", 10))]]
+
+        matrix = PortfolioMetricTracker.load_equity_matrix(df, orig_parquet_path, selected)
+        if not matrix["backtest_ids"] or matrix["equity"].shape[0] == 0:
+            return None
+
+        equity = matrix["equity"]
+        rebalance = config.get("rebalance")
+        points = PortfolioMetricTracker.rebalance_points(
+            equity.shape[0], rebalance, matrix["time"]
+        )
+        weights = PortfolioMetricTracker.compute_weights(
+            equity, points, weighting, config.get("lookback")
+        )
+        combined = PortfolioMetricTracker.combine(equity, points, weights)
+        summary = PortfolioMetricTracker.summarize(combined, time_unit, risk_free_rate)
+
+        frame = pd.DataFrame(
+            {
+                "Return": combined["returns"],
+                "Equity_value": combined["equity"] * 100.0,
+                "Drawdown": combined["drawdown"],
+                "Rebalance": np.isin(np.arange(equity.shape[0]), points),
+            }
+        )
+        if matrix["time"] is not None:
+            frame.insert(0, "Time", matrix["time"])
+        table = pa.Table.from_pandas(frame, preserve_index=False)
+        metadata = dict(table.schema.metadata or {})
+        metadata[b"portfolio_config"] = json.dumps(
+            {
+                "weighting": weighting,
+                "rebalance": rebalance,
+                "lookback": config.get("lookback"),
+                "top_k": config.get("top_k") if weighting == "top_k" else None,
+                "rank_by": config.get("rank_by", "Sharpe") if weighting == "top_k" else None,
+                "time_unit": time_unit,
+                "risk_free_rate": risk_free_rate,
+            },
+            ensure_ascii=False,
+            default=str,
+        ).encode("utf-8")
+        metadata[b"portfolio_summary"] = json.dumps(summary).encode("utf-8")
+        metadata[b"portfolio_backtest_ids"] = json.dumps(
+            matrix["backtest_ids"]
+        ).encode("utf-8")
+        # 最後一個再平衡點的權重（完整權重歷史可由權益矩陣重算）
+        metadata[b"portfolio_weights"] = json.dumps(
+            dict(zip(matrix["backtest_ids"], weights[-1].tolist()))
+        ).encode("utf-8")
+
+        os.makedirs(out_dir, exist_ok=True)
+        out_path = os.path.join(out_dir, f"{orig_name}{PORTFOLIO_SUFFIX}")
+        pq.write_table(table.replace_schema_metadata(metadata), out_path)
+
+        sharpe = summary["Sharpe"]
+        console.print(
+            Panel(
+                f"投資組合合成完成：{len(matrix['backtest_ids'])} 個回測，權重 {weighting}，"
+                f"再平衡 {rebalance if rebalance is not None else '無'}（{len(points)} 次）\n"
+                f"• 總回報：{summary['Total_return']:.2%}  "
+                f"夏普比率：{f'{sharpe:.3f}' if sharpe is not None else '-'}  "
+                f"最大回撤：{summary['Max_drawdown']:.2%}\n"
+                f"📋 Portfolio Parquet: {out_path}",
+                title="[bold #8f1511]🚦 Metricstracker 交易分析[/bold #8f1511]",
+                border_style="#dbac30",
+            )
+        )
+        return out_path
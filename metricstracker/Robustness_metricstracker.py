@@ -0,0 +1,582 @@
+"""
+Robustness_metricstracker.py
+
+【功能說明】
+------------------------------------------------------------
+本模組為 Lo2cin4BT 績效分析框架的穩健性檢驗工具（Monte Carlo / bootstrap），在參數掃描
+完成後，對排名靠前的回測產生大量合成資金曲線，檢查績效是否依賴特定的交易順序或時機：
+- 交易順序洗牌（shuffle）：隨機重排各筆交易，空倉區間保持原位
+- 區塊自助法（bootstrap）：以固定長度的循環區塊重抽逐K線權益變化
+- 隨機進場延遲（delay）：每筆交易隨機延後 0~max_delay 根K線進場，出場K線不變
+- 所有路徑由 Numba prange 並行產生，逐路徑即時累計夏普比率、最大回撤與總回報，
+  不必重新執行交易模擬，也不必保存整條合成路徑
+
+【流程與數據流】
+------------------------------------------------------------
+- MetricsExporter.export 先寫出 <檔名>_metadata.json
+- RobustnessMetricTracker.export 依 metadata 的排名（預設 Sharpe）挑選前 top_n 個回測
+- 由 Return、Equity_value 與 Trade_action 取得逐K線收益率、權益比值與交易區段，交給 Numba 重抽核心
+- 分佈指標（平均值、百分位數、低於零的比例）寫入同目錄的 <檔名>_robustness.json
+
+```mermaid
+flowchart TD
+    A[回測 Parquet] -->|Return / Equity_value / Trade_action| B[收益率 + 權益比值 + 交易區段]
+    C[_metadata.json 排名] -->|top_n| B
+    B -->|_resample_paths_njit（prange）| D[每個回測 N 條合成路徑的指標]
+    D -->|百分位數| E[_robustness.json]
+```
+
+【維護與擴充重點】
+------------------------------------------------------------
+- 每根K線同時重抽 Return（夏普比率）與權益比值 Equity_value[t] / Equity_value[t-1]
+  （最大回撤、總回報，含開平倉成本），定義與 MetricsCalculatorMetricTracker 一致，
+  observed（不重抽的原始路徑）即等於 _metadata.json 中的對應指標
+- 交易區段為開倉K線至平倉K線（含），平倉後權益不變，其餘K線權益比值為 1
+- delay 方法對多頭交易為精確重算（價格比值與開倉價無關），空頭交易為近似值
+- 隨機數使用以 (seed, 回測, 路徑) 為種子的 splitmix64，結果與執行緒數無關、可重現
+- 新增重抽方法時，請同步更新 RESAMPLE_METHODS、核心分支與 README
+
+【常見易錯點】
+------------------------------------------------------------
+- 洗牌不改變收益率集合，夏普比率分佈退化為單點，主要觀察最大回撤分佈
+- block_size 過大時 bootstrap 接近原序列，過小則破壞收益率的自相關
+- trades_only 稀疏 Parquet 需與同名 _bars.npz 放在同一目錄
+
+【範例】
+------------------------------------------------------------
+- RobustnessMetricTracker.export(df, parquet_path, 365, 0.04, {"n_paths": 1000, "top_n": 10})
+- config["robustness"] = {"methods": ["shuffle", "bootstrap"], "block_size": 20, "seed": 7}
+
+【與其他模組的關聯】
+------------------------------------------------------------
+- 由 MetricsRunner_autorunner 在 MetricsExporter.export 之後調用（metricstracker.robustness 配置）
+- 讀取 MetricsExporter 寫出的 _metadata.json 進行排名，交易動作代碼與 TradeSimulator 一致
+"""
+
+import json
+import math
+import os
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+import pyarrow.parquet as pq
+from numba import njit, prange
+from rich.console import Console
+from rich.panel import Panel
+
+from backtester.MultiAsset_backtester import MultiAsset_backtester
+from backtester.SparseRecords_backtester import (
+    RESULT_MODE_TRADES_ONLY,
+    SparseRecords_backtester,
+)
+
+console = Console()
+
+# 重抽方法（代碼即在 RESAMPLE_METHODS 中的位置；-1 為原始路徑）
+RESAMPLE_METHODS = ("shuffle", "bootstrap", "delay")
+_METHOD_OBSERVED = -1
+_METHOD_SHUFFLE = 0
+_METHOD_BOOTSTRAP = 1
+_METHOD_DELAY = 2
+
+DEFAULT_PERCENTILES = (5, 25, 50, 75, 95)
+ROBUSTNESS_SUFFIX = "_robustness.json"
+PATH_METRICS = ("Sharpe", "Max_drawdown", "Total_return")
+
+# splitmix64 常數
+_SPLITMIX_GAMMA = np.uint64(0x9E3779B97F4A7C15)
+_SPLITMIX_MUL1 = np.uint64(0xBF58476D1CE4E5B9)
+_SPLITMIX_MUL2 = np.uint64(0x94D049BB133111EB)
+
+
+@njit(cache=True)
+def _splitmix64(state):  # type: ignore[no-untyped-def]
+    """splitmix64：回傳 (新狀態, 64 位隨機數)"""
+    state = state + _SPLITMIX_GAMMA
+    z = state
+    z = (z ^ (z >> np.uint64(30))) * _SPLITMIX_MUL1
+    z = (z ^ (z >> np.uint64(27))) * _SPLITMIX_MUL2
+    return state, z ^ (z >> np.uint64(31))
+
+
+@njit(cache=True)
+def _randint(state, upper):  # type: ignore[no-untyped-def]
+    """[0, upper) 的隨機整數"""
+    state, value = _splitmix64(state)
+    return state, np.int64(value % np.uint64(upper))
+
+
+@njit(fastmath=True, cache=True)
+def _accumulate(acc, value, growth):  # type: ignore[no-untyped-def]
+    """
+    累計一根K線：acc = [K線數, 收益均值, 離差平方和, 權益, 權益高點, 最大回撤]
+
+    均值與變異數以 Welford 演算法逐筆更新，避免保存整條路徑。
+    """
+    acc[0] += 1.0
+    delta = value - acc[1]
+    acc[1] += delta / acc[0]
+    acc[2] += delta * (value - acc[1])
+    acc[3] *= growth
+    if acc[3] > acc[4]:
+        acc[4] = acc[3]
+    drawdown = acc[3] / acc[4] - 1.0
+    if drawdown < acc[5]:
+        acc[5] = drawdown
+
+
+@njit(parallel=True, fastmath=True, cache=True)
+def _resample_paths_njit(  # pylint: disable=too-complex
+    returns,
+    growth,
+    lengths,
+    seg_start,
+    seg_end,
+    n_trades,
+    method,
+    n_paths,
+    block_size,
+    max_delay,
+    seed,
+    rf_per_bar,
+    time_unit,
+    sharpe_out,
+    max_drawdown_out,
+    total_return_out,
+):  # type: ignore[no-untyped-def]
+    """
+    以 prange 並行產生 (回測 x 路徑) 的合成路徑，逐路徑寫入夏普比率、最大回撤與總回報
+
+    Args:
+        returns: (K線, 回測) 逐K線 Return
+        growth: (K線, 回測) 逐K線權益比值，超出各回測長度的部分不讀取
+        lengths: 各回測的K線數
+        seg_start, seg_end: (回測, 最多交易數) 交易區段的開倉/平倉K線（含）
+        n_trades: 各回測的交易數
+        method: _METHOD_OBSERVED / _METHOD_SHUFFLE / _METHOD_BOOTSTRAP / _METHOD_DELAY
+        sharpe_out, max_drawdown_out, total_return_out: (回測, n_paths) 輸出矩陣
+    """
+    n_series = growth.shape[1]
+    for job in prange(n_series * n_paths):
+        s = job // n_paths
+        p = job - s * n_paths
+        n = lengths[s]
+        k = n_trades[s]
+        rng, _ = _splitmix64(np.uint64(seed) ^ (np.uint64(job + 1) * _SPLITMIX_GAMMA))
+        acc = np.zeros(6)
+        acc[3] = 1.0
+        acc[4] = 1.0
+
+        if method == _METHOD_SHUFFLE and k > 1:
+            order = np.arange(k)
+            for i in range(k - 1, 0, -1):
+                rng, j = _randint(rng, i + 1)
+                tmp = order[i]
+                order[i] = order[j]
+                order[j] = tmp
+            # 空倉區間保持原位，交易區段依洗牌順序填入各交易位置
+            cursor = 0
+            for slot in range(k):
+                for t in range(cursor, seg_start[s, slot]):
+                    _accumulate(acc, returns[t, s], growth[t, s])
+                src = order[slot]
+                for t in range(seg_start[s, src], seg_end[s, src] + 1):
+                    _accumulate(acc, returns[t, s], growth[t, s])
+                cursor = seg_end[s, slot] + 1
+            for t in range(cursor, n):
+                _accumulate(acc, returns[t, s], growth[t, s])
+        elif method == _METHOD_BOOTSTRAP and n > 0:
+            t = 0
+            while t < n:
+                rng, start = _randint(rng, n)
+                for b in range(block_size):
+                    if t >= n:
+                        break
+                    _accumulate(
+                        acc, returns[(start + b) % n, s], growth[(start + b) % n, s]
+                    )
+                    t += 1
+        elif method == _METHOD_DELAY and max_delay > 0:
+            cursor = 0
+            for i in range(k):
+                open_bar = seg_start[s, i]
+                close_bar = seg_end[s, i]
+                for t in range(cursor, open_bar):
+                    _accumulate(acc, returns[t, s], growth[t, s])
+                rng, delay = _randint(rng, max_delay + 1)
+                if delay >= close_bar - open_bar and delay > 0:
+                    # 延遲超過持倉期：整筆交易不成立
+                    for t in range(open_bar, close_bar + 1):
+                        _accumulate(acc, 0.0, 1.0)
+                else:
+                    # 延遲期間空倉，開倉成本移到實際進場K線
+                    for t in range(open_bar, open_bar + delay):
+                        _accumulate(acc, 0.0, 1.0)
+                    _accumulate(acc, returns[open_bar, s], growth[open_bar, s])
+                    for t in range(open_bar + delay + 1, close_bar + 1):
+                        _accumulate(acc, returns[t, s], growth[t, s])
+                cursor = close_bar + 1
+            for t in range(cursor, n):
+                _accumulate(acc, returns[t, s], growth[t, s])
+        else:
+            for t in range(n):
+                _accumulate(acc, returns[t, s], growth[t, s])
+
+        sharpe = np.nan
+        if acc[0] > 1.0:
+            std = math.sqrt(acc[2] / (acc[0] - 1.0))
+            if std > 0.0:
+                sharpe = (acc[1] - rf_per_bar) / std * math.sqrt(time_unit)
+        sharpe_out[s, p] = sharpe
+        max_drawdown_out[s, p] = acc[5]
+        total_return_out[s, p] = acc[3] - 1.0
+
+
+class RobustnessMetricTracker:
+    """Monte Carlo / bootstrap 穩健性檢驗：合成路徑重抽與分佈指標導出"""
+
+    @staticmethod
+    def trade_segments(trade_actions: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        由逐K線 Trade_action（1=開倉，4=平倉）取得各筆交易的開倉/平倉K線（含）
+
+        末端未平倉的交易以最後一根K線作為區段結束。
+        """
+        actions = np.asarray(trade_actions)
+        opens = np.flatnonzero(actions == 1)
+        closes = np.flatnonzero(actions == 4)
+        if len(opens) == 0:
+            return np.zeros(0, dtype=np.int64), np.zeros(0, dtype=np.int64)
+        pos = np.searchsorted(closes, opens, side="right")
+        ends = np.where(
+            pos < len(closes), closes[np.minimum(pos, len(closes) - 1)], len(actions) - 1
+        )
+        return opens.astype(np.int64), ends.astype(np.int64)
+
+    @staticmethod
+    def prepare_series(
+        series: List[Tuple[Any, np.ndarray, np.ndarray, np.ndarray]],
+    ) -> Dict[str, Any]:
+        """
+        將各回測的 (Backtest_id, Return, Equity_value, Trade_action) 整理為重抽核心的輸入矩陣
+
+        權益比值以第一根K線為基準（第一根的比值為 1），與 MetricsCalculator 的
+        總回報 Equity_value[-1] / Equity_value[0] - 1 一致。
+
+        Returns:
+            dict: backtest_ids/returns/growth/lengths/seg_start/seg_end/n_trades
+        """
+        n_series = len(series)
+        lengths = np.array([len(equity) for _, _, equity, _ in series], dtype=np.int64)
+        segments = [
+            RobustnessMetricTracker.trade_segments(actions)
+            for _, _, _, actions in series
+        ]
+        n_trades = np.array([len(starts) for starts, _ in segments], dtype=np.int64)
+        max_bars = int(lengths.max()) if n_series else 0
+        max_trades = max(int(n_trades.max()) if n_series else 0, 1)
+
+        returns = np.zeros((max_bars, n_series), dtype=np.float64)
+        growth = np.ones((max_bars, n_series), dtype=np.float64)
+        seg_start = np.zeros((n_series, max_trades), dtype=np.int64)
+        seg_end = np.zeros((n_series, max_trades), dtype=np.int64)
+        for j, (_, bar_returns, equity, _) in enumerate(series):
+            equity = np.asarray(equity, dtype=np.float64)
+            returns[: len(equity), j] = np.nan_to_num(
+                np.asarray(bar_returns, dtype=np.float64)
+            )
+            with np.errstate(divide="ignore", invalid="ignore"):
+                ratio = np.where(equity[:-1] > 0, equity[1:] / equity[:-1], 1.0)
+            growth[1 : len(equity), j] = np.where(np.isfinite(ratio), ratio, 1.0)
+            starts, ends = segments[j]
+            seg_start[j, : len(starts)] = starts
+            seg_end[j, : len(ends)] = ends
+
+        return {
+            "backtest_ids": [backtest_id for backtest_id, _, _, _ in series],
+            "returns": returns,
+            "growth": growth,
+            "lengths": lengths,
+            "seg_start": seg_start,
+            "seg_end": seg_end,
+            "n_trades": n_trades,
+        }
+
+    @staticmethod
+    def resample(
+        prepared: Dict[str, Any],
+        method: Optional[str],
+        n_paths: int,
+        time_unit: float,
+        risk_free_rate: float,
+        block_size: int = 20,
+        max_delay: int = 3,
+        seed: int = 42,
+    ) -> Dict[str, np.ndarray]:
+        """
+        為每個回測產生 n_paths 條合成路徑
+
+        Args:
+            method: RESAMPLE_METHODS 之一；None 時回傳原始路徑（n_paths 固定為 1）
+
+        Returns:
+            dict: Sharpe/Max_drawdown/Total_return，各為 (回測, 路徑) 矩陣
+        """
+        if method is None:
+            code, n_paths = _METHOD_OBSERVED, 1
+        elif method in RESAMPLE_METHODS:
+            code = RESAMPLE_METHODS.index(method)
+        else:
+            raise ValueError(
+                f"不支援的重抽方法: {method}，可選值為 {RESAMPLE_METHODS}"
+            )
+        n_paths = int(n_paths)
+        if n_paths < 1 or int(block_size) < 1 or int(max_delay) < 0:
+            raise ValueError("n_paths 與 block_size 需至少為 1，max_delay 不可為負數")
+
+        n_series = prepared["growth"].shape[1]
+        outputs = {name: np.empty((n_series, n_paths)) for name in PATH_METRICS}
+        _resample_paths_njit(
+            prepared["returns"],
+            prepared["growth"],
+            prepared["lengths"],
+            prepared["seg_start"],
+            prepared["seg_end"],
+            prepared["n_trades"],
+            code,
+            n_paths,
+            int(block_size),
+            int(max_delay),
+            int(seed) & 0xFFFFFFFFFFFFFFFF,
+            float(risk_free_rate) / float(time_unit),
+            float(time_unit),
+            outputs["Sharpe"],
+            outputs["Max_drawdown"],
+            outputs["Total_return"],
+        )
+        return outputs
+
+    @staticmethod
+    def summarize(
+        values: np.ndarray, percentiles: Iterable[float] = DEFAULT_PERCENTILES
+    ) -> Dict[str, Optional[float]]:
+        """單一回測單一指標的路徑分佈摘要（忽略 NaN）"""
+        values = np.asarray(values, dtype=np.float64)
+        valid = values[np.isfinite(values)]
+        if len(valid) == 0:
+            summary: Dict[str, Optional[float]] = {"mean": None, "std": None}
+            summary.update({f"p{q:g}": None for q in percentiles})
+            summary["below_zero_ratio"] = None
+            return summary
+        summary = {
+            "mean": float(valid.mean()),
+            "std": float(valid.std(ddof=1)) if len(valid) > 1 else 0.0,
+        }
+        for q, value in zip(percentiles, np.percentile(valid, list(percentiles))):
+            summary[f"p{q:g}"] = float(value)
+        summary["below_zero_ratio"] = float((valid < 0).mean())
+        return summary
+
+    @staticmethod
+    def analyze(
+        series: List[Tuple[Any, np.ndarray, np.ndarray, np.ndarray]],
+        time_unit: float,
+        risk_free_rate: float,
+        config: Optional[Dict[str, Any]] = None,
+    ) -> List[Dict[str, Any]]:
+        """
+        對各回測執行所有指定的重抽方法並整理分佈指標
+
+        Returns:
+            List[Dict]: 每個回測的 observed 與各方法的指標分佈
+        """
+        config = config or {}
+        methods = config.get("methods", list(RESAMPLE_METHODS))
+        percentiles = tuple(config.get("percentiles", DEFAULT_PERCENTILES))
+        prepared = RobustnessMetricTracker.prepare_series(series)
+        observed = RobustnessMetricTracker.resample(
+            prepared, None, 1, time_unit, risk_free_rate
+        )
+        distributions = {
+            method: RobustnessMetricTracker.resample(
+                prepared,
+                method,
+                config.get("n_paths", 1000),
+                time_unit,
+                risk_free_rate,
+                block_size=config.get("block_size", 20),
+                max_delay=config.get("max_delay", 3),
+                seed=config.get("seed", 42),
+            )
+            for method in methods
+        }
+
+        reports = []
+        for j, backtest_id in enumerate(prepared["backtest_ids"]):
+            report: Dict[str, Any] = {
+                "Backtest_id": backtest_id,
+                "Trade_count": int(prepared["n_trades"][j]),
+                "observed": {
+                    name: (
+                        float(observed[name][j, 0])
+                        if np.isfinite(observed[name][j, 0])
+                        else None
+                    )
+                    for name in PATH_METRICS
+                },
+            }
+            for method, paths in distributions.items():
+                report[method] = {
+                    name: RobustnessMetricTracker.summarize(paths[name][j], percentiles)
+                    for name in PATH_METRICS
+                }
+            reports.append(report)
+        return reports
+
+    @staticmethod
+    def select_top(
+        batch_metadata: List[Dict[str, Any]], top_n: Optional[int], rank_by: str
+    ) -> Optional[List[Any]]:
+        """依 metadata 指標由高到低挑選前 top_n 個 Backtest_id；top_n 為 None 時不篩選"""
+        if top_n is None:
+            return None
+        ranked = []
+        for meta in batch_metadata:
+            value = meta.get(rank_by)
+            if isinstance(value, (int, float)) and np.isfinite(value):
+                ranked.append((value, meta.get("Backtest_id")))
+        ranked.sort(key=lambda item: item[0], reverse=True)
+        return [backtest_id for _, backtest_id in ranked[: int(top_n)]]
+
+    @staticmethod
+    def collect_series(
+        df: pd.DataFrame, orig_parquet_path: str, selected: Optional[List[Any]]
+    ) -> List[Tuple[Any, np.ndarray, np.ndarray, np.ndarray]]:
+        """由回測 Parquet（full 或 trades_only）取得各回測的收益率、權益與交易動作陣列"""
+        try:
+            orig_meta = pq.read_schema(orig_parquet_path).metadata or {}
+        except Exception:
+            orig_meta = {}
+        wanted = None if selected is None else set(selected)
+        series = []
+
+        if orig_meta.get(b"result_mode") == RESULT_MODE_TRADES_ONLY.encode():
+            # 稀疏檔案：收益率與權益取自共用陣列，交易動作以 Bar_index 放回，不需還原完整記錄
+            bar_store_path = os.path.join(
+                os.path.dirname(orig_parquet_path), orig_meta[b"bar_store"].decode()
+            )
+            store = SparseRecords_backtester.load_bar_store(bar_store_path)
+            grouped = dict(tuple(df.groupby("Backtest_id", sort=False)))
+            for j, backtest_id in enumerate(store["backtest_ids"]):
+                if wanted is not None and backtest_id not in wanted:
+                    continue
+                equity = np.asarray(store["equity_values"][:, j], dtype=np.float64)
+                actions = np.zeros(len(equity), dtype=np.int64)
+                rows = grouped.get(backtest_id)
+                if rows is not None and len(rows):
+                    actions[rows["Bar_index"].to_numpy(dtype=np.int64)] = rows[
+                        "Trade_action"
+                    ].to_numpy(dtype=np.int64)
+                series.append(
+                    (
+                        backtest_id,
+                        np.asarray(store["returns"][:, j], dtype=np.float64),
+                        equity,
+                        actions,
+                    )
+                )
+            return series
+
+        grouped = (
+            df.groupby("Backtest_id", sort=False)
+            if "Backtest_id" in df.columns
+            else [(None, df)]
+        )
+        for backtest_id, group in grouped:
+            if wanted is not None and backtest_id not in wanted:
+                continue
+            series.append(
+                (
+                    backtest_id,
+                    group["Return"].to_numpy(dtype=np.float64),
+                    group["Equity_value"].to_numpy(dtype=np.float64),
+                    group["Trade_action"].fillna(0).to_numpy(dtype=np.int64),
+                )
+            )
+        return series
+
+    @staticmethod
+    def export(
+        df: pd.DataFrame,
+        orig_parquet_path: str,
+        time_unit: float,
+        risk_free_rate: float,
+        config: Optional[Dict[str, Any]] = None,
+    ) -> Optional[str]:
+        """
+        對回測 Parquet 中排名靠前的回測執行穩健性檢驗，輸出 <檔名>_robustness.json
+
+        Args:
+            config: n_paths/methods/block_size/max_delay/seed/percentiles/top_n/rank_by
+
+        Returns:
+            str: 輸出的 JSON 路徑；沒有可分析的回測時為 None
+        """
+        config = dict(config or {})
+        orig_name = os.path.splitext(os.path.basename(orig_parquet_path))[0]
+        out_dir = os.path.join(
+            MultiAsset_backtester.records_root(orig_parquet_path), "metricstracker"
+        )
+        metadata_json_path = os.path.join(out_dir, f"{orig_name}_metadata.json")
+        rank_by = config.get("rank_by", "Sharpe")
+        top_n = config.get("top_n", 10)
+
+        selected = None
+        if top_n is not None and os.path.exists(metadata_json_path):
+            with open(metadata_json_path, "r", encoding="utf-8") as f:
+                selected = RobustnessMetricTracker.select_top(
+                    json.load(f), top_n, rank_by
+                )
+
+        series = RobustnessMetricTracker.collect_series(df, orig_parquet_path, selected)
+        if selected is not None:
+            # 依排名順序輸出
+            position = {backtest_id: i for i, backtest_id in enumerate(selected)}
+            series.sort(key=lambda item: position.get(item[0], len(position)))
+        if not series:
+            return None
+
+        reports = RobustnessMetricTracker.analyze(
+            series, time_unit, risk_free_rate, config
+        )
+        output = {
+            "config": {
+                "n_paths": int(config.get("n_paths", 1000)),
+                "methods": list(config.get("methods", RESAMPLE_METHODS)),
+                "block_size": int(config.get("block_size", 20)),
+                "max_delay": int(config.get("max_delay", 3)),
+                "seed": int(config.get("seed", 42)),
+                "percentiles": list(config.get("percentiles", DEFAULT_PERCENTILES)),
+                "top_n": top_n,
+                "rank_by": rank_by,
+                "time_unit": time_unit,
+                "risk_free_rate": risk_free_rate,
+            },
+            "backtests": reports,
+        }
+        os.makedirs(out_dir, exist_ok=True)
+        out_path = os.path.join(out_dir, f"{orig_name}{ROBUSTNESS_SUFFIX}")
+        with open(out_path, "w", encoding="utf-8") as f:
+            json.dump(output, f, ensure_ascii=False, indent=2)
+
+        console.print(
+            Panel(
+                f"穩健性檢驗完成：{len(reports)} 個回測 x "
+                f"{output['config']['n_paths']} 條路徑 x {len(output['config']['methods'])} 種方法\n"
+                f"📋 Robustness JSON: {out_path}",
+                title="[bold #8f1511]🚦 Metricstracker 交易分析[/bold #8f1511]",
+                border_style="#dbac30",
+            )
+        )
+        return out_path
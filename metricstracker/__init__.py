@@ -43,10 +43,13 @@ flowchart TD
 """
 
 from metricstracker.Base_metricstracker import BaseMetricTracker
+from metricstracker.BatchMetrics_metricstracker import BatchMetricsMetricTracker
 from metricstracker.MetricsCalculator_metricstracker import (
     MetricsCalculatorMetricTracker,
 )
 from metricstracker.MetricsExporter_metricstracker import MetricsExporter
+from metricstracker.Portfolio_metricstracker import PortfolioMetricTracker
+from metricstracker.Robustness_metricstracker import RobustnessMetricTracker
 
 # 如果有以下檔案再加上
 # from metricstracker.Utils_metricstracker import *
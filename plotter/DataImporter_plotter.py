@@ -47,11 +47,12 @@ flowchart TD
 ------------------------------------------------------------
 - 基本使用：importer = DataImporterPlotter("path/to/data")
 - 載入數據：data = importer.load_and_parse_data()
+- 只載入 Sharpe > 1 的回測（指標資料集）：DataImporterPlotter(path, filters=[("Sharpe", ">", 1.0)])
 
 【與其他模組的關聯】
 ------------------------------------------------------------
 - 被 BasePlotter 調用
-- 依賴 metricstracker 產生的 parquet 檔案格式
+- 依賴 metricstracker 產生的 parquet 檔案格式，或 ResultStore_backtester 格式的指標資料集
 - 輸出數據供 DashboardGenerator 和 CallbackHandler 使用
 
 【版本與變更記錄】
@@ -59,6 +60,10 @@ flowchart TD
 - v1.0: 初始版本，支援基本數據導入
 - v1.1: 新增參數解析功能
 - v1.2: 新增記憶體優化
+- v1.3: 支援 metricstracker 指標資料集（_index.parquet 指標索引），以索引篩選（filters）
+        與欄位裁剪只讀取需要的回測與欄位
+- v1.4: 支援引擎內績效（inline_metrics）的回測：只有 _metadata.json 而無 _metrics.parquet 時，
+        權益曲線改由回測 Parquet（trades_only 為共用K線檔案）還原
 
 【參考】
 ------------------------------------------------------------
@@ -77,14 +82,25 @@ import warnings
 from datetime import datetime
 from typing import Any, Dict, List, Optional
 
+import numpy as np
 import pandas as pd
 import pyarrow.parquet as pq
 from rich.console import Console
 from rich.panel import Panel
 from rich.text import Text
 
+from backtester.MultiAsset_backtester import PARTITION_COLUMN
+from backtester.ResultStore_backtester import ResultStore_backtester
+from backtester.SparseRecords_backtester import (
+    RESULT_MODE_TRADES_ONLY,
+    SparseRecords_backtester,
+)
+
 warnings.filterwarnings("ignore")
 
+METRICS_SUFFIX = "_metrics.parquet"
+METADATA_SUFFIX = "_metadata.json"
+
 # 檢查 psutil 是否可用
 PSUTIL_AVAILABLE = False
 try:
@@ -103,15 +119,23 @@ class DataImporterPlotter:
     提取參數組合、績效指標和權益曲線數據。
     """
 
-    def __init__(self, data_path: str, logger: Optional[logging.Logger] = None):
+    def __init__(
+        self,
+        data_path: str,
+        logger: Optional[logging.Logger] = None,
+        filters: Optional[Any] = None,
+    ):
         """
         初始化數據導入器
 
         Args:
             data_path: metricstracker 產生的 parquet 檔案目錄路徑
             logger: 日誌記錄器，預設為 None
+            filters: 指標資料集的索引篩選條件（如 [("Sharpe", ">", 1.0)]），
+                     只載入符合條件的回測；單檔 parquet 不適用
         """
         self.data_path = data_path
+        self.filters = filters
         self.logger = logger or logging.getLogger(__name__)
         self.logger.setLevel(logging.WARNING)
         # 不再自動加 handler，避免預設 log 輸出
@@ -156,7 +180,10 @@ class DataImporterPlotter:
 
     def scan_parquet_files(self) -> List[str]:
         """
-        掃描目錄中的 parquet 檔案
+        掃描目錄中的 parquet 檔案與指標資料集目錄（內含 _index.parquet）
+
+        引擎內績效（inline_metrics）的回測只寫出 _metadata.json，沒有 _metrics.parquet，
+        此時以 _metadata.json 路徑代表該回測檔案。
 
         Returns:
             List[str]: parquet 檔案路徑列表
@@ -164,6 +191,17 @@ class DataImporterPlotter:
         try:
             pattern = os.path.join(self.data_path, "*.parquet")
             parquet_files = glob.glob(pattern)
+            parquet_files += [
+                path
+                for path in glob.glob(os.path.join(self.data_path, "*"))
+                if ResultStore_backtester.is_dataset(path)
+            ]
+            parquet_files += [
+                path
+                for path in glob.glob(os.path.join(self.data_path, f"*{METADATA_SUFFIX}"))
+                if not os.path.exists(path[: -len(METADATA_SUFFIX)] + METRICS_SUFFIX)
+                and self._inline_source_path(path) is not None
+            ]
 
             if not parquet_files:
                 self.logger.warning(f"在目錄 {self.data_path} 中未找到 parquet 檔案")
@@ -283,6 +321,143 @@ class DataImporterPlotter:
             self.logger.warning(f"提取權益曲線數據失敗: {e}")
             return pd.DataFrame()
 
+    def _load_dataset(
+        self, dataset_dir: str, columns: Optional[List[str]] = None
+    ) -> tuple:
+        """讀取指標資料集：batch_metadata 來自 _index.parquet，記錄只讀取指定欄位"""
+        batch_metadata = ResultStore_backtester.read_batch_metadata(
+            dataset_dir, filters=self.filters
+        )
+        backtest_ids = (
+            [meta["Backtest_id"] for meta in batch_metadata]
+            if self.filters is not None
+            else None
+        )
+        df = ResultStore_backtester.read(dataset_dir, backtest_ids, columns=columns)
+        return batch_metadata, df
+
+    @staticmethod
+    def _inline_source_path(metadata_json_path: str) -> Optional[str]:
+        """
+        找回只寫出 _metadata.json 的引擎內績效所對應的回測 Parquet
+
+        一般檔案為 records/backtester/<檔名>.parquet；多標的分區檔案為
+        records/backtester/<資料集>/Trading_instrument=<標的>/<檔名>.parquet
+
+        Returns:
+            Optional[str]: 帶 inline_metrics metadata 的回測 Parquet 路徑；找不到時為 None
+        """
+        name = os.path.basename(metadata_json_path)[: -len(METADATA_SUFFIX)]
+        backtester_dir = os.path.join(
+            os.path.dirname(os.path.dirname(os.path.abspath(metadata_json_path))),
+            "backtester",
+        )
+        candidates = [os.path.join(backtester_dir, f"{name}.parquet")] + glob.glob(
+            os.path.join(backtester_dir, "*", f"{PARTITION_COLUMN}=*", f"{name}.parquet")
+        )
+        for path in candidates:
+            if not os.path.exists(path):
+                continue
+            try:
+                metadata = pq.read_schema(path).metadata or {}
+            except Exception:
+                continue
+            if b"inline_metrics" in metadata:
+                return path
+        return None
+
+    def _load_inline_file(self, metadata_json_path: str) -> tuple:
+        """
+        讀取引擎內績效的回測：指標來自 _metadata.json，權益曲線由回測 Parquet 還原
+
+        trades_only 檔案的權益矩陣直接取自共用K線檔案；BAH_Equity 與
+        MetricsExporter.add_drawdown_bah 相同，以各回測首根K線的權益與收盤價起算。
+        """
+        with open(metadata_json_path, "r", encoding="utf-8") as f:
+            batch_metadata = json.load(f)
+        source_path = self._inline_source_path(metadata_json_path)
+        if source_path is None:
+            raise FileNotFoundError(f"找不到引擎內績效對應的回測檔案: {metadata_json_path}")
+
+        metadata = pq.read_schema(source_path).metadata or {}
+        if metadata.get(b"result_mode") == RESULT_MODE_TRADES_ONLY.encode():
+            store = SparseRecords_backtester.load_bar_store(
+                os.path.join(
+                    os.path.dirname(source_path), metadata[b"bar_store"].decode()
+                )
+            )
+            n_bars, n_series = store["equity_values"].shape
+            df = pd.DataFrame(
+                {
+                    "Time": np.tile(store["bars"]["Time"].to_numpy(), n_series),
+                    "Equity_value": store["equity_values"].T.ravel(),
+                    "Backtest_id": np.repeat(store["backtest_ids"], n_bars),
+                    "Close": np.tile(store["bars"]["Close"].to_numpy(), n_series),
+                }
+            )
+        else:
+            df = pd.read_parquet(
+                source_path, columns=["Time", "Equity_value", "Backtest_id", "Close"]
+            )
+
+        grouped = df.groupby("Backtest_id", sort=False)
+        df["BAH_Equity"] = (
+            grouped["Equity_value"].transform("first")
+            * df["Close"]
+            / grouped["Close"].transform("first")
+        )
+        return batch_metadata, df.drop(columns="Close")
+
+    def _load_single_file(self, file_path: str) -> tuple:
+        """讀取單檔 _metrics.parquet 與對應的 _metadata.json（引擎內績效只有 _metadata.json）"""
+        if file_path.endswith(METADATA_SUFFIX):
+            return self._load_inline_file(file_path)
+
+        # 步驟1: 讀取parquet檔案
+        step1_start = datetime.now()
+        table = pq.read_table(file_path)
+        (datetime.now() - step1_start).total_seconds()
+
+        # 步驟2: 選擇必要列
+        step2_start = datetime.now()
+        required_columns = ["Time", "Equity_value", "BAH_Equity", "Backtest_id"]
+        available_columns = [
+            col for col in required_columns if col in table.column_names
+        ]
+        table = table.select(available_columns)
+        (datetime.now() - step2_start).total_seconds()
+
+        # 步驟3: 轉換為pandas
+        step3_start = datetime.now()
+        df = table.to_pandas()
+        (datetime.now() - step3_start).total_seconds()
+
+        # 步驟4: 提取metadata（優先從 JSON 檔案讀取）
+        step4_start = datetime.now()
+        batch_metadata = []
+
+        # 嘗試從 JSON 檔案讀取 metadata（新格式）
+        metadata_json_path = file_path.replace("_metrics.parquet", "_metadata.json")
+        if os.path.exists(metadata_json_path):
+            try:
+                with open(metadata_json_path, "r", encoding="utf-8") as f:
+                    batch_metadata = json.load(f)
+            except Exception as e:
+                self.logger.warning(f"無法讀取 JSON metadata: {e}")
+
+        # 如果 JSON 檔案不存在，嘗試從 Parquet metadata 讀取（向後相容）
+        if not batch_metadata:
+            meta = table.schema.metadata or {}
+            if b"batch_metadata" in meta:
+                try:
+                    batch_metadata = json.loads(meta[b"batch_metadata"].decode())
+                except Exception as e:
+                    self.logger.warning(f"無法讀取 Parquet metadata: {e}")
+
+        (datetime.now() - step4_start).total_seconds()
+
+        return batch_metadata, df
+
     def _load_single_parquet_file_optimized(
         self, file_path: str
     ) -> List[Dict[str, Any]]:
@@ -299,48 +474,13 @@ class DataImporterPlotter:
         filename = os.path.basename(file_path)
 
         try:
-            # 步驟1: 讀取parquet檔案
-            step1_start = datetime.now()
-            table = pq.read_table(file_path)
-            (datetime.now() - step1_start).total_seconds()
-
-            # 步驟2: 選擇必要列
-            step2_start = datetime.now()
-            required_columns = ["Time", "Equity_value", "BAH_Equity", "Backtest_id"]
-            available_columns = [
-                col for col in required_columns if col in table.column_names
-            ]
-            table = table.select(available_columns)
-            (datetime.now() - step2_start).total_seconds()
-
-            # 步驟3: 轉換為pandas
-            step3_start = datetime.now()
-            df = table.to_pandas()
-            (datetime.now() - step3_start).total_seconds()
-
-            # 步驟4: 提取metadata（優先從 JSON 檔案讀取）
-            step4_start = datetime.now()
-            batch_metadata = []
-
-            # 嘗試從 JSON 檔案讀取 metadata（新格式）
-            metadata_json_path = file_path.replace("_metrics.parquet", "_metadata.json")
-            if os.path.exists(metadata_json_path):
-                try:
-                    with open(metadata_json_path, "r", encoding="utf-8") as f:
-                        batch_metadata = json.load(f)
-                except Exception as e:
-                    self.logger.warning(f"無法讀取 JSON metadata: {e}")
-
-            # 如果 JSON 檔案不存在，嘗試從 Parquet metadata 讀取（向後相容）
-            if not batch_metadata:
-                meta = table.schema.metadata or {}
-                if b"batch_metadata" in meta:
-                    try:
-                        batch_metadata = json.loads(meta[b"batch_metadata"].decode())
-                    except Exception as e:
-                        self.logger.warning(f"無法讀取 Parquet metadata: {e}")
-
-            (datetime.now() - step4_start).total_seconds()
+            if ResultStore_backtester.is_dataset(file_path):
+                # 指標資料集：索引篩選後只讀取選中回測的 row group 與繪圖所需欄位
+                batch_metadata, df = self._load_dataset(
+                    file_path, ["Time", "Equity_value", "BAH_Equity", "Backtest_id"]
+                )
+            else:
+                batch_metadata, df = self._load_single_file(file_path)
 
             # 步驟5: 批量處理數據（優化版本）
             datetime.now()
@@ -411,31 +551,40 @@ class DataImporterPlotter:
         try:
             self.logger.info(f"載入檔案: {file_path}")
 
-            # 讀取 parquet 檔案
-            df = pd.read_parquet(file_path)
-            table = pq.read_table(file_path)
-            batch_metadata = []
-
-            # 嘗試從 JSON 檔案讀取 metadata（新格式）
-            metadata_json_path = file_path.replace("_metrics.parquet", "_metadata.json")
-            if os.path.exists(metadata_json_path):
-                try:
-                    with open(metadata_json_path, "r", encoding="utf-8") as f:
-                        batch_metadata = json.load(f)
-                except Exception as e:
-                    self.logger.warning(f"無法讀取 JSON metadata: {e}")
-
-            # 如果 JSON 檔案不存在，嘗試從 Parquet metadata 讀取（向後相容）
-            if not batch_metadata:
-                meta = table.schema.metadata or {}
-                if b"batch_metadata" in meta:
+            if ResultStore_backtester.is_dataset(file_path):
+                batch_metadata, df = self._load_dataset(file_path)
+            elif file_path.endswith(METADATA_SUFFIX):
+                batch_metadata, df = self._load_inline_file(file_path)
+            else:
+                # 讀取 parquet 檔案
+                df = pd.read_parquet(file_path)
+                table = pq.read_table(file_path)
+                batch_metadata = []
+
+                # 嘗試從 JSON 檔案讀取 metadata（新格式）
+                metadata_json_path = file_path.replace(
+                    "_metrics.parquet", "_metadata.json"
+                )
+                if os.path.exists(metadata_json_path):
                     try:
-                        batch_metadata = json.loads(meta[b"batch_metadata"].decode())
+                        with open(metadata_json_path, "r", encoding="utf-8") as f:
+                            batch_metadata = json.load(f)
                     except Exception as e:
-                        self.logger.warning(f"無法讀取 Parquet metadata: {e}")
+                        self.logger.warning(f"無法讀取 JSON metadata: {e}")
 
+                # 如果 JSON 檔案不存在，嘗試從 Parquet metadata 讀取（向後相容）
                 if not batch_metadata:
-                    self.logger.warning(f"找不到 batch_metadata: {file_path}")
+                    meta = table.schema.metadata or {}
+                    if b"batch_metadata" in meta:
+                        try:
+                            batch_metadata = json.loads(
+                                meta[b"batch_metadata"].decode()
+                            )
+                        except Exception as e:
+                            self.logger.warning(f"無法讀取 Parquet metadata: {e}")
+
+            if not batch_metadata:
+                self.logger.warning(f"找不到 batch_metadata: {file_path}")
 
             results = []
             for meta_item in batch_metadata:
@@ -1,11 +1,18 @@
 import glob
 import json
 import os
+import re
+import sys
 from typing import Any, Dict, List, Optional
 
 import pandas as pd
 import pyarrow.parquet as pq
 
+# 以 python records/Read_parquet.py 直接執行時，專案根目錄不在模組搜尋路徑中
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from backtester.ResultStore_backtester import ResultStore_backtester  # noqa: E402
+
 # 新增：將所有 batch_metadata 與主表格輸出為 txt
 
 
@@ -124,8 +131,13 @@ def list_parquet_files() -> List[str]:
         print(f"❌ 目錄不存在: {search_dir}")
         return []
 
-    # 搜尋 .parquet 檔案
+    # 搜尋 .parquet 檔案與分區資料集（目錄內有 _index.parquet）
     parquet_files = glob.glob(os.path.join(search_dir, "*.parquet"))
+    parquet_files += [
+        path
+        for path in glob.glob(os.path.join(search_dir, "*"))
+        if ResultStore_backtester.is_dataset(path)
+    ]
 
     if not parquet_files:
         print(f"❌ 在 {search_dir} 中未找到任何 .parquet 檔案")
@@ -133,6 +145,9 @@ def list_parquet_files() -> List[str]:
 
     print(f"\n✅ 找到以下 {len(parquet_files)} 個 Parquet 檔案:")
     for i, file in enumerate(parquet_files, 1):
+        if ResultStore_backtester.is_dataset(file):
+            print(f"  {i}. {os.path.basename(file)} (分區資料集)")
+            continue
         file_size = os.path.getsize(file) / 1024  # 檔案大小 (KB)
         print(f"  {i}. {os.path.basename(file)} ({file_size:.1f} KB)")
 
@@ -174,6 +189,65 @@ def read_parquet_with_metadata(
         return None, {}
 
 
+def parse_index_filter(text: str) -> Optional[List[tuple]]:
+    """
+    解析索引篩選條件，如 "Sharpe>1, Condition_pair=MA1_MA4"
+
+    Returns:
+        pyarrow 篩選條件列表；輸入為空時為 None
+    """
+    filters = []
+    for clause in [c.strip() for c in text.split(",") if c.strip()]:
+        match = re.match(r"^(\w+)\s*(>=|<=|!=|>|<|=)\s*(.+)$", clause)
+        if match is None:
+            raise ValueError(f"無法解析篩選條件: {clause}")
+        column, op, value = match.groups()
+        try:
+            parsed: Any = float(value)
+        except ValueError:
+            parsed = value.strip()
+        filters.append((column, op, parsed))
+    return filters or None
+
+
+def read_dataset_with_index(
+    dataset_dir: str,
+    filters: Optional[List[tuple]] = None,
+    columns: Optional[List[str]] = None,
+) -> tuple[Optional[pd.DataFrame], Dict[str, Any]]:
+    """
+    讀取分區資料集：先以 _index.parquet 篩選回測，再只讀取對應 row group 的指定欄位
+
+    Args:
+        dataset_dir: 資料集目錄
+        filters: 索引篩選條件（謂詞下推），如 [("Sharpe", ">", 1.0)]
+        columns: 只讀取的欄位（欄位裁剪）；None 時讀取全部欄位
+
+    Returns:
+        (DataFrame, metadata_dict)，metadata_dict 的 batch_metadata 只含篩選後的回測
+    """
+    try:
+        metadata_dict: Dict[str, Any] = dict(
+            ResultStore_backtester.read_index_metadata(dataset_dir)
+        )
+        batch_metadata = ResultStore_backtester.read_batch_metadata(
+            dataset_dir, filters=filters
+        )
+        metadata_dict["batch_metadata"] = json.dumps(
+            batch_metadata, ensure_ascii=False
+        )
+        backtest_ids = (
+            [meta["Backtest_id"] for meta in batch_metadata]
+            if filters is not None
+            else None
+        )
+        df = ResultStore_backtester.read(dataset_dir, backtest_ids, columns=columns)
+        return df, metadata_dict
+    except Exception as e:
+        print(f"❌ 讀取分區資料集時發生錯誤: {e}")
+        return None, {}
+
+
 def _calculate_column_widths(batch_list: List[Dict[str, Any]]) -> tuple[int, int]:
     """計算顯示欄位所需的最大寬度"""
     all_keys: set[str] = set()
@@ -280,7 +354,15 @@ def main() -> None:
                 print(f"❌ 請輸入有效編號 (1-{len(parquet_files)})")
         except ValueError:
             print("❌ 請輸入數字或 'q' 退出")
-    df, metadata = read_parquet_with_metadata(selected_file)
+    if ResultStore_backtester.is_dataset(selected_file):
+        filter_text = input(
+            "請輸入索引篩選條件（如 Sharpe>1, Condition_pair=MA1_MA4，直接按 Enter 讀取全部）："
+        ).strip()
+        df, metadata = read_dataset_with_index(
+            selected_file, filters=parse_index_filter(filter_text)
+        )
+    else:
+        df, metadata = read_parquet_with_metadata(selected_file)
     if metadata:
         display_metadata(metadata)
     if df is not None:
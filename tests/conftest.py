@@ -0,0 +1,19 @@
+"""
+pytest 共用 fixture：合成數據與一次性的完整回測結果
+"""
+
+import pytest
+
+from backtester.VectorBacktestEngine_backtester import VectorBacktestEngine
+from tests.helpers import make_backtest_config, make_ohlcv
+
+
+@pytest.fixture(scope="session")
+def ohlcv():
+    return make_ohlcv()
+
+
+@pytest.fixture(scope="session")
+def full_results(ohlcv):
+    """預設配置（open 價、延遲 1）的完整 records 回測結果"""
+    return VectorBacktestEngine(ohlcv, "1D").run_backtests(make_backtest_config())
@@ -0,0 +1,197 @@
+"""
+tests/helpers.py
+
+測試共用的合成數據與回測配置產生器。
+- make_ohlcv: 固定種子的合成 OHLCV + 預測因子 X
+- make_backtest_config: 涵蓋 MA/BOLL/HL/VALUE/PERC 的小型參數網格
+- make_autorunner_config: 相同參數網格的 autorunner 配置（BacktestRunnerAutorunner 使用）
+- canonical_records: 以 strategy_id + params 為鍵、交易組ID轉為序號，便於跨次回測比對
+- calculator_metadata / assert_same_metadata: 以逐回測 MetricsCalculator 為基準比對績效
+"""
+
+import json
+import math
+from typing import Any, Dict, Iterable, List, Tuple
+
+import numpy as np
+import pandas as pd
+
+from backtester.Indicators_backtester import IndicatorsBacktester
+from metricstracker.MetricsCalculator_metricstracker import MetricsCalculatorMetricTracker
+from metricstracker.MetricsExporter_metricstracker import MetricsExporter
+
+_RAW_INDICATOR_CONFIG = {
+    "MA1_strategy_1": {"ma_type": "SMA", "ma_range": "5:15:5"},
+    "MA4_strategy_1": {"ma_type": "EMA", "ma_range": "10:10:1"},
+    "MA9_strategy_2": {"ma_type": "WMA", "m_range": "2:3:1", "n_range": "5:10:5"},
+    "MA12_strategy_2": {"ma_type": "SMA", "m_range": "2:2:1", "n_range": "10:10:1"},
+    "BOLL1_strategy_3": {"ma_range": "10:20:10", "sd_multi": "2"},
+    "BOLL4_strategy_3": {"ma_range": "20:20:1", "sd_multi": "2"},
+    "HL1_strategy_4": {"n_range": "1:2:1", "m_range": "10:10:1"},
+    "HL4_strategy_4": {"n_range": "1:1:1", "m_range": "10:10:1"},
+    "VALUE1_strategy_5": {"n_range": "2:2:1", "m_range": "0:1:1"},
+    "VALUE6_strategy_5": {"m1_range": "-2:-2:1", "m2_range": "2:2:1"},
+    "PERC1_strategy_6": {"window_range": "20:20:1", "percentile_range": "60:80:20"},
+    "PERC6_strategy_6": {
+        "window_range": "20:20:1",
+        "m1_range": "20:20:1",
+        "m2_range": "80:80:1",
+    },
+}
+
+_CONDITION_PAIRS = [
+    {"entry": ["MA1"], "exit": ["MA4"]},
+    {"entry": ["MA9"], "exit": ["MA12"]},
+    {"entry": ["BOLL1"], "exit": ["BOLL4"]},
+    {"entry": ["HL1"], "exit": ["HL4"]},
+    {"entry": ["VALUE1"], "exit": ["VALUE6"]},
+    {"entry": ["PERC1"], "exit": ["PERC6"]},
+]
+
+
+def make_ohlcv(n: int = 300, seed: int = 0) -> pd.DataFrame:
+    """固定種子的合成日K線，含預測因子欄位 X"""
+    rng = np.random.default_rng(seed)
+    close = 100 * np.exp(np.cumsum(rng.normal(0, 0.01, n)))
+    open_ = close * (1 + rng.normal(0, 0.002, n))
+    high = np.maximum(open_, close) * 1.003
+    low = np.minimum(open_, close) * 0.997
+    predictor = np.round(rng.normal(0, 1, n).cumsum(), 1)
+    return pd.DataFrame(
+        {
+            "Time": pd.date_range("2020-01-01", periods=n, freq="D"),
+            "Open": open_,
+            "High": high,
+            "Low": low,
+            "Close": close,
+            "Volume": 1.0,
+            "X": predictor,
+        }
+    )
+
+
+def make_backtest_config(
+    trade_price: str = "open", trade_delay: int = 1
+) -> Dict[str, Any]:
+    """產生 VectorBacktestEngine.run_backtests 使用的小型配置"""
+    indicators = IndicatorsBacktester()
+    params = {
+        key: indicators.get_indicator_params(key.split("_strategy_")[0], dict(value))
+        for key, value in _RAW_INDICATOR_CONFIG.items()
+    }
+    return {
+        "condition_pairs": [dict(pair) for pair in _CONDITION_PAIRS],
+        "indicator_params": params,
+        "predictors": ["X"],
+        "trading_params": {
+            "transaction_cost": 0.001,
+            "slippage": 0.0005,
+            "trade_delay": trade_delay,
+            "trade_price": trade_price,
+        },
+    }
+
+
+def make_autorunner_config(**backtester_options: Any) -> Dict[str, Any]:
+    """產生 BacktestRunnerAutorunner.run_backtest 使用的 autorunner 配置"""
+    backtester = {
+        "selected_predictor": "X",
+        "condition_pairs": [dict(pair) for pair in _CONDITION_PAIRS],
+        "indicator_params": {
+            key: dict(value) for key, value in _RAW_INDICATOR_CONFIG.items()
+        },
+        "trading_params": make_backtest_config()["trading_params"],
+    }
+    backtester.update(backtester_options)
+    return {
+        "dataloader": {"frequency": "1D"},
+        "backtester": backtester,
+        "metricstracker": {"time_unit": 365, "risk_free_rate": 0.04},
+    }
+
+
+def result_key(result: Dict[str, Any]) -> str:
+    """不依賴隨機 Backtest_id 的回測識別鍵"""
+    return f"{result['strategy_id']}|{result['params']}"
+
+
+def canonical_frame(records: pd.DataFrame) -> pd.DataFrame:
+    """將隨機交易組ID轉為出現順序的序號，並移除 Backtest_id"""
+    frame = records.reset_index(drop=True).copy()
+    if "Trade_group_id" in frame.columns:
+        ids: Dict[Any, int] = {}
+        frame["Trade_group_id"] = [
+            None if value is None else ids.setdefault(value, len(ids))
+            for value in frame["Trade_group_id"]
+        ]
+    return frame.drop(columns=["Backtest_id"], errors="ignore")
+
+
+def canonical_records(results: List[Dict[str, Any]]) -> Dict[str, pd.DataFrame]:
+    """{result_key: canonical records}"""
+    return {result_key(r): canonical_frame(r["records"]) for r in results}
+
+
+def assert_same_records(
+    expected: Dict[str, pd.DataFrame],
+    actual: Dict[str, pd.DataFrame],
+    check_dtype: bool = True,
+) -> None:
+    """逐個回測比對 canonical records"""
+    assert set(expected) == set(actual)
+    for key, frame in expected.items():
+        pd.testing.assert_frame_equal(
+            frame, actual[key][frame.columns], check_dtype=check_dtype, obj=key
+        )
+
+
+def split_ids(results: List[Dict[str, Any]]) -> Tuple[Dict[str, str], Dict[str, str]]:
+    """(Backtest_id -> result_key, result_key -> Backtest_id)"""
+    forward = {r["Backtest_id"]: result_key(r) for r in results}
+    return forward, {v: k for k, v in forward.items()}
+
+
+def calculator_metadata(
+    groups: Iterable[Tuple[Any, pd.DataFrame]], time_unit: float, risk_free_rate: float
+) -> Tuple[List[Dict[str, Any]], List[pd.DataFrame]]:
+    """逐回測以 MetricsCalculator 計算績效（參考實作），回傳 (JSON 化的指標, 附回撤/BAH 的記錄)"""
+    metadata, frames = [], []
+    for backtest_id, group in groups:
+        group = MetricsExporter.add_drawdown_bah(group)
+        frames.append(group)
+        calculator = MetricsCalculatorMetricTracker(group, time_unit, risk_free_rate)
+        entry = {"Backtest_id": backtest_id}
+        entry.update(calculator.calc_strategy_metrics())
+        entry.update(calculator.calc_bah_metrics())
+        metadata.append(entry)
+    return json.loads(json.dumps(metadata)), frames
+
+
+def _same_metric(a: Any, b: Any) -> bool:
+    if a is None or b is None:
+        return a is None and b is None
+    a, b = float(a), float(b)
+    if math.isnan(a) or math.isnan(b):
+        return math.isnan(a) and math.isnan(b)
+    return abs(a - b) <= 1e-9 * max(1.0, abs(a), abs(b))
+
+
+def assert_same_metadata(
+    expected: List[Dict[str, Any]], actual: List[Dict[str, Any]]
+) -> None:
+    """逐回測比對績效指標（相對誤差 1e-9，整數指標需仍為整數）"""
+    expected = sorted(expected, key=lambda m: m["Backtest_id"])
+    actual = sorted(actual, key=lambda m: m["Backtest_id"])
+    assert [m["Backtest_id"] for m in actual] == [m["Backtest_id"] for m in expected]
+    for reference, batch in zip(expected, actual):
+        assert [key for key in batch if key in reference] == list(reference)
+        for key, value in reference.items():
+            if key == "Backtest_id":
+                continue
+            assert _same_metric(value, batch[key]), (
+                reference["Backtest_id"],
+                key,
+                value,
+                batch[key],
+            )
+            assert isinstance(value, int) == isinstance(batch[key], int), key
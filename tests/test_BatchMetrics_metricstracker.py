@@ -0,0 +1,214 @@
+"""
+BatchMetrics_metricstracker 測試：批量矩陣績效與逐回測 MetricsCalculator 一致
+"""
+
+import json
+import os
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from backtester.SparseRecords_backtester import SparseRecords_backtester
+from backtester.TradeRecordExporter_backtester import TradeRecordExporter_backtester
+from backtester.VectorBacktestEngine_backtester import VectorBacktestEngine
+from metricstracker.BatchMetrics_metricstracker import BatchMetricsMetricTracker
+from metricstracker.MetricsExporter_metricstracker import MetricsExporter
+from tests.helpers import assert_same_metadata, calculator_metadata, make_backtest_config
+
+
+@pytest.mark.parametrize("result_mode", ["full", "trades_only"])
+def test_exported_metrics_match_calculator(ohlcv, tmp_path, monkeypatch, result_mode):
+    monkeypatch.setattr(
+        TradeRecordExporter_backtester,
+        "default_output_dir",
+        staticmethod(lambda: str(tmp_path / "backtester")),
+    )
+    results = VectorBacktestEngine(ohlcv, "1D").run_backtests(
+        dict(make_backtest_config(), result_mode=result_mode)
+    )
+    exporter = TradeRecordExporter_backtester(
+        pd.DataFrame(),
+        "1D",
+        results=results,
+        data=ohlcv,
+        Backtest_id="batch",
+        transaction_cost=0.001,
+        slippage=0.0005,
+        trade_delay=1,
+        trade_price="open",
+    )
+    exporter.export_to_parquet()
+    path = exporter.last_exported_path
+    df = pd.read_parquet(path)
+    if result_mode == "full":
+        groups = list(df.groupby("Backtest_id"))
+    else:
+        store = SparseRecords_backtester.load_bar_store(
+            SparseRecords_backtester.bar_store_path(path)
+        )
+        groups = list(SparseRecords_backtester.iter_expanded_records(df, store))
+    expected, frames = calculator_metadata(groups, 365, 0.04)
+
+    MetricsExporter.export(df, path, 365, 0.04)
+    name = os.path.splitext(os.path.basename(path))[0]
+    out_dir = tmp_path / "metricstracker"
+    with open(out_dir / f"{name}_metadata.json", encoding="utf-8") as f:
+        assert_same_metadata(expected, json.load(f))
+
+    # _metrics.parquet 的逐K線欄位（回撤、Buy & Hold）與逐回測計算相同
+    exported = pd.read_parquet(out_dir / f"{name}_metrics.parquet")
+    reference = pd.concat([f.dropna(axis=1, how="all") for f in frames], ignore_index=True)
+    assert list(exported.columns) == list(reference.columns)
+    for column in reference.columns:
+        if reference[column].equals(exported[column]):
+            continue
+        np.testing.assert_allclose(
+            pd.to_numeric(exported[column], errors="coerce"),
+            pd.to_numeric(reference[column], errors="coerce"),
+            rtol=1e-12,
+            err_msg=column,
+        )
+
+
+def _edge_case_records():
+    """含 NaN 收益、無交易、全虧損交易的合成 records"""
+    rng = np.random.default_rng(1)
+    n_bars = 300
+    frames = []
+    for j in range(6):
+        equity = 100 * np.cumprod(1 + rng.normal(0, 0.01, n_bars))
+        returns = np.r_[0.0, equity[1:] / equity[:-1] - 1]
+        trade_return = np.where(rng.random(n_bars) < 0.05, rng.normal(0, 0.02, n_bars), np.nan)
+        trade_action = np.where(
+            ~np.isnan(trade_return), 4, np.where(rng.random(n_bars) < 0.05, 1, 0)
+        )
+        position = (rng.random(n_bars) < 0.5).astype(float)
+        if j == 1:  # 從未交易
+            equity[:] = 100.0
+            returns[:] = 0.0
+            trade_return[:] = np.nan
+            trade_action[:] = 0
+            position[:] = 0.0
+        if j == 2:
+            returns[5] = np.nan
+            position[7] = np.nan
+        if j == 3:  # 全部交易虧損
+            trade_return = -np.abs(trade_return)
+        frames.append(
+            pd.DataFrame(
+                {
+                    "Backtest_id": f"id{5 - j}",
+                    "Equity_value": equity,
+                    "Return": returns,
+                    "Close": 50 * np.cumprod(1 + rng.normal(0, 0.01, n_bars)),
+                    "Trade_return": trade_return,
+                    "Trade_action": trade_action,
+                    "Position_size": position,
+                }
+            )
+        )
+    return pd.concat(frames, ignore_index=True)
+
+
+@pytest.mark.parametrize(
+    "dropped", [[], ["Trade_return"], ["Position_size", "Trade_action"]]
+)
+def test_edge_cases_match_calculator(dropped):
+    records = _edge_case_records().drop(columns=dropped)
+    expected, _ = calculator_metadata(list(records.groupby("Backtest_id")), 252, 0.02)
+    batch = BatchMetricsMetricTracker.compute(
+        BatchMetricsMetricTracker.load_matrices(records), 252, 0.02
+    )
+    actual = json.loads(json.dumps(BatchMetricsMetricTracker.to_batch_metadata(batch)))
+    assert_same_metadata(expected, actual)
+
+
+def test_unequal_lengths_are_rejected():
+    assert BatchMetricsMetricTracker.load_matrices(_edge_case_records().iloc[:-1]) is None
+
+
+def _naive_path_metrics(equity, trade_returns, positions):
+    """逐K線 Python 迴圈計算路徑指標（參考實作）"""
+    peak = np.nan
+    drawdown = []
+    for level in equity:
+        if not np.isnan(level) and (np.isnan(peak) or level > peak):
+            peak = level
+        if np.isnan(level) or np.isnan(peak):
+            drawdown.append(np.nan)
+        elif peak == 0:
+            drawdown.append(np.nan if level == 0 else -np.inf)
+        else:
+            drawdown.append((level - peak) / peak)
+    drawdown = np.array(drawdown)
+
+    longest = current = 0
+    for value in drawdown:
+        current = current + 1 if value < 0 else 0
+        longest = max(longest, current)
+    valid = ~np.isnan(drawdown)
+    max_drawdown = drawdown[valid].min()
+    trough = int(np.flatnonzero(drawdown == max_drawdown)[0])
+    recovered = np.flatnonzero(drawdown[trough:] >= 0)
+    recovery = 0.0 if max_drawdown == 0 else (float(recovered[0]) if len(recovered) else np.nan)
+
+    wins = losses = longest_wins = longest_losses = 0
+    for value in trade_returns[~np.isnan(trade_returns)]:
+        wins, losses = (wins + 1, 0) if value > 0 else (0, losses + 1) if value < 0 else (0, 0)
+        longest_wins = max(longest_wins, wins)
+        longest_losses = max(longest_losses, losses)
+
+    holding = longest_holding = 0
+    for active in positions != 0:
+        holding = holding + 1 if active else 0
+        longest_holding = max(longest_holding, holding)
+    return drawdown, {
+        "Max_drawdown": max_drawdown,
+        "Max_drawdown_duration": longest,
+        "Recovery_time": recovery,
+        "Max_consecutive_losses": longest_losses,
+        "Max_consecutive_wins": longest_wins,
+        "Max_holding_period": longest_holding,
+        "Exposure_bars": int((positions != 0).sum()),
+    }
+
+
+def test_path_metrics_match_naive_loops():
+    records = _edge_case_records()
+    batch = BatchMetricsMetricTracker.load_matrices(records)
+    equity = batch["Equity_value"].copy()
+    equity[[5, 90, 91], 0] = np.nan  # NaN 權益
+    equity[200:, 4] = 0.0  # 權益歸零
+    equity[:, 5] = 100 + np.arange(len(equity), dtype=float)  # 從未回撤
+
+    path = BatchMetricsMetricTracker.path_metrics(
+        equity, batch["Trade_return"], batch["Position_size"]
+    )
+    assert path["Drawdown"].shape == equity.shape
+    for j in range(equity.shape[1]):
+        drawdown, expected = _naive_path_metrics(
+            equity[:, j], batch["Trade_return"][:, j], batch["Position_size"][:, j]
+        )
+        np.testing.assert_array_equal(path["Drawdown"][:, j], drawdown)
+        for key, value in expected.items():
+            np.testing.assert_array_equal(path[key][j], value, err_msg=f"{key}[{j}]")
+
+    # 缺少交易/持倉欄位時對應指標為 NaN
+    equity_only = BatchMetricsMetricTracker.path_metrics(equity)
+    assert np.isnan(equity_only["Max_consecutive_losses"]).all()
+    assert np.isnan(equity_only["Exposure_bars"]).all()
+    np.testing.assert_array_equal(equity_only["Drawdown"], path["Drawdown"])
+
+
+def test_drawdown_matches_cummax_formula():
+    records = _edge_case_records()
+    for _, group in records.groupby("Backtest_id"):
+        frame = MetricsExporter.add_drawdown_bah(group)
+        equity = group["Equity_value"]
+        running_max = equity.cummax()
+        bah_max = frame["BAH_Equity"].cummax()
+        np.testing.assert_array_equal(frame["Drawdown"], (equity - running_max) / running_max)
+        np.testing.assert_array_equal(
+            frame["BAH_Drawdown"], (frame["BAH_Equity"] - bah_max) / bah_max
+        )
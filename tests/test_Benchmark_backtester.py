@@ -0,0 +1,37 @@
+"""
+Benchmark_backtester 冒煙測試：小規模基準測試記錄全部階段、跳過超限案例並寫入歷史
+"""
+
+import json
+
+from backtester.Benchmark_backtester import STAGES, Benchmark_backtester, main
+
+
+def test_small_benchmark_records_every_stage(tmp_path):
+    history_path = tmp_path / "benchmark_history.json"
+    argv = "--bars 600 --combos 9,50 --repeat 1 --record-tasks 3 --max-cells 10000"
+    entry = main(argv.split() + ["--label", "smoke", "--history", str(history_path)])
+
+    measured, skipped = entry["cases"]
+    assert (measured["n_bars"], measured["n_combos"], measured["record_tasks"]) == (600, 9, 3)
+    assert set(measured["stages"]) == set(STAGES)
+    assert all(seconds >= 0 for seconds in measured["stages"].values())
+    assert skipped["n_combos"] == 50 and "skipped" in skipped
+    assert entry["label"] == "smoke"
+    assert entry["settings"]["record_tasks"] == 3
+
+    history = json.loads(history_path.read_text(encoding="utf-8"))
+    assert [h["label"] for h in history] == ["smoke"]
+    previous, _ = Benchmark_backtester.previous_stages(history, 600, 9, entry["settings"])
+    assert previous == measured["stages"]
+    assert Benchmark_backtester.previous_stages(
+        history, 600, 9, dict(entry["settings"], result_mode="trades_only")
+    ) == (None, None)
+
+
+def test_no_save_leaves_history_untouched(tmp_path):
+    history_path = tmp_path / "benchmark_history.json"
+    argv = "--bars 500 --combos 4 --repeat 1 --record-tasks 2 --result-mode trades_only"
+    entry = main(argv.split() + ["--history", str(history_path), "--no-save"])
+    assert entry["cases"][0]["result_mode"] == "trades_only"
+    assert not history_path.exists()
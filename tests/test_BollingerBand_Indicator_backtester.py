@@ -0,0 +1,80 @@
+"""
+BollingerBand_Indicator_backtester 測試：O(n) 滑動平均/標準差需與原 O(n·w) 實現一致
+"""
+
+import numpy as np
+import pytest
+
+from backtester.BollingerBand_Indicator_backtester import (
+    _rolling_mean_std_batch_njit,
+    _rolling_mean_std_njit,
+)
+
+
+def _reference_mean_std(data, window):
+    """原本逐窗口兩階段計算的滾動平均與母體標準差"""
+    n = len(data)
+    mean = np.zeros(n)
+    std = np.zeros(n)
+    for i in range(window - 1, n):
+        values = data[i - window + 1 : i + 1]
+        mean_val = 0.0
+        for value in values:
+            mean_val += value
+        mean_val /= window
+        var_val = 0.0
+        for value in values:
+            var_val += (value - mean_val) ** 2
+        mean[i] = mean_val
+        std[i] = np.sqrt(var_val / window)
+    return mean, std
+
+
+def _series(n=300, seed=0):
+    rng = np.random.default_rng(seed)
+    return 100 + rng.normal(0, 1, n).cumsum()
+
+
+def _with_non_finite():
+    data = _series()
+    data[0] = np.nan
+    data[75] = np.nan
+    data[140] = np.inf
+    data[141] = -np.inf
+    data[200] = np.inf
+    data[260:263] = np.nan
+    return data
+
+
+@pytest.mark.parametrize("window", [1, 5, 20, 33])
+@pytest.mark.parametrize(
+    "data", [_series(), _with_non_finite()], ids=["finite", "nan_inf"]
+)
+def test_rolling_mean_std_matches_reference(data, window):
+    with np.errstate(invalid="ignore"):
+        expected_mean, expected_std = _reference_mean_std(data, window)
+    mean, std = _rolling_mean_std_njit(data, window)
+    np.testing.assert_allclose(mean, expected_mean, rtol=1e-9, atol=1e-9)
+    np.testing.assert_allclose(std, expected_std, rtol=1e-7, atol=1e-9)
+
+
+def test_non_finite_values_only_affect_windows_containing_them():
+    data = _series()
+    data[0] = np.nan
+    data[100] = np.nan
+    mean, std = _rolling_mean_std_njit(data, 20)
+    # 前導 NaN 只影響第一個完整窗口；中段 NaN 只影響包含它的 20 個窗口
+    assert np.isnan(mean).sum() == 1 + 20
+    assert np.isnan(std).sum() == 1 + 20
+    assert np.isnan(mean[100:120]).all()
+    assert np.isfinite(mean[120:]).all()
+
+
+def test_batch_matches_single_window_kernel():
+    data = _with_non_finite()
+    windows = np.array([5, 20, 33], dtype=np.int64)
+    mean_matrix, std_matrix = _rolling_mean_std_batch_njit(data, windows)
+    for k, window in enumerate(windows):
+        mean, std = _rolling_mean_std_njit(data, window)
+        np.testing.assert_array_equal(mean_matrix[k], mean)
+        np.testing.assert_array_equal(std_matrix[k], std)
@@ -0,0 +1,148 @@
+"""
+Checkpoint_backtester 測試：中斷後續跑與不中斷回測一致、串流續跑沿用導出檔案
+"""
+
+import json
+import os
+
+import numpy as np
+import pytest
+
+from backtester.VectorBacktestEngine_backtester import VectorBacktestEngine
+from tests.helpers import (
+    assert_same_records,
+    canonical_records,
+    make_backtest_config,
+    result_key,
+)
+
+
+class _Crash(RuntimeError):
+    pass
+
+
+def _checkpoint_config(checkpoint_dir, **extra):
+    config = make_backtest_config()
+    config["max_memory_mb"] = 0.05
+    config["checkpoint"] = {"enabled": True, "checkpoint_dir": str(checkpoint_dir)}
+    config.update(extra)
+    return config
+
+
+def _crashing_callback(crash_at, exports_dir=None):
+    calls = []
+
+    def callback(chunk_results):
+        calls.append(chunk_results)
+        if len(calls) == crash_at:
+            raise _Crash()
+        if exports_dir is None:
+            return None
+        path = os.path.join(str(exports_dir), f"export_{len(calls)}.parquet")
+        open(path, "w").close()
+        return [path]
+
+    return callback, calls
+
+
+def _manifest(checkpoint_dir):
+    (run_dir,) = [os.path.join(checkpoint_dir, name) for name in os.listdir(checkpoint_dir)]
+    with open(os.path.join(run_dir, "manifest.json"), encoding="utf-8") as f:
+        return run_dir, json.load(f)
+
+
+@pytest.mark.parametrize("result_mode", ["full", "trades_only"])
+def test_resumed_run_matches_uninterrupted_run(ohlcv, tmp_path, result_mode):
+    extra = {"result_mode": result_mode, "incremental": True, "inline_metrics": True}
+    callback, _ = _crashing_callback(crash_at=3)
+    with pytest.raises(_Crash):
+        VectorBacktestEngine(ohlcv, "1D").run_backtests(
+            _checkpoint_config(tmp_path, **extra), chunk_callback=callback
+        )
+    run_dir, manifest = _manifest(str(tmp_path))
+    assert len(manifest["chunks"]) == 2
+    assert not any(name.endswith(".pkl") for name in os.listdir(run_dir))
+
+    resumed = VectorBacktestEngine(ohlcv, "1D").run_backtests(
+        _checkpoint_config(tmp_path, **extra)
+    )
+    config = make_backtest_config()
+    config.update(extra)
+    expected = VectorBacktestEngine(ohlcv, "1D").run_backtests(config)
+
+    assert not os.path.exists(run_dir)
+    assert_same_records(canonical_records(expected), canonical_records(resumed))
+    resumed_by_key = {result_key(r): r for r in resumed}
+    for result in expected:
+        actual = resumed_by_key[result_key(result)]
+        assert actual["metrics"] == pytest.approx(result["metrics"], nan_ok=True)
+        np.testing.assert_array_equal(
+            actual["end_state"]["state"], result["end_state"]["state"]
+        )
+        for key, value in result.get("bar_data", {}).items():
+            if isinstance(value, np.ndarray):
+                assert actual["bar_data"][key].dtype == value.dtype
+                np.testing.assert_array_equal(actual["bar_data"][key], value)
+
+
+def _keys(chunks):
+    return {result_key(r) for chunk in chunks for r in chunk}
+
+
+def test_streamed_resume_reuses_or_replays_exports(ohlcv, full_results, tmp_path):
+    checkpoint_dir = tmp_path / "checkpoints"
+    exports_dir = tmp_path / "exports"
+    exports_dir.mkdir()
+    callback, first_calls = _crashing_callback(crash_at=4, exports_dir=exports_dir)
+    with pytest.raises(_Crash):
+        VectorBacktestEngine(ohlcv, "1D").run_backtests(
+            _checkpoint_config(checkpoint_dir), chunk_callback=callback
+        )
+    _, manifest = _manifest(str(checkpoint_dir))
+    recorded = [path for chunk in manifest["chunks"] for path in chunk["exported_files"]]
+    assert len(recorded) == 3
+
+    # 刪除第二個區塊的導出檔案：續跑時沿用其餘檔案，該區塊以檢查點結果重新導出
+    os.remove(recorded[1])
+    callback, calls = _crashing_callback(crash_at=0, exports_dir=exports_dir)
+    engine = VectorBacktestEngine(ohlcv, "1D")
+    streamed = engine.run_backtests(
+        _checkpoint_config(checkpoint_dir), chunk_callback=callback
+    )
+
+    assert streamed == []
+    assert engine.resumed_exports == [recorded[0], recorded[2]]
+    assert _keys(calls[:1]) == _keys(first_calls[1:2])
+    assert _keys(first_calls[0:1]) | _keys(first_calls[2:3]) | _keys(calls) == {
+        result_key(r) for r in full_results
+    }
+    assert all(r.get("metrics") is not None for chunk in calls for r in chunk)
+
+
+def test_checkpoint_maps_results_by_backtest_id(ohlcv, tmp_path, monkeypatch, caplog):
+    # 結果順序被打亂且缺少一個任務：其餘任務仍記錄於檢查點，缺少的任務記錄警告後於續跑時重算
+    generate = VectorBacktestEngine._generate_all_results_vectorized
+
+    def reordered(self, *args, **kwargs):
+        return generate(self, *args, **kwargs)[::-1][1:]
+
+    monkeypatch.setattr(
+        VectorBacktestEngine, "_generate_all_results_vectorized", reordered
+    )
+    callback, calls = _crashing_callback(crash_at=3)
+    config = _checkpoint_config(tmp_path, max_memory_mb=0.3)
+    with caplog.at_level("WARNING", logger="VectorBacktestEngine"):
+        with pytest.raises(_Crash):
+            VectorBacktestEngine(ohlcv, "1D").run_backtests(config, chunk_callback=callback)
+    assert sum("續跑時將重新計算" in message for message in caplog.messages) == 2
+    _, manifest = _manifest(str(tmp_path))
+    assert [len(chunk["tasks"]) for chunk in manifest["chunks"]] == [
+        len(chunk) for chunk in calls[:2]
+    ]
+
+    monkeypatch.undo()
+    resumed = VectorBacktestEngine(ohlcv, "1D").run_backtests(
+        _checkpoint_config(tmp_path, max_memory_mb=0.3)
+    )
+    expected = VectorBacktestEngine(ohlcv, "1D").run_backtests(make_backtest_config())
+    assert_same_records(canonical_records(expected), canonical_records(resumed))
@@ -0,0 +1,116 @@
+"""
+DataImporter_plotter 測試：引擎內績效（inline_metrics）與 MetricsCalculator 一致，且只有
+_metadata.json 的回測可直接載入繪圖
+"""
+
+import json
+import os
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from backtester.SparseRecords_backtester import SparseRecords_backtester
+from backtester.TradeRecordExporter_backtester import TradeRecordExporter_backtester
+from backtester.VectorBacktestEngine_backtester import VectorBacktestEngine
+from metricstracker.MetricsExporter_metricstracker import MetricsExporter
+from plotter.DataImporter_plotter import DataImporterPlotter
+from tests.helpers import assert_same_metadata, calculator_metadata, make_backtest_config
+
+
+@pytest.fixture
+def records_dir(tmp_path, monkeypatch):
+    monkeypatch.setattr(
+        TradeRecordExporter_backtester,
+        "default_output_dir",
+        staticmethod(lambda: str(tmp_path / "backtester")),
+    )
+    return tmp_path
+
+
+def _export_inline(data, result_mode, trade_price="open", trade_delay=1):
+    config = make_backtest_config(trade_price, trade_delay)
+    config.update(result_mode=result_mode, inline_metrics=True)
+    results = VectorBacktestEngine(data, "1D").run_backtests(config)
+    assert all("metrics" in r for r in results if r["error"] is None)
+    exporter = TradeRecordExporter_backtester(
+        pd.DataFrame(),
+        "1D",
+        results=results,
+        data=data,
+        Backtest_id="inline",
+        transaction_cost=0.001,
+        slippage=0.0005,
+        trade_delay=trade_delay,
+        trade_price=trade_price,
+    )
+    exporter.export_to_parquet()
+    return exporter.last_exported_path
+
+
+def _reference(path):
+    """讀回 Parquet 後逐回測以 MetricsCalculator 計算"""
+    df = pd.read_parquet(path)
+    bar_store = SparseRecords_backtester.bar_store_path(path)
+    if os.path.exists(bar_store):
+        store = SparseRecords_backtester.load_bar_store(bar_store)
+        groups = list(SparseRecords_backtester.iter_expanded_records(df, store))
+    else:
+        groups = list(df.groupby("Backtest_id"))
+    return calculator_metadata(groups, 365, 0.04)
+
+
+@pytest.mark.parametrize(
+    "result_mode,trade_price,trade_delay",
+    [("full", "open", 1), ("trades_only", "close", 0)],
+)
+def test_inline_metrics_match_calculator(
+    ohlcv, records_dir, result_mode, trade_price, trade_delay
+):
+    path = _export_inline(ohlcv, result_mode, trade_price, trade_delay)
+    name = os.path.splitext(os.path.basename(path))[0]
+    metricstracker_dir = records_dir / "metricstracker"
+    assert not (metricstracker_dir / f"{name}_metrics.parquet").exists()
+    with open(metricstracker_dir / f"{name}_metadata.json", encoding="utf-8") as f:
+        inline = json.load(f)
+
+    expected, _ = _reference(path)
+    assert_same_metadata(expected, inline)
+
+
+@pytest.mark.parametrize("result_mode", ["full", "trades_only"])
+def test_plotter_loads_inline_runs(ohlcv, records_dir, result_mode):
+    path = _export_inline(ohlcv, result_mode)
+    name = os.path.splitext(os.path.basename(path))[0]
+    metricstracker_dir = records_dir / "metricstracker"
+    metadata_path = str(metricstracker_dir / f"{name}_metadata.json")
+
+    importer = DataImporterPlotter(str(metricstracker_dir))
+    assert importer.scan_parquet_files() == [metadata_path]
+
+    _, frames = _reference(path)
+    curves = {
+        frame["Backtest_id"].iloc[0]: frame[["Equity_value", "BAH_Equity"]].to_numpy()
+        for frame in frames
+    }
+    for items in (
+        importer._load_single_parquet_file_optimized(metadata_path),
+        importer.load_parquet_file(metadata_path),
+    ):
+        assert {item["Backtest_id"] for item in items} == set(curves)
+        for item in items:
+            expected = curves[item["Backtest_id"]]
+            assert "Sharpe" in item["metrics"]
+            assert len(item["equity_curve"]) == len(ohlcv)
+            np.testing.assert_allclose(
+                item["equity_curve"]["Equity_value"], expected[:, 0], rtol=1e-12
+            )
+            np.testing.assert_allclose(
+                item["bah_curve"]["BAH_Equity"], expected[:, 1], rtol=1e-12
+            )
+
+    # 重新計算寫出 _metrics.parquet 後改以該檔案代表此回測
+    MetricsExporter.export(pd.read_parquet(path), path, 365, 0.04)
+    assert importer.scan_parquet_files() == [
+        str(metricstracker_dir / f"{name}_metrics.parquet")
+    ]
@@ -0,0 +1,84 @@
+"""
+IncrementalState_backtester 測試：配置驅動的增量回測與完整重跑一致
+"""
+
+import pandas as pd
+import pytest
+
+from autorunner.BacktestRunner_autorunner import BacktestRunnerAutorunner
+from backtester.TradeRecordExporter_backtester import TradeRecordExporter_backtester
+from tests.helpers import assert_same_records, canonical_frame, make_autorunner_config
+
+
+@pytest.fixture
+def output_dir(tmp_path, monkeypatch):
+    monkeypatch.setattr(
+        TradeRecordExporter_backtester,
+        "default_output_dir",
+        staticmethod(lambda: str(tmp_path)),
+    )
+    return tmp_path
+
+
+def _records_by_key(parquet_path, keys_by_id):
+    frame = pd.read_parquet(parquet_path)
+    return {
+        keys_by_id[backtest_id]: canonical_frame(group)
+        for backtest_id, group in frame.groupby("Backtest_id", sort=False)
+    }
+
+
+def test_config_incremental_run_matches_full_rerun(ohlcv, output_dir):
+    runner = BacktestRunnerAutorunner()
+    config = make_autorunner_config(incremental=True)
+
+    first = runner.run_backtest(ohlcv.iloc[:240].reset_index(drop=True), config)
+    assert first["incremental"] is None
+    (parquet_path,) = first["exported_files"]
+    keys_by_id = {
+        r["Backtest_id"]: f"{r['strategy_id']}|{r['params']}" for r in first["results"]
+    }
+
+    for n_bars in (270, len(ohlcv)):
+        update = runner.run_backtest(ohlcv.iloc[:n_bars].reset_index(drop=True), config)
+        assert update["results"] == []
+        assert update["exported_files"] == [parquet_path]
+        assert update["incremental"]["new_bars"] == 30
+        assert update["incremental"]["skipped_backtests"] == 0
+
+    full = runner.run_backtest(ohlcv, make_autorunner_config())
+    expected = _records_by_key(
+        full["exported_files"][0],
+        {r["Backtest_id"]: f"{r['strategy_id']}|{r['params']}" for r in full["results"]},
+    )
+    assert_same_records(expected, _records_by_key(parquet_path, keys_by_id), check_dtype=False)
+
+
+def test_config_incremental_falls_back_to_full_run(ohlcv, output_dir):
+    runner = BacktestRunnerAutorunner()
+    runner.run_backtest(ohlcv.iloc[:240].reset_index(drop=True), make_autorunner_config(incremental=True))
+
+    # 擴大參數網格：既有狀態未涵蓋所有組合，改為完整回測並另存新 Parquet
+    config = make_autorunner_config(incremental=True)
+    config["backtester"]["indicator_params"]["MA1_strategy_1"]["ma_range"] = "5:20:5"
+    expanded = runner.run_backtest(ohlcv, config)
+    assert expanded["incremental"] is None
+    assert len(expanded["results"]) == 16
+
+    # 既有K線被修改：指紋不符，同樣完整回測
+    changed = ohlcv.copy()
+    changed.loc[0, "Close"] *= 1.01
+    rerun = runner.run_backtest(changed, make_autorunner_config(incremental=True))
+    assert rerun["incremental"] is None
+    assert len(rerun["results"]) == 15
+
+
+def test_incremental_with_dataset_store_warns_and_exports_file(ohlcv, output_dir, caplog):
+    runner = BacktestRunnerAutorunner()
+    with caplog.at_level("WARNING", logger="lo2cin4bt.autorunner.backtest"):
+        outcome = runner.run_backtest(
+            ohlcv, make_autorunner_config(incremental=True, result_store="dataset")
+        )
+    (parquet_path,) = outcome["exported_files"]
+    assert parquet_path.endswith(".parquet")
+    assert any("result_store" in record.getMessage() for record in caplog.records)
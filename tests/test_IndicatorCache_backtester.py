@@ -0,0 +1,46 @@
+"""
+IndicatorCache_backtester 測試：緩存命中結果一致、命令列與配置清除
+"""
+
+from backtester.IndicatorCache_backtester import main
+from backtester.VectorBacktestEngine_backtester import VectorBacktestEngine
+from tests.helpers import assert_same_records, canonical_records, make_backtest_config
+
+
+def _cached_run(ohlcv, cache_dir, **cache_options):
+    config = make_backtest_config()
+    config["indicator_cache"] = {"enabled": True, "cache_dir": cache_dir, **cache_options}
+    engine = VectorBacktestEngine(ohlcv, "1D")
+    results = engine.run_backtests(config)
+    return results, engine.indicator_cache.info()
+
+
+def test_cached_runs_match_uncached_run(ohlcv, full_results, tmp_path):
+    cache_dir = str(tmp_path / "cache")
+    cold, cold_stats = _cached_run(ohlcv, cache_dir)
+    warm, warm_stats = _cached_run(ohlcv, cache_dir)
+
+    assert cold_stats["entries"] > 0
+    assert warm_stats["hits"] > cold_stats["hits"]
+    assert warm_stats["misses"] < cold_stats["misses"]
+    assert warm_stats["entries"] == cold_stats["entries"]
+    expected = canonical_records(full_results)
+    assert_same_records(expected, canonical_records(cold))
+    assert_same_records(expected, canonical_records(warm))
+
+
+def test_cache_cli_and_config_clear(ohlcv, tmp_path):
+    cache_dir = str(tmp_path / "cache")
+    _, stats = _cached_run(ohlcv, cache_dir)
+
+    info = main(["info", "--cache-dir", cache_dir])
+    assert info["entries"] == stats["entries"]
+    assert sum(info["by_indicator"].values()) == info["entries"]
+
+    _, warm_stats = _cached_run(ohlcv, cache_dir)
+    _, cleared_stats = _cached_run(ohlcv, cache_dir, clear=True)
+    assert cleared_stats["hits"] == stats["hits"] < warm_stats["hits"]
+
+    cleared = main(["clear", "--cache-dir", cache_dir])
+    assert cleared["removed"] == cleared_stats["entries"]
+    assert main(["info", "--cache-dir", cache_dir])["entries"] == 0
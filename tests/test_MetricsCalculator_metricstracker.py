@@ -0,0 +1,148 @@
+"""
+MetricsCalculator_metricstracker 測試：滾動/分段指標與 pandas 逐窗口計算一致，平坦窗口不產生極大夏普
+"""
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from metricstracker.BatchMetrics_metricstracker import BatchMetricsMetricTracker
+from metricstracker.MetricsCalculator_metricstracker import (
+    ROLLING_METRICS,
+    MetricsCalculatorMetricTracker,
+)
+from metricstracker.MetricsExporter_metricstracker import MetricsExporter
+
+TIME_UNIT = 365
+RISK_FREE_RATE = 0.04
+WINDOW = 30
+
+
+@pytest.fixture(scope="module")
+def series():
+    rng = np.random.default_rng(0)
+    n_bars, n_series = 400, 5
+    returns = rng.normal(0.0005, 0.01, (n_bars, n_series))
+    returns[0] = 0.0
+    returns[100:110, 2] = np.nan
+    returns[:, 3] = np.abs(returns[:, 3])  # 無負收益：Sortino 為 NaN
+    equity = 100 * np.cumprod(1 + np.nan_to_num(returns), axis=0)
+    equity[50, 4] = np.nan
+    return equity, returns
+
+
+def _pandas_rolling(equity, returns):
+    r = pd.Series(returns)
+    e = pd.Series(equity)
+    rf = RISK_FREE_RATE / TIME_UNIT
+    std = r.rolling(WINDOW, min_periods=WINDOW).std()
+    mean = r.rolling(WINDOW, min_periods=WINDOW).mean()
+
+    def sortino(x):
+        negative = x[x < 0]
+        if not len(negative):
+            return np.nan
+        return (np.nanmean(x) - rf) / np.sqrt(np.mean(negative**2)) * np.sqrt(TIME_UNIT)
+
+    return {
+        "Rolling_return": e / e.shift(WINDOW) - 1,
+        "Rolling_std": std * np.sqrt(TIME_UNIT),
+        "Rolling_sharpe": ((mean - rf) / std * np.sqrt(TIME_UNIT)).where(std > 0),
+        "Rolling_sortino": r.rolling(WINDOW, min_periods=WINDOW).apply(sortino, raw=True),
+        "Rolling_drawdown": (e / e.rolling(WINDOW, min_periods=1).max() - 1).where(
+            np.arange(len(e)) >= WINDOW - 1
+        ),
+    }
+
+
+def test_rolling_metrics_match_pandas(series):
+    equity, returns = series
+    out = MetricsCalculatorMetricTracker.rolling_metrics(
+        equity, returns, WINDOW, TIME_UNIT, RISK_FREE_RATE
+    )
+    assert set(out) == set(ROLLING_METRICS)
+    for j in range(returns.shape[1]):
+        for key, expected in _pandas_rolling(equity[:, j], returns[:, j]).items():
+            assert out[key].dtype == np.float32
+            np.testing.assert_allclose(
+                out[key][:, j],
+                expected.to_numpy(dtype=float),
+                rtol=2e-6,
+                atol=2e-7,
+                err_msg=f"{key}[{j}]",
+            )
+
+    single = MetricsCalculatorMetricTracker.rolling_metrics(
+        equity[:, 0], returns[:, 0], WINDOW, TIME_UNIT, RISK_FREE_RATE
+    )
+    np.testing.assert_array_equal(single["Rolling_sharpe"], out["Rolling_sharpe"][:, 0])
+
+
+@pytest.mark.parametrize("flat_value", [0.0, -0.002])
+def test_flat_window_has_no_sharpe(flat_value):
+    rng = np.random.default_rng(1)
+    returns = rng.normal(0.001, 0.02, 200)
+    returns[0] = 0.0
+    returns[50:120] = flat_value  # 空倉期（或固定收益）：窗口內收益率全部相同
+    returns[90] = np.nan  # 含 NaN 的窗口有效值不足 min_periods，結果為 NaN
+    equity = 100 * np.cumprod(1 + np.nan_to_num(returns))
+
+    out = MetricsCalculatorMetricTracker.rolling_metrics(
+        equity, returns, WINDOW, TIME_UNIT, RISK_FREE_RATE
+    )
+    flat = slice(50 + WINDOW - 1, 120)
+    std = out["Rolling_std"][flat]
+    assert (std[~np.isnan(std)] == 0).all() and (~np.isnan(std)).sum() > 10
+    assert np.isnan(out["Rolling_sharpe"][flat]).all()
+    assert np.nanmax(np.abs(out["Rolling_sharpe"])) < 100
+
+    # 窗口離開平坦區後回到正常值，與 pandas 一致
+    expected = _pandas_rolling(equity, returns)["Rolling_sharpe"].to_numpy(dtype=float)
+    np.testing.assert_allclose(
+        out["Rolling_sharpe"][120 + WINDOW :], expected[120 + WINDOW :], rtol=2e-6
+    )
+
+
+def test_period_metrics_match_pandas(series):
+    equity, returns = series
+    times = pd.date_range("2020-01-01", periods=len(equity), freq="D")
+    labels, out = MetricsCalculatorMetricTracker.period_metrics(
+        equity, returns, times, "Y", TIME_UNIT, RISK_FREE_RATE
+    )
+    assert [str(label) for label in labels] == ["2020", "2021"]
+
+    rf = RISK_FREE_RATE / TIME_UNIT
+    for j in range(returns.shape[1]):
+        frame = pd.DataFrame({"e": equity[:, j], "r": returns[:, j]}, index=times)
+        previous = None
+        for b, (_, group) in enumerate(frame.groupby(frame.index.year)):
+            base = frame["e"].iloc[0] if previous is None else previous
+            std = group["r"].std()
+            path = pd.concat([pd.Series([base]), group["e"].dropna()])
+            expected = {
+                "Return": group["e"].iloc[-1] / base - 1,
+                "Std": std * np.sqrt(TIME_UNIT),
+                "Sharpe": (group["r"].mean() - rf) / std * np.sqrt(TIME_UNIT),
+                "Max_drawdown": min(0.0, (path / path.cummax() - 1).min()),
+            }
+            for key, value in expected.items():
+                np.testing.assert_allclose(
+                    out[key][b, j], value, rtol=2e-6, atol=2e-7, err_msg=key
+                )
+            previous = group["e"].iloc[-1]
+
+
+def test_path_methods_use_single_pass_kernel(series):
+    equity, returns = series
+    path = BatchMetricsMetricTracker.path_metrics(equity)
+    for j in range(equity.shape[1]):
+        frame = pd.DataFrame(
+            {"Equity_value": equity[:, j], "Return": returns[:, j], "Close": equity[:, 0]}
+        )
+        calculator = MetricsCalculatorMetricTracker(
+            MetricsExporter.add_drawdown_bah(frame), TIME_UNIT, RISK_FREE_RATE
+        )
+        assert calculator.max_drawdown_duration() == path["Max_drawdown_duration"][j]
+        np.testing.assert_array_equal(calculator.recovery_time(), path["Recovery_time"][j])
+        assert calculator.average_drawdown() == path["Average_drawdown"][j]
+        assert calculator.max_consecutive_losses() is None
@@ -0,0 +1,132 @@
+"""
+MovingAverage_Indicator_backtester 測試：多週期MA矩陣與 MA9-MA12 連續日數信號需與原逐窗口實現一致
+"""
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from backtester.IndicatorParams_backtester import IndicatorParams
+from backtester.MovingAverage_Indicator_backtester import (
+    MovingAverageIndicator,
+    _calculate_ma_matrix,
+    _calculate_ma_unified,
+    _generate_ma_signals_unified,
+)
+
+PERIODS = [1, 2, 5, 13, 50, 120]
+
+
+def _reference_ma(values, period, ma_type):
+    """原本逐週期、逐窗口重算的 SMA/EMA/WMA"""
+    n = len(values)
+    result = np.zeros(n)
+    if ma_type == "EMA":
+        alpha = 2.0 / (period + 1)
+        result[0] = values[0]
+        for i in range(1, n):
+            result[i] = alpha * values[i] + (1 - alpha) * result[i - 1]
+        return result
+    weights = (
+        np.ones(period) if ma_type == "SMA" else np.arange(1, period + 1, dtype=float)
+    )
+    for i in range(period - 1, n):
+        result[i] = np.dot(weights, values[i - period + 1 : i + 1]) / weights.sum()
+    return result
+
+
+def _series(n=1000, seed=4):
+    rng = np.random.default_rng(seed)
+    # 大水位 + 小波動，放大累積和的相消誤差
+    return 1e4 + rng.normal(0, 1, n).cumsum()
+
+
+@pytest.mark.parametrize("ma_type", ["SMA", "EMA", "WMA"])
+def test_ma_matrix_matches_per_period_reference(ma_type):
+    values = _series()
+    matrix = _calculate_ma_matrix(values, PERIODS, ma_type)
+    assert matrix.shape == (len(PERIODS), len(values))
+    for k, period in enumerate(PERIODS):
+        np.testing.assert_allclose(
+            matrix[k], _reference_ma(values, period, ma_type), rtol=1e-12, atol=1e-9
+        )
+
+
+@pytest.mark.parametrize("ma_type", ["SMA", "EMA", "WMA"])
+def test_single_period_ma_equals_matrix_row(ma_type):
+    # 單指標路徑與向量化路徑需逐位元一致，否則均線相交的平手點會產生不同信號
+    values = _series()
+    matrix = _calculate_ma_matrix(values, PERIODS, ma_type)
+    for k, period in enumerate(PERIODS):
+        np.testing.assert_array_equal(
+            _calculate_ma_unified(values, period, ma_type), matrix[k]
+        )
+
+
+def test_ma_matrix_treats_nan_as_zero():
+    values = _series(200)
+    values[[0, 50]] = np.nan
+    matrix = _calculate_ma_matrix(values, [5, 20], "SMA")
+    cleaned = np.nan_to_num(values, nan=0.0)
+    for k, period in enumerate([5, 20]):
+        np.testing.assert_allclose(
+            matrix[k], _reference_ma(cleaned, period, "SMA"), rtol=1e-12, atol=1e-9
+        )
+
+
+def test_unknown_ma_type_raises():
+    with pytest.raises(ValueError):
+        _calculate_ma_matrix(_series(50), [5], "HMA")
+
+
+def _reference_streak_signals(values, ma_values, strat_idx, period, m):
+    """原本逐日檢查連續 m 日位於MA以上/以下的 MA9-MA12 信號"""
+    above = values > ma_values if strat_idx in (9, 10) else values < ma_values
+    consecutive = np.zeros(len(values), dtype=bool)
+    for j in range(m - 1, len(values)):
+        if np.all(above[j - m + 1 : j + 1]):
+            consecutive[j] = True
+    signal_value = 1.0 if strat_idx in (9, 11) else -1.0
+    signals = np.where(consecutive, signal_value, 0.0)
+    signals[: period + m - 2] = 0
+    return signals
+
+
+@pytest.mark.parametrize("strat_idx", [9, 10, 11, 12])
+@pytest.mark.parametrize("period,m", [(5, 1), (10, 2), (20, 5)])
+def test_consecutive_day_signals_match_reference(strat_idx, period, m):
+    values = _series(400)
+    ma_values = _calculate_ma_matrix(values, [period], "SMA")[0]
+    signals = _generate_ma_signals_unified(values, ma_values, strat_idx, period, m=m)
+    expected = _reference_streak_signals(values, ma_values, strat_idx, period, m)
+    assert np.abs(expected).sum() > 0
+    np.testing.assert_array_equal(signals, expected)
+
+
+def _ma_param(ma_type, strat_idx, **periods):
+    param = IndicatorParams("MA")
+    param.add_param("strat_idx", strat_idx)
+    param.add_param("mode", "single")
+    param.add_param("ma_type", ma_type)
+    for name, value in periods.items():
+        param.add_param(name, value)
+    return param
+
+
+def test_ma_type_without_periods_does_not_zero_other_tasks():
+    # 某均線類型的任務全部缺少週期時只跳過該類型，其餘任務照常生成信號
+    values = _series(300)
+    data = pd.DataFrame({"Close": values})
+    tasks = [
+        (1, 0, _ma_param("EMA", 1, period=None)),
+        (0, 0, _ma_param("SMA", 1, period=20)),
+    ]
+    signals_matrix = np.zeros((len(values), 2, 1), dtype=np.int8)
+    MovingAverageIndicator.vectorized_calculate_ma_signals(
+        tasks, "Close", signals_matrix, data=data
+    )
+    ma_values = _calculate_ma_matrix(values, [20], "SMA")[0]
+    expected = _generate_ma_signals_unified(values, ma_values, 1, 20)
+    assert np.abs(expected).sum() > 0
+    np.testing.assert_array_equal(signals_matrix[:, 0, 0], expected)
+    assert not signals_matrix[:, 1, 0].any()
@@ -0,0 +1,197 @@
+"""
+MultiAsset_backtester 測試：多標的批量回測與逐標的單獨回測一致、分區資料集讀回、
+result_store = "dataset" 的標的分區索引
+"""
+
+import pandas as pd
+import pytest
+
+from autorunner.BacktestRunner_autorunner import BacktestRunnerAutorunner
+from backtester.MultiAsset_backtester import PARTITION_COLUMN, MultiAsset_backtester
+from backtester.ResultStore_backtester import (
+    MULTI_ASSET_PARTITION_COLUMNS,
+    ResultStore_backtester,
+)
+from backtester.SparseRecords_backtester import SparseRecords_backtester
+from backtester.TradeRecordExporter_backtester import TradeRecordExporter_backtester
+from backtester.VectorBacktestEngine_backtester import VectorBacktestEngine
+from metricstracker.MetricsExporter_metricstracker import MetricsExporter
+from tests.helpers import (
+    assert_same_records,
+    canonical_records,
+    make_autorunner_config,
+    make_backtest_config,
+    make_ohlcv,
+    result_key,
+)
+
+
+@pytest.fixture(scope="module")
+def datasets():
+    return {
+        "AAA": make_ohlcv(260, seed=0),
+        # 較晚開始的標的：對齊後其他標的的前 15 根K線被捨棄
+        "BBB": make_ohlcv(275, seed=1).iloc[15:].reset_index(drop=True),
+        "CCC": make_ohlcv(260, seed=2),
+    }
+
+
+def test_align_datasets_uses_common_time(datasets):
+    aligned, info = MultiAsset_backtester.align_datasets(datasets)
+    assert info["n_bars"] == 245
+    assert info["dropped"] == {"AAA": 15, "BBB": 15, "CCC": 15}
+    times = [frame["Time"].tolist() for frame in aligned.values()]
+    assert times[0] == times[1] == times[2]
+
+
+@pytest.mark.parametrize("result_mode", ["full", "trades_only"])
+def test_multi_asset_matches_single_instrument_runs(datasets, result_mode):
+    engine = VectorBacktestEngine(datasets["AAA"], "1D")
+    results = engine.run_multi_asset(
+        dict(make_backtest_config(), result_mode=result_mode), datasets
+    )
+
+    for symbol, data in engine.instrument_data.items():
+        multi = [
+            r for r in results if MultiAsset_backtester.result_instrument(r) == symbol
+        ]
+        single = VectorBacktestEngine(data, "1D", symbol=symbol).run_backtests(
+            dict(make_backtest_config(), result_mode=result_mode)
+        )
+        if result_mode == "trades_only":
+            multi = [
+                dict(r, records=SparseRecords_backtester.expand_result(r, data))
+                for r in multi
+            ]
+            single = [
+                dict(r, records=SparseRecords_backtester.expand_result(r, data))
+                for r in single
+            ]
+        assert len(multi) == len(single) > 0
+        assert_same_records(
+            canonical_records(single), canonical_records(multi), check_dtype=False
+        )
+
+
+def test_partitioned_dataset_round_trip(datasets, tmp_path, monkeypatch):
+    monkeypatch.setattr(
+        TradeRecordExporter_backtester,
+        "default_output_dir",
+        staticmethod(lambda: str(tmp_path)),
+    )
+    engine = VectorBacktestEngine(datasets["AAA"], "1D")
+    results = engine.run_multi_asset(make_backtest_config(), datasets)
+    exporter = TradeRecordExporter_backtester(
+        pd.DataFrame(),
+        "1D",
+        results=results,
+        data=datasets["AAA"],
+        Backtest_id="multi",
+        transaction_cost=0.001,
+        slippage=0.0005,
+        trade_delay=1,
+        trade_price="open",
+    )
+    parts = exporter.export_partitioned_dataset(engine.instrument_data)
+    assert len(parts) == 3
+
+    frame = MultiAsset_backtester.read_dataset(exporter.last_exported_path)
+    rows_per_instrument = sum(len(r["records"]) for r in results) // len(
+        engine.instrument_data
+    )
+    assert frame[PARTITION_COLUMN].astype(str).value_counts().to_dict() == {
+        symbol: rows_per_instrument for symbol in engine.instrument_data
+    }
+    subset = MultiAsset_backtester.read_dataset(exporter.last_exported_path, ["BBB"])
+    assert set(subset[PARTITION_COLUMN].astype(str)) == {"BBB"}
+    assert MultiAsset_backtester.records_root(parts[0]) == str(tmp_path.parent)
+
+
+def test_multi_asset_uses_one_pool_and_per_column_metrics(datasets, monkeypatch):
+    # 多區塊 x 多標的：所有標的的結果在同一個進程池生成，績效使用各欄所屬標的的價格
+    from backtester import VectorBacktestEngine_backtester as engine_module
+
+    pools = []
+
+    class CountingPool(engine_module.ProcessPoolExecutor):
+        def __init__(self, *args, **kwargs):
+            pools.append(self)
+            super().__init__(*args, **kwargs)
+
+    monkeypatch.setattr(engine_module, "ProcessPoolExecutor", CountingPool)
+    config = dict(make_backtest_config(), inline_metrics=True, max_memory_mb=2)
+    engine = VectorBacktestEngine(datasets["AAA"], "1D")
+    results = engine.run_multi_asset(config, datasets)
+    assert len(pools) == 1
+    monkeypatch.undo()
+
+    for symbol, data in engine.instrument_data.items():
+        multi = {
+            result_key(r): r["metrics"]
+            for r in results
+            if MultiAsset_backtester.result_instrument(r) == symbol
+        }
+        single = {
+            result_key(r): r["metrics"]
+            for r in VectorBacktestEngine(data, "1D", symbol=symbol).run_backtests(
+                dict(make_backtest_config(), inline_metrics=True)
+            )
+        }
+        assert multi.keys() == single.keys()
+        for key, metrics in single.items():
+            assert multi[key] == pytest.approx(metrics, nan_ok=True), (symbol, key)
+
+
+@pytest.mark.parametrize("result_mode", ["full", "trades_only"])
+def test_multi_asset_result_store_dataset(datasets, tmp_path, monkeypatch, result_mode):
+    # result_store = "dataset"：Trading_instrument / Condition_pair / Predictor 分區並附索引
+    monkeypatch.setattr(
+        TradeRecordExporter_backtester,
+        "default_output_dir",
+        staticmethod(lambda: str(tmp_path / "backtester")),
+    )
+    outcome = BacktestRunnerAutorunner().run_backtest(
+        datasets, make_autorunner_config(result_store="dataset", result_mode=result_mode)
+    )
+    (dataset_dir,) = outcome["exported_files"]
+    assert ResultStore_backtester.is_dataset(dataset_dir)
+    assert ResultStore_backtester.partition_columns(dataset_dir) == (
+        MULTI_ASSET_PARTITION_COLUMNS
+    )
+
+    aligned, _ = MultiAsset_backtester.align_datasets(datasets)
+    for symbol, data in aligned.items():
+        ids = ResultStore_backtester.select(
+            dataset_dir, filters=[(PARTITION_COLUMN, "=", symbol)]
+        )
+        results = [
+            r
+            for r in outcome["results"]
+            if MultiAsset_backtester.result_instrument(r) == symbol
+        ]
+        assert sorted(ids) == sorted(r["Backtest_id"] for r in results)
+        expected = pd.concat(
+            [
+                SparseRecords_backtester.expand_result(r, data)
+                if result_mode == "trades_only"
+                else r["records"]
+                for r in results
+            ],
+            ignore_index=True,
+        ).drop(columns=[PARTITION_COLUMN])
+        actual = ResultStore_backtester.read_records(dataset_dir, ids)
+        columns = [c for c in actual.columns if c in expected.columns]
+        pd.testing.assert_frame_equal(
+            actual[columns].sort_values(["Backtest_id", "Time"]).reset_index(drop=True),
+            expected[columns].sort_values(["Backtest_id", "Time"]).reset_index(drop=True),
+            check_dtype=False,
+        )
+
+    # 指標資料集沿用相同分區
+    metrics_dir = MetricsExporter.export_dataset(dataset_dir, 365, 0.04)
+    assert ResultStore_backtester.partition_columns(metrics_dir) == (
+        MULTI_ASSET_PARTITION_COLUMNS
+    )
+    index = ResultStore_backtester.read_index(metrics_dir)
+    assert set(index[PARTITION_COLUMN]) == set(aligned)
+    assert index["Sharpe"].notna().any()
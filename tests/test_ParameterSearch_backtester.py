@@ -0,0 +1,58 @@
+"""
+ParameterSearch_backtester 測試：搜索結果與網格回測一致、評估速度以參數組合計
+"""
+
+import pytest
+
+from backtester.VectorBacktestEngine_backtester import VectorBacktestEngine
+from tests.helpers import (
+    assert_same_records,
+    canonical_records,
+    make_backtest_config,
+    result_key,
+)
+
+
+@pytest.mark.parametrize("method", ["halving", "tpe", "genetic"])
+def test_search_results_match_grid_backtests(ohlcv, full_results, method):
+    config = make_backtest_config()
+    config["search"] = {
+        "method": method,
+        "objective": "sharpe",
+        "max_evaluations": 10,
+        "batch_size": 4,
+        "top_k": 3,
+        "seed": 1,
+    }
+    engine = VectorBacktestEngine(ohlcv, "1D")
+    results = engine.run_search(config)
+    summary = engine.search_summary
+
+    # halving 只有最後一輪在完整數據上評估，保留的組合可少於 top_k
+    assert 1 <= len(results) == len(summary["leaderboard"]) <= 3
+    assert summary["evaluations"] <= 10
+    scores = [entry["score"] for entry in summary["leaderboard"]]
+    assert scores == sorted(scores, reverse=True)
+    expected = {
+        key: frame
+        for key, frame in canonical_records(full_results).items()
+        if key in {result_key(r) for r in results}
+    }
+    assert_same_records(expected, canonical_records(results))
+
+
+def test_evaluation_rate_counts_parameter_combinations(ohlcv):
+    config = make_backtest_config()
+    config["predictors"] = ["X", "Close"]
+    config["search"] = {"method": "genetic", "max_evaluations": 8, "batch_size": 4, "seed": 2}
+    engine = VectorBacktestEngine(ohlcv, "1D")
+    engine.run_search(config)
+    summary = engine.search_summary
+
+    assert summary["backtests"] == 2 * summary["evaluations"]
+    assert summary["evaluations_per_second"] == pytest.approx(
+        summary["evaluations"] / summary["elapsed"]
+    )
+    assert summary["backtests_per_second"] == pytest.approx(
+        2 * summary["evaluations_per_second"]
+    )
@@ -0,0 +1,58 @@
+"""
+Percentile_Indicator_backtester 測試：排序環形緩衝區需與逐窗口 np.percentile 一致
+"""
+
+import numpy as np
+import pytest
+
+from backtester.Percentile_Indicator_backtester import (
+    _calculate_rolling_percentile_njit,
+    _calculate_rolling_percentiles_njit,
+)
+
+
+def _reference_percentiles(data, window, percentiles):
+    """原本逐窗口呼叫 np.percentile 的 O(n·w log w) 實現"""
+    result = np.zeros((len(percentiles), len(data)))
+    for i in range(window - 1, len(data)):
+        values = data[i - window + 1 : i + 1]
+        for k, percentile in enumerate(percentiles):
+            result[k, i] = (
+                np.nan if np.isnan(values).any() else np.percentile(values, percentile)
+            )
+    return result
+
+
+def _series(n=300, seed=1):
+    rng = np.random.default_rng(seed)
+    # 四捨五入製造重複值，覆蓋排序緩衝區的相同值刪除
+    return np.round(rng.normal(0, 1, n).cumsum(), 1)
+
+
+def _with_nan():
+    data = _series()
+    data[0] = np.nan
+    data[90] = np.nan
+    data[200:203] = np.nan
+    return data
+
+
+PERCENTILES = np.array([0.0, 10.0, 25.0, 50.0, 87.5, 100.0])
+
+
+@pytest.mark.parametrize("window", [1, 2, 7, 20, 64])
+@pytest.mark.parametrize("data", [_series(), _with_nan()], ids=["finite", "nan"])
+def test_rolling_percentiles_match_np_percentile(data, window):
+    result = _calculate_rolling_percentiles_njit(data, window, PERCENTILES)
+    np.testing.assert_allclose(
+        result, _reference_percentiles(data, window, PERCENTILES), rtol=1e-12, atol=1e-12
+    )
+
+
+def test_nan_only_affects_windows_containing_it():
+    data = _series()
+    data[0] = np.nan
+    data[100] = np.nan
+    result = _calculate_rolling_percentile_njit(data, 20, 50.0)
+    assert np.isnan(result).sum() == 1 + 20
+    assert np.isfinite(result[120:]).all()
@@ -0,0 +1,180 @@
+"""
+Portfolio_metricstracker 測試：向量化組合合成與逐K線持倉模擬一致、權重只使用過去數據
+"""
+
+import json
+import os
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from autorunner.MetricsRunner_autorunner import MetricsRunnerAutorunner
+from backtester.TradeRecordExporter_backtester import TradeRecordExporter_backtester
+from backtester.VectorBacktestEngine_backtester import VectorBacktestEngine
+from metricstracker.Portfolio_metricstracker import PortfolioMetricTracker
+from metricstracker.Robustness_metricstracker import RobustnessMetricTracker
+from tests.helpers import make_backtest_config
+
+
+def _simulate_holdings(equity, points, weights):
+    """逐K線持倉模擬（參考實作）：再平衡點以當時淨值按目標權重重新分配"""
+    growth = equity / equity[0]
+    value = np.empty(len(equity))
+    holdings = None
+    current = 1.0
+    k = -1
+    for t in range(len(equity)):
+        if k + 1 < len(points) and points[k + 1] == t:
+            k += 1
+            if holdings is not None:
+                current = (holdings * growth[t]).sum()
+            holdings = current * weights[k] / growth[t]
+        value[t] = (holdings * growth[t]).sum()
+    return value
+
+
+@pytest.fixture(scope="module")
+def equity():
+    rng = np.random.default_rng(0)
+    matrix = 100 * np.cumprod(1 + rng.normal(0, 0.01, (400, 6)), axis=0)
+    matrix[:, 3] = 100.0  # 無交易策略：權益不變
+    return matrix
+
+
+@pytest.mark.parametrize("rebalance", [None, 1, 20, 77])
+@pytest.mark.parametrize("weighting", ["equal", "inverse_vol"])
+def test_combine_matches_holding_simulation(equity, rebalance, weighting):
+    points = PortfolioMetricTracker.rebalance_points(len(equity), rebalance)
+    weights = PortfolioMetricTracker.compute_weights(equity, points, weighting, lookback=30)
+    np.testing.assert_allclose(weights.sum(axis=1), 1.0)
+
+    combined = PortfolioMetricTracker.combine(equity, points, weights)
+    np.testing.assert_allclose(
+        combined["equity"], _simulate_holdings(equity, points, weights), rtol=1e-12
+    )
+    assert combined["equity"][0] == 1.0
+    assert (combined["drawdown"] <= 0).all()
+
+
+def test_inverse_vol_weights_use_only_past_returns(equity):
+    points = PortfolioMetricTracker.rebalance_points(len(equity), 50)
+    weights = PortfolioMetricTracker.compute_weights(equity, points, "inverse_vol")
+    shocked = equity.copy()
+    shocked[201:, 0] *= np.linspace(1.0, 3.0, len(equity) - 201)
+    shocked_weights = PortfolioMetricTracker.compute_weights(shocked, points, "inverse_vol")
+
+    past = points <= 200
+    np.testing.assert_array_equal(weights[past], shocked_weights[past])
+    assert not np.allclose(weights[~past], shocked_weights[~past])
+    # 無波動的策略沒有反波動率權重
+    assert (weights[1:, 3] == 0).all()
+
+
+def test_calendar_rebalance_points():
+    time_values = pd.date_range("2020-01-15", periods=100, freq="D").to_numpy()
+    points = PortfolioMetricTracker.rebalance_points(100, "M", time_values)
+    assert points.tolist() == [0, 17, 46, 77]
+    with pytest.raises(ValueError):
+        PortfolioMetricTracker.rebalance_points(100, "M")
+
+
+def test_trades_only_equity_matrix_matches_full(ohlcv, tmp_path, monkeypatch):
+    monkeypatch.setattr(
+        TradeRecordExporter_backtester,
+        "default_output_dir",
+        staticmethod(lambda: str(tmp_path)),
+    )
+    matrices = {}
+    for result_mode in ("full", "trades_only"):
+        results = VectorBacktestEngine(ohlcv, "1D").run_backtests(
+            dict(make_backtest_config(), result_mode=result_mode)
+        )
+        exporter = TradeRecordExporter_backtester(
+            pd.DataFrame(),
+            "1D",
+            results=results,
+            data=ohlcv,
+            Backtest_id="portfolio",
+            transaction_cost=0.001,
+            slippage=0.0005,
+            trade_delay=1,
+            trade_price="open",
+        )
+        exporter.export_to_parquet()
+        path = exporter.last_exported_path
+        loaded = PortfolioMetricTracker.load_equity_matrix(pd.read_parquet(path), path)
+        keys = {r["Backtest_id"]: (r["strategy_id"], str(r["params"])) for r in results}
+        matrices[result_mode] = {
+            keys[bid]: loaded["equity"][:, j]
+            for j, bid in enumerate(loaded["backtest_ids"])
+        }
+        assert loaded["equity"].shape == (len(ohlcv), len(results))
+
+    assert set(matrices["full"]) == set(matrices["trades_only"])
+    for key, column in matrices["full"].items():
+        np.testing.assert_allclose(matrices["trades_only"][key], column, rtol=1e-12)
+
+
+@pytest.mark.parametrize("result_mode", ["full", "trades_only"])
+def test_metrics_runner_reads_only_analysis_columns(
+    ohlcv, tmp_path, monkeypatch, result_mode
+):
+    # 沿用引擎內績效時只讀取分析所需欄位，結果與讀取完整檔案相同
+    monkeypatch.setattr(
+        TradeRecordExporter_backtester,
+        "default_output_dir",
+        staticmethod(lambda: str(tmp_path / "backtester")),
+    )
+    results = VectorBacktestEngine(ohlcv, "1D").run_backtests(
+        dict(make_backtest_config(), result_mode=result_mode, inline_metrics=True)
+    )
+    exporter = TradeRecordExporter_backtester(
+        pd.DataFrame(),
+        "1D",
+        results=results,
+        data=ohlcv,
+        Backtest_id="columns",
+        transaction_cost=0.001,
+        slippage=0.0005,
+        trade_delay=1,
+        trade_price="open",
+    )
+    exporter.export_to_parquet()
+    path = exporter.last_exported_path
+    name = os.path.splitext(os.path.basename(path))[0]
+    out_dir = tmp_path / "metricstracker"
+    robustness = {"n_paths": 20, "methods": ["bootstrap"], "top_n": 3}
+    portfolio = {"weighting": "top_k", "top_k": 3}
+
+    reads = []
+    read_parquet = pd.read_parquet
+
+    def spy(source, *args, **kwargs):
+        reads.append(kwargs.get("columns"))
+        return read_parquet(source, *args, **kwargs)
+
+    monkeypatch.setattr(pd, "read_parquet", spy)
+    runner = MetricsRunnerAutorunner()
+    assert runner._process_single_file(path, 365, 0.04).status == "success"
+    assert reads == []
+    assert (
+        runner._process_single_file(path, 365, 0.04, robustness, portfolio).status
+        == "success"
+    )
+    monkeypatch.undo()
+    assert len(reads) == 1
+    assert "Backtest_id" in reads[0]
+    assert {"Close", "Position_size", "Trade_return"}.isdisjoint(reads[0])
+
+    with open(out_dir / f"{name}_robustness.json", encoding="utf-8") as f:
+        pruned_robustness = json.load(f)
+    pruned_portfolio = pd.read_parquet(out_dir / f"{name}_portfolio.parquet")
+    full = pd.read_parquet(path)
+    RobustnessMetricTracker.export(full, path, 365, 0.04, robustness)
+    PortfolioMetricTracker.export(full, path, 365, 0.04, portfolio)
+    with open(out_dir / f"{name}_robustness.json", encoding="utf-8") as f:
+        assert json.load(f) == pruned_robustness
+    pd.testing.assert_frame_equal(
+        pd.read_parquet(out_dir / f"{name}_portfolio.parquet"), pruned_portfolio
+    )
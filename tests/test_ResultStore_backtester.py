@@ -0,0 +1,135 @@
+"""
+ResultStore_backtester 測試：分區資料集讀回與單檔導出一致、索引篩選與 row group 讀取
+"""
+
+import json
+import os
+import subprocess
+import sys
+
+import pandas as pd
+import pyarrow.dataset as ds
+import pytest
+
+from backtester.ResultStore_backtester import ResultStore_backtester
+from backtester.SparseRecords_backtester import SparseRecords_backtester
+from backtester.TradeRecordExporter_backtester import TradeRecordExporter_backtester
+from backtester.VectorBacktestEngine_backtester import VectorBacktestEngine
+from tests.helpers import make_backtest_config
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+@pytest.fixture
+def exporter_factory(tmp_path, monkeypatch):
+    monkeypatch.setattr(
+        TradeRecordExporter_backtester,
+        "default_output_dir",
+        staticmethod(lambda: str(tmp_path / "backtester")),
+    )
+
+    def build(data, result_mode):
+        config = dict(make_backtest_config(), result_mode=result_mode, inline_metrics=True)
+        results = VectorBacktestEngine(data, "1D").run_backtests(config)
+        return TradeRecordExporter_backtester(
+            pd.DataFrame(),
+            "1D",
+            results=results,
+            data=data,
+            Backtest_id="store",
+            transaction_cost=0.001,
+            slippage=0.0005,
+            trade_delay=1,
+            trade_price="open",
+        )
+
+    return build
+
+
+def _sorted(frame, columns):
+    return frame[columns].sort_values(["Backtest_id", "Time"]).reset_index(drop=True)
+
+
+@pytest.mark.parametrize("result_mode", ["full", "trades_only"])
+def test_dataset_round_trip_matches_single_file(
+    ohlcv, tmp_path, exporter_factory, result_mode
+):
+    exporter = exporter_factory(ohlcv, result_mode)
+    exporter.export_to_parquet()
+    file_path = exporter.last_exported_path
+    dataset_dir = exporter.export_dataset()
+    assert ResultStore_backtester.is_dataset(dataset_dir)
+
+    # 記錄：資料集讀回（trades_only 逐回測還原）與單檔導出相同
+    single = pd.read_parquet(file_path)
+    if result_mode == "trades_only":
+        store = SparseRecords_backtester.load_bar_store(
+            SparseRecords_backtester.bar_store_path(file_path)
+        )
+        single = pd.concat(
+            [
+                group.dropna(axis=1, how="all")
+                for _, group in SparseRecords_backtester.iter_expanded_records(
+                    single, store
+                )
+            ],
+            ignore_index=True,
+        )
+    round_trip = ResultStore_backtester.read_records(dataset_dir)
+    columns = list(single.columns)
+    pd.testing.assert_frame_equal(
+        _sorted(round_trip, columns), _sorted(single, columns), check_dtype=False
+    )
+
+    # batch_metadata（含引擎內績效）與單檔導出的 _metadata.json 相同
+    name = os.path.splitext(os.path.basename(file_path))[0]
+    with open(
+        tmp_path / "metricstracker" / f"{name}_metadata.json", encoding="utf-8"
+    ) as f:
+        expected = {m["Backtest_id"]: m for m in json.load(f)}
+    batch_metadata = ResultStore_backtester.read_batch_metadata(dataset_dir)
+    assert {m["Backtest_id"] for m in batch_metadata} == set(expected)
+    for meta in batch_metadata:
+        reference = expected[meta["Backtest_id"]]
+        for key in ("Sharpe", "Total_return", "Max_drawdown", "Trade_count"):
+            assert meta[key] == pytest.approx(reference[key], nan_ok=True), key
+
+
+def test_index_selection_reads_only_selected_backtests(ohlcv, exporter_factory):
+    dataset_dir = exporter_factory(ohlcv, "full").export_dataset()
+    index = ResultStore_backtester.read_index(dataset_dir)
+    pair = index.loc[index["Sharpe"].idxmax(), "Condition_pair"]
+
+    ids = ResultStore_backtester.select(
+        dataset_dir, filters=[("Sharpe", ">", 0.0), ("Condition_pair", "=", pair)]
+    )
+    expected = index[(index["Sharpe"] > 0) & (index["Condition_pair"] == pair)]
+    assert sorted(ids) == sorted(expected["Backtest_id"])
+
+    subset = ResultStore_backtester.read(
+        dataset_dir, ids, columns=["Time", "Equity_value", "Backtest_id"]
+    )
+    assert list(subset.columns) == ["Time", "Equity_value", "Backtest_id"]
+    assert set(subset["Backtest_id"]) == set(ids)
+    assert len(subset) == len(ids) * len(ohlcv)
+
+    cutoff = ohlcv["Time"].iloc[100]
+    late = ResultStore_backtester.read_records(
+        dataset_dir, ids[:1], row_filter=ds.field("Time") >= cutoff
+    )
+    assert set(late["Backtest_id"]) == set(ids[:1])
+    assert len(late) == len(ohlcv) - 100
+
+
+def test_read_parquet_script_runs_outside_repo_root(tmp_path):
+    completed = subprocess.run(
+        [sys.executable, os.path.join(REPO_ROOT, "records", "Read_parquet.py")],
+        cwd=tmp_path,
+        stdin=subprocess.DEVNULL,
+        capture_output=True,
+        text=True,
+        timeout=120,
+        check=False,
+    )
+    assert "ModuleNotFoundError" not in completed.stderr
+    assert "[ReadParquet]" in completed.stdout
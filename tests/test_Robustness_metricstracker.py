@@ -0,0 +1,92 @@
+"""
+Robustness_metricstracker 測試：原始路徑指標與 MetricsCalculator 一致、各重抽方法的不變量與可重現性
+"""
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from metricstracker.MetricsCalculator_metricstracker import MetricsCalculatorMetricTracker
+from metricstracker.Robustness_metricstracker import RobustnessMetricTracker
+
+
+@pytest.fixture(scope="module")
+def series(full_results):
+    return [
+        (
+            r["Backtest_id"],
+            r["records"]["Return"].to_numpy(dtype=np.float64),
+            r["records"]["Equity_value"].to_numpy(dtype=np.float64),
+            r["records"]["Trade_action"].to_numpy(),
+        )
+        for r in full_results
+    ]
+
+
+@pytest.fixture(scope="module")
+def prepared(series):
+    return RobustnessMetricTracker.prepare_series(series)
+
+
+def _paths(prepared, method, n_paths=200, **options):
+    return RobustnessMetricTracker.resample(prepared, method, n_paths, 365, 0.04, **options)
+
+
+def test_observed_paths_match_metrics_calculator(series, prepared):
+    observed = _paths(prepared, None)
+    for j, (_, returns, equity, actions) in enumerate(series):
+        calculator = MetricsCalculatorMetricTracker(
+            pd.DataFrame({"Return": returns, "Equity_value": equity, "Trade_action": actions}),
+            365,
+            0.04,
+        )
+        for name, expected in (
+            ("Sharpe", calculator.sharpe()),
+            ("Max_drawdown", calculator.max_drawdown()),
+            ("Total_return", calculator.total_return()),
+        ):
+            assert observed[name][j, 0] == pytest.approx(expected, rel=1e-8, nan_ok=True)
+
+
+def test_trade_segments_pair_opens_with_closes():
+    actions = np.array([0, 1, 0, 4, 0, 1, 4, 0, 1, 0])
+    starts, ends = RobustnessMetricTracker.trade_segments(actions)
+    assert starts.tolist() == [1, 5, 8]
+    assert ends.tolist() == [3, 6, 9]
+
+
+def test_resampling_invariants(prepared):
+    observed = _paths(prepared, None)
+    traded = prepared["n_trades"] > 0
+
+    # 洗牌只重排交易順序：總回報與收益率集合（夏普比率）不變，最大回撤可變
+    shuffled = _paths(prepared, "shuffle")
+    for name in ("Total_return", "Sharpe"):
+        np.testing.assert_allclose(
+            shuffled[name][traded], np.repeat(observed[name][traded], 200, axis=1), rtol=1e-9
+        )
+    assert (shuffled["Max_drawdown"][traded] != observed["Max_drawdown"][traded]).any()
+
+    # 零延遲即原始路徑
+    undelayed = _paths(prepared, "delay", max_delay=0)
+    np.testing.assert_allclose(
+        undelayed["Total_return"], np.repeat(observed["Total_return"], 200, axis=1)
+    )
+
+    # 相同種子可重現，不同種子結果不同
+    for method in ("shuffle", "bootstrap", "delay"):
+        first = _paths(prepared, method, seed=7)
+        again = _paths(prepared, method, seed=7)
+        other = _paths(prepared, method, seed=8)
+        np.testing.assert_array_equal(first["Max_drawdown"], again["Max_drawdown"])
+        assert not np.array_equal(first["Max_drawdown"], other["Max_drawdown"])
+
+    with pytest.raises(ValueError):
+        _paths(prepared, "jackknife")
+
+
+def test_analyze_reports_distribution_per_backtest(series):
+    reports = RobustnessMetricTracker.analyze(series[:3], 365, 0.04, {"n_paths": 100})
+    assert [report["Backtest_id"] for report in reports] == [s[0] for s in series[:3]]
+    for report in reports:
+        assert set(report) >= {"observed", "shuffle", "bootstrap", "delay"}
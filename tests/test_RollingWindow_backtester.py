@@ -0,0 +1,95 @@
+"""
+RollingWindow_backtester 測試：單調佇列滾動極值與 HL / VALUE 信號需與原 O(n·w) 實現一致
+"""
+
+import numpy as np
+import pytest
+
+from backtester.HL_Indicator_backtester import _generate_hl_signals_njit
+from backtester.RollingWindow_backtester import (
+    rolling_max_njit,
+    rolling_min_njit,
+    rolling_sum_njit,
+    run_length_njit,
+)
+from backtester.VALUE_Indicator_backtester import _generate_value_signals_njit
+
+
+def _series(n=400, seed=2):
+    rng = np.random.default_rng(seed)
+    # 四捨五入製造平手值，覆蓋佇列中相同值的支配判斷
+    return np.round(rng.normal(0, 1, n).cumsum(), 0)
+
+
+def _reference_hl_signals(values, n_length, m_length, strat_idx):
+    """原本逐日重算過去 m 天極值的 HL 信號"""
+    signals = np.zeros(len(values))
+    use_max = strat_idx in (1, 2)
+    signal_value = 1.0 if strat_idx in (1, 3) else -1.0
+    for i in range(m_length + n_length - 1, len(values)):
+        hit = True
+        for j in range(i - n_length + 1, i + 1):
+            window = values[max(0, j - m_length + 1) : j + 1]
+            extreme = window.max() if use_max else window.min()
+            if abs(values[j] - extreme) > 1e-10:
+                hit = False
+                break
+        if hit:
+            signals[i] = signal_value
+    return signals
+
+
+def _reference_value_signals(values, n_length, m_value, strat_idx):
+    """原本逐日檢查過去 n 天的 VALUE1-4 信號"""
+    signals = np.zeros(len(values))
+    signal_value = 1.0 if strat_idx in (1, 3) else -1.0
+    for i in range(n_length - 1, len(values)):
+        window = values[i - n_length + 1 : i + 1]
+        hit = (window > m_value).all() if strat_idx in (1, 2) else (window < m_value).all()
+        if hit:
+            signals[i] = signal_value
+    return signals
+
+
+@pytest.mark.parametrize("window", [1, 3, 10, 50])
+def test_rolling_extremes_and_sum_match_naive(window):
+    values = _series()
+    expected_max = np.array(
+        [values[max(0, i - window + 1) : i + 1].max() for i in range(len(values))]
+    )
+    expected_min = np.array(
+        [values[max(0, i - window + 1) : i + 1].min() for i in range(len(values))]
+    )
+    expected_sum = np.array(
+        [values[max(0, i - window + 1) : i + 1].sum() for i in range(len(values))]
+    )
+    np.testing.assert_array_equal(rolling_max_njit(values, window), expected_max)
+    np.testing.assert_array_equal(rolling_min_njit(values, window), expected_min)
+    np.testing.assert_allclose(rolling_sum_njit(values, window), expected_sum, atol=1e-9)
+
+
+def test_run_length_counts_consecutive_true():
+    condition = np.array([0, 1, 1, 0, 1, 1, 1, 0], dtype=np.bool_)
+    np.testing.assert_array_equal(
+        run_length_njit(condition), [0, 1, 2, 0, 1, 2, 3, 0]
+    )
+
+
+@pytest.mark.parametrize("strat_idx", [1, 2, 3, 4])
+@pytest.mark.parametrize("n_length,m_length", [(1, 5), (2, 10), (3, 20)])
+def test_hl_signals_match_reference(strat_idx, n_length, m_length):
+    values = _series()
+    signals = _generate_hl_signals_njit(values, n_length, m_length, strat_idx)
+    expected = _reference_hl_signals(values, n_length, m_length, strat_idx)
+    assert np.abs(expected).sum() > 0
+    np.testing.assert_array_equal(signals, expected)
+
+
+@pytest.mark.parametrize("strat_idx", [1, 2, 3, 4])
+@pytest.mark.parametrize("n_length,m_value", [(1, 0.0), (3, 2.0), (5, -4.0)])
+def test_value_signals_match_reference(strat_idx, n_length, m_value):
+    values = _series()
+    signals = _generate_value_signals_njit(values, n_length, m_value, strat_idx)
+    np.testing.assert_array_equal(
+        signals, _reference_value_signals(values, n_length, m_value, strat_idx)
+    )
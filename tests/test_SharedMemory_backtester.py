@@ -0,0 +1,66 @@
+"""
+SharedMemory_backtester 測試：共享記憶體往返與多批次並行結果一致性
+"""
+
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+
+from backtester.Indicators_backtester import IndicatorsBacktester
+from backtester.SharedMemory_backtester import SharedArrayStore
+from backtester.VectorBacktestEngine_backtester import VectorBacktestEngine
+from tests.helpers import assert_same_records, canonical_records, make_backtest_config
+
+
+def _column_sum(payload):
+    with SharedArrayStore.attach(payload["handles"]) as arrays:
+        matrix = arrays["matrix"][:, payload["start"] : payload["stop"]].copy()
+    return matrix.sum(axis=0)
+
+
+def test_shared_store_round_trip_in_worker_process():
+    matrix = np.arange(60, dtype=np.float32).reshape(10, 6)
+    with SharedArrayStore() as store:
+        store.put("matrix", matrix)
+        store.put("empty", np.zeros((0, 3), dtype=np.int8))
+        # 與引擎一致以 spawn 啟動：先前測試已初始化 Numba 執行緒層，fork 會令解釋器退出時死鎖
+        with ProcessPoolExecutor(
+            max_workers=1, mp_context=multiprocessing.get_context("spawn")
+        ) as executor:
+            sums = executor.submit(
+                _column_sum, {"handles": store.handles, "start": 2, "stop": 5}
+            ).result()
+        assert store.handles["empty"][1] == (0, 3)
+    np.testing.assert_array_equal(sums, matrix[:, 2:5].sum(axis=0))
+    assert store.handles == {}
+
+
+def _ma_config(exit_range):
+    indicators = IndicatorsBacktester()
+    config = make_backtest_config()
+    config["condition_pairs"] = [{"entry": ["MA1"], "exit": ["MA4"]}]
+    config["indicator_params"] = {
+        "MA1_strategy_1": indicators.get_indicator_params(
+            "MA1", {"ma_type": "SMA", "ma_range": "5:50:5"}
+        ),
+        "MA4_strategy_1": indicators.get_indicator_params(
+            "MA4", {"ma_type": "EMA", "ma_range": exit_range}
+        ),
+    }
+    return config
+
+
+def test_multi_batch_shared_memory_results_match_single_batch(ohlcv):
+    # 30 個任務會拆成多批次並以共享記憶體交給子進程；逐個出場週期的 10 任務回測為單批次
+    multi = VectorBacktestEngine(ohlcv, "1D").run_backtests(_ma_config("10:30:10"))
+    assert len(multi) == 30
+
+    single = []
+    for period in (10, 20, 30):
+        single.extend(
+            VectorBacktestEngine(ohlcv, "1D").run_backtests(
+                _ma_config(f"{period}:{period}:1")
+            )
+        )
+    assert_same_records(canonical_records(single), canonical_records(multi))
@@ -0,0 +1,69 @@
+"""
+SparseRecords_backtester 測試：trades_only 結果還原後需與完整 records 一致
+"""
+
+import pandas as pd
+
+from backtester.SparseRecords_backtester import SparseRecords_backtester
+from backtester.TradeRecordExporter_backtester import TradeRecordExporter_backtester
+from backtester.VectorBacktestEngine_backtester import VectorBacktestEngine
+from tests.helpers import (
+    assert_same_records,
+    canonical_frame,
+    canonical_records,
+    make_backtest_config,
+    split_ids,
+)
+
+
+def _sparse_results(ohlcv):
+    config = make_backtest_config()
+    config["result_mode"] = "trades_only"
+    return VectorBacktestEngine(ohlcv, "1D").run_backtests(config)
+
+
+def test_expand_result_matches_full_records(ohlcv, full_results):
+    sparse = _sparse_results(ohlcv)
+    assert all(SparseRecords_backtester.is_sparse_result(r) for r in sparse)
+    assert sum(len(r["records"]) for r in sparse) < sum(
+        len(r["records"]) for r in full_results
+    )
+
+    expanded = [
+        dict(r, records=SparseRecords_backtester.expand_result(r, ohlcv))
+        for r in sparse
+    ]
+    assert_same_records(canonical_records(full_results), canonical_records(expanded))
+
+
+def test_exported_sparse_parquet_expands_to_full_records(ohlcv, full_results, tmp_path):
+    sparse = _sparse_results(ohlcv)
+    exporter = TradeRecordExporter_backtester(
+        pd.DataFrame(),
+        "1D",
+        results=sparse,
+        data=ohlcv,
+        transaction_cost=0.001,
+        slippage=0.0005,
+        trade_delay=1,
+        trade_price="open",
+    )
+    exporter.output_dir = str(tmp_path)
+    exporter.export_to_parquet()
+    path = exporter.last_exported_path
+
+    store = SparseRecords_backtester.load_bar_store(
+        SparseRecords_backtester.bar_store_path(path)
+    )
+    id_to_key, _ = split_ids(sparse)
+    expected = canonical_records(full_results)
+    restored = dict(
+        SparseRecords_backtester.iter_expanded_records(pd.read_parquet(path), store)
+    )
+    assert len(restored) == len(expected)
+    for backtest_id, records in restored.items():
+        key = id_to_key[backtest_id]
+        actual = canonical_frame(records)
+        pd.testing.assert_frame_equal(
+            expected[key], actual[expected[key].columns], check_dtype=False, obj=key
+        )
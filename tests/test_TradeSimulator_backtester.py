@@ -0,0 +1,174 @@
+"""
+TradeSimulator_backtester 測試：欄位式交易記錄建構與並行交易模擬核心
+"""
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from backtester.TradeSimulator_backtester import (
+    TradeSimulator_backtester,
+    vectorized_trade_simulation,
+)
+from tests.helpers import canonical_frame, make_ohlcv
+
+
+def _row_wise_records(data, sim, entry, exit_, trade_price, cost, slippage):
+    """原本 generate_single_result 的逐行建構（參考實作）"""
+    position = sim["positions"][:, 0]
+    returns = sim["returns"][:, 0]
+    actions = sim["trade_actions"][:, 0]
+    equity = sim["equity_values"][:, 0]
+    records = []
+    current_group = None
+    open_price = open_time = None
+    holding = 0
+    for i in range(len(position)):
+        row = data.iloc[i]
+        price = row["Open"] if trade_price == "open" else row["Close"]
+        position_type = open_t = close_t = group = None
+        open_px = close_px = 0.0
+        tx = slip = 0.0
+        holding_period = trade_return = None
+        if actions[i] == 1:
+            position_type = "new_long" if position[i] > 0 else "new_short"
+            open_px = price
+            open_t = row["Time"]
+            group = current_group = f"G{i}"
+            open_price, open_time = open_px, open_t
+            tx, slip = cost, slippage
+            holding = 0
+        elif actions[i] == 4:
+            close_px = price
+            close_t = row["Time"]
+            if i > 0:
+                if position[i - 1] > 0:
+                    position_type = "close_long"
+                elif position[i - 1] < 0:
+                    position_type = "close_short"
+            group = current_group
+            tx, slip = cost, slippage
+            if group is not None:
+                open_t = open_time
+                holding += 1
+                holding_period = holding
+                if open_price > 0:
+                    if position_type == "close_long":
+                        trade_return = (close_px - open_price) / open_price
+                    else:
+                        trade_return = (open_price - close_px) / open_price
+            current_group = None
+            holding = 0
+        elif current_group is not None:
+            holding += 1
+            group = current_group
+        records.append(
+            {
+                "Time": row["Time"],
+                "Position_type": position_type,
+                "Open_position_price": open_px,
+                "Close_position_price": close_px,
+                "Position_size": position[i],
+                "Return": returns[i],
+                "Trade_group_id": group,
+                "Trade_action": int(actions[i]),
+                "Open_time": open_t,
+                "Close_time": close_t,
+                "Equity_value": equity[i],
+                "Transaction_cost": tx,
+                "Slippage_cost": slip,
+                "Predictor_value": row["X"],
+                "Entry_signal": entry[i],
+                "Exit_signal": exit_[i],
+                "Holding_period_count": holding,
+                "Holding_period": holding_period,
+                "Trade_return": trade_return,
+            }
+        )
+    return pd.DataFrame(records)
+
+
+@pytest.mark.parametrize("trade_price,trade_delay", [("open", 1), ("close", 0)])
+def test_columnar_records_match_row_wise_builder(trade_price, trade_delay):
+    data = make_ohlcv(250, seed=3)
+    rng = np.random.default_rng(7)
+    entry = rng.choice([0.0, 1.0, -1.0], size=len(data), p=[0.9, 0.05, 0.05])
+    exit_ = rng.choice([0.0, 1.0, -1.0], size=len(data), p=[0.8, 0.1, 0.1])
+
+    simulator = TradeSimulator_backtester(
+        data,
+        pd.Series(entry),
+        pd.Series(exit_),
+        transaction_cost=0.001,
+        slippage=0.0005,
+        trade_delay=trade_delay,
+        trade_price=trade_price,
+        predictor="X",
+    )
+    records, _ = simulator.simulate_trades()
+
+    sim = vectorized_trade_simulation(
+        entry.reshape(-1, 1),
+        exit_.reshape(-1, 1),
+        data["Close"].to_numpy(),
+        data["Open"].to_numpy(),
+        0.001,
+        0.0005,
+        trade_price,
+        trade_delay,
+    )
+    expected = _row_wise_records(
+        data, sim, entry, exit_, trade_price, 0.001, 0.0005
+    )
+
+    assert (records["Trade_action"] != 0).sum() > 10
+    actual = canonical_frame(records)[expected.columns]
+    expected = canonical_frame(expected)
+    for column in ("Holding_period", "Trade_return"):
+        actual[column] = actual[column].astype(float)
+        expected[column] = expected[column].astype(float)
+    pd.testing.assert_frame_equal(actual, expected, check_dtype=False)
+    assert list(records.columns[:5]) == ["Time", "Open", "High", "Low", "Close"]
+    assert records["Backtest_id"].eq("").all()
+
+
+def _random_signals(n_time, n_strategies, seed):
+    rng = np.random.default_rng(seed)
+    entry = rng.choice([0.0, 1.0, -1.0], size=(n_time, n_strategies), p=[0.9, 0.05, 0.05])
+    exit_ = rng.choice([0.0, 1.0, -1.0], size=(n_time, n_strategies), p=[0.8, 0.1, 0.1])
+    return entry, exit_
+
+
+@pytest.mark.parametrize("trade_price,trade_delay", [("open", 1), ("close", 0), ("open", 2)])
+def test_parallel_simulation_matches_per_strategy_runs(trade_price, trade_delay):
+    data = make_ohlcv(300, seed=5)
+    entry, exit_ = _random_signals(len(data), 16, seed=11)
+    args = (data["Close"].to_numpy(), data["Open"].to_numpy(), 0.001, 0.0005)
+
+    batch = vectorized_trade_simulation(entry, exit_, *args, trade_price, trade_delay)
+    assert batch["positions"].dtype == np.int8
+    assert batch["trade_actions"].dtype == np.int8
+    for j in range(entry.shape[1]):
+        single = vectorized_trade_simulation(
+            entry[:, j : j + 1], exit_[:, j : j + 1], *args, trade_price, trade_delay
+        )
+        for key in ("positions", "returns", "trade_actions", "equity_values"):
+            np.testing.assert_array_equal(batch[key][:, j], single[key][:, 0])
+        np.testing.assert_array_equal(batch["final_state"][j], single["final_state"][0])
+
+
+def test_float32_results_track_float64():
+    data = make_ohlcv(300, seed=6)
+    entry, exit_ = _random_signals(len(data), 8, seed=12)
+    args = (data["Close"].to_numpy(), data["Open"].to_numpy(), 0.001, 0.0005, "open", 1)
+
+    full = vectorized_trade_simulation(entry, exit_, *args)
+    compact = vectorized_trade_simulation(entry, exit_, *args, result_precision="float32")
+    assert compact["returns"].dtype == np.float32
+    assert compact["equity_values"].dtype == np.float32
+    np.testing.assert_array_equal(compact["positions"], full["positions"])
+    np.testing.assert_array_equal(compact["trade_actions"], full["trade_actions"])
+    np.testing.assert_allclose(compact["equity_values"], full["equity_values"], rtol=1e-6)
+
+    with pytest.raises(ValueError):
+        vectorized_trade_simulation(entry, exit_, *args, result_precision="float16")
@@ -0,0 +1,181 @@
+"""
+VectorBacktestEngine_backtester 測試：批量信號張量、進程池與回測管線行為
+"""
+
+import os
+import subprocess
+import sys
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from backtester.Indicators_backtester import IndicatorsBacktester
+from backtester.MovingAverage_Indicator_backtester import (
+    _calculate_ma_unified,
+    _generate_ma_signals_unified,
+)
+from backtester.VectorBacktestEngine_backtester import VectorBacktestEngine
+from tests.helpers import (
+    assert_same_records,
+    canonical_records,
+    make_backtest_config,
+    result_key,
+)
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+_SIGNAL_CONFIG = [
+    ("MA1", {"ma_type": "SMA", "ma_range": "5:15:5"}),
+    ("MA4", {"ma_type": "EMA", "ma_range": "10:10:1"}),
+    ("MA10", {"ma_type": "WMA", "m_range": "2:3:1", "n_range": "5:10:5"}),
+    ("MA5", {"ma_type": "SMA", "short_range": "3:9:3", "long_range": "10:20:10"}),
+    ("BOLL1", {"ma_range": "10:20:10", "sd_multi": "1,2"}),
+    ("BOLL4", {"ma_range": "20:20:1", "sd_multi": "2"}),
+    ("HL1", {"n_range": "1:2:1", "m_range": "10:10:1"}),
+    ("HL4", {"n_range": "1:1:1", "m_range": "10:10:1"}),
+    ("VALUE1", {"n_range": "2:2:1", "m_range": "0:1:1"}),
+    ("VALUE6", {"m1_range": "-2:-2:1", "m2_range": "2:2:1"}),
+    ("PERC1", {"window_range": "20:20:1", "percentile_range": "60:80:20"}),
+]
+
+
+def _single_indicator_signal(indicators, data, param, predictor):
+    """逐個指標的非批量信號（MA 以單週期核心計算，其他指標走 generate_signals）"""
+    values = data[predictor].to_numpy(dtype=np.float64)
+    if param.indicator_type == "MA":
+        get = param.get_param
+        ma_type = get("ma_type")
+        if get("mode") == "double":
+            long_period = get("longMA_period")
+            return _generate_ma_signals_unified(
+                values,
+                np.zeros_like(values),
+                get("strat_idx"),
+                long_period,
+                _calculate_ma_unified(values, get("shortMA_period"), ma_type),
+                _calculate_ma_unified(values, long_period, ma_type),
+            )
+        period = get("period")
+        return _generate_ma_signals_unified(
+            values,
+            _calculate_ma_unified(values, period, ma_type),
+            get("strat_idx"),
+            period,
+            m=get("m", 2),
+        )
+    signal = indicators.calculate_signals(param.indicator_type, data, param, predictor)
+    if isinstance(signal, pd.DataFrame):
+        signal = signal.iloc[:, 0]
+    return np.nan_to_num(np.asarray(signal, dtype=np.float64), nan=0.0)
+
+
+def test_signal_tensor_matches_single_indicator_signals(ohlcv):
+    indicators = IndicatorsBacktester()
+    params = [
+        param
+        for alias, config in _SIGNAL_CONFIG
+        for param in indicators.get_indicator_params(alias, dict(config))
+    ]
+    engine = VectorBacktestEngine(ohlcv, "1D")
+    tensor = engine._vectorized_generate_signals(
+        [[param] for param in params], ["X"] * len(params)
+    )
+
+    assert tensor.dtype == np.int8
+    assert tensor.shape == (len(ohlcv), len(params), 1)
+    for k, param in enumerate(params):
+        expected = _single_indicator_signal(indicators, ohlcv, param, "X")
+        np.testing.assert_array_equal(
+            tensor[:, k, 0], expected, err_msg=f"{param.indicator_type} {param.params}"
+        )
+    assert np.abs(tensor).sum() > 0
+
+
+def test_package_import_keeps_numba_threading_layer():
+    # 匯入 backtester 不可修改全域 Numba 設定（只影響引擎自己的進程池）
+    code = (
+        "import numba; before = list(numba.config.THREADING_LAYER_PRIORITY); "
+        "import backtester, backtester.VectorBacktestEngine_backtester; "
+        "assert list(numba.config.THREADING_LAYER_PRIORITY) == before"
+    )
+    env = {
+        k: v
+        for k, v in os.environ.items()
+        if k not in ("NUMBA_THREADING_LAYER", "NUMBA_THREADING_LAYER_PRIORITY")
+    }
+    subprocess.run([sys.executable, "-c", code], cwd=REPO_ROOT, env=env, check=True)
+
+
+def test_stream_chunks_carry_inline_metrics(ohlcv):
+    config = make_backtest_config()
+    config["max_memory_mb"] = 0.05
+    chunks = []
+    streamed = VectorBacktestEngine(ohlcv, "1D").run_backtests(
+        config, chunk_callback=chunks.append
+    )
+    assert streamed == []
+    assert len(chunks) > 1
+
+    config = make_backtest_config()
+    config["inline_metrics"] = True
+    expected = {
+        result_key(r): r["metrics"]
+        for r in VectorBacktestEngine(ohlcv, "1D").run_backtests(config)
+        if r.get("metrics") is not None
+    }
+    actual = {
+        result_key(r): r["metrics"]
+        for chunk in chunks
+        for r in chunk
+        if r.get("metrics") is not None
+    }
+    assert expected and actual.keys() == expected.keys()
+    for key, metrics in expected.items():
+        assert actual[key] == pytest.approx(metrics, nan_ok=True)
+
+
+def test_stream_chunks_share_indicator_caches_and_pool(ohlcv, monkeypatch):
+    # 多區塊 x 多批次：指標只計算一次，所有區塊共用一個進程池
+    from backtester import MovingAverage_Indicator_backtester as ma_module
+    from backtester import VectorBacktestEngine_backtester as engine_module
+
+    indicators = IndicatorsBacktester()
+    config = make_backtest_config()
+    config["condition_pairs"] = [{"entry": ["MA1"], "exit": ["MA4"]}]
+    config["indicator_params"] = {
+        "MA1_strategy_1": indicators.get_indicator_params(
+            "MA1", {"ma_type": "SMA", "ma_range": "5:100:1"}
+        ),
+        "MA4_strategy_1": indicators.get_indicator_params(
+            "MA4", {"ma_type": "EMA", "ma_range": "10:12:1"}
+        ),
+    }
+    expected = canonical_records(VectorBacktestEngine(ohlcv, "1D").run_backtests(config))
+
+    computed = []
+    calculate = ma_module._calculate_ma_matrix
+
+    def counting_matrix(values, periods, ma_type):
+        computed.extend((ma_type, p) for p in periods)
+        return calculate(values, periods, ma_type)
+
+    pools = []
+
+    class CountingPool(engine_module.ProcessPoolExecutor):
+        def __init__(self, *args, **kwargs):
+            pools.append(self)
+            super().__init__(*args, **kwargs)
+
+    monkeypatch.setattr(ma_module, "_calculate_ma_matrix", counting_matrix)
+    monkeypatch.setattr(engine_module, "ProcessPoolExecutor", CountingPool)
+    chunks = []
+    engine = VectorBacktestEngine(ohlcv, "1D")
+    engine.run_backtests(dict(config, max_memory_mb=10), chunk_callback=chunks.append)
+
+    assert len(chunks) > 1 and max(len(chunk) for chunk in chunks) > 50
+    assert len(computed) == len(set(computed)) == 96 + 3
+    assert len(pools) == 1 and engine._result_executor is None
+    assert_same_records(
+        expected, canonical_records([r for chunk in chunks for r in chunk])
+    )
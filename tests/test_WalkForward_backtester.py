@@ -0,0 +1,103 @@
+"""
+WalkForward_backtester 測試：窗口切分、矩陣評分與 MetricsCalculator 一致、樣本內選優與資金曲線接續
+"""
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from backtester.ParameterSearch_backtester import SEARCH_OBJECTIVES, ParameterSearch
+from backtester.TradeSimulator_backtester import vectorized_trade_simulation
+from backtester.VectorBacktestEngine_backtester import VectorBacktestEngine
+from backtester.WalkForward_backtester import WalkForward_backtester
+from tests.helpers import make_backtest_config
+
+
+def test_make_folds_rolling_and_anchored():
+    rolling = WalkForward_backtester.make_folds(100, 40, 25)
+    assert [(f["is_start"], f["is_end"], f["oos_end"]) for f in rolling] == [
+        (0, 40, 65),
+        (25, 65, 90),
+        (50, 90, 100),
+    ]
+    anchored = WalkForward_backtester.make_folds(100, 40, 20, step=30, anchored=True)
+    assert [(f["is_start"], f["oos_start"], f["oos_end"]) for f in anchored] == [
+        (0, 40, 60),
+        (0, 70, 90),
+    ]
+    with pytest.raises(ValueError):
+        WalkForward_backtester.make_folds(100, 40, 20, step=10)
+
+
+def _window_simulation(engine, config, start, end):
+    combos = engine.generate_parameter_combinations(config)
+    tasks = engine._generate_all_tasks_matrix(combos, config["predictors"])
+    signals = engine._generate_all_signals_vectorized(tasks, config["condition_pairs"])
+    params = config["trading_params"]
+    return vectorized_trade_simulation(
+        signals["entry_signals"],
+        signals["exit_signals"],
+        engine.data["Close"].to_numpy(),
+        engine.data["Open"].to_numpy(),
+        params["transaction_cost"],
+        params["slippage"],
+        params["trade_price"],
+        params["trade_delay"],
+        start_index=start,
+        end_index=end,
+    )
+
+
+def _reference_scores(sim, objective):
+    scores = []
+    for j in range(sim["returns"].shape[1]):
+        records = pd.DataFrame(
+            {
+                "Return": sim["returns"][:, j],
+                "Equity_value": sim["equity_values"][:, j],
+                "Trade_action": sim["trade_actions"][:, j],
+            }
+        )
+        scores.append(
+            ParameterSearch.score_result(
+                {"records": records, "error": None}, objective, 365, 0.04
+            )
+        )
+    return np.array(scores)
+
+
+@pytest.mark.parametrize("objective", SEARCH_OBJECTIVES)
+def test_score_matrix_matches_metrics_calculator(ohlcv, objective):
+    engine = VectorBacktestEngine(ohlcv, "1D")
+    sim = _window_simulation(engine, make_backtest_config(), 100, 250)
+    scores = WalkForward_backtester.score_matrix(
+        sim["returns"], sim["equity_values"], sim["trade_actions"], objective, 365, 0.04
+    )
+    np.testing.assert_allclose(scores, _reference_scores(sim, objective), rtol=1e-9)
+
+
+def test_walk_forward_picks_in_sample_best_and_stitches_equity(ohlcv):
+    config = make_backtest_config()
+    config["walk_forward"] = {"in_sample": 150, "out_of_sample": 50}
+    engine = VectorBacktestEngine(ohlcv, "1D")
+    summary = engine.run_walk_forward(config)
+
+    folds = WalkForward_backtester.make_folds(len(ohlcv), 150, 50)
+    assert len(summary["folds"]) == len(folds) == 3
+    results = {r["Backtest_id"]: r for r in summary["results"]}
+    equity = summary["oos_equity"]
+    assert equity["Fold"].value_counts().sort_index().tolist() == [50, 50, 50]
+
+    base = 100.0
+    for fold, meta in zip(folds, summary["folds"]):
+        in_sample = _window_simulation(engine, config, fold["is_start"], fold["is_end"])
+        assert meta["In_sample_score"] == pytest.approx(
+            _reference_scores(in_sample, "sharpe").max(), rel=1e-9
+        )
+        records = results[meta["Backtest_id"]]["records"]
+        assert len(records) == fold["oos_end"] - fold["oos_start"]
+        stitched = equity.loc[equity["Fold"] == meta["Fold"], "Equity_value"].to_numpy()
+        np.testing.assert_allclose(
+            stitched, records["Equity_value"].to_numpy() * base / 100.0, rtol=1e-12
+        )
+        base = stitched[-1]